@@ -0,0 +1,212 @@
+"""
+Configuração do banco de dados a partir de variáveis de ambiente.
+
+Por padrão o projeto usa SQLite, adequado para execuções locais. Em produção,
+defina `DB_ENGINE=postgresql` e as variáveis de conexão:
+
+    DB_ENGINE             sqlite (padrão) ou postgresql
+    DB_NAME               Nome do banco (ou caminho do arquivo, no SQLite)
+    DB_USER               Usuário do banco
+    DB_PASSWORD           Senha do usuário
+    DB_HOST               Endereço do servidor (padrão: localhost)
+    DB_PORT               Porta do servidor (padrão: 5432)
+    DB_CONN_MAX_AGE       Segundos que uma conexão é reaproveitada entre
+                          solicitações (padrão: 60; 0 fecha a cada solicitação)
+    DB_CONN_HEALTH_CHECKS Verifica a conexão reaproveitada antes de usá-la
+                          (padrão: true)
+    DB_POOL               Modo com pool de conexões (padrão: false)
+    DB_POOL_MIN_SIZE      Tamanho mínimo do pool (padrão: 2)
+    DB_POOL_MAX_SIZE      Tamanho máximo do pool (padrão: 10)
+    DB_REPLICAS           Réplicas de leitura, separadas por vírgula: os
+                          endereços (host ou host:porta) no PostgreSQL, ou os
+                          caminhos dos arquivos no SQLite
+    DB_SHARDS             Shards dos dados dos titulares, no mesmo formato de
+                          DB_REPLICAS
+"""
+
+import django
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def env_bool(environ, name, default):
+    """
+    Lê uma variável de ambiente booleana.
+
+    Parâmetros:
+        environ: O dicionário de variáveis de ambiente.
+        name: O nome da variável.
+        default: O valor usado quando a variável não foi definida.
+
+    Retorna:
+        bool: O valor da variável.
+    """
+
+    value = environ.get(name)
+    if value is None:
+        return default
+
+    return value.strip().lower() in TRUE_VALUES
+
+
+def database_config(environ, base_dir):
+    """
+    Monta a configuração do banco `default` a partir das variáveis de
+    ambiente.
+
+    As conexões persistentes (`CONN_MAX_AGE`) evitam abrir uma conexão nova
+    a cada solicitação, e `CONN_HEALTH_CHECKS` descarta as conexões que o
+    servidor encerrou enquanto estavam ociosas.
+
+    No modo com pool (`DB_POOL=true`), o Django 5.1 ou superior usa o pool
+    nativo do psycopg 3, que exige `CONN_MAX_AGE=0`. Nas versões anteriores,
+    o pool fica a cargo de um pooler externo, como o PgBouncer, e os cursores
+    do lado do servidor são desativados, pois não funcionam no modo de pool
+    por transação.
+
+    Parâmetros:
+        environ: O dicionário de variáveis de ambiente.
+        base_dir: O diretório base do projeto, usado no caminho do SQLite.
+
+    Retorna:
+        dict: A configuração do banco, no formato de `settings.DATABASES`.
+
+    Raises:
+        ValueError: Se `DB_ENGINE` não for suportado.
+
+    Exemplo de Uso:
+        >>> database_config({}, '/srv')['ENGINE']
+        'django.db.backends.sqlite3'
+    """
+
+    engine = environ.get('DB_ENGINE', 'sqlite').strip().lower()
+    if engine not in ENGINES:
+        raise ValueError(
+            f'Unsupported DB_ENGINE {engine!r}; '
+            f'use one of: {", ".join(ENGINES)}.'
+        )
+
+    config = {
+        'ENGINE': ENGINES[engine],
+        'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': env_bool(environ, 'DB_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {},
+    }
+
+    if engine == 'sqlite':
+        config['NAME'] = environ.get('DB_NAME') or f'{base_dir}/db.sqlite3'
+        return config
+
+    config.update({
+        'NAME': environ.get('DB_NAME', 'finances'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', 'localhost'),
+        'PORT': environ.get('DB_PORT', '5432'),
+    })
+
+    if env_bool(environ, 'DB_POOL', False):
+        if django.VERSION >= (5, 1):
+            config['CONN_MAX_AGE'] = 0
+            config['OPTIONS']['pool'] = {
+                'min_size': int(environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(environ.get('DB_POOL_MAX_SIZE', 10)),
+            }
+        else:
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+    return config
+
+
+def derived_configs(entries, primary, prefix):
+    """
+    Monta configurações de banco derivadas do banco principal, trocando
+    apenas o endereço (PostgreSQL) ou o arquivo (SQLite).
+
+    Parâmetros:
+        entries: Os endereços ou arquivos, separados por vírgula.
+        primary: A configuração do banco principal.
+        prefix: O prefixo dos aliases. Por exemplo, "replica".
+
+    Retorna:
+        dict: As configurações, com os aliases `<prefix>1`, `<prefix>2` etc.
+    """
+
+    entries = [entry.strip() for entry in entries.split(',') if entry.strip()]
+
+    configs = {}
+
+    for number, entry in enumerate(entries, start=1):
+        config = {**primary, 'OPTIONS': dict(primary['OPTIONS'])}
+
+        if primary['ENGINE'] == ENGINES['sqlite']:
+            config['NAME'] = entry
+        else:
+            host, _, port = entry.partition(':')
+            config['HOST'] = host
+            config['PORT'] = port or primary['PORT']
+
+        configs[f'{prefix}{number}'] = config
+
+    return configs
+
+
+def replica_configs(environ, primary):
+    """
+    Monta a configuração das réplicas de leitura listadas em `DB_REPLICAS`.
+
+    Cada réplica herda a configuração do banco principal. Nos testes, as
+    réplicas espelham o banco principal (`TEST['MIRROR']`), pois não há
+    replicação entre os bancos de teste.
+
+    Parâmetros:
+        environ: O dicionário de variáveis de ambiente.
+        primary: A configuração do banco principal.
+
+    Retorna:
+        dict: As configurações das réplicas, com os aliases `replica1`,
+        `replica2` etc.
+
+    Exemplo de Uso:
+        >>> primary = database_config({'DB_ENGINE': 'postgresql'}, '/srv')
+        >>> replicas = replica_configs({'DB_REPLICAS': 'db2:5433'}, primary)
+        >>> replicas['replica1']['HOST'], replicas['replica1']['PORT']
+        ('db2', '5433')
+    """
+
+    replicas = derived_configs(
+        environ.get('DB_REPLICAS', ''), primary, 'replica'
+    )
+
+    for config in replicas.values():
+        config['TEST'] = {'MIRROR': 'default'}
+
+    return replicas
+
+
+def shard_configs(environ, primary):
+    """
+    Monta a configuração dos shards listados em `DB_SHARDS`. Cada shard
+    guarda as contas, transações e orçamentos de parte dos titulares (veja
+    `finances.routers.ShardRouter`).
+
+    Parâmetros:
+        environ: O dicionário de variáveis de ambiente.
+        primary: A configuração do banco principal.
+
+    Retorna:
+        dict: As configurações dos shards, com os aliases `shard1`, `shard2`
+        etc.
+
+    Exemplo de Uso:
+        >>> primary = database_config({}, '/srv')
+        >>> shard_configs({'DB_SHARDS': '/srv/a.db,/srv/b.db'}, primary)['shard2']['NAME']
+        '/srv/b.db'
+    """  # noqa: E501
+
+    return derived_configs(environ.get('DB_SHARDS', ''), primary, 'shard')
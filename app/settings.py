@@ -2,6 +2,8 @@ from pathlib import Path
 from datetime import timedelta
 import os
 
+from app.database import database_config, replica_configs, shard_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,21 +38,83 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'finances.authentication.StatelessJWTAuthentication',
     )
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": False,
     "SIGNING_KEY": os.environ.get('SECRET_KEY_JWT', 'INSECURE'),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "finances.authentication.ClaimsTokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "finances.revocation.RevocableTokenRefreshSerializer"
+    ),
+    "TOKEN_VERIFY_SERIALIZER": (
+        "finances.revocation.RevocableTokenVerifySerializer"
+    ),
+}
+
+# Cache de titulares da autenticação JWT (finances/authentication.py):
+# quantidade máxima de titulares por processo e por quantos segundos uma
+# alteração feita em outro processo pode demorar a ser vista.
+
+USER_CACHE = {
+    'MAX_SIZE': int(os.environ.get('USER_CACHE_MAX_SIZE', 1024)),
+    'TTL_SECONDS': int(os.environ.get('USER_CACHE_TTL_SECONDS', 60)),
+}
+
+# Quantidade máxima de tokens de acesso já validados guardados por processo
+# (finances/authentication.py). Cada token fica no cache até o seu 'exp'.
 
+TOKEN_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_CACHE_MAX_SIZE', 4096)),
 }
 
+# Revogação dos tokens de atualização (finances/revocation.py): capacidade e
+# taxa de falsos positivos do filtro de Bloom de cada processo, e intervalo
+# máximo, em segundos, para que ele receba as revogações dos demais processos.
+
+TOKEN_REVOCATION = {
+    'CAPACITY': int(os.environ.get('TOKEN_REVOCATION_CAPACITY', 100000)),
+    'ERROR_RATE': float(os.environ.get('TOKEN_REVOCATION_ERROR_RATE', 0.001)),
+    'SYNC_SECONDS': float(os.environ.get('TOKEN_REVOCATION_SYNC_SECONDS', 5)),
+}
+
+# Hash das senhas (finances/passwords.py): iterações do PBKDF2 (por padrão, as
+# do Django) e pool em que as views assíncronas de cadastro e login calculam
+# o hash ('thread' ou 'process'), com WORKERS processos ou threads (por
+# padrão, a quantidade de CPUs).
+
+PASSWORD_HASHERS = [
+    'finances.passwords.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+PASSWORD_HASHING = {
+    'ITERATIONS': (
+        int(os.environ.get('PASSWORD_HASHING_ITERATIONS', 0)) or None
+    ),
+    'EXECUTOR': os.environ.get('PASSWORD_HASHING_EXECUTOR', 'thread'),
+    'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', 0)) or None,
+}
+
+# Tempo de vida das respostas armazenadas para o cabeçalho Idempotency-Key.
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'finances.middleware.GZipThresholdMiddleware',
+    'finances.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +123,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Compressão gzip das respostas. Apenas as views com `gzip_response = True`
+# são comprimidas, a menos que ALL_VIEWS esteja ativo. Corpos menores que
+# MIN_LENGTH bytes são enviados sem compressão.
+
+GZIP_RESPONSE = {
+    'MIN_LENGTH': int(os.environ.get('GZIP_MIN_LENGTH', 1024)),
+    'COMPRESS_LEVEL': int(os.environ.get('GZIP_COMPRESS_LEVEL', 6)),
+    'ALL_VIEWS': False,
+}
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -83,11 +157,129 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# SQLite por padrão; veja app/database.py para as variáveis de ambiente que
+# configuram o PostgreSQL, as conexões persistentes e o pool de conexões.
+
 DATABASES = {
+    'default': database_config(os.environ, BASE_DIR),
+}
+
+# Réplicas de leitura (DB_REPLICAS). As leituras das views vão para as
+# réplicas, exceto por REPLICA_PIN_SECONDS segundos após uma escrita do mesmo
+# usuário, para que ele veja as próprias alterações.
+#
+# Shards (DB_SHARDS). As contas, transações e orçamentos de cada titular
+# ficam em um shard; categorias e usuários são replicados em todos eles.
+
+replicas = replica_configs(os.environ, DATABASES['default'])
+shards = shard_configs(os.environ, DATABASES['default'])
+
+DATABASES.update(replicas)
+DATABASES.update(shards)
+
+DATABASE_REPLICAS = list(replicas)
+
+DATABASE_SHARDS = list(shards)
+
+DATABASE_ROUTERS = [
+    'finances.routers.ShardRouter',
+    'finances.routers.ReplicaRouter',
+]
+
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+
+# Cache do Django. Por padrão, um cache em memória de cada processo; com
+# vários processos, configure um cache compartilhado, por exemplo
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e
+# CACHE_LOCATION=redis://localhost:6379, para que a invalidação das
+# agregações, a fixação no banco principal e a revogação dos tokens valham
+# em todos eles.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+}
+
+# Meses encerrados há mais que este número de meses podem ser arquivados pelo
+# comando archive_transactions.
+
+TRANSACTION_ARCHIVE_AFTER_MONTHS = int(
+    os.environ.get('TRANSACTION_ARCHIVE_AFTER_MONTHS', 13)
+)
+
+# Quantidade de lançamentos do livro-razão entre dois registros de saldo de
+# uma conta; limita os lançamentos somados ao calcular o saldo em uma data.
+
+LEDGER_SNAPSHOT_INTERVAL = int(os.environ.get('LEDGER_SNAPSHOT_INTERVAL', 50))
+
+# Segundos que uma alteração aguarda antes de ser entregue por /api/changes/,
+# para que alterações de transações ainda não confirmadas, com IDs menores,
+# não fiquem para trás do cursor dos clientes.
+
+CHANGE_FEED_SETTLE_SECONDS = float(
+    os.environ.get('CHANGE_FEED_SETTLE_SECONDS', 1)
+)
+
+# Caixa de saída (finances/outbox.py): URLs dos webhooks notificados pelo
+# comando dispatch_outbox sobre as alterações de transações e orçamentos,
+# separadas por vírgula em OUTBOX_WEBHOOK_URLS. Sem URLs, nenhum evento é
+# gravado.
+
+OUTBOX = {
+    'WEBHOOK_URLS': [
+        url.strip()
+        for url in os.environ.get('OUTBOX_WEBHOOK_URLS', '').split(',')
+        if url.strip()
+    ],
+    'TIMEOUT': float(os.environ.get('OUTBOX_TIMEOUT', 5)),
+    'CONCURRENCY': int(os.environ.get('OUTBOX_CONCURRENCY', 8)),
+    'MAX_ATTEMPTS': int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8)),
+    'BACKOFF_SECONDS': 2,
+    'MAX_BACKOFF_SECONDS': 600,
+}
+
+# Alertas de orçamento (finances/alerts.py): percentuais do valor do
+# orçamento que geram um alerta em /api/alerts/stream/ ao serem ultrapassados
+# pelo gasto, separados por vírgula em BUDGET_ALERT_THRESHOLDS.
+
+BUDGET_ALERTS = {
+    'THRESHOLDS': [
+        int(threshold)
+        for threshold in os.environ.get(
+            'BUDGET_ALERT_THRESHOLDS', '50,80,100'
+        ).split(',')
+        if threshold.strip()
+    ],
+    'POLL_SECONDS': float(os.environ.get('BUDGET_ALERT_POLL_SECONDS', 1)),
+    'HEARTBEAT_SECONDS': 15,
+    'REPLAY_LIMIT': 100,
+}
+
+# Segundos que uma agregação de um titular (finances/aggregates.py), como o
+# painel de /api/dashboard/, fica no cache. A agregação é calculada novamente
+# assim que os dados do titular mudam. Com o cache em memória de cada
+# processo, a alteração só é vista pelo processo que a fez, e as agregações
+# ficam no cache por, no máximo, AGGREGATE_LOCAL_CACHE_SECONDS.
+
+AGGREGATE_CACHE_SECONDS = int(os.environ.get('AGGREGATE_CACHE_SECONDS', 3600))
+
+AGGREGATE_LOCAL_CACHE_SECONDS = int(
+    os.environ.get('AGGREGATE_LOCAL_CACHE_SECONDS', 300)
+)
+
+# Agrupamento das leituras caras simultâneas (finances/singleflight.py): prazo
+# da trava no cache, espera máxima pelo resultado de outra solicitação e
+# intervalo entre as consultas ao cache durante a espera, em segundos.
+
+SINGLE_FLIGHT = {
+    'LEASE_SECONDS': int(os.environ.get('SINGLE_FLIGHT_LEASE_SECONDS', 10)),
+    'WAIT_SECONDS': float(os.environ.get('SINGLE_FLIGHT_WAIT_SECONDS', 10)),
+    'POLL_SECONDS': float(os.environ.get('SINGLE_FLIGHT_POLL_SECONDS', 0.02)),
 }
 
 
@@ -0,0 +1,22 @@
+"""
+Benchmarks de desempenho da API.
+
+Cada módulo pode ser executado a partir da raiz do projeto, por exemplo:
+
+    python -m benchmarks.bench_compression
+"""
+
+import os
+
+
+def setup():
+    """
+    Configura o Django para que os benchmarks possam usar os modelos,
+    serializers e views do projeto fora do `manage.py`.
+    """
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+    import django
+
+    django.setup()
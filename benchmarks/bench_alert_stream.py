@@ -0,0 +1,122 @@
+"""
+Mede o custo das conexões ociosas do fluxo de alertas de orçamento
+(`finances.alerts.stream`) em um único loop de eventos: a memória por
+conexão aberta e o tempo para entregar um alerta a todas as conexões de um
+titular, sobre um banco SQLite temporário.
+
+Uso:
+    python -m benchmarks.bench_alert_stream [--connections 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks import setup
+
+
+def prepare_database(path, owners):
+    """
+    Cria o banco com `owners` titulares e retorna os seus IDs.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+    User.objects.bulk_create(
+        User(username=f'bench-alert-{number}') for number in range(owners)
+    )
+
+    return list(User.objects.values_list('pk', flat=True))
+
+
+async def run(owner_ids, connections):
+    from asgiref.sync import sync_to_async
+    from finances.alerts import broker, stream
+    from finances.models import BudgetAlert
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    streams = []
+    for number in range(connections):
+        events = stream(owner_ids[number % len(owner_ids)])
+        await events.__anext__()
+        streams.append(events)
+
+    readers = [
+        asyncio.ensure_future(events.__anext__()) for events in streams
+    ]
+    await asyncio.sleep(0.1)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    owner_id = owner_ids[0]
+    receivers = [
+        reader
+        for number, reader in enumerate(readers)
+        if owner_ids[number % len(owner_ids)] == owner_id
+    ]
+
+    await sync_to_async(BudgetAlert.objects.create)(
+        owner_id=owner_id,
+        budget_id=1,
+        threshold=80,
+        spent=800,
+        amount=1000
+    )
+    started = time.perf_counter()
+    await broker.poll()
+    await asyncio.gather(*receivers)
+    delivery = (time.perf_counter() - started) * 1000
+
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    for events in streams:
+        await events.aclose()
+
+    return memory, delivery, len(receivers)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--owners', type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    os.environ['CHANGE_FEED_SETTLE_SECONDS'] = '0'
+    setup()
+
+    with tempfile.TemporaryDirectory() as directory:
+        owner_ids = prepare_database(
+            str(Path(directory) / 'bench.sqlite3'),
+            args.owners
+        )
+        memory, delivery, receivers = asyncio.run(
+            run(owner_ids, args.connections)
+        )
+
+    print(f'conexões abertas:         {args.connections}')
+    print(
+        f'memória por conexão:      '
+        f'{memory / args.connections / 1024:.1f} KB'
+    )
+    print(
+        f'entrega a {receivers} conexão(ões) do titular: {delivery:.1f} ms'
+    )
+
+
+if __name__ == '__main__':
+    main()
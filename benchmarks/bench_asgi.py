@@ -0,0 +1,227 @@
+"""
+Compara as views síncronas (Django REST Framework) com as versões
+assíncronas sob ASGI, com muitas solicitações simultâneas de clientes lentos.
+
+O benchmark executa a aplicação ASGI do projeto no mesmo processo, sobre um
+banco SQLite temporário, e injeta uma latência fixa em cada consulta para
+simular um banco de dados remoto. Os clientes lentos são simulados com uma
+espera a cada bloco da resposta enviado.
+
+Para reproduzir com um servidor ASGI real, sirva `app.asgi:application` (por
+exemplo, com `uvicorn app.asgi:application`) e aponte uma ferramenta de carga
+para os mesmos endpoints.
+
+Uso:
+    python -m benchmarks.bench_asgi [--clients 200] [--query-latency 0.005]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks import setup
+
+ENDPOINTS = (
+    ('/api/budgets/', '/api/async/budgets/'),
+    ('/api/budget/{budget}/', '/api/async/budget/{budget}/'),
+    ('/api/account/{account}/', '/api/async/account/{account}/'),
+)
+
+
+def prepare_database(path):
+    """
+    Cria o banco temporário com um administrador, uma conta, transações e
+    orçamentos, e retorna os IDs e o token usados nas solicitações.
+    """
+
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = path
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from finances.models import Account, Budget, Category, Transaction
+
+    call_command('migrate', verbosity=0)
+
+    admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+    account = Account.objects.create(owner=admin, name='Conta', balance=10**6)
+    categories = Category.objects.bulk_create(
+        Category(name=f'Categoria {number}') for number in range(10)
+    )
+    Transaction.objects.bulk_create(
+        Transaction(
+            account=account,
+            category=categories[number % 10],
+            amount=10,
+            description=f'Transação {number}'
+        )
+        for number in range(100)
+    )
+    budgets = Budget.objects.bulk_create(
+        Budget(
+            account=account,
+            category=category,
+            amount=1000,
+            start_date='2023-01-01',
+            end_date='2023-12-31'
+        )
+        for category in categories
+    )
+
+    return {
+        'account': account.pk,
+        'budget': budgets[0].pk,
+        'token': str(AccessToken.for_user(admin)),
+    }
+
+
+def inject_query_latency(seconds):
+    """
+    Adiciona uma espera a cada consulta executada, simulando a latência de
+    rede de um banco de dados remoto.
+    """
+
+    from django.db.backends import utils
+
+    execute = utils.CursorWrapper._execute
+
+    def slow_execute(self, *args, **kwargs):
+        time.sleep(seconds)
+        return execute(self, *args, **kwargs)
+
+    utils.CursorWrapper._execute = slow_execute
+
+
+async def call(application, path, token, client_delay):
+    """
+    Executa uma solicitação GET na aplicação ASGI e retorna a latência.
+    """
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'authorization', f'Bearer {token}'.encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    status = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            await asyncio.Event().wait()
+        requested = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body':
+            await asyncio.sleep(client_delay)
+
+    start = time.perf_counter()
+    await application(scope, receive, send)
+    elapsed = time.perf_counter() - start
+
+    assert status == [200], (path, status)
+
+    return elapsed
+
+
+async def run(application, path, token, clients, client_delay):
+    """
+    Dispara `clients` solicitações simultâneas e retorna as latências, o
+    tempo total e o maior número de threads observado.
+    """
+
+    peak_threads = threading.active_count()
+    done = asyncio.Event()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.001)
+
+    sampler = asyncio.create_task(sample_threads())
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(
+        call(application, path, token, client_delay)
+        for _ in range(clients)
+    ))
+    total = time.perf_counter() - start
+
+    done.set()
+    await sampler
+
+    return sorted(latencies), total, peak_threads
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--query-latency', type=float, default=0.005)
+    parser.add_argument('--client-delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    setup()
+
+    with tempfile.TemporaryDirectory() as directory:
+        ids = prepare_database(str(Path(directory) / 'bench.sqlite3'))
+        inject_query_latency(args.query_latency)
+
+        from django.core.asgi import get_asgi_application
+
+        application = get_asgi_application()
+
+        print(
+            f'{args.clients} clientes simultâneos, '
+            f'{args.query_latency * 1000:.0f} ms por consulta, '
+            f'{args.client_delay * 1000:.0f} ms por bloco enviado\n'
+        )
+        print(
+            f'{"endpoint":<32} {"req/s":>7} {"p50 ms":>8} {"p99 ms":>8} '
+            f'{"threads":>8}'
+        )
+
+        for endpoints in ENDPOINTS:
+            for template in endpoints:
+                path = template.format(**ids)
+                latencies, total, threads = asyncio.run(run(
+                    application,
+                    path,
+                    ids['token'],
+                    args.clients,
+                    args.client_delay
+                ))
+                print(
+                    f'{path:<32} {args.clients / total:>7.0f} '
+                    f'{percentile(latencies, 0.5) * 1000:>8.1f} '
+                    f'{percentile(latencies, 0.99) * 1000:>8.1f} '
+                    f'{threads:>8}'
+                )
+
+
+if __name__ == '__main__':
+    main()
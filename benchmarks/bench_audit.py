@@ -0,0 +1,139 @@
+"""
+Mede a vazão e o pico de memória da auditoria de `finances.audit` sobre
+bancos SQLite temporários com quantidades crescentes de transações.
+
+O pico de memória (medido com tracemalloc, com um processo) deve ficar
+estável à medida que o volume cresce, pois a auditoria
+lê os registros em páginas.
+
+Uso:
+    python -m benchmarks.bench_audit [--rows 100000 400000] [--workers 4]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks import setup
+
+ACCOUNTS = 2000
+
+
+def prepare_database(path, rows):
+    """
+    Cria o banco com `ACCOUNTS` contas, um orçamento por conta e `rows`
+    transações distribuídas entre as contas.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+    from finances.models import Account, Budget, Category
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+    owner = User.objects.create_user('bench-audit', password='pw')
+    category = Category.objects.create(name='Mercado')
+    Account.objects.bulk_create(
+        Account(owner=owner, name=f'Conta {number}', balance=10**7)
+        for number in range(ACCOUNTS)
+    )
+    account_ids = list(Account.objects.values_list('pk', flat=True))
+    Budget.objects.bulk_create(
+        Budget(
+            account_id=account_id,
+            category=category,
+            amount=1000,
+            start_date='2024-01-01',
+            end_date='2024-06-30'
+        )
+        for account_id in account_ids
+    )
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    generator = random.Random(42)
+
+    with connections['default'].cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO finances_transaction (account_id, category_id, '
+            'amount, date, description, version) '
+            'VALUES (%s, %s, %s, %s, %s, 1)',
+            [
+                (
+                    generator.choice(account_ids),
+                    category.pk,
+                    '1.50',
+                    (start + timedelta(minutes=number)).isoformat(' '),
+                    'Compra',
+                )
+                for number in range(rows)
+            ]
+        )
+
+
+def measure(workers):
+    """
+    Executa a auditoria e retorna a duração. Com um processo, executa-a
+    novamente com o tracemalloc, que torna a execução mais lenta, para medir
+    o pico de memória.
+    """
+
+    from finances.audit import audit
+
+    started = time.perf_counter()
+    audit(workers=workers)
+    elapsed = time.perf_counter() - started
+
+    if workers > 1:
+        return elapsed, None
+
+    tracemalloc.start()
+    audit(workers=workers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--rows',
+        type=int,
+        nargs='+',
+        default=[100_000, 400_000]
+    )
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    setup()
+
+    print(
+        f'{"transações":>11} {"processos":>10} {"segundos":>9} '
+        f'{"linhas/s":>10} {"pico (MB)":>10}'
+    )
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as directory:
+            prepare_database(str(Path(directory) / 'bench.sqlite3'), rows)
+
+            for workers in (1, args.workers):
+                elapsed, peak = measure(workers)
+                peak = '-' if peak is None else f'{peak / 2**20:.1f}'
+                print(
+                    f'{rows:>11} {workers:>10} {elapsed:>9.2f} '
+                    f'{rows / elapsed:>10.0f} {peak:>10}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Mede o custo da autenticação JWT por solicitação, sobre um banco SQLite
+temporário, com a mesma solicitação autenticada repetidas vezes:
+
+- `JWTAuthentication`: valida a assinatura e consulta o titular no banco;
+- sem o cache de tokens: valida a assinatura e lê o titular do cache;
+- com o cache de tokens: lê o token validado e o titular dos caches.
+
+Uso:
+    python -m benchmarks.bench_auth [--requests 20000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup
+
+
+def prepare_database(path):
+    """
+    Cria o banco com um titular e retorna um token de acesso dele, obtido
+    por `/api/token/`.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+    from finances.authentication import ClaimsTokenObtainPairSerializer
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+    user = User.objects.create_user(username='bench-auth', password='bench')
+
+    return str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+
+
+def measure(authenticator, request, requests, reset=None):
+    """
+    Retorna o tempo médio, em microssegundos, de `authenticate` na
+    solicitação.
+    """
+
+    authenticator.authenticate(request)
+
+    elapsed = 0
+    for _ in range(requests):
+        if reset is not None:
+            reset()
+        started = time.perf_counter()
+        authenticator.authenticate(request)
+        elapsed += time.perf_counter() - started
+
+    return elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    setup()
+
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from finances.authentication import StatelessJWTAuthentication, get_cache
+
+    with tempfile.TemporaryDirectory() as directory:
+        token = prepare_database(str(Path(directory) / 'bench.sqlite3'))
+        request = APIRequestFactory().get(
+            '/api/categories/',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+        results = {
+            'JWTAuthentication (banco)': measure(
+                JWTAuthentication(),
+                request,
+                args.requests
+            ),
+            'sem o cache de tokens': measure(
+                StatelessJWTAuthentication(),
+                request,
+                args.requests,
+                reset=get_cache('TOKEN_CACHE').clear
+            ),
+            'com o cache de tokens': measure(
+                StatelessJWTAuthentication(),
+                request,
+                args.requests
+            ),
+        }
+
+    print(f'solicitações: {args.requests}')
+    for name, elapsed in results.items():
+        print(f'{name:<28} {elapsed:>8.1f} µs/solicitação')
+
+
+if __name__ == '__main__':
+    main()
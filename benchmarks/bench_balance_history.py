@@ -0,0 +1,150 @@
+"""
+Mede a duração do cálculo da série de saldos diários de
+`finances.ledger.daily_balances` sobre um banco SQLite temporário com o
+livro-razão de uma conta ao longo de vários anos.
+
+Uso:
+    python -m benchmarks.bench_balance_history [--years 5] [--per-day 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+from benchmarks import setup
+
+REPEAT = 20
+
+
+def prepare_database(path, years, per_day):
+    """
+    Cria o banco com uma conta e `per_day` lançamentos por dia durante
+    `years` anos, com as somas diárias e os registros de saldo que
+    `record_entry` gravaria.
+
+    Retorna:
+        tuple: A conta e o primeiro e o último dia do histórico.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+    from django.utils import timezone as django_timezone
+    from finances.ledger import snapshot_interval
+    from finances.models import (
+        Account, BalanceSnapshot, LedgerDay, LedgerEntry
+    )
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+    owner = User.objects.create_user('bench-history', password='pw')
+    account = Account.objects.create(owner=owner, name='Corrente', balance=0)
+    LedgerEntry.objects.filter(account=account).delete()
+    LedgerDay.objects.filter(account=account).delete()
+
+    first = date(2020, 1, 1)
+    days = years * 365
+    interval = snapshot_interval()
+    generator = random.Random(42)
+    entries = []
+    snapshots = []
+    days_delta = defaultdict(int)
+    balance = 0
+
+    for number in range(days * per_day):
+        created_at = datetime(
+            first.year, first.month, first.day, tzinfo=timezone.utc
+        ) + timedelta(seconds=number * 86400 // per_day)
+        delta = generator.randint(-5000, 5000) / 100
+        balance += delta
+        days_delta[django_timezone.localdate(created_at)] += delta
+        sequence = number + 1
+
+        entries.append(LedgerEntry(
+            account=account,
+            sequence=sequence,
+            kind=LedgerEntry.TRANSACTION,
+            delta=delta,
+            created_at=created_at
+        ))
+        if sequence % interval == 0:
+            snapshots.append(BalanceSnapshot(
+                account=account,
+                sequence=sequence,
+                balance=round(balance, 2),
+                created_at=created_at
+            ))
+
+    LedgerEntry.objects.bulk_create(entries, batch_size=5000)
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=5000)
+    LedgerDay.objects.bulk_create(
+        LedgerDay(account=account, day=day, delta=round(delta, 2))
+        for day, delta in days_delta.items()
+    )
+
+    return account, first, first + timedelta(days=days - 1)
+
+
+def measure(account, start, end, points):
+    """
+    Calcula a série `REPEAT` vezes e retorna a mediana e o maior tempo, em
+    milissegundos.
+    """
+
+    from finances.ledger import daily_balances
+
+    durations = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        daily_balances(account, start, end, points)
+        durations.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(durations), max(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--per-day', type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    setup()
+
+    with tempfile.TemporaryDirectory() as directory:
+        account, first, last = prepare_database(
+            str(Path(directory) / 'bench.sqlite3'),
+            args.years,
+            args.per_day
+        )
+
+        print(
+            f'{"intervalo":>10} {"pontos":>7} {"mediana (ms)":>13} '
+            f'{"máximo (ms)":>12}'
+        )
+
+        for days, points in (
+            (30, None),
+            (365, None),
+            (args.years * 365, None),
+            (args.years * 365, 200),
+        ):
+            start = max(first, last - timedelta(days=days - 1))
+            median, worst = measure(account, start, last, points)
+            print(
+                f'{days:>9}d {points or "-":>7} {median:>13.1f} '
+                f'{worst:>12.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Mede o custo de CPU da compressão gzip contra os bytes economizados nas
+listagens típicas da API (transações serializadas com o
+TransactionSerializer).
+
+Uso:
+    python -m benchmarks.bench_compression
+"""
+
+import gzip
+import timeit
+from decimal import Decimal
+
+from benchmarks import setup
+
+PAYLOAD_SIZES = (5, 50, 500, 5000)
+LEVELS = (1, 6, 9)
+
+
+def build_payload(size):
+    """
+    Monta o corpo JSON de uma listagem de transações com `size` itens, no
+    mesmo formato retornado por GET /api/transactions/.
+    """
+
+    from rest_framework.renderers import JSONRenderer
+    from finances.models import Transaction
+    from finances.serializers import TransactionSerializer
+
+    descriptions = (
+        'Compra em supermercado',
+        'Pagamento de aluguel',
+        'Conta de energia elétrica',
+        'Mensalidade da academia',
+        'Farmácia',
+    )
+    transactions = [
+        Transaction(
+            id=number + 1,
+            account_id=number % 7 + 1,
+            category_id=number % 12 + 1,
+            amount=Decimal('10.00') + number % 997,
+            description=descriptions[number % len(descriptions)],
+        )
+        for number in range(size)
+    ]
+
+    data = TransactionSerializer(transactions, many=True).data
+    return JSONRenderer().render(data)
+
+
+def main():
+    setup()
+
+    print(
+        f'{"itens":>6} {"bytes":>9} {"nível":>5} {"gzip":>8} '
+        f'{"razão":>6} {"µs/resp":>9} {"MB/s":>7}'
+    )
+
+    for size in PAYLOAD_SIZES:
+        body = build_payload(size)
+
+        for level in LEVELS:
+            compressed = gzip.compress(body, compresslevel=level, mtime=0)
+            repeat = max(3, 20000 // size)
+            elapsed = min(timeit.repeat(
+                lambda: gzip.compress(body, compresslevel=level, mtime=0),
+                number=repeat,
+                repeat=3,
+            )) / repeat
+
+            print(
+                f'{size:>6} {len(body):>9} {level:>5} {len(compressed):>8} '
+                f'{len(compressed) / len(body):>6.2f} {elapsed * 1e6:>9.1f} '
+                f'{len(body) / elapsed / 1e6:>7.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Mede o custo de abrir uma conexão com o banco a cada solicitação
+(`CONN_MAX_AGE=0`) contra o reaproveitamento de conexões persistentes.
+
+As solicitações passam pelo WSGIHandler do projeto, que dispara os sinais
+`request_started` e `request_finished` e, portanto, fecha ou reaproveita as
+conexões exatamente como em produção.
+
+Com o SQLite padrão, o benchmark cria um banco temporário. Com
+`DB_ENGINE=postgresql`, ele usa o banco configurado nas variáveis de ambiente
+(use um banco descartável, pois as migrações são aplicadas e dados de teste
+são criados). A opção `--connect-latency` simula o custo de estabelecer uma
+conexão com um servidor remoto (rede, TLS e autenticação), que não existe no
+SQLite.
+
+Uso:
+    python -m benchmarks.bench_connections [--requests 2000]
+        [--connect-latency 0.005]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup
+
+
+def prepare_database():
+    """
+    Aplica as migrações e cria um usuário e algumas categorias. Retorna o
+    token usado nas solicitações.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from finances.models import Category
+
+    call_command('migrate', verbosity=0)
+
+    user, _ = User.objects.get_or_create(username='bench-connections')
+    Category.objects.bulk_create(
+        Category(name=f'Categoria {number}') for number in range(10)
+    )
+
+    return str(AccessToken.for_user(user))
+
+
+def inject_connect_latency(seconds):
+    """
+    Adiciona uma espera a cada conexão aberta com o banco.
+    """
+
+    from django.db import connections
+
+    backend = type(connections['default'])
+    get_new_connection = backend.get_new_connection
+
+    def slow_get_new_connection(self, *args, **kwargs):
+        time.sleep(seconds)
+        return get_new_connection(self, *args, **kwargs)
+
+    backend.get_new_connection = slow_get_new_connection
+
+
+def run(handler, token, requests, conn_max_age):
+    """
+    Executa as solicitações com o `CONN_MAX_AGE` informado e retorna o tempo
+    médio por solicitação e a quantidade de conexões abertas.
+    """
+
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count)
+
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': '/api/categories/',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+    }
+
+    def start_response(status, headers):
+        assert status.startswith('200'), status
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = handler(dict(environ), start_response)
+        b''.join(response)
+        response.close()
+    elapsed = time.perf_counter() - start
+
+    connection_created.disconnect(count)
+    connection.close()
+
+    return elapsed / requests, len(opened)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--connect-latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if os.environ.get('DB_ENGINE', 'sqlite') == 'sqlite':
+            os.environ['DB_NAME'] = str(Path(directory) / 'bench.sqlite3')
+
+        setup()
+
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.db import connection
+
+        token = prepare_database()
+        if args.connect_latency:
+            inject_connect_latency(args.connect_latency)
+
+        handler = WSGIHandler()
+
+        print(
+            f'{connection.vendor}, {args.requests} solicitações, latência de '
+            f'conexão simulada de {args.connect_latency * 1000:.1f} ms'
+        )
+        print(f'{"CONN_MAX_AGE":>12} {"conexões":>9} {"ms/sol":>8}')
+
+        for conn_max_age in (0, 60):
+            per_request, opened = run(
+                handler, token, args.requests, conn_max_age
+            )
+            print(
+                f'{conn_max_age:>12} {opened:>9} {per_request * 1000:>8.3f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
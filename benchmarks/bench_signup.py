@@ -0,0 +1,152 @@
+"""
+Mede quantos cadastros de titulares por segundo cada núcleo suporta, com o
+custo do hash da senha configurado:
+
+- o hash de uma senha (`hash_password`);
+- o caminho anterior do cadastro, que calculava o hash duas vezes;
+- o cadastro completo por `OwnerSerializer`, sobre um banco SQLite
+  temporário;
+- os hashes simultâneos calculados nos pools de threads e de processos de
+  `finances.passwords`, com um trabalhador por núcleo.
+
+Uso:
+    python -m benchmarks.bench_signup [--signups 50] [--iterations N]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import setup
+
+
+def prepare_database(path):
+    """
+    Cria as tabelas no banco temporário.
+    """
+
+    from django.core.management import call_command
+    from django.db import connections
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+
+def measure(function, signups):
+    """
+    Retorna quantas chamadas de `function` por segundo foram feitas em
+    sequência.
+    """
+
+    function(0)
+
+    started = time.perf_counter()
+    for number in range(1, signups + 1):
+        function(number)
+
+    return signups / (time.perf_counter() - started)
+
+
+def measure_pool(executor, signups, workers):
+    """
+    Retorna quantos hashes por segundo foram calculados com `signups`
+    solicitações simultâneas no pool informado.
+    """
+
+    from django.test import override_settings
+    from finances import passwords
+
+    async def run():
+        await asyncio.gather(*[
+            passwords.ahash_password(f'password{number}')
+            for number in range(signups)
+        ])
+
+    config = {
+        **passwords.get_config(),
+        'EXECUTOR': executor,
+        'WORKERS': workers,
+    }
+
+    with override_settings(PASSWORD_HASHING=config):
+        asyncio.run(run())
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+
+        passwords.get_executor().shutdown()
+
+    return signups / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--signups', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=None)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    if args.iterations:
+        os.environ['PASSWORD_HASHING_ITERATIONS'] = str(args.iterations)
+    setup()
+
+    from django.contrib.auth.hashers import get_hasher, make_password
+    from finances.passwords import hash_password
+    from finances.serializers import OwnerSerializer
+
+    cores = os.cpu_count()
+
+    def signup(number):
+        serializer = OwnerSerializer(data={
+            'username': f'bench-signup-{number}',
+            'first_name': 'Bench',
+            'last_name': 'Signup',
+            'email': f'bench-{number}@example.com',
+            'password': 'bench-password',
+        })
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+    with tempfile.TemporaryDirectory() as directory:
+        prepare_database(str(Path(directory) / 'bench.sqlite3'))
+
+        results = {
+            'hash_password': measure(
+                lambda number: hash_password('bench-password'),
+                args.signups
+            ),
+            'hash duplo (anterior)': measure(
+                lambda number: make_password(make_password('bench-password')),
+                args.signups
+            ),
+            'cadastro (OwnerSerializer)': measure(signup, args.signups),
+        }
+
+    pools = {
+        f'pool de threads ({cores})': measure_pool(
+            'thread', args.signups, cores
+        ),
+        f'pool de processos ({cores})': measure_pool(
+            'process', args.signups, cores
+        ),
+    }
+
+    print(f'iterações: {get_hasher().iterations}')
+    print(f'núcleos: {cores}')
+    for name, rate in results.items():
+        print(f'{name:<30} {rate:>8.1f} cadastros/s/núcleo')
+    for name, rate in pools.items():
+        print(
+            f'{name:<30} {rate:>8.1f} cadastros/s '
+            f'({rate / cores:.1f}/núcleo)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Mede a vazão de escritas simultâneas em POST /api/transactions/ sobre
+SQLite, com e sem o perfil de desempenho de `finances.database` (WAL,
+pragmas e novas tentativas em caso de banco bloqueado).
+
+Cada modo usa um banco temporário próprio, pois o modo WAL fica gravado no
+arquivo. As solicitações passam pelo WSGIHandler do projeto, a partir de
+várias threads, como em um servidor WSGI com threads.
+
+Uso:
+    python -m benchmarks.bench_sqlite_writes [--threads 8] [--seconds 5]
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks import setup
+
+MODES = (
+    ('padrão', {}, {'ATTEMPTS': 1}),
+    ('perfil', None, None),
+)
+
+
+def prepare_database(path):
+    """
+    Cria o banco com um titular, uma conta e uma categoria sem orçamento, e
+    retorna o corpo e o token usados nas solicitações.
+    """
+
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connections
+    from rest_framework_simplejwt.tokens import AccessToken
+    from finances.models import Account, Category
+
+    connections.close_all()
+    connections['default'].settings_dict['NAME'] = path
+
+    call_command('migrate', verbosity=0)
+
+    owner = User.objects.create_user('bench-writes', password='pw')
+    account = Account.objects.create(owner=owner, name='Conta', balance=10**7)
+    category = Category.objects.create(name='Mercado')
+
+    body = json.dumps({
+        'amount': '1.00',
+        'description': 'Compra',
+        'account': account.pk,
+        'category': category.pk,
+    }).encode()
+
+    return body, str(AccessToken.for_user(owner))
+
+
+def worker(handler, body, token, deadline, results):
+    """
+    Envia solicitações POST até o prazo e registra os status recebidos.
+    """
+
+    from django.db import connections
+
+    def start_response(status, headers):
+        results.append(int(status.split()[0]))
+
+    while time.perf_counter() < deadline:
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': '/api/transactions/',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+        }
+        response = handler(environ, start_response)
+        b''.join(response)
+        response.close()
+
+    connections.close_all()
+
+
+def run(handler, body, token, threads, seconds):
+    """
+    Executa as threads de escrita e retorna os status recebidos.
+    """
+
+    results = []
+    deadline = time.perf_counter() + seconds
+
+    pool = [
+        threading.Thread(
+            target=worker,
+            args=(handler, body, token, deadline, results)
+        )
+        for _ in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.environ['DB_ENGINE'] = 'sqlite'
+    setup()
+
+    import logging
+
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+
+    logging.disable(logging.CRITICAL)
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['localhost']
+
+    handler = WSGIHandler()
+
+    print(f'{args.threads} threads, {args.seconds:.0f} s por modo')
+    print(f'{"modo":>7} {"criadas":>8} {"erros":>6} {"escritas/s":>11}')
+
+    for name, pragmas, retry in MODES:
+        with tempfile.TemporaryDirectory() as directory:
+            if pragmas is not None:
+                settings.SQLITE_PRAGMAS = pragmas
+                settings.DB_LOCK_RETRY = retry
+            else:
+                del settings.SQLITE_PRAGMAS
+                del settings.DB_LOCK_RETRY
+
+            body, token = prepare_database(
+                str(Path(directory) / 'bench.sqlite3')
+            )
+            results = run(handler, body, token, args.threads, args.seconds)
+
+            created = results.count(201)
+            print(
+                f'{name:>7} {created:>8} {len(results) - created:>6} '
+                f'{created / args.seconds:>11.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
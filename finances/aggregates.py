@@ -0,0 +1,368 @@
+"""
+Cache das agregações por titular, como o total gasto por categoria e o
+patrimônio líquido.
+
+Cada agregação é guardada no cache do Django com a chave
+(titular, agregação, período, gerações). As gerações são dois contadores no
+próprio cache, um do titular e um compartilhado pelas categorias. A
+alteração do titular ou de uma das suas contas, transações ou orçamentos
+incrementa o contador do titular, e a de uma categoria incrementa o
+compartilhado. As entradas calculadas antes da alteração deixam de ser
+lidas, sem que seja preciso encontrá-las e apagá-las, e expiram em
+`AGGREGATE_CACHE_SECONDS`.
+
+Os contadores só são vistos por todos os processos com um cache
+compartilhado (Redis, Memcached, banco ou arquivos). Com o cache em memória
+de cada processo (`LocMemCache`, o padrão), a alteração incrementa apenas o
+contador do processo que a fez, e os demais continuam lendo as agregações
+antigas até que expirem. Por isso, nesse caso, as agregações ficam no cache
+por no máximo `AGGREGATE_LOCAL_CACHE_SECONDS`.
+
+As gravações feitas com `save()` e as exclusões de titulares, contas,
+orçamentos e categorias incrementam os contadores pelos sinais `post_save` e
+`post_delete`. As feitas com `QuerySet.update()` e as exclusões de
+transações chamam `invalidate` diretamente, como em `finances.changes`. O
+contador só é incrementado após a confirmação da transação do banco: uma
+solicitação que leia a geração antes da confirmação e calcule a agregação
+com os dados antigos grava a entrada com a geração antiga, que não é mais
+lida.
+
+Um contador ausente do cache (por exemplo, removido por falta de memória) é
+recriado com o instante atual em microssegundos, maior que qualquer valor
+anterior, para que as entradas antigas não voltem a ser lidas.
+
+Quando várias solicitações encontram a mesma agregação fora do cache ao
+mesmo tempo, apenas uma a calcula (`finances.singleflight`), e as demais
+reutilizam o resultado.
+
+As leituras e os cálculos de cada agregação são contados por processo e
+retornados por `stats`.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router, transaction
+from django.db.models import QuerySet, Sum
+from finances.changes import owner_of
+from finances.partitions import period_bounds, transactions_between
+from finances.singleflight import single_flight
+
+GENERATION_KEY = 'finances:aggregates:generation:{scope}'
+
+CACHE_KEY = 'finances:aggregates:{owner_id}:{name}:{period}:{generations}'
+
+SHARED_SCOPE = 'shared'
+
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'coalesced': 0})
+_stats_lock = threading.Lock()
+
+
+def cache_seconds():
+    """
+    Retorna por quantos segundos uma agregação fica no cache, definido em
+    `settings.AGGREGATE_CACHE_SECONDS` (3600 por padrão) ou, com o cache em
+    memória de cada processo, limitado a
+    `settings.AGGREGATE_LOCAL_CACHE_SECONDS` (300 por padrão).
+    """
+
+    seconds = getattr(settings, 'AGGREGATE_CACHE_SECONDS', 3600)
+
+    if isinstance(caches['default'], LocMemCache):
+        seconds = min(
+            seconds,
+            getattr(settings, 'AGGREGATE_LOCAL_CACHE_SECONDS', 300)
+        )
+
+    return seconds
+
+
+def new_generation():
+    """
+    Retorna o valor inicial de um contador de geração.
+    """
+
+    return time.time_ns() // 1000
+
+
+def generations(owner_id):
+    """
+    Retorna as gerações do titular e das categorias, lidas do cache com uma
+    única operação.
+
+    Retorna:
+        str: As duas gerações, separadas por hífen.
+    """
+
+    keys = [
+        GENERATION_KEY.format(scope=owner_id),
+        GENERATION_KEY.format(scope=SHARED_SCOPE),
+    ]
+    values = cache.get_many(keys)
+
+    for key in keys:
+        if key not in values:
+            cache.add(key, new_generation(), None)
+            values[key] = cache.get(key)
+
+    return '-'.join(str(values[key]) for key in keys)
+
+
+def bump(scope):
+    """
+    Incrementa o contador de geração de um titular ou das categorias.
+
+    Parâmetros:
+        scope: O ID do titular, ou `SHARED_SCOPE`.
+    """
+
+    key = GENERATION_KEY.format(scope=scope)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_generation(), None)
+
+
+def invalidate(instance):
+    """
+    Invalida as agregações afetadas pela alteração de um titular, conta,
+    transação, orçamento ou categoria, após a confirmação da transação do
+    banco.
+
+    Parâmetros:
+        instance: O objeto alterado.
+    """
+
+    name = instance._meta.model_name
+
+    if name == 'category':
+        scope = SHARED_SCOPE
+    elif name == 'user':
+        scope = instance.pk
+    else:
+        scope = owner_of(instance)
+        if scope is None:
+            return
+
+    transaction.on_commit(
+        lambda: bump(scope),
+        using=instance._state.db or 'default'
+    )
+
+
+def invalidate_saved(sender, instance, raw=False, **kwargs):
+    """
+    Receptor do sinal `post_save` que invalida as agregações do titular.
+    """
+
+    if not raw:
+        invalidate(instance)
+
+
+def invalidate_deleted(sender, instance, **kwargs):
+    """
+    Receptor do sinal `post_delete` que invalida as agregações do titular.
+    """
+
+    invalidate(instance)
+
+
+def record(name, hit, coalesced=False):
+    """
+    Conta uma leitura (hit) ou um cálculo (miss) de uma agregação. As
+    leituras do resultado calculado por outra solicitação simultânea também
+    são contadas em `coalesced`.
+    """
+
+    with _stats_lock:
+        _stats[name]['hits' if hit else 'misses'] += 1
+        if coalesced:
+            _stats[name]['coalesced'] += 1
+
+
+def stats():
+    """
+    Retorna as leituras e os cálculos de cada agregação neste processo.
+
+    Retorna:
+        dict: Para cada agregação, `hits`, `misses`, `coalesced` e
+        `hit_rate`.
+    """
+
+    with _stats_lock:
+        items = {name: dict(values) for name, values in _stats.items()}
+
+    for values in items.values():
+        total = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / total, 4) if total else 0
+
+    return items
+
+
+def reset_stats():
+    """
+    Zera as estatísticas deste processo.
+    """
+
+    with _stats_lock:
+        _stats.clear()
+
+
+def cached_aggregate(owner_id, name, period, compute):
+    """
+    Retorna uma agregação do cache ou a calcula e guarda, uma única vez
+    para as solicitações simultâneas.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+        name: O nome da agregação.
+        period: O período da agregação (por exemplo, o primeiro dia do mês),
+        ou None.
+        compute: Função sem parâmetros que calcula a agregação.
+
+    Retorna:
+        tuple: A agregação e se ela foi lida do cache.
+    """
+
+    key = CACHE_KEY.format(
+        owner_id=owner_id,
+        name=name,
+        period=f'{period:%Y-%m}' if period is not None else '-',
+        generations=generations(owner_id)
+    )
+
+    value = cache.get(key)
+    if value is not None:
+        record(name, True)
+        return value, True
+
+    def fill():
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, cache_seconds())
+            return value, False
+        return value, True
+
+    (value, hit), shared = single_flight(key, fill)
+    record(name, hit or shared, coalesced=shared)
+
+    return value, hit or shared
+
+
+def category_totals(using, start, end, account_ids):
+    """
+    Retorna o total gasto por categoria nas contas informadas no intervalo
+    `[start, end)`, em ordem decrescente de total, incluindo as partições
+    desanexadas e os arquivos do intervalo.
+    """
+
+    from finances.models import Category, Transaction
+
+    transactions = transactions_between(
+        start,
+        end,
+        Transaction.objects.using(using),
+        account_ids
+    )
+
+    if isinstance(transactions, QuerySet):
+        rows = transactions.values(
+            'category_id', 'category__name'
+        ).annotate(total=Sum('amount')).order_by()
+        totals = [
+            (row['category_id'], row['category__name'], row['total'])
+            for row in rows
+        ]
+    else:
+        sums = defaultdict(Decimal)
+        for item in transactions:
+            sums[item.category_id] += item.amount
+        names = dict(
+            Category.objects.using(using).filter(
+                pk__in=[pk for pk in sums if pk is not None]
+            ).values_list('pk', 'name')
+        )
+        totals = [
+            (pk, names.get(pk), total) for pk, total in sums.items()
+        ]
+
+    totals.sort(key=lambda row: (-row[2], row[0] or 0))
+
+    return [
+        {'category': pk, 'name': name, 'total': f'{total:.2f}'}
+        for pk, name, total in totals
+    ]
+
+
+def owner_category_totals(user, period):
+    """
+    Retorna o total gasto por categoria nas contas do titular no mês.
+    """
+
+    from finances.models import Account
+
+    using = router.db_for_read(Account)
+    account_ids = list(
+        Account.objects.using(using).filter(
+            owner_id=user.pk
+        ).values_list('pk', flat=True)
+    )
+    start, end = period_bounds(period)
+
+    return {
+        'period': f'{period:%Y-%m}',
+        'totals': category_totals(using, start, end, account_ids),
+    }
+
+
+def net_worth(user, period=None):
+    """
+    Retorna a soma dos saldos das contas do titular.
+    """
+
+    from finances.models import Account
+
+    total = Account.objects.using(router.db_for_read(Account)).filter(
+        owner_id=user.pk
+    ).aggregate(total=Sum('balance'))['total'] or 0
+
+    return {'net_worth': f'{total:.2f}'}
+
+
+AGGREGATES = {
+    'category-totals': (owner_category_totals, True),
+    'net-worth': (net_worth, False),
+}
+
+
+def get_aggregate(user, name, period):
+    """
+    Retorna uma das agregações de `AGGREGATES` do titular, do cache ou
+    calculada.
+
+    Parâmetros:
+        user: O titular.
+        name: O nome da agregação.
+        period: O primeiro dia do mês, usado apenas pelas agregações
+        mensais.
+
+    Retorna:
+        tuple: A agregação e se ela foi lida do cache.
+    """
+
+    compute, monthly = AGGREGATES[name]
+    period = period if monthly else None
+
+    return cached_aggregate(
+        user.pk,
+        name,
+        period,
+        lambda: compute(user, period)
+    )
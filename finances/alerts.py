@@ -0,0 +1,307 @@
+"""
+Alertas de orçamento enviados por Server-Sent Events.
+
+Sempre que o gasto (`spent`) ou o valor (`amount`) de um orçamento muda,
+`check_thresholds` compara o percentual gasto antes e depois da alteração
+com os limites de `settings.BUDGET_ALERTS['THRESHOLDS']` (50, 80 e 100% por
+padrão). Nenhum outro orçamento é lido. Se algum limite foi ultrapassado
+para cima, um alerta (`BudgetAlert`) é gravado com o maior deles, no banco
+principal (ou no banco do orçamento, se não for um shard), como em
+`finances.changes`.
+
+O endpoint `/api/alerts/stream/` mantém uma conexão aberta por titular e
+envia os alertas como eventos `budget.threshold`. As conexões não consultam o
+banco: em cada processo, uma única tarefa (`AlertBroker`) lê os alertas
+novos a cada `POLL_SECONDS` e os distribui às filas das conexões abertas dos
+titulares, de forma que uma conexão ociosa custa apenas uma fila e uma
+tarefa do loop de eventos. Os alertas gravados por qualquer processo,
+inclusive pelos servidores WSGI, chegam a todos os processos ASGI.
+
+O ID do alerta é o ID do evento. Ao reconectar, o navegador envia o
+cabeçalho `Last-Event-ID`, e os alertas posteriores a ele são reenviados.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+from finances.changes import owner_of, settle_seconds
+from finances.routers import get_shards
+
+DEFAULTS = {
+    'THRESHOLDS': [50, 80, 100],
+    'POLL_SECONDS': 1,
+    'HEARTBEAT_SECONDS': 15,
+    'REPLAY_LIMIT': 100,
+}
+
+BATCH_SIZE = 1000
+
+
+def get_config():
+    """
+    Retorna a configuração dos alertas, definida em
+    `settings.BUDGET_ALERTS`, completada com os valores padrão.
+    """
+
+    return {**DEFAULTS, **getattr(settings, 'BUDGET_ALERTS', {})}
+
+
+def percent(spent, amount):
+    """
+    Retorna o percentual gasto de um orçamento. Um orçamento de valor zero
+    com gasto positivo está acima de qualquer limite.
+    """
+
+    if amount <= 0:
+        return Decimal('Infinity') if spent > 0 else Decimal(0)
+
+    return Decimal(spent) * 100 / Decimal(amount)
+
+
+def crossed(previous_spent, previous_amount, spent, amount, thresholds):
+    """
+    Retorna o maior limite ultrapassado para cima pela alteração de um
+    orçamento, ou None.
+
+    Parâmetros:
+        previous_spent: O gasto antes da alteração.
+        previous_amount: O valor antes da alteração.
+        spent: O gasto após a alteração.
+        amount: O valor após a alteração.
+        thresholds: Os limites, em percentual do valor.
+
+    Retorna:
+        int | None: O limite ultrapassado.
+    """
+
+    before = percent(previous_spent, previous_amount)
+    after = percent(spent, amount)
+
+    passed = [
+        threshold for threshold in thresholds
+        if before < threshold <= after
+    ]
+
+    return max(passed) if passed else None
+
+
+def check_thresholds(budget, previous_spent, previous_amount=None):
+    """
+    Grava um alerta se a alteração do orçamento ultrapassou um limite.
+
+    Parâmetros:
+        budget: O orçamento já alterado.
+        previous_spent: O gasto antes da alteração.
+        previous_amount: O valor antes da alteração. Por padrão, o atual.
+
+    Retorna:
+        BudgetAlert | None: O alerta gravado.
+    """
+
+    from finances.models import BudgetAlert
+
+    if previous_amount is None:
+        previous_amount = budget.amount
+
+    threshold = crossed(
+        previous_spent,
+        previous_amount,
+        budget.spent,
+        budget.amount,
+        get_config()['THRESHOLDS']
+    )
+    if threshold is None:
+        return None
+
+    owner_id = owner_of(budget)
+    if owner_id is None:
+        return None
+
+    using = budget._state.db or 'default'
+    if using in get_shards():
+        using = 'default'
+
+    return BudgetAlert.objects.using(using).create(
+        owner_id=owner_id,
+        budget_id=budget.pk,
+        threshold=threshold,
+        spent=budget.spent,
+        amount=budget.amount
+    )
+
+
+def serialize(alert):
+    """
+    Retorna os dados de um alerta enviados no evento.
+    """
+
+    return {
+        'id': alert.pk,
+        'budget': alert.budget_id,
+        'threshold': alert.threshold,
+        'spent': str(alert.spent),
+        'amount': str(alert.amount),
+        'created_at': alert.created_at,
+    }
+
+
+def format_event(alert):
+    """
+    Formata um alerta como um evento Server-Sent Events.
+    """
+
+    data = json.dumps(serialize(alert), cls=JSONEncoder)
+
+    return f'id: {alert.pk}\nevent: budget.threshold\ndata: {data}\n\n'
+
+
+class AlertBroker:
+    """
+    Distribui os alertas novos às conexões abertas de um processo.
+
+    A tarefa de leitura é iniciada pela primeira conexão, a partir do último
+    alerta gravado, e encerrada quando não há mais conexões. Cada leitura
+    busca, com uma consulta, os alertas posteriores ao último lido e gravados
+    há mais de `CHANGE_FEED_SETTLE_SECONDS`, para que um alerta ainda não
+    confirmado, com ID menor, não seja pulado.
+
+    Métodos:
+        subscribe: Registra uma conexão de um titular.
+        unsubscribe: Remove uma conexão.
+        poll: Lê os alertas novos e os entrega às conexões.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.cursor = None
+        self.task = None
+
+    def subscribe(self, owner_id):
+        """
+        Registra uma conexão de um titular e retorna a sua fila de alertas.
+        """
+
+        queue = asyncio.Queue()
+        self.subscribers[owner_id].add(queue)
+
+        if self.task is None or self.task.done() or \
+                self.task.get_loop() is not asyncio.get_running_loop():
+            self.task = asyncio.create_task(self.run())
+
+        return queue
+
+    def unsubscribe(self, owner_id, queue):
+        """
+        Remove uma conexão de um titular.
+        """
+
+        queues = self.subscribers.get(owner_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[owner_id]
+
+    async def poll(self):
+        """
+        Lê os alertas novos e os entrega às filas dos titulares conectados.
+
+        Retorna:
+            int: A quantidade de alertas lidos.
+        """
+
+        from finances.models import BudgetAlert
+
+        horizon = timezone.now() - timedelta(seconds=settle_seconds())
+        alerts = [
+            alert
+            async for alert in BudgetAlert.objects.filter(
+                id__gt=self.cursor,
+                created_at__lte=horizon
+            ).order_by('id')[:BATCH_SIZE]
+        ]
+
+        for alert in alerts:
+            for queue in self.subscribers.get(alert.owner_id, ()):
+                queue.put_nowait(alert)
+            self.cursor = alert.pk
+
+        return len(alerts)
+
+    async def run(self):
+        from finances.models import BudgetAlert
+
+        self.cursor = (
+            await BudgetAlert.objects.aaggregate(cursor=Max('id'))
+        )['cursor'] or 0
+
+        while self.subscribers:
+            if await self.poll() < BATCH_SIZE:
+                await asyncio.sleep(get_config()['POLL_SECONDS'])
+
+
+broker = AlertBroker()
+
+
+async def replay(owner_id, last_event_id):
+    """
+    Retorna os alertas de um titular posteriores ao último evento recebido
+    pelo cliente, até `REPLAY_LIMIT`.
+    """
+
+    from finances.models import BudgetAlert
+
+    alerts = [
+        alert
+        async for alert in BudgetAlert.objects.filter(
+            owner_id=owner_id,
+            id__gt=last_event_id
+        ).order_by('-id')[:get_config()['REPLAY_LIMIT']]
+    ]
+
+    return alerts[::-1]
+
+
+async def stream(owner_id, last_event_id=None):
+    """
+    Gera os eventos de alerta de um titular até que a conexão seja encerrada,
+    com um comentário a cada `HEARTBEAT_SECONDS` para manter a conexão
+    aberta nos proxies.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+        last_event_id: O ID do último alerta recebido pelo cliente.
+    """
+
+    config = get_config()
+    queue = broker.subscribe(owner_id)
+
+    try:
+        yield f'retry: {int(config["POLL_SECONDS"] * 1000) + 1000}\n\n'
+
+        sent = 0
+        if last_event_id is not None:
+            for alert in await replay(owner_id, last_event_id):
+                sent = alert.pk
+                yield format_event(alert)
+
+        while True:
+            try:
+                alert = await asyncio.wait_for(
+                    queue.get(),
+                    config['HEARTBEAT_SECONDS']
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            if alert.pk > sent:
+                yield format_event(alert)
+    finally:
+        broker.unsubscribe(owner_id, queue)
@@ -1,6 +1,58 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class FinancesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finances'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from finances.aggregates import invalidate_deleted, invalidate_saved
+        from finances.authentication import evict_user
+        from finances.changes import record_deleted, record_saved
+        from finances.database import configure_sqlite
+        from finances.ledger import record_opening
+        from finances.models import Account, Budget, Category, Transaction
+        from finances.sharding import (
+            prepare_shard,
+            replicate,
+            replicate_delete
+        )
+
+        connection_created.connect(
+            configure_sqlite,
+            dispatch_uid='finances.configure_sqlite'
+        )
+
+        post_migrate.connect(prepare_shard, sender=self)
+
+        post_save.connect(
+            record_opening,
+            sender=Account,
+            dispatch_uid='finances.record_opening'
+        )
+
+        for model in (User, Category):
+            post_save.connect(replicate, sender=model)
+            post_delete.connect(replicate_delete, sender=model)
+
+        for model in (Account, Transaction, Budget, Category):
+            post_save.connect(record_saved, sender=model)
+
+        # As exclusões de transações são registradas pelas views, para que o
+        # arquivamento continue excluindo as transações em massa.
+        for model in (Account, Budget, Category):
+            post_delete.connect(record_deleted, sender=model)
+
+        for model in (User, Account, Transaction, Budget, Category):
+            post_save.connect(invalidate_saved, sender=model)
+
+        # Assim como no registro de alterações, as exclusões de transações
+        # invalidam as agregações pelas views.
+        for model in (User, Account, Budget, Category):
+            post_delete.connect(invalidate_deleted, sender=model)
+
+        post_save.connect(evict_user, sender=User)
+        post_delete.connect(evict_user, sender=User)
@@ -0,0 +1,301 @@
+"""
+Arquivamento das transações antigas em armazenamento frio.
+
+A maior parte das consultas usa apenas os últimos meses, mas os índices e as
+varreduras da tabela de transações crescem com todo o histórico. Os meses
+encerrados há mais de `settings.TRANSACTION_ARCHIVE_AFTER_MONTHS` meses (13
+por padrão) podem ser movidos para `TransactionArchive`: um registro por
+conta e mês, com o resumo do mês e as transações em JSON comprimido.
+
+As consultas por intervalo de datas (`finances.partitions.
+transactions_between`) incluem as transações arquivadas dos meses do
+intervalo, e o detalhe de uma transação arquivada continua disponível para
+leitura. As transações arquivadas não podem ser alteradas.
+"""
+
+import json
+import zlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from finances.partitions import (
+    month_start,
+    months_between,
+    period_bounds,
+    read_partitions
+)
+
+
+def archive_cutoff(today=None):
+    """
+    Retorna o primeiro mês que não pode ser arquivado: os meses anteriores a
+    ele estão encerrados há mais de `TRANSACTION_ARCHIVE_AFTER_MONTHS` meses.
+
+    Exemplo de Uso:
+        >>> from datetime import date
+        >>> archive_cutoff(date(2024, 3, 15))
+        datetime.date(2023, 2, 1)
+    """
+
+    months = getattr(settings, 'TRANSACTION_ARCHIVE_AFTER_MONTHS', 13)
+    period = month_start(today or timezone.now().date())
+
+    index = period.year * 12 + period.month - 1 - months
+    return period.replace(year=index // 12, month=index % 12 + 1)
+
+
+def pack(transactions):
+    """
+    Serializa e comprime as transações de um arquivo.
+
+    Parâmetros:
+        transactions: As transações, de uma mesma conta.
+
+    Retorna:
+        bytes: O JSON das transações comprimido com zlib.
+    """
+
+    rows = [
+        {
+            'id': instance.pk,
+            'amount': str(instance.amount),
+            'date': instance.date.isoformat(),
+            'description': instance.description,
+            'category_id': instance.category_id,
+            'version': instance.version,
+        }
+        for instance in transactions
+    ]
+
+    return zlib.compress(
+        json.dumps(rows, separators=(',', ':')).encode(),
+        level=9
+    )
+
+
+def unpack(archive):
+    """
+    Descomprime as transações de um arquivo.
+
+    Parâmetros:
+        archive: O registro de TransactionArchive.
+
+    Retorna:
+        list: Instâncias de Transaction, marcadas como lidas do banco do
+        arquivo.
+    """
+
+    from finances.models import Transaction
+
+    instances = []
+
+    for row in json.loads(zlib.decompress(bytes(archive.payload))):
+        instance = Transaction(
+            id=row['id'],
+            account_id=archive.account_id,
+            category_id=row['category_id'],
+            amount=Decimal(row['amount']),
+            date=parse_datetime(row['date']),
+            description=row['description'],
+            version=row['version']
+        )
+        instance._state.adding = False
+        instance._state.db = archive._state.db
+        instances.append(instance)
+
+    return instances
+
+
+def archive_period(period, using='default'):
+    """
+    Move as transações de um mês para `TransactionArchive`, com um registro
+    por conta. As transações são lidas da tabela principal ou, se o mês
+    tiver sido desanexado (`finances.partitions.detach_partition`), da tabela
+    do mês, que é excluída.
+
+    Parâmetros:
+        period: O primeiro dia do mês.
+        using: O alias do banco.
+
+    Retorna:
+        int: A quantidade de transações arquivadas.
+
+    Raises:
+        ValueError: Se o mês for posterior ao limite de `archive_cutoff` ou
+        já tiver sido arquivado.
+    """
+
+    from finances.models import (
+        Transaction, TransactionArchive, TransactionPartition
+    )
+
+    period = month_start(period)
+    if period >= archive_cutoff():
+        raise ValueError(f'Period {period:%Y-%m} is too recent to archive.')
+
+    archives = TransactionArchive.objects.using(using)
+    if archives.filter(period=period).exists():
+        raise ValueError(f'Period {period:%Y-%m} is already archived.')
+
+    start, end = period_bounds(period)
+    live = Transaction.objects.using(using).filter(
+        date__gte=start,
+        date__lt=end
+    )
+    partition = TransactionPartition.objects.using(using).filter(
+        period=period
+    ).first()
+
+    with transaction.atomic(using=using):
+        transactions = list(live)
+        if partition is not None:
+            transactions.extend(
+                read_partitions([partition], using, None, None)
+            )
+
+        by_account = {}
+        for instance in sorted(transactions, key=lambda t: (t.date, t.pk)):
+            by_account.setdefault(instance.account_id, []).append(instance)
+
+        archives.bulk_create([
+            TransactionArchive(
+                account_id=account_id,
+                period=period,
+                rows=len(rows),
+                total=sum(instance.amount for instance in rows),
+                first_id=min(instance.pk for instance in rows),
+                last_id=max(instance.pk for instance in rows),
+                payload=pack(rows)
+            )
+            for account_id, rows in by_account.items()
+        ])
+
+        live.delete()
+
+        if partition is not None:
+            connection = connections[using]
+            table = connection.ops.quote_name(partition.table_name)
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE {table}')
+            partition.delete()
+
+    return len(transactions)
+
+
+def archive_before(cutoff=None, using='default'):
+    """
+    Arquiva todos os meses anteriores a `cutoff` que ainda têm transações na
+    tabela principal ou em partições desanexadas.
+
+    Parâmetros:
+        cutoff: O primeiro mês que não será arquivado. Por padrão, o limite
+        de `archive_cutoff`.
+        using: O alias do banco.
+
+    Retorna:
+        dict: A quantidade de transações arquivadas por mês.
+    """
+
+    from finances.models import Transaction, TransactionPartition
+
+    cutoff = min(month_start(cutoff or archive_cutoff()), archive_cutoff())
+    start, _ = period_bounds(cutoff)
+
+    periods = {
+        month_start(value)
+        for value in Transaction.objects.using(using).filter(
+            date__lt=start
+        ).dates('date', 'month')
+    }
+    periods.update(
+        TransactionPartition.objects.using(using).filter(
+            period__lt=cutoff
+        ).values_list('period', flat=True)
+    )
+
+    return {
+        period: archive_period(period, using)
+        for period in sorted(periods)
+    }
+
+
+def archives_between(using, start, end, account_ids=None):
+    """
+    Retorna os arquivos dos meses que cruzam o intervalo `[start, end)`.
+
+    Parâmetros:
+        using: O alias do banco.
+        start: O início do intervalo (inclusivo), ou None.
+        end: O fim do intervalo (exclusivo), ou None.
+        account_ids: Restringe os arquivos às contas informadas.
+
+    Retorna:
+        QuerySet: Os registros de TransactionArchive.
+    """
+
+    from finances.models import TransactionArchive
+
+    archives = TransactionArchive.objects.using(using)
+    first, last = months_between(start, end)
+    if first is not None:
+        archives = archives.filter(period__gte=first)
+    if last is not None:
+        archives = archives.filter(period__lte=last)
+    if account_ids is not None:
+        archives = archives.filter(account_id__in=account_ids)
+
+    return archives
+
+
+def read_archives(archives, start, end):
+    """
+    Descomprime os arquivos informados e retorna as transações com data no
+    intervalo `[start, end)`.
+
+    Parâmetros:
+        archives: Os registros de TransactionArchive.
+        start: O início do intervalo (inclusivo), ou None.
+        end: O fim do intervalo (exclusivo), ou None.
+
+    Retorna:
+        list: Instâncias de Transaction.
+    """
+
+    return [
+        instance
+        for archive in archives
+        for instance in unpack(archive)
+        if (start is None or instance.date >= start)
+        and (end is None or instance.date < end)
+    ]
+
+
+def find_archived(pk, using):
+    """
+    Procura uma transação arquivada pelo ID, descomprimindo apenas os
+    arquivos cuja faixa de IDs inclui o ID informado.
+
+    Parâmetros:
+        pk: O ID da transação.
+        using: O alias do banco.
+
+    Retorna:
+        Transaction | None: A transação arquivada, ou None se não existir.
+    """
+
+    from finances.models import TransactionArchive
+
+    archives = TransactionArchive.objects.using(using).filter(
+        first_id__lte=pk,
+        last_id__gte=pk
+    )
+
+    for archive in archives:
+        for instance in unpack(archive):
+            if instance.pk == pk:
+                return instance
+
+    return None
@@ -0,0 +1,602 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.settings import (
+    api_settings as jwt_api_settings
+)
+from finances.alerts import stream
+from finances.concurrency import etag_for
+from finances.fieldsets import (
+    get_fieldset,
+    parse_list_param,
+    restrict_queryset
+)
+from finances.models import Account, Budget, Category, Transaction
+from finances.passwords import acheck_password, ahash_password
+from finances.routers import SHARDED_MODELS, get_shards
+from finances.serializers import (
+    AccountSerializer,
+    BudgetSerializer,
+    CategorySerializer,
+    OwnerSerializer,
+    TransactionSerializer
+)
+
+
+class AsyncAPIView(View):
+    """
+    View base assíncrona para os endpoints de leitura servidos sob ASGI.
+
+    As views do Django REST Framework são síncronas e, sob ASGI, ocupam uma
+    thread durante toda a solicitação. As views derivadas desta classe rodam
+    no loop de eventos e usam o ORM assíncrono (`aget`, `async for`), de forma
+    que uma solicitação só ocupa uma thread durante as consultas ao banco.
+
+    A autenticação usa as mesmas classes configuradas em
+    `REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']`, e os erros são
+    retornados no mesmo formato das views síncronas. Como nas views do
+    Django REST Framework, a verificação CSRF não é aplicada: a API é
+    autenticada por tokens, e não por sessões.
+
+    Atributos:
+        admin_only: Se True, apenas administradores podem acessar a view.
+        authentication_required: Se False, a view também aceita solicitações
+        não autenticadas.
+
+    Métodos:
+        authenticate: Autentica a solicitação.
+        check_permissions: Verifica se o usuário pode acessar a view.
+        parse: Lê o corpo JSON da solicitação.
+        render: Cria uma resposta JSON.
+    """
+
+    admin_only = False
+    authentication_required = True
+    http_method_names = ['get', 'head', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+            self.check_permissions(request)
+
+            handler = getattr(
+                self, request.method.lower(), self.http_method_not_allowed
+            )
+            response = handler(request, *args, **kwargs)
+            if not isinstance(response, HttpResponse):
+                response = await response
+
+            return response
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        """
+        Autentica a solicitação com as classes de autenticação configuradas.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Raises:
+            AuthenticationFailed: Se o token enviado for inválido.
+        """
+
+        request.user = None
+        request.auth = None
+
+        classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+        for authentication_class in classes:
+            authenticator = authentication_class()
+            result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+
+    def check_permissions(self, request):
+        """
+        Verifica se o usuário autenticado pode acessar a view.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Raises:
+            NotAuthenticated: Se a solicitação não estiver autenticada.
+            PermissionDenied: Se a view exigir um administrador.
+        """
+
+        if not self.authentication_required:
+            return
+
+        if request.user is None or not request.user.is_active:
+            raise exceptions.NotAuthenticated()
+
+        if self.admin_only and not request.user.is_staff:
+            raise exceptions.PermissionDenied()
+
+    def check_owner(self, request, owner_id):
+        """
+        Verifica se o usuário autenticado é o titular do registro.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            owner_id: O ID do titular do registro.
+
+        Raises:
+            PermissionDenied: Se o usuário não for o titular.
+        """
+
+        if owner_id is None or owner_id != request.user.pk:
+            raise exceptions.PermissionDenied(
+                'Você não tem permissão para executar essa ação.'
+            )
+
+    def parse(self, request):
+        """
+        Lê o corpo JSON da solicitação.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Retorna:
+            dict: Os dados enviados.
+
+        Raises:
+            ParseError: Se o corpo não for um objeto JSON válido.
+        """
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise exceptions.ParseError(f'JSON parse error - {exc}')
+
+        if not isinstance(data, dict):
+            raise exceptions.ParseError('JSON parse error - expected object')
+
+        return data
+
+    def handle_exception(self, exc):
+        """
+        Converte uma exceção da API em uma resposta JSON, no mesmo formato
+        usado pelo Django REST Framework.
+        """
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+
+        headers = {}
+        if isinstance(exc, exceptions.NotAuthenticated):
+            headers['WWW-Authenticate'] = 'Bearer realm="api"'
+
+        return self.render(data, status=exc.status_code, headers=headers)
+
+    def render(self, data, status=status.HTTP_200_OK, headers=None):
+        """
+        Cria uma resposta JSON com o mesmo renderizador das views síncronas.
+
+        Parâmetros:
+            data: Os dados a serem renderizados.
+            status: O status HTTP da resposta.
+            headers: Cabeçalhos adicionais da resposta.
+
+        Retorna:
+            HttpResponse: A resposta em formato JSON.
+        """
+
+        return HttpResponse(
+            JSONRenderer().render(data),
+            status=status,
+            headers=headers,
+            content_type='application/json'
+        )
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    View base assíncrona para as listagens.
+
+    Atributos:
+        queryset: O queryset listado.
+        serializer_class: O serializer usado na listagem.
+        empty_message: A mensagem retornada quando não há registros.
+        sparse_fieldsets: Se True, aceita os parâmetros `?fields=` e
+        `?expand=`.
+        gzip_response: Habilita a compressão gzip das listagens.
+    """
+
+    queryset = None
+    serializer_class = None
+    empty_message = None
+    sparse_fieldsets = False
+    gzip_response = True
+
+    async def get(self, request):
+        """
+        Método HTTP GET para listar os registros.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Retorna:
+            HttpResponse: Uma resposta HTTP contendo a lista de registros em
+            formato JSON.
+        """
+
+        options = {}
+        queryset = self.queryset.all()
+
+        if self.sparse_fieldsets:
+            fields, expand = get_fieldset(request, self.serializer_class)
+            queryset = restrict_queryset(queryset, fields, expand)
+            options = {'fields': fields, 'expand': expand}
+
+        if queryset.model._meta.label_lower in SHARDED_MODELS:
+            shards = get_shards()
+        else:
+            shards = []
+
+        if shards:
+            instances = [
+                instance
+                for alias in shards
+                async for instance in queryset.using(alias)
+            ]
+        else:
+            instances = [instance async for instance in queryset]
+
+        if not instances:
+            return self.render({'message': self.empty_message})
+
+        serializer = self.serializer_class(instances, many=True, **options)
+
+        return self.render(serializer.data)
+
+
+class AccountAsyncList(AsyncListView):
+    """
+    Versão assíncrona da listagem de contas.
+
+    Endpoint Base:
+        /api/async/accounts/
+    """
+
+    admin_only = True
+    queryset = Account.objects.all()
+    serializer_class = AccountSerializer
+    empty_message = 'There are no registered accounts.'
+
+
+class CategoryAsyncList(AsyncListView):
+    """
+    Versão assíncrona da listagem de categorias.
+
+    Endpoint Base:
+        /api/async/categories/
+    """
+
+    queryset = Category.objects.all()
+    serializer_class = CategorySerializer
+    empty_message = 'There are no registered categories.'
+
+
+class TransactionAsyncList(AsyncListView):
+    """
+    Versão assíncrona da listagem de transações.
+
+    Endpoint Base:
+        /api/async/transactions/
+    """
+
+    admin_only = True
+    queryset = Transaction.objects.all()
+    serializer_class = TransactionSerializer
+    empty_message = 'There are no registered transactions.'
+    sparse_fieldsets = True
+
+
+class BudgetAsyncList(AsyncListView):
+    """
+    Versão assíncrona da listagem de orçamentos.
+
+    Endpoint Base:
+        /api/async/budgets/
+    """
+
+    admin_only = True
+    queryset = Budget.objects.all()
+    serializer_class = BudgetSerializer
+    empty_message = 'There are no registered budgets.'
+    sparse_fieldsets = True
+
+
+class AccountAsyncDetail(AsyncAPIView):
+    """
+    Versão assíncrona dos detalhes de uma conta financeira.
+
+    Endpoint Base:
+        /api/async/account/<pk>/
+    """
+
+    expandable_fields = ('owner', 'transactions', 'budgets')
+
+    async def get(self, request, pk):
+        """
+        Método HTTP GET para obter detalhes de uma conta financeira específica,
+        com o titular, as transações e os orçamentos da conta. O parâmetro
+        `?expand=` restringe a resposta às relações informadas.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            pk: O ID da conta a ser obtida.
+
+        Retorna:
+            HttpResponse: Uma resposta HTTP contendo os detalhes da conta em
+            formato JSON.
+        """
+
+        expand = parse_list_param(request, 'expand')
+        if expand is None:
+            expand = self.expandable_fields
+
+        unknown = ', '.join(sorted(set(expand) - set(self.expandable_fields)))
+        if unknown:
+            raise exceptions.ValidationError(
+                {'expand': [f'Unknown relation(s): {unknown}.']}
+            )
+
+        queryset = Account.objects.all()
+        if 'owner' in expand:
+            queryset = queryset.select_related('owner')
+
+        try:
+            account = await queryset.aget(pk=pk)
+        except Account.DoesNotExist:
+            raise Http404
+
+        self.check_owner(request, account.owner_id)
+
+        data = {}
+
+        if 'owner' in expand:
+            data['owner'] = OwnerSerializer(account.owner).data
+
+        if 'transactions' in expand:
+            transactions = [
+                transaction
+                async for transaction in account.transaction_set.all()
+            ]
+            data['transactions'] = TransactionSerializer(
+                transactions,
+                many=True
+            ).data
+
+        if 'budgets' in expand:
+            budgets = [budget async for budget in account.budget_set.all()]
+            data['budgets'] = BudgetSerializer(budgets, many=True).data
+
+        return self.render(data, headers={'ETag': etag_for(account)})
+
+
+class BudgetAsyncDetail(AsyncAPIView):
+    """
+    Versão assíncrona dos detalhes de um orçamento.
+
+    Endpoint Base:
+        /api/async/budget/<pk>/
+    """
+
+    async def get(self, request, pk):
+        """
+        Método HTTP GET para obter detalhes de um orçamento específico. Aceita
+        os parâmetros `?fields=` e `?expand=`.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            pk: O ID do orçamento a ser obtido.
+
+        Retorna:
+            HttpResponse: Uma resposta HTTP contendo os detalhes do orçamento
+            em formato JSON.
+        """
+
+        fields, expand = get_fieldset(request, BudgetSerializer)
+
+        queryset = restrict_queryset(
+            Budget.objects.select_related('account'),
+            fields,
+            expand,
+            required=('account', 'version')
+        )
+
+        try:
+            budget = await queryset.aget(pk=pk)
+        except Budget.DoesNotExist:
+            raise Http404
+
+        self.check_owner(
+            request,
+            budget.account.owner_id if budget.account else None
+        )
+
+        serializer = BudgetSerializer(budget, fields=fields, expand=expand)
+
+        return self.render(serializer.data, headers={'ETag': etag_for(budget)})
+
+
+class BudgetAlertStream(AsyncAPIView):
+    """
+    Fluxo Server-Sent Events dos alertas de orçamento do titular (veja
+    `finances.alerts`). Deve ser servido sob ASGI: sob WSGI, cada conexão
+    ocuparia uma thread.
+
+    Endpoint Base:
+        /api/alerts/stream/
+    """
+
+    async def get(self, request):
+        """
+        Método HTTP GET para abrir o fluxo de alertas do titular autenticado.
+        A conexão fica aberta e recebe um evento `budget.threshold` sempre
+        que o gasto de um orçamento do titular ultrapassa um dos limites
+        configurados.
+
+        O cabeçalho `Last-Event-ID` (ou o parâmetro `?last_event_id=`)
+        reenvia os alertas posteriores ao último evento recebido.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Retorna:
+            StreamingHttpResponse: O fluxo de eventos.
+        """
+
+        last_event_id = request.headers.get(
+            'Last-Event-ID',
+            request.GET.get('last_event_id')
+        )
+
+        if last_event_id is not None:
+            try:
+                last_event_id = int(last_event_id)
+            except ValueError:
+                raise exceptions.ValidationError(
+                    {'last_event_id': ['Invalid value.']}
+                )
+
+        return StreamingHttpResponse(
+            stream(request.user.pk, last_event_id),
+            content_type='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            }
+        )
+
+
+class OwnerAsyncCreate(AsyncAPIView):
+    """
+    Versão assíncrona do cadastro de titulares. O hash da senha é calculado
+    no pool de `finances.passwords`, sem ocupar o loop de eventos.
+
+    Endpoint Base:
+        /api/async/owners/
+    """
+
+    authentication_required = False
+    http_method_names = ['post', 'options']
+
+    async def post(self, request):
+        """
+        Método HTTP POST para criar um novo titular, com os mesmos dados e as
+        mesmas validações de `POST /api/owners/`.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+
+        Retorna:
+            HttpResponse: Uma resposta HTTP com status 201 Created e os
+            detalhes do novo titular em formato JSON.
+
+        Raises:
+            ValidationError: Se os dados enviados forem inválidos.
+        """
+
+        serializer = OwnerSerializer(data=self.parse(request))
+
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+        data = serializer.validated_data
+        owner = await User.objects.acreate(**{
+            **data,
+            'password': await ahash_password(data['password']),
+        })
+
+        return self.render(
+            OwnerSerializer(owner).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TokenAsyncObtain(AsyncAPIView):
+    """
+    Versão assíncrona do login (`/api/token/`). A senha é verificada no pool
+    de `finances.passwords`, e os tokens são emitidos pelo serializer
+    configurado em `SIMPLE_JWT['TOKEN_OBTAIN_SERIALIZER']`.
+
+    Endpoint Base:
+        /api/async/token/
+    """
+
+    authentication_required = False
+    http_method_names = ['post', 'options']
+
+    async def post(self, request):
+        """
+        Método HTTP POST para obter os tokens de acesso e de atualização.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP, com `username` e
+            `password` no corpo.
+
+        Retorna:
+            HttpResponse: Uma resposta HTTP com os tokens `refresh` e
+            `access` em formato JSON.
+
+        Raises:
+            ValidationError: Se `username` ou `password` não forem enviados.
+            AuthenticationFailed: Se as credenciais forem inválidas ou o
+            titular estiver inativo.
+        """
+
+        data = self.parse(request)
+
+        missing = {
+            field: ['This field is required.']
+            for field in ('username', 'password')
+            if not isinstance(data.get(field), str) or not data[field]
+        }
+        if missing:
+            raise exceptions.ValidationError(missing)
+
+        user = await User.objects.filter(
+            username=data['username']
+        ).afirst()
+
+        if user is None:
+            # Calcula um hash mesmo assim, para que o tempo de resposta não
+            # revele quais titulares existem.
+            await ahash_password(data['password'])
+            valid = False
+        else:
+            valid = await acheck_password(user, data['password'])
+
+        if not valid or not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'No active account found with the given credentials'
+            )
+
+        serializer_class = import_string(
+            jwt_api_settings.TOKEN_OBTAIN_SERIALIZER
+        )
+        refresh = serializer_class.get_token(user)
+
+        return self.render({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        })
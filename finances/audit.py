@@ -0,0 +1,491 @@
+"""
+Auditoria dos valores desnormalizados: o saldo das contas
+(`Account.balance`) e o gasto dos orçamentos (`Budget.spent`).
+
+As contas, os orçamentos e as transações são lidos em páginas ordenadas pela
+conta (paginação por chave, sem OFFSET), e as três sequências são
+percorridas juntas, uma conta por vez. A memória usada depende apenas do
+tamanho das páginas e da quantidade de orçamentos de uma conta, e não da
+quantidade de transações.
+
+Para cada orçamento, o gasto esperado é a soma das transações da mesma conta
+e categoria no período do orçamento, como em `Budget.update_spent`. Para
+cada conta, o saldo esperado é o saldo de abertura registrado em
+`BalanceCheckpoint` menos a soma das transações da conta. Na primeira
+auditoria de uma conta, o saldo de abertura é calculado a partir do saldo
+atual.
+
+As transações dos meses desanexados (`finances.partitions`) são lidas das
+tabelas dos meses, em páginas, como as da tabela principal. As dos meses
+arquivados (`finances.archive`) entram no saldo pelo total de cada arquivo;
+os arquivos só são descomprimidos quando o mês cruza o período de um
+orçamento da conta.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time
+from decimal import Decimal
+from multiprocessing import get_context
+
+from django.db import connections, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+CHUNK_SIZE = 5000
+
+
+def after(keys, values):
+    """
+    Monta o filtro que seleciona os registros posteriores a `values` na
+    ordem das colunas `keys`. A condição `>=` na primeira coluna, redundante,
+    permite que o banco comece a leitura do índice a partir da última chave.
+
+    Exemplo de Uso:
+        >>> print(after(['id'], (3,)))
+        (AND: ('id__gte', 3), ('id__gt', 3))
+    """
+
+    condition = Q()
+    for index, key in enumerate(keys):
+        equal = {name: value for name, value in zip(keys[:index], values)}
+        condition |= Q(**equal, **{f'{key}__gt': values[index]})
+
+    return Q(**{f'{keys[0]}__gte': values[0]}) & condition
+
+
+def stream(queryset, keys, fields, chunk_size=CHUNK_SIZE):
+    """
+    Percorre um queryset em páginas de `chunk_size` registros, ordenadas
+    pelas colunas `keys`, buscando cada página a partir da última chave lida.
+
+    Parâmetros:
+        queryset: O queryset a ser percorrido.
+        keys: As colunas da ordenação, que devem identificar os registros.
+        fields: As demais colunas lidas.
+        chunk_size: A quantidade de registros por página.
+
+    Retorna:
+        Generator: Tuplas com as colunas de `keys` seguidas das de `fields`.
+    """
+
+    queryset = queryset.order_by(*keys).values_list(*keys, *fields)
+    last = None
+
+    while True:
+        page = queryset if last is None else queryset.filter(
+            after(keys, last)
+        )
+        rows = list(page[:chunk_size])
+
+        yield from rows
+
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][:len(keys)]
+
+
+def stream_partition(using, table, first=None, last=None,
+                     chunk_size=CHUNK_SIZE):
+    """
+    Percorre as transações de uma partição desanexada em páginas ordenadas
+    pela conta e pelo ID, como `stream`.
+
+    Parâmetros:
+        using: O alias do banco.
+        table: O nome da tabela da partição.
+        first: O menor ID de conta, ou None.
+        last: O maior ID de conta, ou None.
+        chunk_size: A quantidade de registros por página.
+
+    Retorna:
+        Generator: Tuplas com a conta, o ID, a categoria, a data e o valor
+        de cada transação.
+    """
+
+    from finances.models import Transaction
+
+    quote = connections[using].ops.quote_name
+
+    conditions, params = ['account_id IS NOT NULL'], []
+    if first is not None:
+        conditions.append('account_id >= %s')
+        params.append(first)
+    if last is not None:
+        conditions.append('account_id <= %s')
+        params.append(last)
+
+    key = None
+
+    while True:
+        where, page_params = list(conditions), list(params)
+        if key is not None:
+            where.append('(account_id > %s OR (account_id = %s AND id > %s))')
+            page_params.extend([key[0], key[0], key[1]])
+
+        rows = [
+            (
+                instance.account_id, instance.pk, instance.category_id,
+                instance.date, instance.amount
+            )
+            for instance in Transaction.objects.using(using).raw(
+                f'SELECT id, account_id, category_id, date, amount '
+                f'FROM {quote(table)} WHERE {" AND ".join(where)} '
+                f'ORDER BY account_id, id LIMIT %s',
+                [*page_params, chunk_size]
+            )
+        ]
+
+        yield from rows
+
+        if len(rows) < chunk_size:
+            return
+        key = rows[-1][:2]
+
+
+def day_start(value):
+    """
+    Converte uma data no início do dia no fuso horário padrão, como o ORM
+    faz ao comparar uma data com um campo de data e hora.
+    """
+
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def audit_range(using, first=None, last=None, fix=False,
+                chunk_size=CHUNK_SIZE):
+    """
+    Audita as contas com ID entre `first` e `last`, inclusive.
+
+    Parâmetros:
+        using: O alias do banco.
+        first: O menor ID de conta, ou None.
+        last: O maior ID de conta, ou None.
+        fix: Se True, corrige os saldos e os gastos divergentes.
+        chunk_size: A quantidade de registros por página.
+
+    Retorna:
+        dict: A quantidade de contas, orçamentos e transações auditados, de
+        saldos de abertura registrados e a lista das divergências
+        encontradas.
+    """
+
+    from finances.archive import unpack
+    from finances.models import (
+        Account,
+        BalanceCheckpoint,
+        Budget,
+        Transaction,
+        TransactionArchive,
+        TransactionPartition
+    )
+    from finances.partitions import period_bounds
+
+    def in_range(field):
+        condition = Q(**{f'{field}__isnull': False})
+        if first is not None:
+            condition &= Q(**{f'{field}__gte': first})
+        if last is not None:
+            condition &= Q(**{f'{field}__lte': last})
+        return condition
+
+    accounts = stream(
+        Account.objects.using(using).filter(in_range('id')),
+        ['id'],
+        ['balance', 'checkpoint__opening_balance'],
+        chunk_size
+    )
+    budgets = AccountRows(stream(
+        Budget.objects.using(using).filter(in_range('account_id')),
+        ['account_id', 'id'],
+        ['category_id', 'start_date', 'end_date', 'spent'],
+        chunk_size
+    ))
+    transactions = AccountRows(stream(
+        Transaction.objects.using(using).filter(in_range('account_id')),
+        ['account_id', 'id'],
+        ['category_id', 'date', 'amount'],
+        chunk_size
+    ))
+    partitions = [
+        AccountRows(stream_partition(using, table, first, last, chunk_size))
+        for table in TransactionPartition.objects.using(using).order_by(
+            'period'
+        ).values_list('table_name', flat=True)
+    ]
+    archives = AccountRows(stream(
+        TransactionArchive.objects.using(using).filter(
+            in_range('account_id')
+        ),
+        ['account_id', 'id'],
+        ['period', 'rows', 'total'],
+        chunk_size
+    ))
+
+    report = {
+        'accounts': 0,
+        'budgets': 0,
+        'transactions': 0,
+        'checkpoints': 0,
+        'drift': [],
+    }
+    checkpoints = []
+
+    for account_id, balance, opening in accounts:
+        report['accounts'] += 1
+
+        by_category = {}
+        for _, pk, category_id, start, end, spent in budgets.take(account_id):
+            by_category.setdefault(category_id, []).append(
+                [pk, day_start(start), day_start(end), spent, Decimal(0)]
+            )
+            report['budgets'] += 1
+
+        def spend(category_id, date, amount):
+            for budget in by_category.get(category_id, ()):
+                if budget[1] <= date <= budget[2]:
+                    budget[4] += amount
+
+        total = Decimal(0)
+        for rows in (transactions, *partitions):
+            for _, _, category_id, date, amount in rows.take(account_id):
+                total += amount
+                report['transactions'] += 1
+                spend(category_id, date, amount)
+
+        for _, pk, period, rows, archived in archives.take(account_id):
+            total += archived
+            report['transactions'] += rows
+
+            start, end = period_bounds(period)
+            if any(
+                budget[1] < end and budget[2] >= start
+                for bs in by_category.values() for budget in bs
+            ):
+                archive = TransactionArchive.objects.using(using).get(pk=pk)
+                for instance in unpack(archive):
+                    spend(instance.category_id, instance.date, instance.amount)
+
+        for budget in (b for bs in by_category.values() for b in bs):
+            if budget[3] != budget[4]:
+                report['drift'].append({
+                    'model': 'budget',
+                    'pk': budget[0],
+                    'recorded': budget[3],
+                    'expected': budget[4],
+                })
+
+        if opening is None:
+            checkpoints.append(BalanceCheckpoint(
+                account_id=account_id,
+                opening_balance=balance + total
+            ))
+        elif opening - total != balance:
+            report['drift'].append({
+                'model': 'account',
+                'pk': account_id,
+                'recorded': balance,
+                'expected': opening - total,
+            })
+
+        if len(checkpoints) >= chunk_size:
+            report['checkpoints'] += save_checkpoints(checkpoints, using)
+            checkpoints = []
+
+    report['checkpoints'] += save_checkpoints(checkpoints, using)
+
+    if fix:
+        fix_drift(report['drift'], using)
+
+    return report
+
+
+class AccountRows:
+    """
+    Sequência de registros ordenados pela conta que entrega, a cada chamada
+    de `take`, apenas os registros de uma conta. As contas devem ser pedidas
+    em ordem crescente.
+    """
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.pending = next(self.rows, None)
+
+    def take(self, account_id):
+        while self.pending is not None and self.pending[0] < account_id:
+            self.pending = next(self.rows, None)
+
+        while self.pending is not None and self.pending[0] == account_id:
+            yield self.pending
+            self.pending = next(self.rows, None)
+
+
+def audit_unassigned(using, fix=False):
+    """
+    Audita os orçamentos sem conta, cujo gasto esperado é zero, como em
+    `Budget.update_spent`.
+
+    Retorna:
+        list: As divergências encontradas.
+    """
+
+    from finances.models import Budget
+
+    drift = [
+        {'model': 'budget', 'pk': pk, 'recorded': spent, 'expected': 0}
+        for pk, spent in Budget.objects.using(using).filter(
+            account__isnull=True
+        ).exclude(spent=0).values_list('pk', 'spent')
+    ]
+
+    if fix:
+        fix_drift(drift, using)
+
+    return drift
+
+
+def save_checkpoints(checkpoints, using):
+    """
+    Registra os saldos de abertura das contas auditadas pela primeira vez.
+
+    Retorna:
+        int: A quantidade de saldos registrados.
+    """
+
+    from finances.models import BalanceCheckpoint
+
+    BalanceCheckpoint.objects.using(using).bulk_create(
+        checkpoints,
+        ignore_conflicts=True
+    )
+
+    return len(checkpoints)
+
+
+def fix_drift(drift, using):
+    """
+    Grava os valores esperados nas contas e nos orçamentos divergentes,
+    incrementando a versão dos registros e registrando as alterações em
+    `finances.changes`. A correção do saldo de uma conta é gravada no
+    livro-razão como um ajuste.
+
+    Parâmetros:
+        drift: As divergências encontradas por `audit_range`.
+        using: O alias do banco.
+    """
+
+    from finances.aggregates import invalidate
+    from finances.changes import record_change
+    from finances.ledger import record_entry
+    from finances.models import Account, Budget, LedgerEntry
+
+    models = {'account': (Account, 'balance'), 'budget': (Budget, 'spent')}
+
+    with transaction.atomic(using=using):
+        for item in drift:
+            model, field = models[item['model']]
+            model.objects.using(using).filter(pk=item['pk']).update(
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+                **{field: item['expected']}
+            )
+            instance = model.objects.using(using).get(pk=item['pk'])
+            record_change(instance)
+            invalidate(instance)
+
+            if model is Account:
+                record_entry(
+                    item['pk'],
+                    using,
+                    item['expected'] - item['recorded'],
+                    LedgerEntry.ADJUSTMENT
+                )
+
+
+def account_ranges(using, workers):
+    """
+    Divide as contas de um banco em até `workers` faixas contíguas de IDs.
+
+    Retorna:
+        list: Tuplas com o primeiro e o último ID de cada faixa.
+    """
+
+    from finances.models import Account
+
+    bounds = Account.objects.using(using).aggregate(
+        first=Min('id'),
+        last=Max('id')
+    )
+    if bounds['first'] is None:
+        return []
+
+    first, last = bounds['first'], bounds['last']
+    size = max((last - first + 1 + workers - 1) // workers, 1)
+
+    return [
+        (start, min(start + size - 1, last))
+        for start in range(first, last + 1, size)
+    ]
+
+
+def audit_worker(using, first, last, fix, chunk_size):
+    """
+    Executa `audit_range` em um processo do pool, com conexões próprias.
+    """
+
+    connections.close_all()
+    try:
+        return audit_range(using, first, last, fix, chunk_size)
+    finally:
+        connections.close_all()
+
+
+def audit(using='default', workers=1, fix=False, chunk_size=CHUNK_SIZE):
+    """
+    Audita todas as contas de um banco. Com `workers` maior que 1, as contas
+    são divididas em faixas de IDs auditadas em paralelo por um pool de
+    processos.
+
+    Parâmetros:
+        using: O alias do banco.
+        workers: A quantidade de processos.
+        fix: Se True, corrige os saldos e os gastos divergentes.
+        chunk_size: A quantidade de registros por página.
+
+    Retorna:
+        dict: O relatório combinado, no formato de `audit_range`.
+    """
+
+    unassigned = audit_unassigned(using, fix)
+
+    if workers <= 1:
+        report = audit_range(using, fix=fix, chunk_size=chunk_size)
+        report['drift'].extend(unassigned)
+        return report
+
+    ranges = account_ranges(using, workers)
+
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context('fork')
+    ) as executor:
+        reports = list(executor.map(
+            audit_worker,
+            *zip(*[
+                (using, first, last, fix, chunk_size)
+                for first, last in ranges
+            ])
+        ))
+
+    combined = {
+        'accounts': 0,
+        'budgets': 0,
+        'transactions': 0,
+        'checkpoints': 0,
+        'drift': unassigned,
+    }
+    for report in reports:
+        for key, value in report.items():
+            combined[key] += value
+
+    return combined
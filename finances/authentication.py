@@ -0,0 +1,320 @@
+"""
+Autenticação JWT sem consulta ao banco na maioria das solicitações.
+
+Os tokens emitidos por `/api/token/` levam, além do ID do titular, as
+permissões usadas pelas views (`is_staff` e `is_active`) e a versão das
+credenciais (`auth_version`): um resumo HMAC da senha e dessas permissões.
+A versão muda sempre que a senha ou as permissões do titular mudam.
+
+`StatelessJWTAuthentication` valida a assinatura do token e procura o
+titular em um cache LRU do processo, com tempo de vida (`USER_CACHE`). Se o
+titular estiver no cache com a mesma versão do token, a solicitação não
+consulta o banco. Caso contrário, o titular é lido do banco e guardado no
+cache, e o token é recusado se a versão não for mais a atual: alterar a
+senha ou as permissões revoga os tokens emitidos antes da alteração.
+
+As alterações de titulares removem a entrada do cache do processo que as
+fez. Nos demais processos, um titular alterado continua aceito com os dados
+antigos por, no máximo, `TTL_SECONDS`. Os tokens sem a versão, emitidos antes
+desse modo, são autenticados com uma consulta ao banco, como em
+`JWTAuthentication`.
+
+Os clientes repetem o mesmo token de acesso durante todo o seu tempo de
+vida. Por isso, os tokens já validados também ficam em um cache LRU do
+processo (`TOKEN_CACHE`), com a chave SHA-256 do token, até o seu `exp`: a
+repetição de um token não decodifica o JSON nem verifica a assinatura
+novamente. Apenas a validação do token fica no cache; o titular continua
+sendo conferido a cada solicitação.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.crypto import salted_hmac
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+VERSION_CLAIM = 'auth_version'
+
+DEFAULTS = {
+    'USER_CACHE': {
+        'MAX_SIZE': 1024,
+        'TTL_SECONDS': 60,
+    },
+    'TOKEN_CACHE': {
+        'MAX_SIZE': 4096,
+    },
+}
+
+
+def get_config(name):
+    """
+    Retorna a configuração de um dos caches da autenticação
+    (`USER_CACHE` ou `TOKEN_CACHE`), definida em `settings`, completada com
+    os valores padrão.
+    """
+
+    return {**DEFAULTS[name], **getattr(settings, name, {})}
+
+
+def auth_version(user):
+    """
+    Retorna a versão das credenciais de um titular.
+
+    Parâmetros:
+        user: O titular.
+
+    Retorna:
+        str: O resumo HMAC da senha e das permissões do titular.
+    """
+
+    return salted_hmac(
+        'finances.authentication.auth_version',
+        f'{user.password}:{user.is_active}:{user.is_staff}:'
+        f'{user.is_superuser}',
+        algorithm='sha256'
+    ).hexdigest()[:32]
+
+
+class LRUCache:
+    """
+    Cache LRU com expiração por entrada, compartilhado pelas threads do
+    processo.
+
+    Atributos:
+        max_size: A quantidade máxima de entradas no cache.
+
+    Métodos:
+        get: Retorna o valor guardado em uma chave.
+        set: Guarda um valor até um instante.
+        evict: Remove uma chave.
+        clear: Remove todas as chaves.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Retorna o valor guardado em uma chave, ou None se a chave não
+        estiver no cache ou a entrada tiver expirado.
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires <= time.time():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires):
+        """
+        Guarda um valor até o instante `expires` (em segundos desde a época),
+        removendo a entrada usada há mais tempo se o cache estiver cheio.
+        """
+
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        """
+        Remove uma chave do cache.
+        """
+
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove todas as chaves do cache.
+        """
+
+        with self.lock:
+            self.entries.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name):
+    """
+    Retorna um dos caches da autenticação do processo (`USER_CACHE` ou
+    `TOKEN_CACHE`), criado com a sua configuração no primeiro uso.
+    """
+
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = LRUCache(get_config(name)['MAX_SIZE'])
+        return _caches[name]
+
+
+def evict_user(sender, instance, **kwargs):
+    """
+    Receptor dos sinais `post_save` e `post_delete` de `User` que remove o
+    titular alterado do cache.
+    """
+
+    get_cache('USER_CACHE').evict(instance.pk)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer de `/api/token/` que inclui as permissões e a versão das
+    credenciais do titular nos tokens.
+
+    Métodos:
+        get_token: Retorna o token de atualização do titular.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        """
+        Retorna o token de atualização do titular, com as declarações
+        `is_staff`, `is_active` e `auth_version`, copiadas para os tokens de
+        acesso emitidos a partir dele.
+
+        Parâmetros:
+            user: O titular autenticado.
+
+        Retorna:
+            RefreshToken: O token de atualização.
+        """
+
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        token['is_active'] = user.is_active
+        token[VERSION_CLAIM] = auth_version(user)
+
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que obtém o titular do cache do processo, sem consultar
+    o banco, quando a versão das credenciais do token é a do titular em
+    cache.
+
+    Métodos:
+        get_validated_token: Retorna o token validado.
+        get_user: Retorna o titular do token.
+    """
+
+    def get_validated_token(self, raw_token):
+        """
+        Retorna o token validado, do cache ou validando a assinatura e as
+        declarações do token.
+
+        Parâmetros:
+            raw_token: O token recebido no cabeçalho `Authorization`.
+
+        Retorna:
+            Token: O token validado.
+
+        Raises:
+            InvalidToken: Se o token for inválido ou tiver expirado.
+        """
+
+        token_cache = get_cache('TOKEN_CACHE')
+        key = hashlib.sha256(raw_token).digest()
+
+        validated_token = token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(key, validated_token, validated_token['exp'])
+
+        return validated_token
+
+    def get_user(self, validated_token):
+        """
+        Retorna o titular do token, do cache ou do banco.
+
+        Parâmetros:
+            validated_token: O token com a assinatura já validada.
+
+        Retorna:
+            User: Uma cópia do titular, que a view pode alterar sem afetar o
+            cache.
+
+        Raises:
+            InvalidToken: Se o token não identificar o titular.
+            AuthenticationFailed: Se o titular não existir, estiver inativo
+            ou se as credenciais tiverem mudado desde a emissão do token.
+        """
+
+        version = validated_token.get(VERSION_CLAIM)
+        if version is None:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+
+        if validated_token.get('is_active') is False:
+            raise AuthenticationFailed(
+                'User is inactive',
+                code='user_inactive'
+            )
+
+        user_cache = get_cache('USER_CACHE')
+        entry = user_cache.get(user_id)
+
+        if entry is None or entry[1] != version:
+            User = get_user_model()
+            try:
+                user = User.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except User.DoesNotExist:
+                raise AuthenticationFailed(
+                    'User not found',
+                    code='user_not_found'
+                )
+
+            entry = (user, auth_version(user))
+            user_cache.set(
+                user.pk,
+                entry,
+                time.time() + get_config('USER_CACHE')['TTL_SECONDS']
+            )
+
+        user, current = entry
+
+        if current != version:
+            raise AuthenticationFailed(
+                'The user credentials have changed.',
+                code='credentials_changed'
+            )
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'User is inactive',
+                code='user_inactive'
+            )
+
+        return copy.copy(user)
@@ -0,0 +1,335 @@
+"""
+Execução de várias operações da API em uma única solicitação.
+
+O endpoint `/api/batch/` recebe uma lista ordenada de operações, cada uma com
+o método, o caminho de um endpoint de `finances.urls`, o corpo e cabeçalhos
+opcionais. Cada operação é executada pela view do seu endpoint, com as mesmas
+validações e permissões, mas sem uma nova autenticação: o usuário autenticado
+na solicitação do lote é repassado às operações.
+
+Por padrão (`atomic`), as operações são executadas em uma transação aberta
+no banco principal e em cada shard, e a primeira operação com status 4xx ou
+5xx interrompe o lote e desfaz as anteriores. Os bancos são confirmados um
+após o outro, sem confirmação em duas fases. Com `atomic` falso, cada
+operação é independente e todas são executadas.
+
+Com `parallel`, as leituras (GET e HEAD) consecutivas são executadas ao mesmo
+tempo, cada uma em uma thread com a sua conexão e com uma cópia do contexto
+da solicitação, para que o shard do titular e a fixação no banco principal
+(`finances.routers`) continuem valendo. Em um lote atômico, apenas as
+leituras anteriores à primeira escrita são executadas assim, pois as demais
+precisam ver as escritas ainda não confirmadas do lote.
+"""
+
+import contextvars
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+from finances.database import retry_on_lock
+from finances.routers import get_shards
+
+MAX_WORKERS = 8
+
+METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+RESPONSE_HEADERS = ('ETag', 'Location', 'Idempotent-Replayed')
+
+
+class RolledBack(Exception):
+    """
+    Exceção usada para desfazer a transação de um lote atômico, com as
+    respostas das operações executadas até a falha.
+    """
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+
+
+def max_requests():
+    """
+    Retorna a quantidade máxima de operações de um lote, definida em
+    `settings.BATCH_MAX_REQUESTS` (50 por padrão).
+    """
+
+    return getattr(settings, 'BATCH_MAX_REQUESTS', 50)
+
+
+def resolve_view(path):
+    """
+    Encontra a view síncrona de `finances.views` que atende um caminho.
+
+    Parâmetros:
+        path: O caminho do endpoint, sem a query string.
+
+    Retorna:
+        ResolverMatch | None: O resultado da resolução, ou None se o caminho
+        não for de um endpoint que possa ser usado em um lote.
+    """
+
+    from finances.views import BatchAPIView
+
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+
+    view_class = getattr(match.func, 'view_class', None)
+    if view_class is None or not issubclass(view_class, APIView) or \
+            view_class.__module__ != 'finances.views' or \
+            issubclass(view_class, BatchAPIView):
+        return None
+
+    return match
+
+
+def parse_operations(data):
+    """
+    Valida as operações de um lote.
+
+    Parâmetros:
+        data: O corpo da solicitação do lote.
+
+    Retorna:
+        list: As operações, cada uma com as chaves id, method, path, query,
+        body, headers e match.
+
+    Raises:
+        ValidationError: Se alguma operação for inválida.
+    """
+
+    items = data.get('requests') if isinstance(data, dict) else None
+
+    if not isinstance(items, list) or not items:
+        raise ValidationError({'requests': ['Send a list of requests.']})
+
+    if len(items) > max_requests():
+        raise ValidationError({'requests': [
+            f'Ensure this list has no more than {max_requests()} requests.'
+        ]})
+
+    operations = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValidationError({'requests': {index: ['Invalid request.']}})
+
+        method = str(item.get('method', 'GET')).upper()
+        url = urlsplit(str(item.get('path', '')))
+        headers = item.get('headers') or {}
+        match = resolve_view(url.path)
+
+        errors = []
+        if method not in METHODS:
+            errors.append(f'Unsupported method: {method}.')
+        if match is None:
+            errors.append(f'Unknown or unsupported path: {url.path}.')
+        if not isinstance(headers, dict):
+            errors.append('Headers must be an object.')
+        if errors:
+            raise ValidationError({'requests': {index: errors}})
+
+        operations.append({
+            'id': item.get('id', index),
+            'method': method,
+            'path': url.path,
+            'query': url.query,
+            'body': item.get('body'),
+            'headers': headers,
+            'match': match,
+        })
+
+    return operations
+
+
+def build_request(parent, operation):
+    """
+    Monta a solicitação de uma operação, autenticada com o usuário e o token
+    da solicitação do lote.
+
+    Parâmetros:
+        parent: A solicitação do lote.
+        operation: A operação.
+
+    Retorna:
+        WSGIRequest: A solicitação da operação.
+    """
+
+    body = b''
+    if operation['body'] is not None:
+        body = json.dumps(operation['body'], cls=JSONEncoder).encode()
+
+    environ = {
+        key: value
+        for key, value in parent.META.items()
+        if key in ('SERVER_NAME', 'SERVER_PORT', 'REMOTE_ADDR', 'HTTP_HOST')
+    }
+    environ.update({
+        'REQUEST_METHOD': operation['method'],
+        'PATH_INFO': operation['path'],
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': operation['query'],
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.url_scheme': parent.scheme,
+    })
+    for name, value in operation['headers'].items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = str(value)
+
+    request = WSGIRequest(environ)
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+
+    return request
+
+
+def execute(parent, operation):
+    """
+    Executa uma operação pela view do seu endpoint.
+
+    Parâmetros:
+        parent: A solicitação do lote.
+        operation: A operação.
+
+    Retorna:
+        dict: O ID da operação, o status, os cabeçalhos relevantes e o corpo
+        da resposta.
+    """
+
+    match = operation['match']
+    response = match.func(
+        build_request(parent, operation),
+        *match.args,
+        **match.kwargs
+    )
+
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+
+    body = None
+    if response.content:
+        try:
+            body = json.loads(response.content)
+        except ValueError:
+            body = response.content.decode(errors='replace')
+
+    return {
+        'id': operation['id'],
+        'status': response.status_code,
+        'headers': {
+            name: response[name]
+            for name in RESPONSE_HEADERS
+            if response.has_header(name)
+        },
+        'body': body,
+    }
+
+
+def execute_in_thread(parent, operation):
+    """
+    Executa uma leitura em uma thread do lote e fecha as conexões da thread.
+    """
+
+    try:
+        return execute(parent, operation)
+    finally:
+        connections.close_all()
+
+
+def run_operations(parent, operations, parallel, atomic):
+    """
+    Executa as operações em ordem, com as leituras consecutivas ao mesmo
+    tempo se `parallel` for verdadeiro.
+
+    Raises:
+        RolledBack: Se `atomic` for verdadeiro e uma operação falhar.
+    """
+
+    responses = []
+    wrote = False
+    index = 0
+
+    while index < len(operations):
+        end = index + 1
+        if parallel and operations[index]['method'] in SAFE_METHODS and \
+                not (atomic and wrote):
+            while end < len(operations) and \
+                    operations[end]['method'] in SAFE_METHODS:
+                end += 1
+
+        group = operations[index:end]
+        if len(group) > 1:
+            with ThreadPoolExecutor(min(len(group), MAX_WORKERS)) as executor:
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        execute_in_thread,
+                        parent,
+                        operation
+                    )
+                    for operation in group
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [execute(parent, group[0])]
+
+        for operation, result in zip(group, results):
+            responses.append(result)
+            wrote = wrote or operation['method'] not in SAFE_METHODS
+
+            if atomic and result['status'] >= 400:
+                raise RolledBack(responses)
+
+        index = end
+
+    return responses
+
+
+@retry_on_lock(using=lambda *args: ['default', *get_shards()])
+def run_atomic(parent, operations, parallel):
+    """
+    Executa as operações em uma transação no banco principal e em cada
+    shard (aberta por `retry_on_lock`), desfeita se uma operação falhar.
+    """
+
+    return run_operations(parent, operations, parallel, atomic=True)
+
+
+def run_batch(parent, operations, atomic=True, parallel=False):
+    """
+    Executa as operações de um lote.
+
+    Parâmetros:
+        parent: A solicitação do lote.
+        operations: As operações validadas por `parse_operations`.
+        atomic: Se True, executa as operações em uma transação e interrompe o
+        lote na primeira falha.
+        parallel: Se True, executa as leituras consecutivas ao mesmo tempo.
+
+    Retorna:
+        tuple: As respostas das operações executadas e se o lote foi
+        interrompido por uma falha (e as escritas desfeitas).
+    """
+
+    writes = any(
+        operation['method'] not in SAFE_METHODS for operation in operations
+    )
+
+    try:
+        if atomic and writes:
+            return run_atomic(parent, operations, parallel), False
+
+        return run_operations(parent, operations, parallel, atomic), False
+    except RolledBack as exc:
+        return exc.responses, True
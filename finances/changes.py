@@ -0,0 +1,302 @@
+"""
+Registro de alterações para a sincronização incremental dos clientes.
+
+Cada criação, alteração ou exclusão de uma conta, transação, orçamento ou
+categoria grava um registro em `ChangeLog`, no banco principal (ou no banco
+do objeto, se não for um shard), e remove o registro anterior do mesmo
+objeto. Assim a tabela guarda um registro por
+objeto, inclusive dos excluídos (lápides), e o ID crescente dos registros
+ordena as alterações, independentemente do shard do titular.
+
+As gravações feitas com `save()` e as exclusões de contas, orçamentos e
+categorias são registradas pelos sinais `post_save` e `post_delete`; as
+feitas com `QuerySet.update()` (`VersionedModel.update_versioned`, o saldo
+da conta em uma transação nova e as correções da auditoria) e as exclusões
+de transações chamam `record_change` diretamente. As transações arquivadas
+(`finances.archive`) não são registradas como excluídas, e as transações e
+os orçamentos de uma conta excluída devem ser descartados pelo cliente junto
+com a conta. As exclusões feitas dentro de `recording_paused()`, como a
+remoção do shard de origem ao mover um titular, não são registradas.
+
+O endpoint `/api/changes/?since=<cursor>` retorna, em ordem de cursor, os
+registros do titular e das categorias posteriores ao cursor, com os dados
+atuais de cada objeto.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from finances.routers import get_shards
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+_paused = ContextVar('finances_changes_paused', default=False)
+
+
+def settle_seconds():
+    """
+    Retorna por quantos segundos uma alteração fica fora das respostas,
+    definido em `settings.CHANGE_FEED_SETTLE_SECONDS` (1 por padrão).
+
+    Os IDs são atribuídos na gravação e não na confirmação da transação, de
+    forma que uma alteração ainda não confirmada pode receber um ID menor
+    que o de outra já entregue ao cliente. Aguardar esse intervalo evita que
+    o cursor do cliente passe por ela.
+    """
+
+    return getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 1)
+
+
+def owner_of(instance):
+    """
+    Retorna o ID do titular de uma conta, transação ou orçamento, ou None
+    para as categorias e os orçamentos sem conta.
+    """
+
+    from finances.models import Account
+
+    name = instance._meta.model_name
+
+    if name == 'account':
+        return instance.owner_id
+    if name == 'category' or instance.account_id is None:
+        return None
+
+    if instance._meta.get_field('account').is_cached(instance):
+        return instance.account.owner_id
+
+    return Account.objects.using(instance._state.db).filter(
+        pk=instance.account_id
+    ).values_list('owner_id', flat=True).first()
+
+
+def record_change(instance, deleted=False):
+    """
+    Registra a alteração ou a exclusão de uma conta, transação, orçamento ou
+    categoria, substituindo o registro anterior do objeto.
+
+    O registro é gravado no banco principal se o objeto estiver em um shard,
+    ou no próprio banco do objeto. As cópias das categorias gravadas nos
+    shards por `replicate` não são registradas, pois a categoria já foi
+    registrada ao ser gravada no banco principal.
+
+    Parâmetros:
+        instance: O objeto alterado.
+        deleted: Se True, registra a exclusão do objeto.
+    """
+
+    from finances.models import ChangeLog
+
+    name = instance._meta.model_name
+    using = instance._state.db or 'default'
+
+    if using in get_shards():
+        if name == 'category':
+            return
+        using = 'default'
+
+    changes = ChangeLog.objects.using(using)
+
+    with transaction.atomic(using=using):
+        changes.filter(model=name, object_id=instance.pk).delete()
+        changes.create(
+            model=name,
+            object_id=instance.pk,
+            owner_id=owner_of(instance),
+            deleted=deleted
+        )
+
+
+def record_changes(instances, owner_id):
+    """
+    Registra a alteração de vários objetos de um mesmo titular, substituindo
+    os registros anteriores com uma exclusão e uma inserção por modelo.
+
+    Parâmetros:
+        instances: As contas, transações e orçamentos alterados.
+        owner_id: O ID do titular dos objetos.
+    """
+
+    from finances.models import ChangeLog
+
+    ids = {}
+    for instance in instances:
+        ids.setdefault(instance._meta.model_name, []).append(instance.pk)
+
+    changes = ChangeLog.objects.using('default')
+
+    with transaction.atomic(using='default'):
+        for name, object_ids in ids.items():
+            changes.filter(model=name, object_id__in=object_ids).delete()
+            changes.bulk_create(
+                ChangeLog(model=name, object_id=object_id, owner_id=owner_id)
+                for object_id in object_ids
+            )
+
+
+@contextmanager
+def recording_paused():
+    """
+    Gerenciador de contexto que suspende o registro das alterações feito
+    pelos sinais `post_save` e `post_delete`.
+
+    Exemplo de Uso:
+        with recording_paused():
+            Account.objects.using(source).filter(pk__in=ids).delete()
+    """
+
+    token = _paused.set(True)
+    try:
+        yield
+    finally:
+        _paused.reset(token)
+
+
+def record_saved(sender, instance, raw=False, **kwargs):
+    """
+    Receptor do sinal `post_save` que registra a alteração do objeto.
+    """
+
+    if not raw and not _paused.get():
+        record_change(instance)
+
+
+def record_deleted(sender, instance, **kwargs):
+    """
+    Receptor do sinal `post_delete` que registra a exclusão do objeto.
+    """
+
+    if not _paused.get():
+        record_change(instance, deleted=True)
+
+
+def cursor_params(request):
+    """
+    Lê os parâmetros de consulta `?since=` (o cursor, 0 por padrão) e
+    `?limit=` (`PAGE_SIZE` por padrão, até `MAX_PAGE_SIZE`) de uma
+    solicitação.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+
+    Retorna:
+        tuple: O cursor e a quantidade máxima de alterações.
+
+    Raises:
+        ValidationError: Se algum valor for inválido.
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+    values = {}
+
+    for name, default, maximum in (
+        ('since', 0, None),
+        ('limit', PAGE_SIZE, MAX_PAGE_SIZE),
+    ):
+        try:
+            values[name] = int(query_params.get(name, default))
+        except ValueError:
+            values[name] = -1
+
+        if values[name] < (1 if name == 'limit' else 0) or \
+                (maximum is not None and values[name] > maximum):
+            raise ValidationError({name: ['Invalid value.']})
+
+    return values['since'], values['limit']
+
+
+def changes_since(user, since, limit):
+    """
+    Retorna as alterações dos objetos do titular e das categorias
+    posteriores ao cursor, com os dados atuais dos objetos.
+
+    Os objetos são lidos com uma consulta por modelo. Um objeto registrado
+    como alterado que não existe mais (por exemplo, excluído junto com a
+    conta) é retornado como excluído.
+
+    Parâmetros:
+        user: O titular.
+        since: O cursor da última alteração recebida pelo cliente.
+        limit: A quantidade máxima de alterações.
+
+    Retorna:
+        tuple: A lista de alterações, o cursor da última alteração
+        retornada e se há mais alterações após ela.
+    """
+
+    from finances.models import (
+        Account, Budget, Category, ChangeLog, Transaction
+    )
+    from finances.serializers import (
+        AccountSerializer,
+        BudgetSerializer,
+        CategorySerializer,
+        TransactionSerializer
+    )
+
+    rows = list(
+        ChangeLog.objects.filter(
+            Q(owner_id=user.pk) | Q(model='category'),
+            id__gt=since
+        ).order_by('id').values_list(
+            'id', 'model', 'object_id', 'deleted', 'changed_at'
+        )[:limit + 1]
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    horizon = timezone.now() - timedelta(seconds=settle_seconds())
+    for index, row in enumerate(rows):
+        if row[4] > horizon:
+            rows = rows[:index]
+            has_more = False
+            break
+
+    models = {
+        'account': (
+            Account.objects.filter(owner_id=user.pk),
+            AccountSerializer
+        ),
+        'transaction': (
+            Transaction.objects.filter(account__owner_id=user.pk),
+            TransactionSerializer
+        ),
+        'budget': (
+            Budget.objects.filter(account__owner_id=user.pk),
+            BudgetSerializer
+        ),
+        'category': (Category.objects.all(), CategorySerializer),
+    }
+
+    data = {}
+    for name, (queryset, serializer_class) in models.items():
+        ids = [row[2] for row in rows if row[1] == name and not row[3]]
+        if ids:
+            data[name] = {
+                item['id']: item
+                for item in serializer_class(
+                    queryset.filter(pk__in=ids),
+                    many=True
+                ).data
+            }
+
+    changes = []
+    for cursor, name, object_id, deleted, _ in rows:
+        item = None if deleted else data.get(name, {}).get(object_id)
+        changes.append({
+            'cursor': cursor,
+            'model': name,
+            'id': object_id,
+            'deleted': item is None,
+            'data': item,
+        })
+
+    return changes, rows[-1][0] if rows else since, has_more
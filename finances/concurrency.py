@@ -0,0 +1,80 @@
+import re
+
+from rest_framework.exceptions import ValidationError
+from finances.exceptions import PreconditionFailed
+
+re_etag = re.compile(r'^(?:W/)?"(\d+)"$')
+
+
+def etag_for(instance):
+    """
+    Retorna o ETag que representa a versão atual de um registro.
+
+    Parâmetros:
+        instance: Um registro de um modelo derivado de VersionedModel.
+
+    Retorna:
+        str: O ETag no formato "<versão>".
+    """
+
+    return f'"{instance.version}"'
+
+
+def expected_version(request, instance):
+    """
+    Obtém a versão sobre a qual o cliente fez a edição.
+
+    Se a solicitação trouxer o cabeçalho `If-Match`, a versão informada nele é
+    usada; caso contrário, é usada a versão carregada do banco no início da
+    solicitação.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP, ou None.
+        instance: O registro que será atualizado.
+
+    Retorna:
+        int: A versão esperada do registro.
+
+    Raises:
+        ValidationError: Se o cabeçalho `If-Match` não for um ETag válido.
+        PreconditionFailed: Se a versão informada já estiver desatualizada.
+    """
+
+    if_match = request.headers.get('If-Match') if request else None
+
+    if not if_match or if_match.strip() == '*':
+        return instance.version
+
+    match = re_etag.match(if_match.strip())
+    if not match:
+        raise ValidationError({'If-Match': ['Invalid ETag.']})
+
+    version = int(match.group(1))
+    if version != instance.version:
+        raise PreconditionFailed()
+
+    return version
+
+
+def update_versioned(instance, request, **fields):
+    """
+    Aplica uma atualização condicional à versão esperada do registro.
+
+    Parâmetros:
+        instance: O registro que será atualizado.
+        request: O objeto da solicitação HTTP, ou None.
+        fields: Os campos e os novos valores.
+
+    Retorna:
+        Model: O registro atualizado.
+
+    Raises:
+        PreconditionFailed: Se outra edição alterou o registro antes.
+    """
+
+    version = expected_version(request, instance)
+
+    if not instance.update_versioned(version, **fields):
+        raise PreconditionFailed()
+
+    return instance
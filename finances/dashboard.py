@@ -0,0 +1,153 @@
+"""
+Painel inicial do titular: as contas e o patrimônio líquido, os orçamentos,
+as transações recentes e o total gasto por categoria no mês, em uma única
+resposta.
+
+O painel é montado com uma consulta por parte, sem consultas por registro
+(`select_related` nas relações exibidas e agregação no banco para os totais).
+A lista de contas é lida primeiro, pois os totais por categoria dependem dos
+IDs das contas para incluir as partições desanexadas e os arquivos do mês;
+as demais consultas são independentes e executadas ao mesmo tempo, cada uma
+em uma thread com a sua conexão. Dentro de uma transação aberta, as consultas
+são executadas em sequência, na conexão da transação, pois as outras
+conexões não veriam as escritas ainda não confirmadas.
+
+O resultado fica no cache de agregações por titular e mês
+(`finances.aggregates`) e é montado novamente após qualquer alteração dos
+dados do titular.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections, router
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from finances.aggregates import cached_aggregate, category_totals
+from finances.partitions import month_start, parse_period, period_bounds
+
+RECENT_TRANSACTIONS = 10
+
+
+def period_param(request):
+    """
+    Lê o parâmetro de consulta `?period=` (AAAA-MM, o mês atual por padrão)
+    de uma solicitação.
+
+    Retorna:
+        date: O primeiro dia do mês.
+
+    Raises:
+        ValidationError: Se o período for inválido.
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+    value = query_params.get('period')
+
+    if value is None:
+        return month_start(timezone.localdate())
+
+    try:
+        return parse_period(value)
+    except ValueError:
+        raise ValidationError({'period': ['Invalid period, use YYYY-MM.']})
+
+
+def build_dashboard(user, period):
+    """
+    Monta o painel de um titular.
+
+    Parâmetros:
+        user: O titular.
+        period: O primeiro dia do mês dos totais por categoria.
+
+    Retorna:
+        dict: O titular, as contas, o patrimônio líquido, os orçamentos, as
+        transações recentes e os totais por categoria.
+    """
+
+    from finances.models import Account, Budget, Transaction
+    from finances.serializers import (
+        AccountSerializer,
+        BudgetSerializer,
+        OwnerSerializer,
+        TransactionSerializer
+    )
+
+    using = router.db_for_read(Account)
+    start, end = period_bounds(period)
+
+    accounts = list(
+        Account.objects.using(using).filter(owner_id=user.pk).order_by('pk')
+    )
+    account_ids = [account.pk for account in accounts]
+
+    def budgets():
+        return BudgetSerializer(
+            Budget.objects.using(using).filter(
+                account_id__in=account_ids
+            ).select_related('category').order_by('pk'),
+            many=True
+        ).data
+
+    def recent_transactions():
+        return TransactionSerializer(
+            Transaction.objects.using(using).filter(
+                account_id__in=account_ids
+            ).select_related('category').order_by(
+                '-date', '-pk'
+            )[:RECENT_TRANSACTIONS],
+            many=True
+        ).data
+
+    def totals():
+        return category_totals(using, start, end, account_ids)
+
+    parts = {
+        'budgets': budgets,
+        'recent_transactions': recent_transactions,
+        'category_totals': totals,
+    }
+
+    if connections[using].in_atomic_block:
+        results = {name: query() for name, query in parts.items()}
+    else:
+        def run(query):
+            try:
+                return query()
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(len(parts)) as executor:
+            futures = {
+                name: executor.submit(run, query)
+                for name, query in parts.items()
+            }
+            results = {
+                name: future.result() for name, future in futures.items()
+            }
+
+    return {
+        'owner': OwnerSerializer(user).data,
+        'period': f'{period:%Y-%m}',
+        'accounts': AccountSerializer(accounts, many=True).data,
+        'net_worth': f'{sum(account.balance for account in accounts):.2f}',
+        **results,
+    }
+
+
+def get_dashboard(user, period):
+    """
+    Retorna o painel de um titular do cache de agregações ou, se os dados do
+    titular foram alterados desde a última montagem, monta e guarda um
+    painel novo.
+
+    Retorna:
+        tuple: O painel e se ele foi lido do cache.
+    """
+
+    return cached_aggregate(
+        user.pk,
+        'dashboard',
+        period,
+        lambda: build_dashboard(user, period)
+    )
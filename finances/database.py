@@ -0,0 +1,168 @@
+import random
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from finances.routers import current_shard
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -65536,
+    'mmap_size': 268435456,
+    'busy_timeout': 5000,
+}
+
+LOCK_RETRY_DEFAULTS = {
+    'ATTEMPTS': 5,
+    'BACKOFF': 0.02,
+    'MAX_BACKOFF': 0.5,
+}
+
+
+def sqlite_pragmas():
+    """
+    Retorna os pragmas aplicados às conexões SQLite, definidos em
+    `settings.SQLITE_PRAGMAS` (os valores de `SQLITE_PRAGMAS` por padrão).
+    """
+
+    return getattr(settings, 'SQLITE_PRAGMAS', SQLITE_PRAGMAS)
+
+
+def lock_retry_settings():
+    """
+    Retorna a configuração das novas tentativas em caso de banco bloqueado,
+    definida em `settings.DB_LOCK_RETRY` e completada com os valores padrão.
+
+    Retorna:
+        dict: Dicionário com as chaves ATTEMPTS, BACKOFF e MAX_BACKOFF.
+    """
+
+    return {**LOCK_RETRY_DEFAULTS, **getattr(settings, 'DB_LOCK_RETRY', {})}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Receptor do sinal `connection_created` que aplica os pragmas de
+    desempenho em cada conexão SQLite nova.
+
+    O modo WAL permite leituras simultâneas a uma escrita, `synchronous =
+    normal` evita um fsync a cada commit (seguro no modo WAL), `cache_size`
+    e `mmap_size` reduzem as leituras do disco, e `busy_timeout` faz uma
+    escrita aguardar o bloqueio de outra em vez de falhar imediatamente.
+
+    Parâmetros:
+        sender: A classe do backend do banco.
+        connection: O wrapper da conexão recém-criada.
+    """
+
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for pragma, value in sqlite_pragmas().items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def is_lock_error(exc):
+    """
+    Verifica se o erro indica que o banco SQLite estava bloqueado por outra
+    escrita.
+
+    Parâmetros:
+        exc: A exceção levantada pelo banco.
+
+    Retorna:
+        bool: True se a operação pode ser repetida.
+    """
+
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def write_aliases(using, args, kwargs):
+    """
+    Retorna os aliases dos bancos em que `retry_on_lock` abre a transação.
+
+    Parâmetros:
+        using: Um alias, uma lista de aliases, uma função que os retorna a
+        partir dos argumentos da função decorada, ou None para o banco
+        principal e o shard ativo (`finances.routers.current_shard`).
+        args: Os argumentos posicionais da função decorada.
+        kwargs: Os argumentos nomeados da função decorada.
+
+    Retorna:
+        list: Os aliases, sem repetições.
+    """
+
+    if callable(using):
+        using = using(*args, **kwargs)
+
+    if using is None:
+        using = ['default', current_shard()]
+    elif isinstance(using, str):
+        using = [using]
+
+    return list(dict.fromkeys(alias for alias in using if alias))
+
+
+def retry_on_lock(func=None, *, using=None):
+    """
+    Decorador que executa a função em uma transação e, se o banco estiver
+    bloqueado por outra escrita, desfaz a transação e tenta novamente com
+    espera exponencial e variação aleatória.
+
+    A transação é aberta em cada banco em que a função escreve: por padrão,
+    no banco principal e no shard do titular da solicitação; ou nos bancos
+    informados em `using`. A transação inteira é repetida, para que nenhuma
+    escrita parcial da tentativa anterior permaneça em nenhum deles. Se a
+    função for chamada dentro de uma transação já aberta em um desses
+    bancos, ela é executada uma única vez, ainda atômica (com pontos de
+    salvamento), pois o bloqueio só pode ser tratado por quem abriu a
+    transação.
+
+    Parâmetros:
+        func: A função (ou o método da view) a ser decorada.
+        using: Os bancos da transação (veja `write_aliases`).
+
+    Retorna:
+        function: A função decorada.
+
+    Exemplo de Uso:
+        @retry_on_lock(using=lambda parent, operations: get_shards())
+        def run(parent, operations):
+            ...
+    """
+
+    if func is None:
+        return lambda func: retry_on_lock(func, using=using)
+
+    def run(aliases, args, kwargs):
+        with ExitStack() as stack:
+            for alias in aliases:
+                stack.enter_context(transaction.atomic(using=alias))
+            return func(*args, **kwargs)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        aliases = write_aliases(using, args, kwargs)
+
+        if any(connections[alias].in_atomic_block for alias in aliases):
+            return run(aliases, args, kwargs)
+
+        config = lock_retry_settings()
+        delay = config['BACKOFF']
+
+        for attempt in range(1, config['ATTEMPTS'] + 1):
+            try:
+                return run(aliases, args, kwargs)
+            except OperationalError as exc:
+                if not is_lock_error(exc) or attempt == config['ATTEMPTS']:
+                    raise
+
+            time.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, config['MAX_BACKOFF'])
+
+    return wrapper
@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    """
+    Exceção lançada quando a versão enviada no cabeçalho `If-Match` não
+    corresponde mais à versão do registro, porque outra edição foi aplicada
+    antes.
+    """
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource was modified by another request.'
+    default_code = 'precondition_failed'
@@ -0,0 +1,89 @@
+from rest_framework.exceptions import ValidationError
+
+
+def parse_list_param(request, name):
+    """
+    Lê um parâmetro de consulta com valores separados por vírgula.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP, do Django REST Framework ou do
+        Django.
+        name: O nome do parâmetro de consulta. Por exemplo, "fields".
+
+    Retorna:
+        list | None: A lista de valores informados, ou None se o parâmetro não
+        foi enviado.
+
+    Exemplo de Uso:
+        GET /api/transactions/?fields=id,amount -> ['id', 'amount']
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+
+    value = query_params.get(name)
+    if value is None:
+        return None
+
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def get_fieldset(request, serializer_class):
+    """
+    Obtém e valida os parâmetros `?fields=` e `?expand=` de uma solicitação
+    para o serializer informado.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+        serializer_class: O serializer cujos campos serão restringidos.
+
+    Retorna:
+        tuple: Os campos solicitados (ou None para todos) e as relações a
+        expandir.
+
+    Raises:
+        ValidationError: Se algum campo ou relação não existir no serializer.
+    """
+
+    fields = parse_list_param(request, 'fields')
+    expand = parse_list_param(request, 'expand') or []
+
+    if fields is not None:
+        unknown = set(fields) - set(serializer_class().fields)
+        if unknown:
+            raise ValidationError({
+                'fields': [f'Unknown field(s): {", ".join(sorted(unknown))}.']
+            })
+
+    unknown = set(expand) - set(serializer_class.get_expandable_fields())
+    if unknown:
+        raise ValidationError({
+            'expand': [f'Unknown relation(s): {", ".join(sorted(unknown))}.']
+        })
+
+    return fields, expand
+
+
+def restrict_queryset(queryset, fields, expand, required=()):
+    """
+    Restringe as colunas selecionadas pelo ORM aos campos solicitados e
+    carrega as relações expandidas na mesma consulta.
+
+    Parâmetros:
+        queryset: O queryset a ser restringido.
+        fields: Os campos solicitados, ou None para todos.
+        expand: As relações que serão serializadas de forma aninhada.
+        required: Campos sempre necessários, como os usados na verificação
+        de permissão.
+
+    Retorna:
+        QuerySet: O queryset com `.only()` e `select_related()` aplicados.
+    """
+
+    if expand:
+        queryset = queryset.select_related(*expand)
+
+    if fields is not None:
+        pk_name = queryset.model._meta.pk.name
+        queryset = queryset.only(pk_name, *fields, *expand, *required)
+
+    return queryset
@@ -0,0 +1,162 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from finances.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+def get_ttl():
+    """
+    Retorna o tempo de vida das chaves de idempotência, definido em
+    `settings.IDEMPOTENCY_KEY_TTL` (24 horas por padrão).
+    """
+
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24))
+
+
+def request_fingerprint(request):
+    """
+    Calcula o hash que identifica o conteúdo de uma solicitação.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+
+    Retorna:
+        str: O hash SHA-256 do método, do caminho e do corpo da solicitação.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.body)
+
+    return digest.hexdigest()
+
+
+def replay(record, fingerprint):
+    """
+    Reproduz a resposta armazenada para uma chave de idempotência.
+
+    Parâmetros:
+        record: A chave de idempotência armazenada.
+        fingerprint: O hash da solicitação atual.
+
+    Retorna:
+        Response: A resposta original, ou uma resposta com status 422 se a
+        chave foi usada com outro conteúdo.
+    """
+
+    if record.request_hash != fingerprint:
+        return Response(
+            {'detail': 'Idempotency key already used with another request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return Response(
+        json.loads(record.response_body),
+        status=record.status_code,
+        headers={REPLAY_HEADER: 'true'}
+    )
+
+
+def idempotent(view_method):
+    """
+    Decorador para métodos POST que torna a criação idempotente através do
+    cabeçalho `Idempotency-Key`.
+
+    Na primeira solicitação com uma chave, a chave é registrada na mesma
+    transação de banco da criação, junto com a resposta produzida. As
+    repetições com a mesma chave recebem a resposta armazenada sem executar a
+    validação ou as escritas novamente. A restrição de unicidade de
+    (usuário, chave) garante que, se a mesma chave chegar ao mesmo tempo em
+    vários workers, apenas um deles execute a view; os demais aguardam o
+    término da transação e reproduzem a resposta.
+
+    Respostas com status 5xx e exceções não são armazenadas, para que o
+    cliente possa tentar novamente.
+
+    Parâmetros:
+        view_method: O método da view a ser decorado.
+
+    Retorna:
+        function: O método decorado.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            raise ValidationError({
+                IDEMPOTENCY_HEADER: [
+                    'Ensure this header has no more than 255 characters.'
+                ]
+            })
+
+        fingerprint = request_fingerprint(request)
+        keys = IdempotencyKey.objects.filter(user_id=request.user.pk, key=key)
+
+        record = keys.first()
+        if record is not None:
+            if not record.is_expired(get_ttl()):
+                return replay(record, fingerprint)
+            record.delete()
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user_id=request.user.pk,
+                        key=key,
+                        request_hash=fingerprint
+                    )
+            except IntegrityError:
+                return replay(keys.get(), fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+
+            record.status_code = response.status_code
+            record.response_body = json.dumps(response.data, cls=JSONEncoder)
+            record.save(update_fields=['status_code', 'response_body'])
+
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(now=None):
+    """
+    Remove as chaves de idempotência que ultrapassaram o tempo de vida.
+
+    Parâmetros:
+        now: O instante de referência. Por padrão, o instante atual.
+
+    Retorna:
+        int: A quantidade de chaves removidas.
+    """
+
+    now = now or timezone.now()
+
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lte=now - get_ttl()
+    ).delete()
+
+    return deleted
@@ -0,0 +1,337 @@
+"""
+Livro-razão das contas.
+
+Cada alteração do saldo de uma conta (abertura, transação ou ajuste manual)
+é gravada como um lançamento (`LedgerEntry`) na mesma transação do banco que
+altera o saldo. Os lançamentos de uma conta são numerados em sequência e
+nunca são alterados ou excluídos.
+
+A cada `settings.LEDGER_SNAPSHOT_INTERVAL` lançamentos (50 por padrão), o
+saldo da conta é registrado em `BalanceSnapshot`. O saldo em uma data é o do
+último registro anterior à data, obtido pelo índice (conta, data), somado
+aos lançamentos posteriores a ele e anteriores à data, que são no máximo
+`LEDGER_SNAPSHOT_INTERVAL`.
+
+Cada lançamento também soma sua variação à de seu dia em `LedgerDay`. A
+série de saldos diários de uma conta (`daily_balances`) parte do saldo no
+início do intervalo e acumula os dias do intervalo com uma soma em janela
+(`SUM(delta) OVER (ORDER BY day)`) calculada no banco, lendo no máximo um
+registro por dia.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, Window
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+MAX_HISTORY_DAYS = 3660
+
+
+def snapshot_interval():
+    """
+    Retorna a quantidade de lançamentos entre dois registros de saldo,
+    definida em `settings.LEDGER_SNAPSHOT_INTERVAL`.
+    """
+
+    return getattr(settings, 'LEDGER_SNAPSHOT_INTERVAL', 50)
+
+
+def record_entry(account_id, using, delta, kind, transaction_id=None):
+    """
+    Grava um lançamento no livro-razão da conta, soma sua variação à do dia
+    em `LedgerDay` e, a cada `LEDGER_SNAPSHOT_INTERVAL` lançamentos, grava
+    o saldo da conta.
+
+    Deve ser chamada na mesma transação do banco que altera o saldo, depois
+    do UPDATE da conta: o bloqueio da linha da conta ordena os lançamentos
+    concorrentes.
+
+    Parâmetros:
+        account_id: O ID da conta.
+        using: O alias do banco da conta.
+        delta: A variação do saldo.
+        kind: O tipo do lançamento (`LedgerEntry.OPENING`, `TRANSACTION` ou
+        `ADJUSTMENT`).
+        transaction_id: O ID da transação que originou o lançamento.
+
+    Retorna:
+        LedgerEntry: O lançamento gravado.
+    """
+
+    from finances.models import BalanceSnapshot, LedgerDay, LedgerEntry
+
+    with transaction.atomic(using=using):
+        last = LedgerEntry.objects.using(using).filter(
+            account_id=account_id
+        ).order_by('-sequence').values_list('sequence', flat=True).first()
+
+        entry = LedgerEntry.objects.using(using).create(
+            account_id=account_id,
+            sequence=(last or 0) + 1,
+            kind=kind,
+            delta=delta,
+            transaction_id=transaction_id
+        )
+
+        day = timezone.localdate(entry.created_at)
+        updated = LedgerDay.objects.using(using).filter(
+            account_id=account_id,
+            day=day
+        ).update(delta=F('delta') + delta)
+        if not updated:
+            LedgerDay.objects.using(using).create(
+                account_id=account_id,
+                day=day,
+                delta=delta
+            )
+
+        if entry.sequence % snapshot_interval() == 0:
+            BalanceSnapshot.objects.using(using).create(
+                account_id=account_id,
+                sequence=entry.sequence,
+                balance=replay(account_id, using, sequence=entry.sequence),
+                created_at=entry.created_at
+            )
+
+    return entry
+
+
+def replay(account_id, using, at=None, sequence=None):
+    """
+    Calcula o saldo de uma conta a partir do último registro de saldo e dos
+    lançamentos posteriores a ele.
+
+    Parâmetros:
+        account_id: O ID da conta.
+        using: O alias do banco.
+        at: Considera apenas os lançamentos até esta data e hora.
+        sequence: Considera apenas os lançamentos até este número.
+
+    Retorna:
+        Decimal | None: O saldo, ou None se não houver lançamentos.
+    """
+
+    from finances.models import BalanceSnapshot, LedgerEntry
+
+    snapshots = BalanceSnapshot.objects.using(using).filter(
+        account_id=account_id
+    )
+    entries = LedgerEntry.objects.using(using).filter(account_id=account_id)
+
+    if at is not None:
+        snapshots = snapshots.filter(created_at__lte=at)
+        entries = entries.filter(created_at__lte=at)
+    if sequence is not None:
+        snapshots = snapshots.filter(sequence__lte=sequence)
+        entries = entries.filter(sequence__lte=sequence)
+
+    snapshot = snapshots.order_by('-created_at', '-sequence').values_list(
+        'sequence', 'balance'
+    ).first()
+
+    if snapshot is not None:
+        entries = entries.filter(sequence__gt=snapshot[0])
+
+    delta = entries.aggregate(delta=Sum('delta'))['delta']
+
+    if snapshot is None:
+        return delta
+    return snapshot[1] + (delta or 0)
+
+
+def balance_at(account, at=None):
+    """
+    Retorna o saldo de uma conta em uma data e hora.
+
+    Parâmetros:
+        account: A conta.
+        at: A data e hora. Por padrão, agora.
+
+    Retorna:
+        Decimal | None: O saldo, ou None se a conta não tiver lançamentos
+        até a data.
+    """
+
+    return replay(account.pk, account._state.db, at=at or timezone.now())
+
+
+def day_end(day):
+    """
+    Retorna o fim de um dia no fuso horário padrão.
+    """
+
+    return timezone.make_aware(datetime.combine(day, time.max))
+
+
+def daily_balances(account, start, end, points=None):
+    """
+    Retorna o saldo de uma conta no fim de cada dia de um intervalo.
+
+    O saldo no início do intervalo é obtido por `replay`, e as variações
+    diárias (`LedgerDay`) do intervalo são acumuladas no banco por uma soma
+    em janela. Os dias sem lançamentos repetem o saldo do dia anterior.
+
+    Parâmetros:
+        account: A conta.
+        start: O primeiro dia do intervalo.
+        end: O último dia do intervalo.
+        points: Se informado e menor que a quantidade de dias, divide o
+        intervalo em `points` faixas de dias consecutivos e retorna apenas o
+        último dia de cada faixa.
+
+    Retorna:
+        list: Pares (dia, saldo); o saldo é None nos dias anteriores ao
+        primeiro lançamento da conta.
+    """
+
+    from finances.models import LedgerDay
+
+    using = account._state.db
+    opening = replay(
+        account.pk,
+        using,
+        at=day_end(start - timedelta(days=1))
+    )
+
+    running = dict(
+        LedgerDay.objects.using(using).filter(
+            account_id=account.pk,
+            day__range=(start, end)
+        ).annotate(
+            running=Window(Sum('delta'), order_by=F('day').asc())
+        ).values_list('day', 'running')
+    )
+    balance = opening
+    days = []
+
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        if day in running:
+            balance = (opening or 0) + running[day]
+        days.append((day, balance))
+
+    if points and points < len(days):
+        days = [
+            days[(index + 1) * len(days) // points - 1]
+            for index in range(points)
+        ]
+
+    return days
+
+
+def history_params(request):
+    """
+    Lê os parâmetros de consulta `?start=` e `?end=` (datas no formato
+    AAAA-MM-DD, ambas inclusivas) e `?points=` de uma solicitação. Por
+    padrão, o intervalo são os últimos 30 dias.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+
+    Retorna:
+        tuple: O primeiro e o último dia do intervalo e a quantidade de
+        pontos, ou None se o parâmetro `points` não foi enviado.
+
+    Raises:
+        ValidationError: Se algum valor for inválido ou o intervalo for
+        maior que `MAX_HISTORY_DAYS` dias.
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+    days = {}
+
+    for name in ('start', 'end'):
+        value = query_params.get(name)
+        if value is None:
+            days[name] = None
+            continue
+
+        try:
+            days[name] = parse_date(value)
+        except ValueError:
+            days[name] = None
+        if days[name] is None:
+            raise ValidationError({name: ['Invalid date, use YYYY-MM-DD.']})
+
+    end = days['end'] or timezone.localdate()
+    start = days['start'] or end - timedelta(days=29)
+
+    if start > end:
+        raise ValidationError({'start': ['Must not be after end.']})
+    if (end - start).days >= MAX_HISTORY_DAYS:
+        raise ValidationError(
+            {'start': [f'The range must not exceed {MAX_HISTORY_DAYS} days.']}
+        )
+
+    points = query_params.get('points')
+    if points is not None:
+        try:
+            points = int(points)
+        except ValueError:
+            points = 0
+        if points < 1:
+            raise ValidationError({'points': ['Must be a positive integer.']})
+
+    return start, end, points
+
+
+def at_param(request):
+    """
+    Lê o parâmetro de consulta `?at=` de uma solicitação: uma data
+    (AAAA-MM-DD), que corresponde ao fim do dia no fuso horário padrão, ou
+    uma data e hora ISO 8601.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+
+    Retorna:
+        datetime | None: A data e hora, ou None se o parâmetro não foi
+        enviado.
+
+    Raises:
+        ValidationError: Se o valor for inválido.
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+    value = query_params.get('at')
+    if value is None:
+        return None
+
+    try:
+        day = parse_date(value)
+        at = parse_datetime(value) if day is None else None
+    except ValueError:
+        at = day = None
+
+    if day is not None:
+        at = day_end(day)
+    if at is None:
+        raise ValidationError(
+            {'at': ['Invalid date, use YYYY-MM-DD or ISO 8601.']}
+        )
+
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at)
+
+    return at
+
+
+def record_opening(sender, instance, created, raw=False, **kwargs):
+    """
+    Receptor do sinal `post_save` que abre o livro-razão de uma conta nova
+    com o saldo inicial.
+    """
+
+    from finances.models import LedgerEntry
+
+    if created and not raw:
+        record_entry(
+            instance.pk,
+            instance._state.db,
+            instance.balance,
+            LedgerEntry.OPENING
+        )
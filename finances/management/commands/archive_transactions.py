@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from finances.archive import archive_before, archive_period
+from finances.partitions import parse_period
+
+
+class Command(BaseCommand):
+    """
+    Comando que move as transações dos meses antigos para o arquivo.
+
+    Uso:
+        python manage.py archive_transactions
+        python manage.py archive_transactions --before 2023-01
+        python manage.py archive_transactions --period 2022-06
+
+    Sem argumentos, arquiva todos os meses encerrados há mais de
+    `TRANSACTION_ARCHIVE_AFTER_MONTHS` meses.
+    """
+
+    help = 'Move as transações dos meses antigos para o arquivo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', metavar='AAAA-MM')
+        parser.add_argument(
+            '--period',
+            action='append',
+            default=[],
+            metavar='AAAA-MM'
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+
+        try:
+            if options['period']:
+                archived = {
+                    period: archive_period(period, using)
+                    for period in map(parse_period, options['period'])
+                }
+            else:
+                before = options['before']
+                archived = archive_before(
+                    parse_period(before) if before else None,
+                    using
+                )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for period, rows in archived.items():
+            self.stdout.write(
+                f'{period:%Y-%m}: {rows} transação(ões) arquivada(s).'
+            )
+
+        self.stdout.write(f'{len(archived)} mês(es) arquivado(s).')
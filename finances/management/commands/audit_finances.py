@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from finances.audit import CHUNK_SIZE, audit
+from finances.routers import get_shards
+
+
+class Command(BaseCommand):
+    """
+    Comando que audita o saldo das contas e o gasto dos orçamentos.
+
+    Uso:
+        python manage.py audit_finances
+        python manage.py audit_finances --workers 8
+        python manage.py audit_finances --fix
+
+    Sem `--database`, audita cada shard ou, sem shards, o banco principal.
+    Com `--fix`, grava os valores esperados nos registros divergentes.
+    """
+
+    help = 'Audita o saldo das contas e o gasto dos orçamentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true')
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--database', action='append')
+
+    def handle(self, *args, **options):
+        databases = options['database'] or get_shards() or ['default']
+
+        for using in databases:
+            report = audit(
+                using,
+                workers=options['workers'],
+                fix=options['fix'],
+                chunk_size=options['chunk_size']
+            )
+
+            for item in report['drift']:
+                self.stdout.write(
+                    f'{using} {item["model"]} {item["pk"]}: '
+                    f'registrado {item["recorded"]}, '
+                    f'esperado {item["expected"]}'
+                )
+
+            self.stdout.write(
+                f'{using}: {report["accounts"]} conta(s), '
+                f'{report["budgets"]} orçamento(s), '
+                f'{report["transactions"]} transação(ões), '
+                f'{report["checkpoints"]} saldo(s) de abertura registrado(s), '
+                f'{len(report["drift"])} divergência(s)'
+                + (' corrigida(s).' if options['fix'] else '.')
+            )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from finances.outbox import BATCH_SIZE, dispatch, get_config
+from finances.routers import get_shards
+
+
+class Command(BaseCommand):
+    """
+    Comando que envia os eventos da caixa de saída aos webhooks configurados.
+
+    Uso:
+        python manage.py dispatch_outbox
+        python manage.py dispatch_outbox --concurrency 16
+        python manage.py dispatch_outbox --loop --interval 5
+
+    Sem `--database`, envia os eventos de cada shard ou, sem shards, do banco
+    principal. Com `--loop`, repete o envio a cada `--interval` segundos.
+    """
+
+    help = 'Envia os eventos da caixa de saída aos webhooks configurados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int)
+        parser.add_argument('--database', action='append')
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        databases = options['database'] or get_shards() or ['default']
+        config = get_config()
+        if options['concurrency']:
+            config['CONCURRENCY'] = options['concurrency']
+
+        while True:
+            for using in databases:
+                report = dispatch(using, options['batch_size'], config)
+
+                if report['events'] or not options['loop']:
+                    self.stdout.write(
+                        f'{using}: {report["events"]} evento(s), '
+                        f'{report["delivered"]} entregue(s), '
+                        f'{report["failed"]} com falha, '
+                        f'{report["requests"]} notificação(ões) enviada(s).'
+                    )
+
+            if not options['loop']:
+                return
+
+            time.sleep(options['interval'])
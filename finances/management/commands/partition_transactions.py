@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from finances.models import TransactionPartition
+from finances.partitions import (
+    create_partitions, detach_partition, month_start, next_month,
+    parse_period
+)
+
+
+class Command(BaseCommand):
+    """
+    Comando que administra as partições mensais das transações.
+
+    Uso:
+        python manage.py partition_transactions --create-ahead 3
+        python manage.py partition_transactions --detach 2024-01
+        python manage.py partition_transactions --list
+
+    `--create-ahead` cria no PostgreSQL as partições do mês atual e dos N
+    meses seguintes; execute-o periodicamente (por exemplo, uma vez por mês),
+    para que as transações novas não caiam na partição padrão. `--detach`
+    desanexa um mês encerrado da tabela principal.
+    """
+
+    help = 'Cria, desanexa e lista as partições mensais das transações.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--create-ahead', type=int, metavar='N')
+        parser.add_argument(
+            '--detach',
+            action='append',
+            default=[],
+            metavar='AAAA-MM'
+        )
+        parser.add_argument('--list', action='store_true')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+
+        if options['create_ahead'] is not None:
+            first = month_start(timezone.now().date())
+            last = first
+            for _ in range(options['create_ahead']):
+                last = next_month(last)
+
+            created = create_partitions(using, first, last)
+            self.stdout.write(f'{len(created)} partição(ões) verificada(s).')
+
+        for value in options['detach']:
+            try:
+                partition = detach_partition(parse_period(value), using)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+            self.stdout.write(
+                f'{partition.period:%Y-%m} desanexado em '
+                f'{partition.table_name}: {partition.rows} transação(ões).'
+            )
+
+        if options['list']:
+            partitions = TransactionPartition.objects.using(using)
+            for partition in partitions.order_by('period'):
+                self.stdout.write(
+                    f'{partition.period:%Y-%m} {partition.table_name} '
+                    f'{partition.rows}'
+                )
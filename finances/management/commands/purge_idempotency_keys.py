@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from finances.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    """
+    Comando que remove as chaves de idempotência expiradas.
+
+    Uso:
+        python manage.py purge_idempotency_keys
+    """
+
+    help = 'Remove as chaves de idempotência que ultrapassaram o TTL.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+
+        self.stdout.write(f'{deleted} chave(s) de idempotência removida(s).')
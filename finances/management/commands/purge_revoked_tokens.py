@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from finances.revocation import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    """
+    Comando que remove os tokens de atualização revogados já expirados.
+
+    Uso:
+        python manage.py purge_revoked_tokens
+    """
+
+    help = 'Remove os tokens de atualização revogados já expirados.'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens()
+
+        self.stdout.write(f'{deleted} token(s) revogado(s) removido(s).')
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from finances.models import OwnerShard
+from finances.routers import get_shards, hash_shard, shard_for_owner
+from finances.sharding import move_owner, sync_reference_data
+
+
+class Command(BaseCommand):
+    """
+    Comando que move titulares entre shards e prepara a adição de shards.
+
+    Uso:
+        python manage.py rebalance_shards --owner 7 --to shard2
+        python manage.py rebalance_shards --owner 7
+        python manage.py rebalance_shards --pin-all
+        python manage.py rebalance_shards --sync shard3
+
+    Sem `--to`, o titular volta para o shard escolhido por hash. Antes de
+    adicionar um shard em `DB_SHARDS`, execute `--pin-all` para registrar no
+    diretório o shard atual de cada titular; depois de adicioná-lo, execute
+    `--sync` para copiar os usuários e as categorias para o novo shard e mova
+    os titulares desejados com `--owner`.
+    """
+
+    help = 'Move titulares entre shards e prepara a adição de shards.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', type=int, action='append', default=[])
+        parser.add_argument('--to', dest='target')
+        parser.add_argument('--pin-all', action='store_true')
+        parser.add_argument('--sync', metavar='ALIAS')
+
+    def handle(self, *args, **options):
+        shards = get_shards()
+        if not shards:
+            raise CommandError('No shards configured (DB_SHARDS).')
+
+        if options['sync']:
+            if options['sync'] not in shards:
+                raise CommandError(f'Unknown shard {options["sync"]!r}.')
+
+            copied = sync_reference_data(options['sync'])
+            self.stdout.write(
+                f'{copied} registro(s) copiado(s) para {options["sync"]}.'
+            )
+
+        if options['pin_all']:
+            pinned = set(OwnerShard.objects.values_list('owner_id', flat=True))
+            entries = [
+                OwnerShard(
+                    owner_id=owner_id,
+                    alias=hash_shard(owner_id, shards)
+                )
+                for owner_id in User.objects.values_list('pk', flat=True)
+                if owner_id not in pinned
+            ]
+            OwnerShard.objects.bulk_create(entries)
+            self.stdout.write(f'{len(entries)} titular(es) registrado(s).')
+
+        for owner_id in options['owner']:
+            target = options['target'] or hash_shard(owner_id, shards)
+            source = shard_for_owner(owner_id)
+
+            try:
+                moved = move_owner(owner_id, target)
+            except (User.DoesNotExist, ValueError) as exc:
+                raise CommandError(str(exc))
+
+            if not moved:
+                self.stdout.write(f'Titular {owner_id} já está em {target}.')
+                continue
+
+            self.stdout.write(
+                f'Titular {owner_id} movido de {source} para {target}: '
+                f'{moved["accounts"]} conta(s), '
+                f'{moved["transactions"]} transação(ões), '
+                f'{moved["budgets"]} orçamento(s).'
+            )
@@ -0,0 +1,259 @@
+import gzip
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from finances.routers import pin_user, start_routing, stop_routing
+
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+GZIP_DEFAULTS = {
+    'MIN_LENGTH': 1024,
+    'COMPRESS_LEVEL': 6,
+    'ALL_VIEWS': False,
+}
+
+
+def gzip_settings():
+    """
+    Retorna a configuração de compressão definida em
+    `settings.GZIP_RESPONSE`, completada com os valores padrão.
+
+    Retorna:
+        dict: Dicionário com as chaves MIN_LENGTH, COMPRESS_LEVEL e ALL_VIEWS.
+    """
+
+    return {**GZIP_DEFAULTS, **getattr(settings, 'GZIP_RESPONSE', {})}
+
+
+def compress_stream(chunks, level):
+    """
+    Comprime uma sequência de blocos de bytes em um único fluxo gzip, à
+    medida que os blocos são produzidos.
+
+    Parâmetros:
+        chunks: Iterável com os blocos de bytes da resposta.
+        level: O nível de compressão (1 a 9).
+
+    Retorna:
+        Generator: Os blocos comprimidos.
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def acompress_stream(chunks, level):
+    """
+    Versão assíncrona de `compress_stream`, usada em respostas de streaming
+    servidas sob ASGI.
+
+    Parâmetros:
+        chunks: Iterável assíncrono com os blocos de bytes da resposta.
+        level: O nível de compressão (1 a 9).
+
+    Retorna:
+        AsyncGenerator: Os blocos comprimidos.
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class GZipThresholdMiddleware:
+    """
+    Middleware que comprime com gzip as respostas das views que optarem pela
+    compressão.
+
+    Uma view habilita a compressão definindo o atributo `gzip_response = True`
+    (ou todas as views, com `GZIP_RESPONSE['ALL_VIEWS']`). Respostas menores
+    que `GZIP_RESPONSE['MIN_LENGTH']` bytes são enviadas sem compressão, pois o
+    custo de CPU não compensa os poucos bytes economizados. Respostas de
+    streaming são comprimidas à medida que são enviadas.
+
+    O middleware funciona tanto sob WSGI quanto sob ASGI, sem forçar as views
+    assíncronas a rodarem em uma thread.
+
+    Atributos:
+        get_response: O próximo middleware, ou a view, da cadeia.
+
+    Métodos:
+        process_view: Registra na solicitação se a view habilitou a compressão.
+        compress: Aplica a compressão na resposta, quando cabível.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.compress(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Registra na solicitação se a view resolvida habilitou a compressão.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            view_func: A função da view (ou o resultado de `as_view()`).
+            view_args: Os argumentos posicionais da view.
+            view_kwargs: Os argumentos nomeados da view.
+        """
+
+        view_class = getattr(view_func, 'view_class', None)
+        request.gzip_response = getattr(
+            view_class or view_func, 'gzip_response', None
+        )
+
+    def compress(self, request, response):
+        """
+        Comprime a resposta se a view habilitou a compressão, se o cliente
+        aceita gzip e se o corpo atinge o tamanho mínimo configurado.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            response: A resposta produzida pela view.
+
+        Retorna:
+            HttpResponse: A resposta, comprimida ou não.
+        """
+
+        config = gzip_settings()
+
+        enabled = getattr(request, 'gzip_response', None)
+        if enabled is None:
+            enabled = config['ALL_VIEWS']
+        if not enabled:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        if not response.streaming and \
+                len(response.content) < config['MIN_LENGTH']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if not re_accepts_gzip.search(accept_encoding):
+            return response
+
+        level = config['COMPRESS_LEVEL']
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, level
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, level
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = gzip.compress(
+                response.content, compresslevel=level, mtime=0
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Middleware que habilita o roteamento de leituras para as réplicas durante
+    as solicitações (veja `finances.routers.ReplicaRouter`).
+
+    As solicitações de escrita leem do banco principal. Quando uma escrita
+    de um usuário autenticado é bem-sucedida, as leituras desse usuário
+    continuam no banco principal por `REPLICA_PIN_SECONDS` segundos, para que
+    ele veja as próprias alterações mesmo com atraso de replicação.
+
+    Atributos:
+        get_response: O próximo middleware, ou a view, da cadeia.
+
+    Métodos:
+        finish: Marca o usuário que realizou uma escrita.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = start_routing(request, request.method not in SAFE_METHODS)
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_routing(token)
+
+        self.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = start_routing(request, request.method not in SAFE_METHODS)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_routing(token)
+
+        self.finish(request, response)
+        return response
+
+    def finish(self, request, response):
+        """
+        Marca o usuário para ler do banco principal se a solicitação foi uma
+        escrita bem-sucedida.
+
+        Parâmetros:
+            request: O objeto da solicitação HTTP.
+            response: A resposta produzida pela view.
+        """
+
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin_user(user.pk)
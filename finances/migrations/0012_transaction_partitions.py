@@ -0,0 +1,163 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+SEQUENCE = 'finances_transaction_partitioned_id_seq'
+
+
+def partition_transactions(apps, schema_editor):
+    """
+    No PostgreSQL, converte `finances_transaction` em uma tabela particionada
+    por mês, com uma partição padrão, as partições dos meses existentes e as
+    dos próximos três meses. Nos demais bancos, não faz nada.
+    """
+
+    from finances.partitions import (
+        create_partitions,
+        month_start,
+        next_month,
+        transaction_columns
+    )
+
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    execute('ALTER TABLE finances_transaction RENAME TO finances_transaction_old')
+    execute(f'CREATE SEQUENCE {SEQUENCE}')
+    execute(
+        f'CREATE TABLE finances_transaction ('
+        f'id bigint NOT NULL DEFAULT nextval(\'{SEQUENCE}\'), '
+        f'amount numeric(10, 2) NOT NULL, '
+        f'date timestamp with time zone NOT NULL, '
+        f'description text NOT NULL, '
+        f'account_id bigint NOT NULL REFERENCES finances_account (id) '
+        f'DEFERRABLE INITIALLY DEFERRED, '
+        f'category_id bigint NULL REFERENCES finances_category (id) '
+        f'DEFERRABLE INITIALLY DEFERRED, '
+        f'version integer NOT NULL CHECK (version >= 0), '
+        f'PRIMARY KEY (id, date)'
+        f') PARTITION BY RANGE (date)'
+    )
+    execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY finances_transaction.id')
+    execute(
+        'CREATE TABLE finances_transaction_default '
+        'PARTITION OF finances_transaction DEFAULT'
+    )
+    execute(
+        'CREATE INDEX finances_tr_account_id_idx '
+        'ON finances_transaction (account_id)'
+    )
+    execute(
+        'CREATE INDEX finances_tr_category_id_idx '
+        'ON finances_transaction (category_id)'
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT MIN(date), MAX(date) FROM finances_transaction_old'
+        )
+        first, last = cursor.fetchone()
+
+    today = django.utils.timezone.now().date()
+    ahead = month_start(today)
+    for _ in range(3):
+        ahead = next_month(ahead)
+
+    first = month_start(first.date() if first else today)
+    last = max(month_start(last.date()) if last else ahead, ahead)
+    create_partitions(connection.alias, first, last)
+
+    columns = ', '.join(
+        connection.ops.quote_name(column)
+        for column in transaction_columns(
+            apps.get_model('finances', 'Transaction')
+        )
+    )
+    execute(
+        f'INSERT INTO finances_transaction ({columns}) '
+        f'SELECT {columns} FROM finances_transaction_old'
+    )
+    execute(
+        f'SELECT setval(\'{SEQUENCE}\', '
+        f'(SELECT COALESCE(MAX(id), 0) + 1 FROM finances_transaction), false)'
+    )
+    execute('DROP TABLE finances_transaction_old')
+
+
+def unpartition_transactions(apps, schema_editor):
+    """
+    No PostgreSQL, converte `finances_transaction` de volta em uma tabela
+    comum, com os registros das partições anexadas.
+    """
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    execute(
+        'CREATE TABLE finances_transaction_plain '
+        '(LIKE finances_transaction INCLUDING DEFAULTS)'
+    )
+    execute(
+        'INSERT INTO finances_transaction_plain SELECT * FROM '
+        'finances_transaction'
+    )
+    execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE')
+    execute('DROP TABLE finances_transaction CASCADE')
+    execute(
+        'ALTER TABLE finances_transaction_plain '
+        'RENAME TO finances_transaction'
+    )
+    execute('ALTER TABLE finances_transaction ADD PRIMARY KEY (id)')
+    execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY finances_transaction.id')
+    execute(
+        'ALTER TABLE finances_transaction ADD FOREIGN KEY (account_id) '
+        'REFERENCES finances_account (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    execute(
+        'ALTER TABLE finances_transaction ADD FOREIGN KEY (category_id) '
+        'REFERENCES finances_category (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    execute(
+        'CREATE INDEX finances_tr_account_id_idx '
+        'ON finances_transaction (account_id)'
+    )
+    execute(
+        'CREATE INDEX finances_tr_category_id_idx '
+        'ON finances_transaction (category_id)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0011_ownershard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(unique=True)),
+                ('table_name', models.CharField(max_length=63)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('detached_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(
+            partition_transactions,
+            unpartition_transactions
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date'], name='finances_tr_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date'], name='finances_tr_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0012_transaction_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField()),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('first_id', models.BigIntegerField()),
+                ('last_id', models.BigIntegerField()),
+                ('payload', models.BinaryField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='finances.account')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='transactionarchive',
+            constraint=models.UniqueConstraint(fields=('account', 'period'), name='unique_transaction_archive_per_period'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0013_transactionarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='checkpoint', serialize=False, to='finances.account')),
+                ('opening_balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
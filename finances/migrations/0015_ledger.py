@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def open_ledgers(apps, schema_editor):
+    """
+    Abre o livro-razão das contas existentes com o saldo atual.
+    """
+
+    using = schema_editor.connection.alias
+    Account = apps.get_model('finances', 'Account')
+    LedgerEntry = apps.get_model('finances', 'LedgerEntry')
+    BalanceSnapshot = apps.get_model('finances', 'BalanceSnapshot')
+
+    now = django.utils.timezone.now()
+    accounts = list(
+        Account.objects.using(using).values_list('pk', 'balance')
+    )
+
+    LedgerEntry.objects.using(using).bulk_create(
+        LedgerEntry(
+            account_id=pk,
+            sequence=1,
+            kind='opening',
+            delta=balance,
+            created_at=now
+        )
+        for pk, balance in accounts
+    )
+    BalanceSnapshot.objects.using(using).bulk_create(
+        BalanceSnapshot(
+            account_id=pk,
+            sequence=1,
+            balance=balance,
+            created_at=now
+        )
+        for pk, balance in accounts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0014_balancecheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('kind', models.CharField(choices=[('opening', 'Abertura'), ('transaction', 'Transação'), ('adjustment', 'Ajuste')], max_length=20)),
+                ('delta', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('transaction_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='finances.account')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField()),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='finances.account')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.UniqueConstraint(fields=('account', 'sequence'), name='unique_ledger_sequence_per_account'),
+        ),
+        migrations.AddIndex(
+            model_name='balancesnapshot',
+            index=models.Index(fields=['account', 'created_at'], name='finances_snapshot_at_idx'),
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:02
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def sum_ledger_days(apps, schema_editor):
+    """
+    Soma os lançamentos existentes de cada conta por dia.
+    """
+
+    using = schema_editor.connection.alias
+    LedgerEntry = apps.get_model('finances', 'LedgerEntry')
+    LedgerDay = apps.get_model('finances', 'LedgerDay')
+
+    days = defaultdict(int)
+    entries = LedgerEntry.objects.using(using).values_list(
+        'account_id', 'created_at', 'delta'
+    )
+    for account_id, created_at, delta in entries.iterator():
+        day = django.utils.timezone.localdate(created_at)
+        days[account_id, day] += delta
+
+    LedgerDay.objects.using(using).bulk_create(
+        (
+            LedgerDay(account_id=account_id, day=day, delta=delta)
+            for (account_id, day), delta in days.items()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0015_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('delta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='finances.account')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerday',
+            constraint=models.UniqueConstraint(fields=('account', 'day'), name='unique_ledger_day_per_account'),
+        ),
+        migrations.AddIndex(
+            model_name='ledgerentry',
+            index=models.Index(fields=['account', 'created_at'], name='finances_ledger_at_idx'),
+        ),
+        migrations.RunPython(sum_ledger_days, migrations.RunPython.noop),
+    ]
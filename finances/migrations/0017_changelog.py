@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_existing(apps, schema_editor):
+    """
+    Registra as contas, transações, orçamentos e categorias existentes no
+    registro de alterações do banco principal, para que a primeira
+    sincronização dos clientes os receba. As categorias são registradas
+    apenas a partir do banco principal, pois os shards guardam cópias.
+    """
+
+    using = schema_editor.connection.alias
+    ChangeLog = apps.get_model('finances', 'ChangeLog')
+
+    sources = [
+        ('account', 'owner_id'),
+        ('transaction', 'account__owner_id'),
+        ('budget', 'account__owner_id'),
+    ]
+    if using == 'default':
+        sources.append(('category', None))
+
+    for name, owner in sources:
+        model = apps.get_model('finances', name)
+        rows = model.objects.using(using).values_list(
+            'pk', *([owner] if owner else [])
+        )
+        ChangeLog.objects.using('default').bulk_create(
+            (
+                ChangeLog(
+                    model=name,
+                    object_id=row[0],
+                    owner_id=row[1] if owner else None
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=1000
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0016_ledgerday'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'id'], name='finances_change_owner_idx'), models.Index(fields=['model', 'object_id'], name='finances_change_object_idx')],
+            },
+        ),
+        migrations.RunPython(record_existing, migrations.RunPython.noop),
+    ]
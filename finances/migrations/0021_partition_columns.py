@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-19 05:10
+
+from django.db import migrations
+
+
+def add_partition_columns(apps, schema_editor):
+    """
+    Acrescenta às partições desanexadas antes de `0017_changelog` a coluna
+    `updated_at` (e qualquer outra coluna de transações ausente), para que
+    elas possam ser lidas com todas as colunas do modelo.
+    """
+
+    from finances.partitions import add_missing_columns
+
+    connection = schema_editor.connection
+    Transaction = apps.get_model('finances', 'Transaction')
+    TransactionPartition = apps.get_model('finances', 'TransactionPartition')
+
+    tables = TransactionPartition.objects.using(connection.alias).values_list(
+        'table_name', flat=True
+    )
+    for table in tables:
+        add_missing_columns(connection, table, Transaction)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0020_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            add_partition_columns,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -1,10 +1,137 @@
-from django.db import models
+from django.db import models, router
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.utils import timezone
 
 
-class Account(models.Model):
+class OwnerScopedQuerySet(models.QuerySet):
+    """
+    QuerySet dos modelos particionados por titular (veja
+    `finances.routers.ShardRouter`).
+
+    O `create()` padrão do Django escolhe o banco antes de montar o registro,
+    sem informar ao roteador o titular ou a conta. Aqui o registro é montado
+    primeiro, para que o roteador grave a conta no shard do titular e a
+    transação ou o orçamento no shard da conta.
+    """
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(
+            force_insert=True,
+            using=router.db_for_write(self.model, instance=obj)
+        )
+
+        return obj
+
+
+class VersionedModel(models.Model):
+    """
+    Modelo abstrato com controle de concorrência otimista.
+
+    Cada atualização feita por `update_versioned` executa um único
+    `UPDATE ... WHERE id = <pk> AND version = <n>` e incrementa a versão, de
+    forma que duas edições concorrentes a partir da mesma versão não se
+    sobrescrevam: apenas a primeira é aplicada.
+
+    Atributos:
+        version: O número da versão atual do registro.
+        updated_at: A data e hora da última alteração do registro.
+
+    Métodos:
+        update_versioned: Atualiza campos do registro se a versão no banco
+        ainda for a esperada.
+        increment: Soma um valor a um campo numérico no próprio banco.
+    """
+
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def update_versioned(self, expected_version, **fields):
+        """
+        Atualiza os campos informados se a versão no banco ainda for a
+        esperada, incrementando a versão, e registra a alteração no
+        registro de alterações (`finances.changes`).
+
+        Parâmetros:
+            expected_version: A versão sobre a qual a edição foi feita.
+            fields: Os campos e os novos valores.
+
+        Retorna:
+            bool: True se o registro foi atualizado, False se outra edição
+            alterou a versão antes.
+        """
+
+        from finances.aggregates import invalidate
+        from finances.changes import record_change
+
+        manager = type(self)._base_manager.db_manager(hints={'instance': self})
+        fields['updated_at'] = timezone.now()
+
+        updated = manager.filter(
+            pk=self.pk,
+            version=expected_version
+        ).update(version=F('version') + 1, **fields)
+
+        if not updated:
+            return False
+
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.version = expected_version + 1
+
+        record_change(self)
+        invalidate(self)
+
+        return True
+
+    def increment(self, field, amount):
+        """
+        Soma um valor a um campo numérico com um único
+        `UPDATE ... SET <campo> = <campo> + <valor>`, incrementando a versão,
+        e recarrega o campo. Diferentemente de `update_versioned`, a
+        atualização não depende da versão carregada: as somas concorrentes
+        são todas aplicadas, sem que uma sobrescreva a outra.
+
+        Parâmetros:
+            field: O nome do campo.
+            amount: O valor a ser somado.
+
+        Retorna:
+            O valor do campo antes da soma.
+        """
+
+        from finances.aggregates import invalidate
+        from finances.changes import record_change
+
+        using = self._state.db or router.db_for_write(
+            type(self), instance=self
+        )
+
+        type(self)._base_manager.using(using).filter(pk=self.pk).update(**{
+            field: F(field) + amount,
+            'version': F('version') + 1,
+            'updated_at': timezone.now(),
+        })
+        self.refresh_from_db(
+            using=using,
+            fields=[field, 'version', 'updated_at']
+        )
+
+        record_change(self)
+        invalidate(self)
+
+        return getattr(self, field) - amount
+
+
+class Account(VersionedModel):
     """
     Representação da conta financeira do usuário.
 
@@ -13,6 +140,8 @@ class Account(models.Model):
         name: O tipo de conta. Por exemplo, Conta Corrente.
         balance: O valor monetário atual disponível na conta.
         created_at: A data e hora da criação da conta.
+        version: O número da versão atual da conta.
+        updated_at: A data e hora da última alteração da conta.
 
     Métodos:
         __str__: Retorna uma representação em string da conta.
@@ -28,6 +157,8 @@ class Account(models.Model):
     balance = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = OwnerScopedQuerySet.as_manager()
+
     def __str__(self):
         return f'Account of {self.owner.first_name} {self.owner.last_name} - '\
             f'{self.name}'
@@ -39,18 +170,20 @@ class Category(models.Model):
 
     Atributos:
         name: O nome da categoria. Por exemplo, "Alimentação".
+        updated_at: A data e hora da última alteração da categoria.
 
     Métodos:
         __str__: Retorna uma representação em string da categoria.
     """
 
     name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'Category: {self.name}'
 
 
-class Transaction(models.Model):
+class Transaction(VersionedModel):
     """
     Representação da transação financeira associada a uma conta.
 
@@ -60,6 +193,8 @@ class Transaction(models.Model):
         amount: O valor monetário da transação.
         description: Uma descrição opcional da transação, feita pelo usuário.
         timestamp: O timestamp da criação da transação.
+        version: O número da versão atual da transação.
+        updated_at: A data e hora da última alteração da transação.
 
     Métodos:
         __str__: Retorna uma representação em string da transação.
@@ -76,11 +211,22 @@ class Transaction(models.Model):
     date = models.DateTimeField(default=timezone.now)
     description = models.TextField()
 
+    objects = OwnerScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='finances_tr_date_idx'),
+            models.Index(
+                fields=['account', 'date'],
+                name='finances_tr_account_date_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'Value: {self.amount} - Description: {self.description}'
 
 
-class Budget(models.Model):
+class Budget(VersionedModel):
     """
     Representação do orçamento associado a uma categoria.
 
@@ -91,6 +237,8 @@ class Budget(models.Model):
         start_date: A data de início do período do orçamento.
         end_date: A data de término do período do orçamento.
         spent: O valor gasto dentro do período de orçamento.
+        version: O número da versão atual do orçamento.
+        updated_at: A data e hora da última alteração do orçamento.
 
     Métodos:
         __str__: Retorna uma representação em string do orçamento.
@@ -110,6 +258,8 @@ class Budget(models.Model):
     end_date = models.DateField()
     spent = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    objects = OwnerScopedQuerySet.as_manager()
+
     def __str__(self):
         return f'Budget to {self.category.name} - {self.amount}'
 
@@ -119,6 +269,8 @@ class Budget(models.Model):
         orçamento.
         """
 
+        from finances.alerts import check_thresholds
+
         if transaction_amount == 0:
             return
 
@@ -128,5 +280,458 @@ class Budget(models.Model):
             date__range=(self.start_date, self.end_date)
         ).aggregate(Sum('amount'))['amount__sum'] or 0
 
+        previous_spent = self.spent
         self.spent = spent_amount
         self.save()
+
+        check_thresholds(self, previous_spent)
+
+
+class ChangeLog(models.Model):
+    """
+    Última alteração de uma conta, transação, orçamento ou categoria, usada
+    pelo endpoint `/api/changes/` (veja `finances.changes`). Cada alteração
+    substitui o registro anterior do mesmo objeto, e o ID crescente do
+    registro é o cursor da sincronização. Os registros de objetos excluídos
+    (lápides) têm `deleted` verdadeiro. Fica no banco principal.
+
+    Atributos:
+        model: O nome do modelo. Por exemplo, "transaction".
+        object_id: O ID do objeto.
+        owner: O titular do objeto, ou None para as categorias, que são
+        compartilhadas.
+        deleted: Se True, o objeto foi excluído.
+        changed_at: A data e hora da alteração.
+
+    Métodos:
+        __str__: Retorna uma representação em string do registro.
+    """
+
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['owner', 'id'],
+                name='finances_change_owner_idx'
+            ),
+            models.Index(
+                fields=['model', 'object_id'],
+                name='finances_change_object_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Change {self.pk}: {self.model} {self.object_id}'
+
+
+class BudgetAlert(models.Model):
+    """
+    Alerta de um orçamento cujo gasto ultrapassou um dos limites
+    configurados, enviado pelo endpoint `/api/alerts/stream/` (veja
+    `finances.alerts`). O ID crescente do alerta é o ID do evento. Fica no
+    banco principal.
+
+    Atributos:
+        owner: O titular do orçamento.
+        budget_id: O ID do orçamento.
+        threshold: O limite ultrapassado, em percentual do valor.
+        spent: O gasto do orçamento ao ultrapassar o limite.
+        amount: O valor do orçamento ao ultrapassar o limite.
+        created_at: A data e hora do alerta.
+
+    Métodos:
+        __str__: Retorna uma representação em string do alerta.
+    """
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    budget_id = models.BigIntegerField()
+    threshold = models.PositiveSmallIntegerField()
+    spent = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['owner', 'id'],
+                name='finances_alert_owner_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Alert {self.pk}: budget {self.budget_id} {self.threshold}%'
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento de alteração de uma transação ou de um orçamento a ser enviado
+    aos webhooks configurados (veja `finances.outbox`). É gravado na mesma
+    transação do banco que altera o objeto e excluído após a entrega. Fica
+    no shard da conta.
+
+    Atributos:
+        account_id: O ID da conta do objeto.
+        event: O tipo do evento. Por exemplo, "transaction.created".
+        object_id: O ID do objeto.
+        payload: Os dados do objeto em formato JSON.
+        created_at: A data e hora do evento.
+        attempts: A quantidade de tentativas de entrega com falha.
+        next_attempt_at: A data e hora da próxima tentativa de entrega.
+        last_error: O erro da última tentativa de entrega.
+
+    Métodos:
+        __str__: Retorna uma representação em string do evento.
+    """
+
+    account_id = models.BigIntegerField(blank=True, null=True)
+    event = models.CharField(max_length=40)
+    object_id = models.BigIntegerField()
+    payload = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='finances_outbox_next_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Event {self.pk}: {self.event} {self.object_id}'
+
+
+class RevokedToken(models.Model):
+    """
+    Token de atualização revogado, por exemplo, ao ser trocado por outro em
+    `/api/token/refresh/` (veja `finances.revocation`). Fica no banco
+    principal até expirar.
+
+    Atributos:
+        jti: O identificador do token (declaração `jti`).
+        expires_at: A data e hora em que o token expira.
+        revoked_at: A data e hora da revogação.
+
+    Métodos:
+        __str__: Retorna uma representação em string do token revogado.
+    """
+
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'Revoked token {self.jti}'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Representação de uma chave de idempotência enviada no cabeçalho
+    `Idempotency-Key` de uma solicitação de criação.
+
+    Atributos:
+        user: O usuário que enviou a solicitação.
+        key: O valor do cabeçalho `Idempotency-Key`.
+        request_hash: O hash SHA-256 do método, do caminho e do corpo da
+        solicitação original.
+        status_code: O status HTTP da resposta original.
+        response_body: O corpo da resposta original em formato JSON.
+        created_at: A data e hora em que a chave foi registrada.
+
+    Métodos:
+        __str__: Retorna uma representação em string da chave.
+        is_expired: Verifica se a chave ultrapassou o tempo de vida.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(default=0)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='unique_idempotency_key_per_user'
+            )
+        ]
+
+    def __str__(self):
+        return f'Idempotency key {self.key} - {self.status_code}'
+
+    def is_expired(self, ttl):
+        """
+        Verifica se a chave ultrapassou o tempo de vida informado.
+
+        Parâmetros:
+            ttl: O tempo de vida das chaves (timedelta).
+
+        Retorna:
+            bool: True se a chave expirou, False caso contrário.
+        """
+
+        return self.created_at + ttl <= timezone.now()
+
+
+class OwnerShard(models.Model):
+    """
+    Entrada do diretório de shards, que registra o shard de um titular
+    quando ele difere do escolhido pelo hash (por exemplo, após uma
+    movimentação com o comando `rebalance_shards`). Fica no banco principal.
+
+    Atributos:
+        owner: O titular.
+        alias: O alias do banco do shard. Por exemplo, "shard2".
+        updated_at: A data e hora da última movimentação.
+
+    Métodos:
+        __str__: Retorna uma representação em string da entrada.
+    """
+
+    owner = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='shard'
+    )
+    alias = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Owner {self.owner_id} on {self.alias}'
+
+
+class TransactionPartition(models.Model):
+    """
+    Registro de um mês de transações desanexado da tabela principal (veja
+    `finances.partitions`). Fica no mesmo banco das transações.
+
+    Atributos:
+        period: O primeiro dia do mês.
+        table_name: O nome da tabela que guarda as transações do mês.
+        rows: A quantidade de transações do mês.
+        detached_at: A data e hora em que o mês foi desanexado.
+
+    Métodos:
+        __str__: Retorna uma representação em string da partição.
+    """
+
+    period = models.DateField(unique=True)
+    table_name = models.CharField(max_length=63)
+    rows = models.PositiveIntegerField(default=0)
+    detached_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'Partition {self.period:%Y-%m} ({self.table_name})'
+
+
+class TransactionArchive(models.Model):
+    """
+    Transações de um mês encerrado de uma conta, movidas da tabela de
+    transações para armazenamento frio (veja `finances.archive`). Cada
+    registro guarda o resumo do mês e as transações em JSON comprimido com
+    zlib, e não é alterado depois de criado. Fica no shard da conta.
+
+    Atributos:
+        account: A conta das transações.
+        period: O primeiro dia do mês.
+        rows: A quantidade de transações do mês.
+        total: A soma dos valores das transações do mês.
+        first_id: O menor ID das transações do mês.
+        last_id: O maior ID das transações do mês.
+        payload: As transações em JSON comprimido.
+        archived_at: A data e hora do arquivamento.
+
+    Métodos:
+        __str__: Retorna uma representação em string do arquivo.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    period = models.DateField()
+    rows = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    first_id = models.BigIntegerField()
+    last_id = models.BigIntegerField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = OwnerScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'period'],
+                name='unique_transaction_archive_per_period'
+            )
+        ]
+
+    def __str__(self):
+        return f'Archive {self.account_id} {self.period:%Y-%m}: {self.rows}'
+
+
+class BalanceCheckpoint(models.Model):
+    """
+    Saldo de abertura de uma conta, registrado pelo comando `audit_finances`
+    (veja `finances.audit`). O saldo esperado da conta é o saldo de abertura
+    menos a soma das suas transações; ajustes manuais do saldo deslocam o
+    saldo de abertura na mesma medida. Fica no shard da conta.
+
+    Atributos:
+        account: A conta.
+        opening_balance: O saldo da conta antes de todas as transações.
+        checked_at: A data e hora da última auditoria da conta.
+
+    Métodos:
+        __str__: Retorna uma representação em string do registro.
+    """
+
+    account = models.OneToOneField(
+        Account,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='checkpoint'
+    )
+    opening_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Account {self.account_id} opened at {self.opening_balance}'
+
+
+class LedgerEntry(models.Model):
+    """
+    Lançamento do livro-razão de uma conta: uma alteração do saldo, gravada
+    junto com a alteração e nunca modificada (veja `finances.ledger`). Fica
+    no shard da conta.
+
+    Atributos:
+        account: A conta.
+        sequence: O número do lançamento na conta, a partir de 1.
+        kind: O tipo do lançamento (abertura, transação ou ajuste).
+        delta: A variação do saldo.
+        transaction_id: O ID da transação que originou o lançamento, se
+        houver.
+        created_at: A data e hora do lançamento.
+
+    Métodos:
+        __str__: Retorna uma representação em string do lançamento.
+    """
+
+    OPENING = 'opening'
+    TRANSACTION = 'transaction'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (OPENING, 'Abertura'),
+        (TRANSACTION, 'Transação'),
+        (ADJUSTMENT, 'Ajuste'),
+    ]
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    sequence = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    delta = models.DecimalField(max_digits=14, decimal_places=2)
+    transaction_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = OwnerScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'sequence'],
+                name='unique_ledger_sequence_per_account'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['account', 'created_at'],
+                name='finances_ledger_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Entry {self.sequence} of {self.account_id}: {self.delta}'
+
+
+class LedgerDay(models.Model):
+    """
+    Soma dos lançamentos do livro-razão de uma conta em um dia, no fuso
+    horário padrão, atualizada junto com cada lançamento (veja
+    `finances.ledger`). Fica no shard da conta.
+
+    Atributos:
+        account: A conta.
+        day: O dia.
+        delta: A variação do saldo no dia.
+
+    Métodos:
+        __str__: Retorna uma representação em string do dia.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    day = models.DateField()
+    delta = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    objects = OwnerScopedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['account', 'day'],
+                name='unique_ledger_day_per_account'
+            )
+        ]
+
+    def __str__(self):
+        return f'Day {self.day} of {self.account_id}: {self.delta}'
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Saldo de uma conta após um lançamento do livro-razão, registrado a cada
+    `LEDGER_SNAPSHOT_INTERVAL` lançamentos para que o saldo em uma data seja
+    calculado sem percorrer todo o histórico. Fica no shard da conta.
+
+    Atributos:
+        account: A conta.
+        sequence: O número do lançamento após o qual o saldo foi registrado.
+        balance: O saldo após o lançamento.
+        created_at: A data e hora do lançamento.
+
+    Métodos:
+        __str__: Retorna uma representação em string do saldo.
+    """
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    sequence = models.PositiveBigIntegerField()
+    balance = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField()
+
+    objects = OwnerScopedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['account', 'created_at'],
+                name='finances_snapshot_at_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'Balance of {self.account_id} at {self.sequence}: '\
+            f'{self.balance}'
@@ -0,0 +1,354 @@
+"""
+Notificação de sistemas externos sobre as alterações de transações e
+orçamentos por meio de uma caixa de saída (transactional outbox).
+
+As views e os serializers gravam um evento (`OutboxEvent`) na mesma
+transação do banco que altera a transação ou o orçamento, sem nenhuma
+chamada de rede durante a solicitação. O comando `dispatch_outbox` lê os
+eventos pendentes em lotes, agrupa os eventos de cada conta em uma única
+notificação e a envia por POST para cada URL em `WEBHOOK_URLS` de
+`settings.OUTBOX`, com várias conexões simultâneas.
+
+Os eventos de um mesmo objeto no lote são combinados: apenas o último é
+enviado, um objeto criado e alterado é enviado como criado, com os dados
+mais recentes, e um objeto criado e excluído no mesmo lote não é enviado.
+
+Os eventos entregues a todas as URLs são excluídos. Os demais são
+reenviados com espera exponencial (`BACKOFF_SECONDS`, dobrando a cada
+falha, até `MAX_BACKOFF_SECONDS`) até `MAX_ATTEMPTS` tentativas, quando
+ficam na tabela para inspeção. A entrega é pelo menos uma vez: os
+destinatários devem descartar eventos repetidos pelo `id`.
+
+Os eventos de uma conta são entregues em ordem: enquanto um evento aguarda
+uma nova tentativa ou está reservado por outro processo, os eventos
+posteriores da mesma conta não são reservados. Os eventos que esgotaram as
+tentativas não bloqueiam os seguintes.
+"""
+
+import json
+import math
+import random
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+BATCH_SIZE = 500
+
+DEFAULTS = {
+    'WEBHOOK_URLS': [],
+    'TIMEOUT': 5,
+    'CONCURRENCY': 8,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_SECONDS': 2,
+    'MAX_BACKOFF_SECONDS': 600,
+}
+
+
+def get_config():
+    """
+    Retorna a configuração da caixa de saída, definida em `settings.OUTBOX`,
+    completada com os valores padrão.
+    """
+
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def enqueue(using, event, instance, data=None, account_id=None):
+    """
+    Grava um evento na caixa de saída. Deve ser chamada na mesma transação
+    do banco que altera o objeto. Sem URLs configuradas, nada é gravado.
+
+    Parâmetros:
+        using: O alias do banco do objeto.
+        event: O tipo do evento. Por exemplo, "transaction.created".
+        instance: A transação ou o orçamento.
+        data: Os dados do objeto. Se omitido, apenas o ID é enviado.
+        account_id: A conta do evento. Por padrão, a conta do objeto.
+
+    Retorna:
+        OutboxEvent | None: O evento gravado.
+    """
+
+    from finances.models import OutboxEvent
+
+    if not get_config()['WEBHOOK_URLS']:
+        return None
+
+    return OutboxEvent.objects.using(using).create(
+        account_id=account_id or instance.account_id,
+        event=event,
+        object_id=instance.pk,
+        payload=json.dumps(
+            data if data is not None else {'id': instance.pk},
+            cls=JSONEncoder
+        )
+    )
+
+
+def backoff(attempts, config):
+    """
+    Retorna a espera antes da próxima tentativa de entrega, com variação
+    aleatória de até 10% para que os eventos não sejam reenviados juntos.
+
+    Parâmetros:
+        attempts: A quantidade de tentativas já feitas.
+        config: A configuração da caixa de saída.
+
+    Retorna:
+        timedelta: A espera.
+    """
+
+    seconds = min(
+        config['BACKOFF_SECONDS'] * 2 ** (attempts - 1),
+        config['MAX_BACKOFF_SECONDS']
+    )
+
+    return timedelta(seconds=seconds * random.uniform(0.9, 1.1))
+
+
+def claim_batch(using, size, config):
+    """
+    Reserva até `size` eventos pendentes, adiando a próxima tentativa deles
+    pelo tempo máximo de envio do lote, para que outro processo do comando
+    não os envie ao mesmo tempo.
+
+    Um evento só é reservado se todos os eventos anteriores da mesma conta
+    (que ainda não esgotaram as tentativas) também forem reservados no lote.
+    O tempo máximo de envio considera uma notificação por conta e URL,
+    enviadas em grupos de `CONCURRENCY`, cada uma com até `TIMEOUT`
+    segundos, mais uma margem de `TIMEOUT` segundos.
+
+    Parâmetros:
+        using: O alias do banco.
+        size: A quantidade máxima de eventos.
+        config: A configuração da caixa de saída.
+
+    Retorna:
+        list: Os eventos reservados, em ordem de criação.
+    """
+
+    from finances.models import OutboxEvent
+
+    now = timezone.now()
+    live = OutboxEvent.objects.using(using).filter(
+        attempts__lt=config['MAX_ATTEMPTS']
+    )
+    waiting = live.filter(
+        account_id=OuterRef('account_id'),
+        pk__lt=OuterRef('pk'),
+        next_attempt_at__gt=now
+    )
+
+    with transaction.atomic(using=using):
+        pending = live.filter(next_attempt_at__lte=now).exclude(
+            Exists(waiting)
+        ).order_by('id')
+
+        if connections[using].features.has_select_for_update_skip_locked:
+            pending = pending.select_for_update(skip_locked=True)
+
+        events = list(pending[:size])
+
+        # Os eventos bloqueados por outro processo não passam pelo filtro
+        # acima; os eventos posteriores a eles na mesma conta são liberados.
+        accounts = {event.account_id for event in events} - {None}
+        if accounts:
+            gaps = {}
+            for account_id, pk in live.filter(
+                account_id__in=accounts,
+                pk__lte=events[-1].pk
+            ).exclude(
+                pk__in=[event.pk for event in events]
+            ).values_list('account_id', 'pk'):
+                gaps[account_id] = min(pk, gaps.get(account_id, pk))
+
+            events = [
+                event for event in events
+                if event.pk < gaps.get(event.account_id, event.pk + 1)
+            ]
+
+        deliveries = len({event.account_id for event in events}) * len(
+            config['WEBHOOK_URLS']
+        )
+        lease = timedelta(seconds=config['TIMEOUT'] * (
+            math.ceil(deliveries / config['CONCURRENCY']) + 1
+        ))
+
+        OutboxEvent.objects.using(using).filter(
+            pk__in=[event.pk for event in events]
+        ).update(next_attempt_at=now + lease)
+
+    return events
+
+
+def coalesce(events):
+    """
+    Agrupa os eventos por conta e combina os eventos de um mesmo objeto.
+
+    Parâmetros:
+        events: Os eventos, em ordem de criação.
+
+    Retorna:
+        dict: Para cada conta, a lista de eventos a enviar, em ordem.
+    """
+
+    accounts = OrderedDict()
+
+    for event in events:
+        model = event.event.split('.')[0]
+        objects = accounts.setdefault(event.account_id, OrderedDict())
+        key = (model, event.object_id)
+        previous = objects.pop(key, None)
+
+        item = {
+            'id': event.pk,
+            'event': event.event,
+            'object_id': event.object_id,
+            'created_at': event.created_at.isoformat(),
+            'data': json.loads(event.payload),
+        }
+
+        if previous is not None and previous['event'].endswith('.created'):
+            if event.event.endswith('.deleted'):
+                continue
+            item['event'] = previous['event']
+
+        objects[key] = item
+
+    return OrderedDict(
+        (account_id, list(objects.values()))
+        for account_id, objects in accounts.items()
+        if objects
+    )
+
+
+def post(url, body, timeout):
+    """
+    Envia uma notificação por POST e retorna None em caso de sucesso ou a
+    descrição do erro.
+    """
+
+    request = urllib.request.Request(
+        url,
+        data=body,
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as exc:
+        return f'{url}: HTTP {exc.code}'
+    except (urllib.error.URLError, OSError) as exc:
+        return f'{url}: {exc}'
+
+    return None
+
+
+def dispatch_batch(using, size=BATCH_SIZE, config=None):
+    """
+    Reserva um lote de eventos, envia as notificações de cada conta para
+    todas as URLs e registra o resultado.
+
+    Parâmetros:
+        using: O alias do banco.
+        size: A quantidade máxima de eventos do lote.
+        config: A configuração da caixa de saída. Por padrão, a de
+        `settings.OUTBOX`.
+
+    Retorna:
+        dict: A quantidade de eventos lidos, entregues e com falha e de
+        notificações enviadas.
+    """
+
+    from finances.models import OutboxEvent
+
+    config = config or get_config()
+    events = claim_batch(using, size, config)
+    report = {
+        'events': len(events),
+        'delivered': 0,
+        'failed': 0,
+        'requests': 0,
+    }
+    if not events:
+        return report
+
+    groups = coalesce(events)
+    deliveries = [
+        (account_id, url, json.dumps(
+            {'account': account_id, 'events': items},
+            cls=JSONEncoder
+        ).encode())
+        for account_id, items in groups.items()
+        for url in config['WEBHOOK_URLS']
+    ]
+
+    errors = {}
+    if deliveries:
+        with ThreadPoolExecutor(config['CONCURRENCY']) as executor:
+            results = executor.map(
+                lambda delivery: post(
+                    delivery[1], delivery[2], config['TIMEOUT']
+                ),
+                deliveries
+            )
+            for (account_id, _, _), error in zip(deliveries, results):
+                if error is not None:
+                    errors.setdefault(account_id, error)
+    report['requests'] = len(deliveries)
+
+    delivered = [
+        event.pk for event in events if event.account_id not in errors
+    ]
+    OutboxEvent.objects.using(using).filter(pk__in=delivered).delete()
+    report['delivered'] = len(delivered)
+
+    now = timezone.now()
+    for event in events:
+        if event.account_id not in errors:
+            continue
+
+        attempts = event.attempts + 1
+        OutboxEvent.objects.using(using).filter(pk=event.pk).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + backoff(attempts, config),
+            last_error=errors[event.account_id][:500]
+        )
+        report['failed'] += 1
+
+    return report
+
+
+def dispatch(using, size=BATCH_SIZE, config=None):
+    """
+    Envia os lotes de eventos pendentes até que não haja mais eventos
+    prontos para envio.
+
+    Parâmetros:
+        using: O alias do banco.
+        size: A quantidade máxima de eventos por lote.
+        config: A configuração da caixa de saída.
+
+    Retorna:
+        dict: A soma dos resultados dos lotes.
+    """
+
+    total = {'events': 0, 'delivered': 0, 'failed': 0, 'requests': 0}
+
+    while True:
+        report = dispatch_batch(using, size, config)
+        for name in total:
+            total[name] += report[name]
+
+        if report['events'] < size or report['delivered'] == 0:
+            return total
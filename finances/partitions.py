@@ -0,0 +1,453 @@
+"""
+Particionamento mensal da tabela de transações.
+
+No PostgreSQL, `finances_transaction` é uma tabela particionada por
+intervalo de datas (`PARTITION BY RANGE (date)`), com uma partição por mês
+e uma partição padrão para as datas sem partição. As consultas com
+intervalo de datas leem apenas as partições do intervalo (partition
+pruning), e as partições antigas podem ser desanexadas para arquivamento.
+
+No SQLite, que não tem particionamento declarativo, a tabela principal
+guarda os períodos em aberto, e cada mês encerrado pode ser movido para uma
+tabela própria (`finances_transaction_pAAAAMM`). Nos dois bancos, as
+partições desanexadas são registradas em `TransactionPartition`, e
+`transactions_between` consulta apenas as tabelas cujo mês cruza o
+intervalo pedido.
+
+Os meses são delimitados em UTC.
+"""
+
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+PARENT_TABLE = 'finances_transaction'
+DEFAULT_PARTITION = 'finances_transaction_default'
+
+
+def month_start(value):
+    """
+    Retorna o primeiro dia do mês da data informada.
+
+    Exemplo de Uso:
+        >>> month_start(date(2024, 3, 15))
+        datetime.date(2024, 3, 1)
+    """
+
+    return date(value.year, value.month, 1)
+
+
+def next_month(period):
+    """
+    Retorna o primeiro dia do mês seguinte ao período informado.
+
+    Exemplo de Uso:
+        >>> next_month(date(2024, 12, 1))
+        datetime.date(2025, 1, 1)
+    """
+
+    if period.month == 12:
+        return date(period.year + 1, 1, 1)
+    return date(period.year, period.month + 1, 1)
+
+
+def period_bounds(period):
+    """
+    Retorna o início (inclusivo) e o fim (exclusivo) do mês em UTC.
+
+    Parâmetros:
+        period: O primeiro dia do mês.
+
+    Retorna:
+        tuple: Os dois instantes (datetime com fuso horário).
+    """
+
+    start = datetime(period.year, period.month, 1, tzinfo=dt_timezone.utc)
+    end = next_month(period)
+    end = datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc)
+
+    return start, end
+
+
+def transaction_columns(model=None):
+    """
+    Retorna as colunas da tabela de transações, na ordem dos campos do
+    modelo, para que as partições desanexadas guardem todas elas.
+
+    Parâmetros:
+        model: O modelo de transações (nas migrações, o modelo histórico).
+        Por padrão, `Transaction`.
+
+    Retorna:
+        tuple: Os nomes das colunas.
+    """
+
+    if model is None:
+        from finances.models import Transaction as model
+
+    return tuple(field.column for field in model._meta.concrete_fields)
+
+
+def add_missing_columns(connection, table, model=None):
+    """
+    Acrescenta a uma partição desanexada as colunas de transações criadas
+    depois que ela foi desanexada, preenchidas com o valor padrão do campo
+    (ou o instante atual, para os campos `auto_now`).
+
+    Parâmetros:
+        connection: A conexão do banco da partição.
+        table: O nome da tabela da partição.
+        model: O modelo de transações. Por padrão, `Transaction`.
+
+    Retorna:
+        list: Os nomes das colunas acrescentadas.
+    """
+
+    if model is None:
+        from finances.models import Transaction as model
+
+    quote = connection.ops.quote_name
+    added = []
+
+    with connection.cursor() as cursor:
+        existing = {
+            column.name
+            for column in connection.introspection.get_table_description(
+                cursor, table
+            )
+        }
+
+        for field in model._meta.concrete_fields:
+            if field.column in existing:
+                continue
+
+            cursor.execute(
+                f'ALTER TABLE {quote(table)} ADD COLUMN '
+                f'{quote(field.column)} {field.db_type(connection)} NULL'
+            )
+
+            if getattr(field, 'auto_now', False) or \
+                    getattr(field, 'auto_now_add', False):
+                value = timezone.now()
+            else:
+                value = field.get_default()
+            if value is not None:
+                cursor.execute(
+                    f'UPDATE {quote(table)} SET {quote(field.column)} = %s',
+                    [field.get_db_prep_save(value, connection)]
+                )
+
+            added.append(field.column)
+
+    return added
+
+
+def months_between(start, end):
+    """
+    Retorna o primeiro e o último mês, em UTC, que cruzam o intervalo
+    `[start, end)`.
+
+    Os períodos das partições e dos arquivos são datas; comparar um período
+    diretamente com um instante converteria o instante para o fuso horário
+    do projeto, e um fim de intervalo à meia-noite UTC do dia 2 de um mês
+    excluiria o próprio mês.
+
+    Parâmetros:
+        start: O início do intervalo (datetime com fuso horário), ou None.
+        end: O fim do intervalo (datetime com fuso horário), ou None.
+
+    Retorna:
+        tuple: O primeiro dia do primeiro e do último mês; cada um é None se
+        o limite correspondente for None.
+
+    Exemplo de Uso:
+        >>> months_between(
+        ...     None, datetime(2024, 3, 1, tzinfo=dt_timezone.utc)
+        ... )
+        (None, datetime.date(2024, 2, 1))
+    """
+
+    first = last = None
+
+    if start is not None:
+        first = month_start(start.astimezone(dt_timezone.utc))
+    if end is not None:
+        last = month_start(
+            end.astimezone(dt_timezone.utc) - timedelta(microseconds=1)
+        )
+
+    return first, last
+
+
+def partition_table(period):
+    """
+    Retorna o nome da tabela (ou partição) de um mês.
+
+    Exemplo de Uso:
+        >>> partition_table(date(2024, 3, 1))
+        'finances_transaction_p202403'
+    """
+
+    return f'{PARENT_TABLE}_p{period:%Y%m}'
+
+
+def parse_period(value):
+    """
+    Converte um período no formato AAAA-MM no primeiro dia do mês.
+
+    Raises:
+        ValueError: Se o formato for inválido.
+
+    Exemplo de Uso:
+        >>> parse_period('2024-03')
+        datetime.date(2024, 3, 1)
+    """
+
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def create_partitions(using, first, last):
+    """
+    Cria as partições mensais do PostgreSQL entre os meses informados,
+    inclusive. Nos demais bancos, não faz nada.
+
+    Parâmetros:
+        using: O alias do banco.
+        first: O primeiro mês.
+        last: O último mês.
+
+    Retorna:
+        list: Os nomes das partições criadas (ou já existentes).
+    """
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return []
+
+    quote = connection.ops.quote_name
+    created = []
+    period = month_start(first)
+
+    with connection.cursor() as cursor:
+        while period <= last:
+            start, end = period_bounds(period)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {quote(partition_table(period))} '
+                f'PARTITION OF {quote(PARENT_TABLE)} '
+                f'FOR VALUES FROM (%s) TO (%s)',
+                [start, end]
+            )
+            created.append(partition_table(period))
+            period = next_month(period)
+
+    return created
+
+
+def detach_partition(period, using='default'):
+    """
+    Desanexa o mês informado da tabela de transações, deixando seus registros
+    em uma tabela própria, e registra a partição em `TransactionPartition`.
+
+    No PostgreSQL, a partição é desanexada com `DETACH PARTITION`. No SQLite,
+    os registros do mês são movidos da tabela principal para a tabela do
+    período, com um índice por conta e data.
+
+    Apenas meses encerrados podem ser desanexados.
+
+    Parâmetros:
+        period: O primeiro dia do mês.
+        using: O alias do banco.
+
+    Retorna:
+        TransactionPartition: O registro da partição desanexada.
+
+    Raises:
+        ValueError: Se o mês não estiver encerrado ou já tiver sido
+        desanexado.
+    """
+
+    from finances.models import TransactionPartition
+
+    period = month_start(period)
+    if next_month(period) > month_start(timezone.now().date()):
+        raise ValueError(f'Period {period:%Y-%m} is not closed yet.')
+
+    partitions = TransactionPartition.objects.using(using)
+    if partitions.filter(period=period).exists():
+        raise ValueError(f'Period {period:%Y-%m} is already detached.')
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = partition_table(period)
+    start, end = period_bounds(period)
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            create_partitions(using, period, period)
+            cursor.execute(
+                f'ALTER TABLE {quote(PARENT_TABLE)} '
+                f'DETACH PARTITION {quote(table)}'
+            )
+        else:
+            columns = ', '.join(
+                quote(column) for column in transaction_columns()
+            )
+            cursor.execute(
+                f'CREATE TABLE {quote(table)} AS SELECT {columns} '
+                f'FROM {quote(PARENT_TABLE)} WHERE date >= %s AND date < %s',
+                [start, end]
+            )
+            cursor.execute(
+                f'CREATE INDEX {quote(table + "_account_date")} '
+                f'ON {quote(table)} (account_id, date)'
+            )
+            cursor.execute(
+                f'DELETE FROM {quote(PARENT_TABLE)} '
+                f'WHERE date >= %s AND date < %s',
+                [start, end]
+            )
+
+        cursor.execute(f'SELECT COUNT(*) FROM {quote(table)}')
+        rows = cursor.fetchone()[0]
+
+        return partitions.create(period=period, table_name=table, rows=rows)
+
+
+def date_range_param(request):
+    """
+    Lê os parâmetros de consulta `?start=` e `?end=` (datas no formato
+    AAAA-MM-DD, ambas inclusivas) de uma solicitação.
+
+    Parâmetros:
+        request: O objeto da solicitação HTTP.
+
+    Retorna:
+        tuple: O início (inclusivo) e o fim (exclusivo) do intervalo em UTC;
+        cada um é None se o parâmetro não foi enviado.
+
+    Raises:
+        ValidationError: Se alguma data for inválida.
+    """
+
+    query_params = getattr(request, 'query_params', request.GET)
+    bounds = []
+
+    for name in ('start', 'end'):
+        value = query_params.get(name)
+        if value is None:
+            bounds.append(None)
+            continue
+
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: ['Invalid date, use YYYY-MM-DD.']})
+
+        if name == 'end':
+            day = day + timedelta(days=1)
+        bounds.append(
+            datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+        )
+
+    return tuple(bounds)
+
+
+def transactions_between(start, end, queryset=None, account_ids=None):
+    """
+    Retorna as transações com data no intervalo `[start, end)`, reunindo a
+    tabela principal e apenas as partições desanexadas e os arquivos
+    (`finances.archive`) cujo mês cruza o intervalo.
+
+    Parâmetros:
+        start: O início do intervalo (inclusivo), ou None.
+        end: O fim do intervalo (exclusivo), ou None.
+        queryset: O queryset de transações da tabela principal. Por padrão,
+        todas as transações.
+        account_ids: Restringe as transações às contas informadas.
+
+    Retorna:
+        QuerySet | list: O queryset filtrado, se nenhuma partição desanexada
+        ou arquivo cruzar o intervalo, ou a lista das transações ordenadas por
+        data.
+    """
+
+    from finances.archive import archives_between, read_archives
+    from finances.models import Transaction, TransactionPartition
+
+    if queryset is None:
+        queryset = Transaction.objects.all()
+
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lt=end)
+    if account_ids is not None:
+        queryset = queryset.filter(account_id__in=account_ids)
+
+    using = queryset.db
+    partitions = TransactionPartition.objects.using(using).order_by('period')
+    first, last = months_between(start, end)
+    if first is not None:
+        partitions = partitions.filter(period__gte=first)
+    if last is not None:
+        partitions = partitions.filter(period__lte=last)
+
+    partitions = list(partitions)
+    archives = list(archives_between(using, start, end, account_ids))
+    if not partitions and not archives:
+        return queryset
+
+    instances = list(queryset)
+    instances.extend(
+        read_partitions(partitions, using, start, end, account_ids)
+    )
+    instances.extend(read_archives(archives, start, end))
+    instances.sort(key=lambda instance: (instance.date, instance.pk))
+
+    return instances
+
+
+def read_partitions(partitions, using, start, end, account_ids=None):
+    """
+    Lê as transações das partições desanexadas informadas.
+
+    Retorna:
+        list: Instâncias de Transaction, uma por registro.
+    """
+
+    from finances.models import Transaction
+
+    quote = connections[using].ops.quote_name
+
+    conditions, params = [], []
+    if start is not None:
+        conditions.append('date >= %s')
+        params.append(start)
+    if end is not None:
+        conditions.append('date < %s')
+        params.append(end)
+    if account_ids is not None:
+        account_ids = list(account_ids)
+        if not account_ids:
+            return []
+        conditions.append(
+            f'account_id IN ({", ".join(["%s"] * len(account_ids))})'
+        )
+        params.extend(account_ids)
+
+    where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+    columns = ', '.join(quote(column) for column in transaction_columns())
+    instances = []
+
+    for partition in partitions:
+        instances.extend(Transaction.objects.using(using).raw(
+            f'SELECT {columns} FROM {quote(partition.table_name)}{where}',
+            params
+        ))
+
+    return instances
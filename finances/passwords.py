@@ -0,0 +1,169 @@
+"""
+Hash das senhas dos titulares, no cadastro e no login.
+
+Todas as senhas passam pelo mesmo caminho: o primeiro hasher de
+`PASSWORD_HASHERS`, `ConfigurablePBKDF2PasswordHasher`, um PBKDF2-SHA256 com
+a quantidade de iterações definida em `PASSWORD_HASHING['ITERATIONS']` (por
+padrão, a do Django). Os hashes gravados com outra quantidade de iterações
+continuam válidos e são refeitos no próximo login.
+
+O PBKDF2 ocupa a CPU durante dezenas de milissegundos por senha. Sob ASGI,
+as views assíncronas de cadastro e login executam o hash em um pool
+(`PASSWORD_HASHING['EXECUTOR']`): de threads, já que o `hashlib` libera o
+GIL durante o cálculo, ou de processos. Assim, o loop de eventos e a thread
+das views síncronas ficam livres enquanto as senhas são calculadas.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    get_hasher,
+    get_hashers,
+    get_hashers_by_algorithm,
+    identify_hasher
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULTS = {
+    'ITERATIONS': None,
+    'EXECUTOR': 'thread',
+    'WORKERS': None,
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_config():
+    """
+    Retorna a configuração do hash das senhas, definida em
+    `settings.PASSWORD_HASHING`, completada com os valores padrão.
+    """
+
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Hasher PBKDF2-SHA256 com a quantidade de iterações definida em
+    `PASSWORD_HASHING['ITERATIONS']`.
+
+    A quantidade é lida ao criar o hasher e guardada na instância, de forma
+    que o hasher possa ser enviado a um processo do pool sem as
+    configurações do Django.
+    """
+
+    def __init__(self):
+        self.iterations = (
+            get_config()['ITERATIONS'] or PBKDF2PasswordHasher.iterations
+        )
+
+
+@receiver(setting_changed)
+def reset_hashers(*, setting, **kwargs):
+    """
+    Recria os hashers quando `PASSWORD_HASHING` é alterado (por exemplo,
+    nos testes), para que a nova quantidade de iterações seja usada.
+    """
+
+    if setting == 'PASSWORD_HASHING':
+        get_hashers.cache_clear()
+        get_hashers_by_algorithm.cache_clear()
+
+
+def hash_password(password):
+    """
+    Calcula o hash de uma senha com o hasher padrão.
+
+    Parâmetros:
+        password: A senha.
+
+    Retorna:
+        str: O hash da senha, no formato de `User.password`.
+    """
+
+    hasher = get_hasher()
+
+    return hasher.encode(password, hasher.salt())
+
+
+def get_executor():
+    """
+    Retorna o pool usado pelas funções assíncronas, criado no primeiro uso,
+    ou None para o executor padrão do loop de eventos.
+    """
+
+    config = get_config()
+    kind = config['EXECUTOR']
+    workers = config['WORKERS'] or os.cpu_count()
+
+    if kind is None:
+        return None
+
+    with _executors_lock:
+        key = (kind, workers)
+        if key not in _executors:
+            if kind == 'process':
+                _executors[key] = ProcessPoolExecutor(workers)
+            else:
+                _executors[key] = ThreadPoolExecutor(
+                    workers,
+                    thread_name_prefix='password'
+                )
+        return _executors[key]
+
+
+async def run_in_pool(func, *args):
+    """
+    Executa uma função no pool do hash das senhas.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+async def ahash_password(password):
+    """
+    Versão assíncrona de `hash_password`, com o cálculo no pool.
+    """
+
+    hasher = get_hasher()
+
+    return await run_in_pool(hasher.encode, password, hasher.salt())
+
+
+async def acheck_password(user, password):
+    """
+    Verifica a senha de um titular, com o cálculo no pool, e refaz o hash
+    se ele foi gravado com outro hasher ou outra quantidade de iterações.
+
+    Parâmetros:
+        user: O titular.
+        password: A senha informada.
+
+    Retorna:
+        bool: True se a senha estiver correta.
+    """
+
+    if not user.has_usable_password() or password is None:
+        await ahash_password(password or '')
+        return False
+
+    hasher = identify_hasher(user.password)
+    valid = await run_in_pool(hasher.verify, password, user.password)
+
+    if valid and (
+        hasher.algorithm != get_hasher().algorithm or
+        get_hasher().must_update(user.password)
+    ):
+        user.password = await ahash_password(password)
+        await user.asave(update_fields=['password'])
+
+    return valid
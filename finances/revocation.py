@@ -0,0 +1,364 @@
+"""
+Revogação dos tokens de atualização, com um filtro de Bloom à frente.
+
+Com `ROTATE_REFRESH_TOKENS`, cada uso de um token de atualização em
+`/api/token/refresh/` retorna um token novo e revoga o usado: o `jti` do
+token é gravado em `RevokedToken`, no banco principal, até a sua expiração.
+A restrição de unicidade do `jti` garante que um token só possa ser trocado
+uma vez, mesmo por solicitações simultâneas.
+
+Para que o caso comum (o token não foi revogado) não consulte o banco, cada
+processo mantém um filtro de Bloom com os `jti` revogados. Se o `jti` não
+estiver no filtro, o token certamente não foi revogado; se estiver, a
+revogação é confirmada no banco, pois o filtro admite falsos positivos
+(`ERROR_RATE`).
+
+O filtro é completado com as revogações dos demais processos quando o
+contador de revogações no cache do Django muda ou, no máximo, a cada
+`SYNC_SECONDS`, lendo apenas as revogações recentes. Com um cache que não é
+compartilhado entre os processos, um token revogado em outro processo pode
+ser aceito durante esse intervalo. Quando o filtro passa da sua capacidade,
+ele é recriado com pelo menos o dobro dela, apenas com os tokens ainda não
+expirados.
+
+Os tokens revogados expirados são removidos pelo comando
+`purge_revoked_tokens`.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+DEFAULTS = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_SECONDS': 5,
+}
+
+VERSION_KEY = 'finances:revocation:version'
+
+
+def get_config():
+    """
+    Retorna a configuração da revogação, definida em
+    `settings.TOKEN_REVOCATION`, completada com os valores padrão.
+    """
+
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_REVOCATION', {})}
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom de textos, dimensionado pela capacidade e pela taxa de
+    falsos positivos desejada.
+
+    Atributos:
+        size: A quantidade de bits do filtro.
+        hashes: A quantidade de posições verificadas por item.
+        count: A quantidade de itens adicionados.
+        capacity: A quantidade de itens para a qual o filtro foi
+        dimensionado.
+
+    Métodos:
+        positions: Retorna as posições de um item.
+        add: Adiciona um item.
+        __contains__: Verifica se um item pode ter sido adicionado.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item):
+        """
+        Retorna as posições de um item, calculadas por hash duplo a partir
+        de um único resumo BLAKE2b.
+        """
+
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'big')
+        second = int.from_bytes(digest[8:], 'big') | 1
+
+        return [
+            (first + number * second) % self.size
+            for number in range(self.hashes)
+        ]
+
+    def add(self, item):
+        """
+        Adiciona um item ao filtro.
+        """
+
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class RevocationStore:
+    """
+    Conjunto dos tokens revogados, com o filtro de Bloom do processo à
+    frente da tabela `RevokedToken`.
+
+    Métodos:
+        rebuild: Recria o filtro com os tokens revogados não expirados.
+        sync: Completa o filtro com as revogações recentes.
+        is_revoked: Verifica se um token foi revogado.
+        revoke: Revoga um token.
+        reset: Descarta o filtro do processo.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Descarta o filtro do processo, recriado na próxima verificação.
+        """
+
+        with self.lock:
+            self.filter = None
+            self.version = None
+            self.synced_at = 0
+            self.synced_wall = None
+
+    def rebuild(self, capacity):
+        """
+        Recria o filtro com os tokens revogados ainda não expirados, com
+        pelo menos a capacidade informada.
+        """
+
+        from finances.models import RevokedToken
+
+        config = get_config()
+        jtis = list(
+            RevokedToken.objects.using('default').filter(
+                expires_at__gt=timezone.now()
+            ).values_list('jti', flat=True)
+        )
+
+        bloom = BloomFilter(
+            max(capacity, 2 * len(jtis)),
+            config['ERROR_RATE']
+        )
+        for jti in jtis:
+            bloom.add(jti)
+
+        self.filter = bloom
+
+    def sync(self):
+        """
+        Cria o filtro, se ainda não existir, ou o completa com as revogações
+        recentes se o contador de revogações mudou ou se o intervalo
+        `SYNC_SECONDS` passou.
+        """
+
+        from finances.models import RevokedToken
+
+        config = get_config()
+        version = cache.get(VERSION_KEY)
+
+        if self.filter is not None and version == self.version and \
+                time.monotonic() - self.synced_at < config['SYNC_SECONDS']:
+            return
+
+        with self.lock:
+            started = timezone.now()
+
+            if self.filter is None:
+                self.rebuild(config['CAPACITY'])
+            else:
+                for jti in RevokedToken.objects.using('default').filter(
+                    revoked_at__gte=self.synced_wall - timedelta(
+                        seconds=config['SYNC_SECONDS']
+                    )
+                ).values_list('jti', flat=True):
+                    if jti not in self.filter:
+                        self.filter.add(jti)
+
+                if self.filter.count > self.filter.capacity:
+                    self.rebuild(2 * self.filter.capacity)
+
+            self.version = version
+            self.synced_at = time.monotonic()
+            self.synced_wall = started
+
+    def is_revoked(self, jti):
+        """
+        Verifica se um token foi revogado, consultando o banco apenas se o
+        `jti` estiver no filtro.
+
+        Parâmetros:
+            jti: O identificador do token.
+
+        Retorna:
+            bool: True se o token foi revogado.
+        """
+
+        from finances.models import RevokedToken
+
+        self.sync()
+
+        if jti not in self.filter:
+            return False
+
+        return RevokedToken.objects.using('default').filter(jti=jti).exists()
+
+    def revoke(self, jti, exp):
+        """
+        Revoga um token, se ainda não tiver sido revogado.
+
+        Parâmetros:
+            jti: O identificador do token.
+            exp: A expiração do token (declaração `exp`), em segundos desde a
+            época.
+
+        Retorna:
+            bool: True se o token foi revogado por esta chamada, ou False se
+            já estava revogado.
+        """
+
+        from finances.models import RevokedToken
+
+        try:
+            with transaction.atomic(using='default'):
+                RevokedToken.objects.using('default').create(
+                    jti=jti,
+                    expires_at=datetime.fromtimestamp(exp, dt_timezone.utc)
+                )
+        except IntegrityError:
+            return False
+
+        self.sync()
+
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            version = 1
+            cache.set(VERSION_KEY, version, None)
+
+        with self.lock:
+            self.filter.add(jti)
+            if self.filter.count > self.filter.capacity:
+                self.rebuild(2 * self.filter.capacity)
+
+            # Se nenhum outro processo revogou um token desde a última
+            # sincronização, o filtro já está completo.
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+
+        return True
+
+
+store = RevocationStore()
+
+
+def purge_expired_tokens(now=None):
+    """
+    Remove os tokens revogados que já expiraram.
+
+    Parâmetros:
+        now: O instante de referência. Por padrão, o instante atual.
+
+    Retorna:
+        int: A quantidade de tokens removidos.
+    """
+
+    from finances.models import RevokedToken
+
+    deleted, _ = RevokedToken.objects.using('default').filter(
+        expires_at__lte=now or timezone.now()
+    ).delete()
+
+    return deleted
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Serializer de `/api/token/refresh/` que recusa os tokens revogados e,
+    com `ROTATE_REFRESH_TOKENS`, revoga o token trocado.
+
+    Métodos:
+        validate: Valida o token e retorna os tokens novos.
+    """
+
+    def validate(self, attrs):
+        """
+        Valida o token de atualização e retorna um token de acesso novo e,
+        com `ROTATE_REFRESH_TOKENS`, um token de atualização novo.
+
+        Raises:
+            InvalidToken: Se o token for inválido ou tiver sido revogado.
+        """
+
+        refresh = self.token_class(attrs['refresh'])
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        if store.is_revoked(jti):
+            raise InvalidToken('Token is revoked')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not store.revoke(jti, refresh['exp']):
+                raise InvalidToken('Token is revoked')
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class RevocableTokenVerifySerializer(serializers.Serializer):
+    """
+    Serializer de `/api/token/verify/` que também recusa os tokens
+    revogados.
+
+    Métodos:
+        validate: Valida o token.
+    """
+
+    token = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        """
+        Valida a assinatura e a expiração do token e verifica se ele não foi
+        revogado.
+
+        Raises:
+            InvalidToken: Se o token tiver sido revogado.
+        """
+
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+
+        if jti is not None and store.is_revoked(jti):
+            raise InvalidToken('Token is revoked')
+
+        return {}
@@ -0,0 +1,396 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import LazyObject
+
+PIN_CACHE_KEY = 'finances:replica-pin:{user_id}'
+
+SHARDED_MODELS = (
+    'finances.account',
+    'finances.transaction',
+    'finances.budget',
+    'finances.transactionarchive',
+    'finances.balancecheckpoint',
+    'finances.ledgerentry',
+    'finances.ledgerday',
+    'finances.balancesnapshot',
+    'finances.outboxevent',
+)
+REPLICATED_MODELS = ('auth.user', 'finances.category')
+PRIMARY_APPS = ('sessions',)
+
+_routing = ContextVar('finances_replica_routing', default=None)
+_active_shard = ContextVar('finances_active_shard', default=None)
+
+
+def request_user(request):
+    """
+    Retorna o usuário já identificado na solicitação, sem carregar o usuário
+    da sessão.
+
+    O `AuthenticationMiddleware` do Django define `request.user` como um
+    objeto preguiçoso, que consulta a sessão e o usuário no primeiro acesso.
+    Essas consultas passam pelos roteadores, que não podem avaliá-lo: a
+    avaliação chamaria os roteadores novamente, indefinidamente. Por isso, o
+    usuário preguiçoso só é usado depois de carregado (`_cached_user`); o
+    usuário definido pela autenticação do Django REST Framework, que
+    substitui `request.user`, é usado diretamente.
+
+    Parâmetros:
+        request: A solicitação HTTP.
+
+    Retorna:
+        User | AnonymousUser | None: O usuário, ou None se ainda não for
+        conhecido.
+    """
+
+    user = getattr(request, 'user', None)
+
+    if issubclass(type(user), LazyObject):
+        return getattr(request, '_cached_user', None)
+
+    return user
+
+
+class RoutingState:
+    """
+    Estado do roteamento de leituras durante uma solicitação.
+
+    O estado é compartilhado pelas threads das leituras simultâneas de um
+    lote (`finances.batch`). Por isso, a fixação e o shard resolvidos para o
+    usuário são guardados junto com o ID dele, em uma única atribuição.
+
+    Atributos:
+        request: A solicitação HTTP em andamento.
+        pinned: Se True, as leituras da solicitação vão para o banco
+        principal.
+    """
+
+    def __init__(self, request, pinned=False):
+        self.request = request
+        self.pinned = pinned
+        self.user_pin = None
+        self.user_shard = None
+
+    def is_pinned(self):
+        """
+        Verifica se as leituras devem ir para o banco principal: nas
+        solicitações de escrita e, por `REPLICA_PIN_SECONDS` segundos, nas
+        solicitações do usuário que acabou de escrever.
+
+        O usuário só é conhecido depois da autenticação, que ocorre na view;
+        por isso a verificação é feita na primeira leitura após a
+        autenticação e o resultado é guardado.
+
+        Retorna:
+            bool: True se as leituras devem ir para o banco principal.
+        """
+
+        if self.pinned:
+            return True
+
+        user = request_user(self.request)
+        if user is None or not user.is_authenticated:
+            return False
+
+        user_pin = self.user_pin
+        if user_pin is None or user_pin[0] != user.pk:
+            user_pin = (user.pk, bool(cache.get(pin_key(user.pk))))
+            self.user_pin = user_pin
+
+        return user_pin[1]
+
+    def owner_shard(self):
+        """
+        Retorna o shard do usuário autenticado na solicitação, ou None se a
+        solicitação não estiver autenticada. Assim como em `is_pinned`, o
+        shard é resolvido na primeira consulta após a autenticação.
+        """
+
+        user = request_user(self.request)
+        if user is None or not user.is_authenticated:
+            return None
+
+        user_shard = self.user_shard
+        if user_shard is None or user_shard[0] != user.pk:
+            user_shard = (user.pk, shard_for_owner(user.pk))
+            self.user_shard = user_shard
+
+        return user_shard[1]
+
+
+def pin_key(user_id):
+    """
+    Retorna a chave de cache que marca as escritas recentes de um usuário.
+    """
+
+    return PIN_CACHE_KEY.format(user_id=user_id)
+
+
+def pin_user(user_id):
+    """
+    Direciona as leituras do usuário para o banco principal durante
+    `REPLICA_PIN_SECONDS` segundos, para que ele veja as próprias escritas
+    mesmo com atraso de replicação.
+
+    Parâmetros:
+        user_id: O ID do usuário que realizou a escrita.
+    """
+
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    if seconds > 0:
+        cache.set(pin_key(user_id), True, seconds)
+
+
+def start_routing(request, pinned=False):
+    """
+    Inicia o roteamento de leituras para a solicitação. Retorna o token usado
+    em `stop_routing`.
+    """
+
+    return _routing.set(RoutingState(request, pinned))
+
+
+def stop_routing(token):
+    """
+    Encerra o roteamento de leituras iniciado por `start_routing`.
+    """
+
+    _routing.reset(token)
+
+
+def get_shards():
+    """
+    Retorna os aliases dos shards, definidos em `settings.DATABASE_SHARDS`.
+    """
+
+    return getattr(settings, 'DATABASE_SHARDS', [])
+
+
+def hash_shard(owner_id, shards):
+    """
+    Escolhe o shard de um titular por hash de maior peso (rendezvous
+    hashing). A escolha é estável entre processos e, quando um shard é
+    adicionado, apenas os titulares que passam a pertencer ao novo shard
+    mudam de lugar.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+        shards: Os aliases dos shards.
+
+    Retorna:
+        str: O alias do shard escolhido.
+
+    Exemplo de Uso:
+        >>> hash_shard(7, ['shard1', 'shard2']) in ('shard1', 'shard2')
+        True
+    """
+
+    def weight(alias):
+        return hashlib.sha256(f'{alias}:{owner_id}'.encode()).digest()
+
+    return max(shards, key=weight)
+
+
+def shard_for_owner(owner_id):
+    """
+    Retorna o shard que guarda os dados do titular: o registrado no
+    diretório de shards (`OwnerShard`), se houver, ou o escolhido por hash.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+
+    Retorna:
+        str | None: O alias do shard, ou None se não houver shards.
+    """
+
+    from finances.models import OwnerShard
+
+    shards = get_shards()
+    if not shards:
+        return None
+
+    if owner_id is not None:
+        alias = OwnerShard.objects.using('default').filter(
+            owner_id=owner_id
+        ).values_list('alias', flat=True).first()
+        if alias in shards:
+            return alias
+
+    return hash_shard(owner_id, shards)
+
+
+@contextmanager
+def owner_shard(owner_id):
+    """
+    Gerenciador de contexto que direciona as consultas dos modelos
+    particionados para o shard do titular informado, independentemente do
+    usuário da solicitação. Usado em comandos e por administradores.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+
+    Exemplo de Uso:
+        with owner_shard(owner.pk):
+            accounts = Account.objects.filter(owner=owner)
+    """
+
+    token = _active_shard.set(shard_for_owner(owner_id))
+    try:
+        yield
+    finally:
+        _active_shard.reset(token)
+
+
+def current_shard():
+    """
+    Retorna o shard ativo: o definido por `owner_shard` ou o do usuário
+    autenticado na solicitação em andamento.
+    """
+
+    shard = _active_shard.get()
+    if shard is not None:
+        return shard
+
+    state = _routing.get()
+    if state is None:
+        return None
+
+    return state.owner_shard()
+
+
+def get_replicas():
+    """
+    Retorna os aliases das réplicas de leitura, definidos em
+    `settings.DATABASE_REPLICAS`.
+    """
+
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """
+    Roteador que envia as leituras feitas durante as solicitações às views
+    para as réplicas e todas as escritas para o banco principal (`default`).
+
+    As leituras continuam no banco principal quando:
+
+    - não há réplicas configuradas;
+    - a leitura ocorre fora de uma solicitação (comandos, migrações, shell);
+    - há uma transação aberta no banco principal;
+    - a solicitação é de escrita (POST, PUT, PATCH, DELETE), para que as
+      validações não usem dados atrasados;
+    - o usuário realizou uma escrita há menos de `REPLICA_PIN_SECONDS`
+      segundos (leitura das próprias escritas);
+    - o modelo é de um dos apps de `PRIMARY_APPS`, como as sessões, que são
+      gravadas no login e lidas logo em seguida.
+
+    Métodos:
+        db_for_read: Escolhe o banco das leituras.
+        db_for_write: Escolhe o banco das escritas.
+        allow_relation: Permite relações entre o principal e as réplicas.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        state = _routing.get()
+
+        if not replicas or state is None:
+            return 'default'
+
+        if model._meta.app_label in PRIMARY_APPS:
+            return 'default'
+
+        if connections['default'].in_atomic_block or state.is_pinned():
+            return 'default'
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ShardRouter:
+    """
+    Roteador que particiona as contas, transações e orçamentos por titular.
+
+    Os dados de cada titular ficam no shard registrado no diretório
+    (`OwnerShard`) ou, se não houver registro, no escolhido por hash do ID do
+    titular (`hash_shard`). As categorias e os usuários ficam no banco
+    principal e são replicados em todos os shards, para que as chaves
+    estrangeiras sejam válidas em cada um deles.
+
+    O shard é escolhido, nesta ordem:
+
+    - pelo banco do objeto informado na consulta (por exemplo, as transações
+      de uma conta lida de um shard);
+    - pelo titular de uma conta nova, ou pela conta de uma transação ou de um
+      orçamento novo;
+    - pelo titular informado em `owner_shard` ou pelo usuário autenticado na
+      solicitação.
+
+    Os demais modelos, e as consultas sem shard definido, seguem para o
+    próximo roteador (`ReplicaRouter`). Sem `DATABASE_SHARDS`, o roteador não
+    interfere.
+
+    Métodos:
+        db_for_read: Escolhe o shard das leituras.
+        db_for_write: Escolhe o shard das escritas.
+        allow_relation: Permite relações dentro de um shard e com os modelos
+        replicados.
+    """
+
+    def shard_for(self, model, hints):
+        shards = get_shards()
+        if not shards or model._meta.label_lower not in SHARDED_MODELS:
+            return None
+
+        instance = hints.get('instance')
+
+        if instance is not None:
+            label = instance._meta.label_lower
+
+            if label in SHARDED_MODELS and instance._state.db in shards:
+                return instance._state.db
+
+            if label == 'auth.user':
+                return shard_for_owner(instance.pk)
+
+            if label == 'finances.account':
+                return shard_for_owner(instance.owner_id)
+
+            account = instance._state.fields_cache.get('account')
+            if account is not None and account._state.db in shards:
+                return account._state.db
+
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self.shard_for(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self.shard_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not get_shards():
+            return None
+
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if labels & set(REPLICATED_MODELS):
+            return True
+
+        if labels <= set(SHARDED_MODELS):
+            return obj1._state.db == obj2._state.db
+
+        return None
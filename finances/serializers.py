@@ -1,9 +1,63 @@
-from django.contrib.auth.hashers import make_password
+from django.db import router
+from django.db.models import F
+from django.db.transaction import atomic
+from django.utils import timezone
 from rest_framework import serializers
-from finances.models import Account, Category, Transaction, Budget
+from finances.alerts import check_thresholds
+from finances.changes import record_change
+from finances.concurrency import update_versioned
+from finances.ledger import record_entry
+from finances.outbox import enqueue
+from finances.passwords import hash_password
+from finances.models import (
+    Account, BalanceCheckpoint, Category, LedgerEntry, Transaction, Budget
+)
 from django.contrib.auth.models import User
 
 
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    Serializer base que permite restringir os campos retornados e expandir
+    relações de forma aninhada.
+
+    Parâmetros extras do construtor:
+        fields: Os nomes dos campos a serem mantidos. Se omitido, todos os
+        campos são retornados.
+        expand: Os nomes das relações que serão serializadas por completo em
+        vez de apenas pela chave primária.
+
+    Métodos:
+        get_expandable_fields: Retorna as relações que podem ser expandidas e
+        seus respectivos serializers.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None) or []
+
+        super().__init__(*args, **kwargs)
+
+        expandable_fields = self.get_expandable_fields()
+        for name in expand:
+            self.fields[name] = expandable_fields[name](read_only=True)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        """
+        Retorna as relações que podem ser expandidas.
+
+        Retorna:
+            dict: Dicionário com o nome da relação e o serializer usado para
+            representá-la.
+        """
+
+        return {}
+
+
 class AccountSerializer(serializers.ModelSerializer):
     """
     Serializer para o modelo Account.
@@ -13,6 +67,7 @@ class AccountSerializer(serializers.ModelSerializer):
 
     Métodos:
         validate: Valida os dados fornecidos durante a serialização.
+        update: Atualiza a conta de forma condicional à versão esperada.
 
     Campos:
         Todos os campoos do modelo Account.
@@ -20,6 +75,7 @@ class AccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Account
         fields = '__all__'
+        read_only_fields = ('version',)
 
     def validate(self, data):
         """
@@ -40,13 +96,7 @@ class AccountSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and request.method == 'PATCH':
             if 'balance' in data:
-                instance = self.instance
-                balance_update = data['balance']
-                instance.balance = balance_update
-
-                instance.save()
-
-                return {'balance': instance.balance}
+                return {'balance': data['balance']}
 
         if not data.get('owner'):
             raise serializers.ValidationError(
@@ -55,8 +105,53 @@ class AccountSerializer(serializers.ModelSerializer):
 
         return data
 
+    def update(self, instance, validated_data):
+        """
+        Atualiza uma conta existente com um único UPDATE condicional à versão
+        esperada. Um ajuste manual do saldo desloca o saldo de abertura
+        registrado pela auditoria (`BalanceCheckpoint`) na mesma medida e é
+        gravado no livro-razão da conta.
+
+        Parâmetros:
+            instance: A conta existente.
+            validated_data: Dados validados para atualização.
+
+        Retorna:
+            Account: A conta atualizada.
+
+        Raises:
+            PreconditionFailed: Se a conta foi alterada por outra solicitação.
+        """
+
+        old_balance = instance.balance
+
+        with atomic(using=instance._state.db):
+            update_versioned(
+                instance,
+                self.context.get('request'),
+                **validated_data
+            )
+
+            if 'balance' in validated_data and \
+                    instance.balance != old_balance:
+                BalanceCheckpoint.objects.using(instance._state.db).filter(
+                    account=instance
+                ).update(
+                    opening_balance=F('opening_balance') + (
+                        instance.balance - old_balance
+                    )
+                )
+                record_entry(
+                    instance.pk,
+                    instance._state.db,
+                    instance.balance - old_balance,
+                    LedgerEntry.ADJUSTMENT
+                )
+
+        return instance
+
 
-class BudgetSerializer(serializers.ModelSerializer):
+class BudgetSerializer(DynamicFieldsModelSerializer):
     """
     Serializer para o modelo Budget.
 
@@ -64,6 +159,7 @@ class BudgetSerializer(serializers.ModelSerializer):
         Nenhum atributo específico nesta classe.
 
     Métodos:
+        get_expandable_fields: Permite expandir a conta e a categoria.
         validate: Valida os dados fornecidos durante a serialização.
 
     Campos:
@@ -73,6 +169,11 @@ class BudgetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Budget
         fields = '__all__'
+        read_only_fields = ('version',)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return {'account': AccountSerializer, 'category': CategorySerializer}
 
     def validate(self, data):
         """
@@ -111,24 +212,61 @@ class BudgetSerializer(serializers.ModelSerializer):
 
         return data
 
+    def create(self, validated_data):
+        """
+        Cria um novo orçamento e grava o evento `budget.created` na caixa de
+        saída, na mesma transação do banco.
+
+        Parâmetros:
+            validated_data: Dados validados do orçamento.
+
+        Retorna:
+            Budget: O orçamento recém-criado.
+        """
+
+        using = router.db_for_write(Budget, instance=Budget(**validated_data))
+
+        with atomic(using=using):
+            budget = super().create(validated_data)
+            enqueue(
+                using,
+                'budget.created',
+                budget,
+                BudgetSerializer(budget).data
+            )
+
+        return budget
+
     def update(self, instance, validated_data):
         """
-        Atualiza uma transação existente e ajusta o gasto do orçamento, se
-        necessário.
+        Atualiza um orçamento existente com um único UPDATE condicional à
+        versão esperada e grava o evento `budget.updated` na caixa de saída,
+        na mesma transação do banco.
 
         Parâmetros:
-            instance: A transação existente.
+            instance: O orçamento existente.
             validated_data: Dados validados para atualização.
 
         Retorna:
-            Transaction: A transação atualizada.
+            Budget: O orçamento atualizado.
+
+        Raises:
+            PreconditionFailed: Se o orçamento foi alterado por outra
+            solicitação.
         """
 
         request = self.context.get('request')
+        fields = {
+            name: validated_data[name]
+            for name in (
+                'amount', 'account', 'category', 'start_date', 'end_date'
+            )
+            if name in validated_data
+        }
+
         if request and request.method == 'PUT':
             if 'amount' in validated_data:
                 budget_amount = validated_data['amount']
-                instance.amount = budget_amount
 
                 if budget_amount < 0:
                     raise serializers.ValidationError(
@@ -138,18 +276,20 @@ class BudgetSerializer(serializers.ModelSerializer):
                         }
                     )
 
-                instance.save()
-                return instance
+                fields = {'amount': budget_amount}
 
-        instance.amount = validated_data.get('amount', instance.amount)
-        instance.account = validated_data.get('account', instance.account)
-        instance.category = validated_data.get('category', instance.category)
-        instance.start_date = validated_data.get(
-            'start_date', instance.start_date
-        )
-        instance.end_date = validated_data.get('end_date', instance.end_date)
+        previous_amount = instance.amount
+
+        with atomic(using=instance._state.db):
+            update_versioned(instance, request, **fields)
+            check_thresholds(instance, instance.spent, previous_amount)
+            enqueue(
+                instance._state.db,
+                'budget.updated',
+                instance,
+                BudgetSerializer(instance).data
+            )
 
-        instance.save()
         return instance
 
 
@@ -181,7 +321,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return data
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsModelSerializer):
     """
     Serializer para o modelo Transaction.
 
@@ -191,8 +331,10 @@ class TransactionSerializer(serializers.ModelSerializer):
         - description: A descrição da transação.
         - account: A conta associada à transação.
         - category: A categoria à qual a transação pertence.
+        - version: A versão atual da transação (somente leitura).
 
     Métodos:
+        - get_expandable_fields: Permite expandir a conta e a categoria.
         - validate: Realiza validações personalizadas durante a serialização.
         - create: Cria uma nova instância de transação e atualiza os saldos da
         conta e orçamento, se aplicável.
@@ -201,7 +343,14 @@ class TransactionSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Transaction
-        fields = ('id', 'amount', 'description', 'account', 'category')
+        fields = (
+            'id', 'amount', 'description', 'account', 'category', 'version'
+        )
+        read_only_fields = ('version',)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return {'account': AccountSerializer, 'category': CategorySerializer}
 
     def validate(self, data):
         """
@@ -253,8 +402,10 @@ class TransactionSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """
-        Cria uma nova transação e atualiza o saldo da conta e o gasto do
-        orçamento, se aplicável.
+        Cria uma nova transação e atualiza o saldo da conta, o livro-razão
+        da conta e o gasto do orçamento, se aplicável. Os eventos
+        `transaction.created` e `budget.updated` são gravados na caixa de
+        saída na mesma transação do banco.
 
         Parâmetros:
             validated_data: Dados validados da transação.
@@ -271,21 +422,56 @@ class TransactionSerializer(serializers.ModelSerializer):
         if category.budget_set.exists():
             budget = category.budget_set.first()
 
-        transaction = Transaction.objects.create(**validated_data)
+        transaction = Transaction(**validated_data)
+        using = router.db_for_write(Transaction, instance=transaction)
 
-        account.balance -= transaction_amount
-        account.save()
+        with atomic(using=using):
+            transaction.save(force_insert=True, using=using)
 
-        if budget:
-            budget.spent += transaction_amount
-            budget.save()
+            Account.objects.using(using).filter(pk=account.pk).update(
+                balance=F('balance') - transaction_amount,
+                version=F('version') + 1,
+                updated_at=timezone.now()
+            )
+            record_entry(
+                account.pk,
+                using,
+                -transaction_amount,
+                LedgerEntry.TRANSACTION,
+                transaction_id=transaction.pk
+            )
+            account.balance -= transaction_amount
+            account.version += 1
+            record_change(account)
+
+            if budget:
+                previous_spent = budget.increment('spent', transaction_amount)
+                check_thresholds(budget, previous_spent)
+
+            enqueue(
+                using,
+                'transaction.created',
+                transaction,
+                TransactionSerializer(transaction).data
+            )
+            if budget:
+                enqueue(
+                    using,
+                    'budget.updated',
+                    budget,
+                    BudgetSerializer(budget).data,
+                    account_id=budget.account_id or account.pk
+                )
 
         return transaction
 
     def update(self, instance, validated_data):
         """
         Atualiza uma transação existente e ajusta o gasto do orçamento, se
-        necessário.
+        necessário. A transação é gravada com um único UPDATE condicional à
+        versão esperada, e os eventos `transaction.updated` e
+        `budget.updated` são gravados na caixa de saída na mesma transação
+        do banco.
 
         Parâmetros:
             instance: A transação existente.
@@ -293,27 +479,50 @@ class TransactionSerializer(serializers.ModelSerializer):
 
         Retorna:
             transaction: A transação atualizada.
+
+        Raises:
+            PreconditionFailed: Se a transação foi alterada por outra
+            solicitação.
         """
 
         old_amount = instance.amount
         new_amount = validated_data.get('amount', old_amount)
-        account = instance.account
         category = instance.category
 
-        if category.budget_set.exists():
-            budget = category.budget_set.first()
-            if new_amount != old_amount:
-                difference = new_amount - old_amount
-                budget.spent += difference
-                budget.save()
-
-        instance.amount = new_amount
-        instance.description = validated_data.get(
-            'description', instance.description
-        )
-        instance.category = validated_data.get('category', instance.category)
-        instance.save()
-        account.save()
+        using = instance._state.db
+
+        with atomic(using=using):
+            update_versioned(
+                instance,
+                self.context.get('request'),
+                amount=new_amount,
+                description=validated_data.get(
+                    'description', instance.description
+                ),
+                category=validated_data.get('category', instance.category)
+            )
+            enqueue(
+                using,
+                'transaction.updated',
+                instance,
+                TransactionSerializer(instance).data
+            )
+
+            if category.budget_set.exists():
+                budget = category.budget_set.first()
+                if new_amount != old_amount:
+                    previous_spent = budget.increment(
+                        'spent',
+                        new_amount - old_amount
+                    )
+                    check_thresholds(budget, previous_spent)
+                    enqueue(
+                        using,
+                        'budget.updated',
+                        budget,
+                        BudgetSerializer(budget).data,
+                        account_id=budget.account_id or instance.account_id
+                    )
 
         return instance
 
@@ -328,6 +537,7 @@ class OwnerSerializer(serializers.ModelSerializer):
     Métodos:
         validate: Valida os dados fornecidos durante a serialização.
         create: Cria uma nova instância de Owner.
+        update: Atualiza uma instância de Owner.
 
     Campos:
         - id
@@ -373,14 +583,12 @@ class OwnerSerializer(serializers.ModelSerializer):
                     {'email': ['Este campo é obrigatório.']}
                 )
 
-        if 'password' in data:
-            data['password'] = make_password(data['password'])
-
         return data
 
     def create(self, validated_data):
         """
-        Cria uma nova instância de Owner.
+        Cria uma nova instância de Owner, com o hash da senha calculado uma
+        única vez por `finances.passwords.hash_password`.
 
         Parâmetros:
             validated_data: Os dados validados para criar o proprietário.
@@ -389,6 +597,30 @@ class OwnerSerializer(serializers.ModelSerializer):
             user: A instância de Owner criada.
         """
 
-        owner = User.objects.create(**validated_data)
+        owner = User.objects.create(**{
+            **validated_data,
+            'password': hash_password(validated_data['password']),
+        })
 
         return owner
+
+    def update(self, instance, validated_data):
+        """
+        Atualiza uma instância de Owner, calculando o hash da nova senha, se
+        informada.
+
+        Parâmetros:
+            instance: O titular a ser atualizado.
+            validated_data: Os dados validados.
+
+        Retorna:
+            user: A instância de Owner atualizada.
+        """
+
+        if 'password' in validated_data:
+            validated_data = {
+                **validated_data,
+                'password': hash_password(validated_data['password']),
+            }
+
+        return super().update(instance, validated_data)
@@ -0,0 +1,287 @@
+from django.db import connections, transaction
+from finances.routers import get_shards, shard_for_owner
+
+SHARD_ID_SPAN = 10 ** 12
+
+
+def across_shards(queryset):
+    """
+    Executa o queryset em todos os shards e concatena os resultados. Usado
+    nas listagens dos administradores, que abrangem todos os titulares.
+
+    Parâmetros:
+        queryset: O queryset de um modelo particionado.
+
+    Retorna:
+        QuerySet | list: O próprio queryset, se não houver shards, ou a lista
+        com os registros de todos os shards.
+    """
+
+    shards = get_shards()
+    if not shards:
+        return queryset
+
+    return [
+        instance
+        for alias in shards
+        for instance in queryset.using(alias)
+    ]
+
+
+def reserve_id_range(alias):
+    """
+    Faz com que os IDs das contas, transações, orçamentos, lançamentos do
+    livro-razão, somas diárias, registros de saldo e eventos da caixa de
+    saída gerados em um shard comecem em `posição do shard * SHARD_ID_SPAN`.
+    Como cada shard gera IDs em uma faixa própria, os registros mantêm os IDs
+    ao serem movidos entre shards.
+
+    No SQLite, a sequência de uma tabela acompanha o maior ID presente nela.
+    Registros movidos de um shard posterior para um anterior fazem o shard de
+    destino continuar a partir dos IDs movidos; no PostgreSQL, a sequência não
+    é afetada pelos registros movidos.
+
+    Parâmetros:
+        alias: O alias do shard.
+    """
+
+    from finances.models import (
+        Account, BalanceSnapshot, Budget, LedgerDay, LedgerEntry,
+        OutboxEvent, Transaction
+    )
+
+    start = (get_shards().index(alias) + 1) * SHARD_ID_SPAN
+    connection = connections[alias]
+
+    with connection.cursor() as cursor:
+        for model in (
+            Account, Transaction, Budget, LedgerEntry, LedgerDay,
+            BalanceSnapshot, OutboxEvent
+        ):
+            table = model._meta.db_table
+
+            if connection.vendor == 'sqlite':
+                cursor.execute(
+                    'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        'INSERT INTO sqlite_sequence (name, seq) '
+                        'VALUES (%s, %s)',
+                        [table, start - 1]
+                    )
+                elif row[0] < start - 1:
+                    cursor.execute(
+                        'UPDATE sqlite_sequence SET seq = %s WHERE name = %s',
+                        [start - 1, table]
+                    )
+
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'SELECT setval(pg_get_serial_sequence(%s, %s), '
+                    f'GREATEST(%s, (SELECT COALESCE(MAX(id), 0) + 1 '
+                    f'FROM {connection.ops.quote_name(table)})), false)',
+                    [table, 'id', start]
+                )
+
+
+def prepare_shard(sender, using, **kwargs):
+    """
+    Receptor do sinal `post_migrate` que reserva a faixa de IDs de um shard
+    após as migrações.
+    """
+
+    if sender.name == 'finances' and using in get_shards():
+        reserve_id_range(using)
+
+
+def replicated_values(instance):
+    """
+    Retorna os valores das colunas de um registro, para copiá-lo em outro
+    banco.
+    """
+
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if not field.primary_key
+    }
+
+
+def replicate(sender, instance, using, **kwargs):
+    """
+    Receptor do sinal `post_save` que copia as categorias e os usuários
+    gravados no banco principal para todos os shards, após o commit.
+    """
+
+    if using != 'default' or not get_shards():
+        return
+
+    pk = instance.pk
+    values = replicated_values(instance)
+
+    def copy():
+        for alias in get_shards():
+            sender._base_manager.using(alias).update_or_create(
+                pk=pk,
+                defaults=values
+            )
+
+    transaction.on_commit(copy, using=using)
+
+
+def replicate_delete(sender, instance, using, **kwargs):
+    """
+    Receptor do sinal `post_delete` que remove dos shards as categorias e os
+    usuários excluídos do banco principal. A exclusão em cada shard remove
+    também os registros dependentes nele, como as contas do titular.
+    """
+
+    if using != 'default' or not get_shards():
+        return
+
+    pk = instance.pk
+
+    def delete():
+        for alias in get_shards():
+            sender._base_manager.using(alias).filter(pk=pk).delete()
+
+    transaction.on_commit(delete, using=using)
+
+
+def sync_reference_data(alias):
+    """
+    Copia para um shard todas as categorias e usuários do banco principal.
+    Usado ao adicionar um shard a uma instalação existente.
+
+    Parâmetros:
+        alias: O alias do shard.
+
+    Retorna:
+        int: A quantidade de registros copiados.
+    """
+
+    from django.contrib.auth.models import User
+    from finances.models import Category
+
+    copied = 0
+
+    with transaction.atomic(using=alias):
+        for model in (User, Category):
+            for instance in model._base_manager.using('default').iterator():
+                model._base_manager.using(alias).update_or_create(
+                    pk=instance.pk,
+                    defaults=replicated_values(instance)
+                )
+                copied += 1
+
+    return copied
+
+
+def move_owner(owner_id, target):
+    """
+    Move as contas, transações, orçamentos, transações arquivadas, saldos
+    de abertura e livros-razão de um titular para outro shard, mantendo os
+    IDs, e registra o novo shard no diretório.
+
+    Os registros são copiados para o shard de destino em uma transação, o
+    diretório é atualizado e, por fim, os registros são excluídos do shard de
+    origem, sem registrar as exclusões no registro de alterações. As contas,
+    transações e orçamentos movidos são registrados como alterados, para que
+    os clientes os vejam no novo shard. As escritas do titular devem estar
+    suspensas durante a movimentação.
+
+    Parâmetros:
+        owner_id: O ID do titular.
+        target: O alias do shard de destino.
+
+    Retorna:
+        dict: A quantidade de registros movidos por modelo, ou um dicionário
+        vazio se o titular já estiver no shard de destino.
+
+    Raises:
+        ValueError: Se o shard de destino não existir.
+    """
+
+    from django.contrib.auth.models import User
+    from finances.changes import record_changes, recording_paused
+    from finances.models import (
+        Account, BalanceCheckpoint, BalanceSnapshot, Budget, LedgerDay,
+        LedgerEntry, OwnerShard, Transaction, TransactionArchive
+    )
+
+    if target not in get_shards():
+        raise ValueError(f'Unknown shard {target!r}.')
+
+    source = shard_for_owner(owner_id)
+    if source == target:
+        return {}
+
+    accounts = list(Account.objects.using(source).filter(owner_id=owner_id))
+    account_ids = [account.pk for account in accounts]
+    transactions = list(
+        Transaction.objects.using(source).filter(account_id__in=account_ids)
+    )
+    budgets = list(
+        Budget.objects.using(source).filter(account_id__in=account_ids)
+    )
+    archives = list(
+        TransactionArchive.objects.using(source).filter(
+            account_id__in=account_ids
+        )
+    )
+    checkpoints = list(
+        BalanceCheckpoint.objects.using(source).filter(
+            account_id__in=account_ids
+        )
+    )
+
+    entries = list(
+        LedgerEntry.objects.using(source).filter(account_id__in=account_ids)
+    )
+    ledger_days = list(
+        LedgerDay.objects.using(source).filter(account_id__in=account_ids)
+    )
+    snapshots = list(
+        BalanceSnapshot.objects.using(source).filter(
+            account_id__in=account_ids
+        )
+    )
+
+    owner = User.objects.using('default').get(pk=owner_id)
+
+    with transaction.atomic(using=target):
+        User._base_manager.using(target).update_or_create(
+            pk=owner.pk,
+            defaults=replicated_values(owner)
+        )
+        Account.objects.using(target).bulk_create(accounts)
+        Transaction.objects.using(target).bulk_create(transactions)
+        Budget.objects.using(target).bulk_create(budgets)
+        TransactionArchive.objects.using(target).bulk_create(archives)
+        BalanceCheckpoint.objects.using(target).bulk_create(checkpoints)
+        LedgerEntry.objects.using(target).bulk_create(entries)
+        LedgerDay.objects.using(target).bulk_create(ledger_days)
+        BalanceSnapshot.objects.using(target).bulk_create(snapshots)
+
+    OwnerShard.objects.using('default').update_or_create(
+        owner_id=owner_id,
+        defaults={'alias': target}
+    )
+
+    with transaction.atomic(using=source), recording_paused():
+        Account.objects.using(source).filter(pk__in=account_ids).delete()
+
+    record_changes([*accounts, *transactions, *budgets], owner_id)
+
+    return {
+        'accounts': len(accounts),
+        'transactions': len(transactions),
+        'budgets': len(budgets),
+        'archives': len(archives),
+        'checkpoints': len(checkpoints),
+        'ledger_entries': len(entries),
+        'ledger_days': len(ledger_days),
+        'snapshots': len(snapshots),
+    }
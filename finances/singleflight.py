@@ -0,0 +1,160 @@
+"""
+Agrupamento de leituras caras simultâneas (single-flight).
+
+Quando várias solicitações precisam do mesmo resultado ao mesmo tempo (por
+exemplo, o painel de um titular que acabou de sair do cache), apenas uma
+delas, a líder, o calcula; as demais aguardam e reutilizam o resultado.
+
+O agrupamento tem dois níveis:
+
+- No processo, cada chave tem um voo (`Flight`): a primeira thread o cria e
+  calcula o resultado, e as seguintes aguardam o seu término.
+- Entre processos, a líder de cada processo disputa uma trava no cache do
+  Django (`cache.add`), com um prazo curto (`LEASE_SECONDS`). A vencedora
+  calcula o resultado e o publica no cache, com uma chave própria do seu
+  token, antes de liberar a trava; as demais consultam essa chave até que o
+  resultado apareça.
+
+Somente as solicitações simultâneas são agrupadas: o resultado publicado
+expira junto com a trava, e uma solicitação posterior calcula um resultado
+novo. Se a trava expirar ou for liberada sem resultado (por exemplo, porque a
+líder falhou), ou se a espera passar de `WAIT_SECONDS`, a solicitação calcula
+o resultado por conta própria.
+
+Dentro de uma transação aberta, o resultado é calculado sem agrupamento, pois
+ele pode incluir escritas ainda não confirmadas, que as outras solicitações
+não devem ver.
+"""
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+DEFAULTS = {
+    'LEASE_SECONDS': 10,
+    'WAIT_SECONDS': 10,
+    'POLL_SECONDS': 0.02,
+}
+
+LOCK_KEY = 'finances:singleflight:{key}'
+
+RESULT_KEY = 'finances:singleflight:{key}:{token}'
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class Flight:
+    """
+    Cálculo em andamento de uma chave neste processo.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+def get_config():
+    """
+    Retorna a configuração do agrupamento, definida em
+    `settings.SINGLE_FLIGHT`, completada com os valores padrão.
+    """
+
+    return {**DEFAULTS, **getattr(settings, 'SINGLE_FLIGHT', {})}
+
+
+def in_transaction():
+    """
+    Retorna se alguma conexão desta thread está em uma transação aberta.
+    """
+
+    return any(
+        connection.in_atomic_block
+        for connection in connections.all(initialized_only=True)
+    )
+
+
+def lead(key, compute, config):
+    """
+    Calcula o resultado com a trava do cache, ou aguarda o resultado do
+    processo que a detém.
+
+    Retorna:
+        tuple: O resultado e se ele foi calculado por outro processo.
+    """
+
+    lock_key = LOCK_KEY.format(key=key)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + config['WAIT_SECONDS']
+
+    while time.monotonic() < deadline:
+        if cache.add(lock_key, token, config['LEASE_SECONDS']):
+            try:
+                value = compute()
+                cache.set(
+                    RESULT_KEY.format(key=key, token=token),
+                    value,
+                    config['LEASE_SECONDS']
+                )
+                return value, False
+            finally:
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
+        holder = cache.get(lock_key)
+        while holder is not None and time.monotonic() < deadline:
+            time.sleep(config['POLL_SECONDS'])
+
+            value = cache.get(RESULT_KEY.format(key=key, token=holder))
+            if value is not None:
+                return value, True
+
+            if cache.get(lock_key) != holder:
+                break
+
+    return compute(), False
+
+
+def single_flight(key, compute):
+    """
+    Calcula um resultado uma única vez para as solicitações simultâneas com a
+    mesma chave, neste e nos demais processos.
+
+    Parâmetros:
+        key: A chave que identifica o resultado.
+        compute: Função sem parâmetros que calcula o resultado. Ela não deve
+        retornar None, e o resultado deve poder ser guardado no cache.
+
+    Retorna:
+        tuple: O resultado e se ele foi calculado por outra solicitação.
+    """
+
+    if in_transaction():
+        return compute(), False
+
+    config = get_config()
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        if flight.done.wait(config['WAIT_SECONDS']) and \
+                flight.value is not None:
+            return flight.value, True
+        return compute(), False
+
+    try:
+        value, shared = lead(key, compute, config)
+        flight.value = value
+        return value, shared
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
@@ -0,0 +1,242 @@
+import tempfile
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.aggregates import cache_seconds, reset_stats, stats
+from finances.models import Account, Budget, Category, Transaction
+
+
+class AggregateTest(TestCase):
+    """
+    Testes para o cache de agregações e os endpoints `/api/aggregates/`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria dois titulares,
+        cada um com uma conta, uma categoria com um orçamento na conta do
+        primeiro titular e uma transação em março de 2024 em cada conta.
+        """
+
+        cache.clear()
+        reset_stats()
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.other_account = Account.objects.create(
+            owner=self.other,
+            name='Poupança',
+            balance=500
+        )
+        self.category = Category.objects.create(name='Mercado')
+        self.budget = Budget.objects.create(
+            account=self.account,
+            category=self.category,
+            amount=800,
+            start_date='2024-03-01',
+            end_date='2024-03-31'
+        )
+        self.transaction = self.create_transaction(self.account, 120)
+        self.create_transaction(self.other_account, 50)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(user=self.other)
+
+    def create_transaction(self, account, amount):
+        return Transaction.objects.create(
+            account=account,
+            category=self.category,
+            amount=amount,
+            description='Compra',
+            date=datetime(2024, 3, 10, tzinfo=timezone.utc)
+        )
+
+    def post_transaction(self, amount):
+        response = self.client.post('/api/transactions/', {
+            'account': self.account.pk,
+            'category': self.category.pk,
+            'amount': amount,
+            'description': 'Compra'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def aggregate(self, name, client=None):
+        response = (client or self.client).get(
+            f'/api/aggregates/{name}/',
+            {'period': '2024-03'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertCached(self, name, client=None):
+        with self.assertNumQueries(0):
+            return self.aggregate(name, client)
+
+    def test_aggregates(self):
+        """
+        Testa o total gasto por categoria e o patrimônio líquido do titular.
+        """
+
+        self.assertEqual(self.aggregate('category-totals'), {
+            'period': '2024-03',
+            'totals': [
+                {'category': self.category.pk, 'name': 'Mercado',
+                 'total': '120.00'},
+            ],
+        })
+        self.assertEqual(
+            self.aggregate('net-worth'),
+            {'net_worth': '1000.00'}
+        )
+
+    def test_hit_and_miss_stats(self):
+        """
+        Testa se a segunda leitura vem do cache e se as leituras e os
+        cálculos são contados por agregação.
+        """
+
+        self.aggregate('net-worth')
+        self.assertCached('net-worth')
+        self.aggregate('category-totals')
+
+        self.assertEqual(stats(), {
+            'net-worth': {
+                'hits': 1, 'misses': 1, 'coalesced': 0, 'hit_rate': 0.5
+            },
+            'category-totals': {
+                'hits': 0, 'misses': 1, 'coalesced': 0, 'hit_rate': 0
+            },
+        })
+
+    def test_invalidated_by_changes(self):
+        """
+        Testa se a criação e a exclusão de transações e as alterações de
+        contas e orçamentos invalidam as agregações do titular.
+        """
+
+        self.aggregate('net-worth')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_transaction(80)
+        self.assertEqual(self.aggregate('net-worth'), {'net_worth': '920.00'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.account.name = 'Conta corrente'
+            self.account.save()
+        self.aggregate('net-worth')
+        self.assertCached('net-worth')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.budget.amount = 900
+            self.budget.save()
+        self.aggregate('net-worth')
+        self.assertEqual(stats()['net-worth']['misses'], 4)
+
+        self.aggregate('category-totals')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                f'/api/transaction/{self.transaction.pk}/'
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        data = self.aggregate('category-totals')
+        self.assertEqual(data['totals'], [])
+
+    def test_other_owners_unaffected(self):
+        """
+        Testa se as alterações de um titular não invalidam as agregações dos
+        outros titulares, e se as de uma categoria invalidam as de todos.
+        """
+
+        self.aggregate('category-totals', self.other_client)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_transaction(self.account, 80)
+        self.assertCached('category-totals', self.other_client)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Supermercado'
+            self.category.save()
+        data = self.aggregate('category-totals', self.other_client)
+        self.assertEqual(data['totals'][0]['name'], 'Supermercado')
+
+    def test_not_invalidated_before_commit(self):
+        """
+        Testa se a invalidação só ocorre após a confirmação da transação.
+        """
+
+        self.aggregate('net-worth')
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.post_transaction(80)
+        self.assertCached('net-worth')
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.aggregate('net-worth'), {'net_worth': '920.00'})
+
+    def test_unknown_aggregate(self):
+        """
+        Testa se uma agregação desconhecida retorna 404.
+        """
+
+        response = self.client.get('/api/aggregates/unknown/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_requires_admin(self):
+        """
+        Testa se apenas administradores podem ver as estatísticas do cache.
+        """
+
+        response = self.client.get('/api/aggregates/stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.aggregate('net-worth')
+        self.client.force_authenticate(
+            user=User.objects.create_superuser('admin', password='admin')
+        )
+
+        response = self.client.get('/api/aggregates/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['net-worth']['misses'], 1)
+
+    def test_cache_seconds(self):
+        """
+        Testa se, com o cache em memória de cada processo, as agregações
+        ficam no cache por no máximo `AGGREGATE_LOCAL_CACHE_SECONDS`.
+        """
+
+        with self.settings(
+            AGGREGATE_CACHE_SECONDS=3600,
+            AGGREGATE_LOCAL_CACHE_SECONDS=300
+        ):
+            self.assertEqual(cache_seconds(), 300)
+
+            with tempfile.TemporaryDirectory() as directory:
+                with override_settings(CACHES={
+                    'default': {
+                        'BACKEND': 'django.core.cache.backends.filebased.'
+                                   'FileBasedCache',
+                        'LOCATION': directory,
+                    },
+                }):
+                    self.assertEqual(cache_seconds(), 3600)
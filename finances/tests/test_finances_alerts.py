@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from finances.alerts import broker, crossed, stream
+from finances.models import Account, Budget, BudgetAlert, Category
+
+
+@override_settings(
+    CHANGE_FEED_SETTLE_SECONDS=0,
+    BUDGET_ALERTS={'THRESHOLDS': [50, 80, 100], 'POLL_SECONDS': 0.01}
+)
+class BudgetAlertTest(TestCase):
+    """
+    Testes para os alertas de orçamento e o endpoint `/api/alerts/stream/`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        uma conta, uma categoria e um orçamento de 1000.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=5000
+        )
+        self.category = Category.objects.create(name='Mercado')
+        self.budget = Budget.objects.create(
+            account=self.account,
+            category=self.category,
+            amount=1000,
+            start_date='2024-01-01',
+            end_date='2024-12-31'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def spend(self, amount):
+        response = self.client.post(
+            '/api/transactions/',
+            {
+                'account': self.account.pk,
+                'category': self.category.pk,
+                'amount': amount,
+                'description': 'Compra'
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_crossed(self):
+        """
+        Testa se apenas o maior limite ultrapassado para cima é retornado.
+        """
+
+        thresholds = [50, 80, 100]
+
+        self.assertEqual(crossed(400, 1000, 600, 1000, thresholds), 50)
+        self.assertEqual(crossed(400, 1000, 1200, 1000, thresholds), 100)
+        self.assertIsNone(crossed(600, 1000, 700, 1000, thresholds))
+        self.assertIsNone(crossed(900, 1000, 400, 1000, thresholds))
+        self.assertEqual(crossed(600, 1000, 600, 700, thresholds), 80)
+        self.assertEqual(crossed(0, 0, 10, 0, thresholds), 100)
+
+    def test_alerts_recorded_as_spent_changes(self):
+        """
+        Testa se os alertas são gravados quando o gasto ultrapassa os
+        limites, e apenas nesse momento.
+        """
+
+        self.spend(400)
+        self.spend(200)
+        self.spend(100)
+        self.spend(400)
+
+        self.assertEqual(
+            list(BudgetAlert.objects.order_by('id').values_list(
+                'budget_id', 'threshold', 'spent'
+            )),
+            [(self.budget.pk, 50, 600), (self.budget.pk, 100, 1100)]
+        )
+
+    async def read_event(self, chunks):
+        while True:
+            chunk = await asyncio.wait_for(chunks.__anext__(), 5)
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith('id:'):
+                lines = dict(
+                    line.split(': ', 1) for line in chunk.strip().split('\n')
+                )
+                return lines['event'], json.loads(lines['data'])
+
+    async def test_stream(self):
+        """
+        Testa se o fluxo reenvia os alertas posteriores a `Last-Event-ID` e
+        envia os alertas novos do titular.
+        """
+
+        await sync_to_async(self.spend)(600)
+
+        response = await self.async_client.get(
+            '/api/alerts/stream/',
+            headers={'Authorization': self.auth, 'Last-Event-ID': '0'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        chunks = aiter(response.streaming_content)
+        try:
+            event, data = await self.read_event(chunks)
+            self.assertEqual(event, 'budget.threshold')
+            self.assertEqual(data['threshold'], 50)
+
+            await asyncio.sleep(0.05)
+            await sync_to_async(self.spend)(300)
+
+            event, data = await self.read_event(chunks)
+            self.assertEqual(data['threshold'], 80)
+            self.assertEqual(data['spent'], '900.00')
+        finally:
+            await chunks.aclose()
+
+    async def test_stream_unsubscribes_on_close(self):
+        """
+        Testa se a conexão é removida do distribuidor ao ser encerrada.
+        """
+
+        events = stream(self.user.pk)
+        await events.__anext__()
+        self.assertIn(self.user.pk, broker.subscribers)
+
+        await events.aclose()
+        self.assertNotIn(self.user.pk, broker.subscribers)
+
+    async def test_stream_requires_authentication(self):
+        """
+        Testa se o fluxo exige autenticação.
+        """
+
+        response = await self.async_client.get('/api/alerts/stream/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
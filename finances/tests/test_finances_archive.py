@@ -0,0 +1,201 @@
+import zlib
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.archive import archive_cutoff, archive_period
+from finances.models import (
+    Account, Category, Transaction, TransactionArchive, TransactionPartition
+)
+from finances.partitions import detach_partition
+
+
+def utc(year, month, day):
+    return datetime(year, month, day, 12, tzinfo=timezone.utc)
+
+
+class TransactionArchiveTest(TestCase):
+    """
+    Testes para o arquivamento das transações antigas.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        duas contas e transações em 2020 e no mês atual.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.accounts = [
+            Account.objects.create(owner=self.user, name=name, balance=1000)
+            for name in ('Corrente', 'Poupança')
+        ]
+        self.category = Category.objects.create(name='Mercado')
+
+        self.old = [
+            Transaction.objects.create(
+                account=account,
+                category=self.category,
+                amount=amount,
+                date=utc(2020, 5, day),
+                description=f'Compra {day}'
+            )
+            for account, amount, day in (
+                (self.accounts[0], 10, 3),
+                (self.accounts[0], 15, 20),
+                (self.accounts[1], 7, 9),
+            )
+        ]
+        self.recent = Transaction.objects.create(
+            account=self.accounts[0],
+            category=self.category,
+            amount=30,
+            description='Compra recente'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_archive_period(self):
+        """
+        Testa se o arquivamento move as transações do mês para um registro
+        comprimido por conta, com o resumo do mês.
+        """
+
+        archived = archive_period(date(2020, 5, 1))
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(list(Transaction.objects.all()), [self.recent])
+
+        archive = TransactionArchive.objects.get(account=self.accounts[0])
+        self.assertEqual(archive.period, date(2020, 5, 1))
+        self.assertEqual(archive.rows, 2)
+        self.assertEqual(archive.total, 25)
+        self.assertEqual(
+            (archive.first_id, archive.last_id),
+            (self.old[0].pk, self.old[1].pk)
+        )
+        self.assertIn(b'Compra 20', zlib.decompress(bytes(archive.payload)))
+
+        with self.assertRaises(ValueError):
+            archive_period(date(2020, 5, 1))
+
+        with self.assertRaises(ValueError):
+            archive_period(archive_cutoff())
+
+    def test_archive_detached_partition(self):
+        """
+        Testa se o arquivamento de um mês desanexado lê a tabela do mês e a
+        exclui.
+        """
+
+        partition = detach_partition(date(2020, 5, 1))
+
+        archive_period(date(2020, 5, 1))
+
+        self.assertEqual(TransactionArchive.objects.count(), 2)
+        self.assertFalse(TransactionPartition.objects.exists())
+        self.assertNotIn(
+            partition.table_name,
+            connection.introspection.table_names()
+        )
+
+    def test_reads_merge_archive(self):
+        """
+        Testa se a listagem por intervalo e o detalhe de uma transação
+        incluem as transações arquivadas.
+        """
+
+        archive_period(date(2020, 5, 1))
+
+        admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        response = client.get(
+            '/api/transactions/?start=2020-05-05&end=2020-05-31'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [transaction['id'] for transaction in response.data],
+            [self.old[2].pk, self.old[1].pk]
+        )
+        self.assertEqual(response.data[1]['amount'], '15.00')
+
+        response = self.client.get(f'/api/transaction/{self.old[1].pk}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['description'], 'Compra 20')
+
+        other = APIClient()
+        other.force_authenticate(user=self.other)
+        response = other.get(f'/api/transaction/{self.old[1].pk}/')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_end_on_first_day_of_month(self):
+        """
+        Testa se um `?end=` no primeiro dia de um mês inclui as transações
+        arquivadas desse dia.
+        """
+
+        first = Transaction.objects.create(
+            account=self.accounts[0],
+            category=self.category,
+            amount=12,
+            date=utc(2020, 6, 1),
+            description='Compra 1º de junho'
+        )
+        archive_period(date(2020, 5, 1))
+        archive_period(date(2020, 6, 1))
+
+        admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+        client = APIClient()
+        client.force_authenticate(user=admin)
+
+        response = client.get(
+            '/api/transactions/?start=2020-05-15&end=2020-06-01'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [transaction['id'] for transaction in response.data],
+            [self.old[1].pk, first.pk]
+        )
+
+    def test_archive_command(self):
+        """
+        Testa se o comando arquiva apenas os meses anteriores ao limite.
+        """
+
+        out = StringIO()
+        call_command('archive_transactions', stdout=out)
+
+        self.assertIn(
+            '2020-05: 3 transação(ões) arquivada(s).',
+            out.getvalue()
+        )
+        self.assertEqual(list(Transaction.objects.all()), [self.recent])
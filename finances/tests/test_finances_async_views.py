@@ -0,0 +1,181 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from finances.models import Account, Budget, Category, Transaction
+from finances.serializers import CategorySerializer
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Testes para as versões assíncronas dos endpoints de leitura.
+
+    Esta classe verifica se as views assíncronas retornam os mesmos dados e
+    aplicam as mesmas regras de permissão das views síncronas.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um
+        administrador, um titular com conta, transação e orçamento, e os
+        tokens de acesso de ambos.
+        """
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1',
+            first_name='Carlos',
+            last_name='Alberto',
+            email='carlos@email.com'
+        )
+
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Conta Corrente',
+            balance=1000
+        )
+
+        self.category = Category.objects.create(name='Academia')
+
+        self.transaction = Transaction.objects.create(
+            amount=100,
+            description='Mensalidade',
+            account=self.account,
+            category=self.category
+        )
+
+        self.budget = Budget.objects.create(
+            start_date='2023-08-01',
+            end_date='2023-08-31',
+            amount=150,
+            account=self.account,
+            category=self.category
+        )
+
+        self.admin_auth = f'Bearer {AccessToken.for_user(self.admin)}'
+        self.user_auth = f'Bearer {AccessToken.for_user(self.user)}'
+
+    async def test_account_detail(self):
+        """
+        Testa se os detalhes da conta retornam o titular, as transações e os
+        orçamentos para o titular.
+        """
+
+        response = await self.async_client.get(
+            f'/api/async/account/{self.account.pk}/',
+            AUTHORIZATION=self.user_auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = response.json()
+        self.assertEqual(data['owner']['username'], 'user1')
+        self.assertEqual(data['transactions'][0]['description'], 'Mensalidade')
+        self.assertEqual(data['budgets'][0]['amount'], '150.00')
+        self.assertEqual(response['ETag'], '"1"')
+
+    async def test_account_detail_other_owner(self):
+        """
+        Testa se apenas o titular pode obter os detalhes da conta.
+        """
+
+        response = await self.async_client.get(
+            f'/api/async/account/{self.account.pk}/',
+            AUTHORIZATION=self.admin_auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_budget_detail(self):
+        """
+        Testa se os detalhes do orçamento aceitam `?fields=` e `?expand=`.
+        """
+
+        response = await self.async_client.get(
+            f'/api/async/budget/{self.budget.pk}/?fields=amount'
+            '&expand=category',
+            AUTHORIZATION=self.user_auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json(),
+            {
+                'amount': '150.00',
+                'category': CategorySerializer(self.category).data
+            }
+        )
+
+    async def test_not_found(self):
+        """
+        Testa se um registro inexistente retorna o status HTTP 404 NOT FOUND.
+        """
+
+        response = await self.async_client.get(
+            '/api/async/budget/999/',
+            AUTHORIZATION=self.user_auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_lists_require_admin(self):
+        """
+        Testa se as listagens de contas, transações e orçamentos são restritas
+        ao administrador, e se a de categorias exige autenticação.
+        """
+
+        for url in (
+            '/api/async/accounts/',
+            '/api/async/transactions/',
+            '/api/async/budgets/'
+        ):
+            response = await self.async_client.get(
+                url, AUTHORIZATION=self.admin_auth
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()), 1)
+
+            response = await self.async_client.get(
+                url, AUTHORIZATION=self.user_auth
+            )
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.async_client.get('/api/async/categories/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_invalid_token(self):
+        """
+        Testa se um token inválido retorna o status HTTP 401 UNAUTHORIZED.
+        """
+
+        response = await self.async_client.get(
+            '/api/async/categories/',
+            AUTHORIZATION='Bearer invalid'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_empty_list(self):
+        """
+        Testa se a mensagem apropriada é retornada quando não há registros.
+        """
+
+        await Transaction.objects.all().adelete()
+
+        response = await self.async_client.get(
+            '/api/async/transactions/',
+            AUTHORIZATION=self.admin_auth
+        )
+
+        self.assertEqual(
+            response.json(),
+            {'message': 'There are no registered transactions.'}
+        )
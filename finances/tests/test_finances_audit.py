@@ -0,0 +1,258 @@
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.archive import archive_period
+from finances.audit import audit
+from finances.models import (
+    Account, BalanceCheckpoint, Budget, Category, Transaction
+)
+from finances.partitions import detach_partition
+
+
+def utc(year, month, day):
+    return datetime(year, month, day, 12, tzinfo=timezone.utc)
+
+
+def create_data(using='default'):
+    """
+    Cria um titular com duas contas, dois orçamentos e transações dentro e
+    fora do período dos orçamentos. Os orçamentos são criados com gasto
+    zero, divergente das transações.
+    """
+
+    user = User.objects.db_manager(using).create_user(
+        username='user1',
+        password='password1'
+    )
+    category = Category.objects.using(using).create(name='Mercado')
+    accounts = [
+        Account.objects.using(using).create(
+            owner_id=user.pk,
+            name=name,
+            balance=1000
+        )
+        for name in ('Corrente', 'Poupança')
+    ]
+    budgets = [
+        Budget.objects.using(using).create(
+            account_id=account.pk,
+            category_id=category.pk,
+            amount=500,
+            start_date=date(2024, 3, 1),
+            end_date=date(2024, 3, 31)
+        )
+        for account in accounts
+    ]
+
+    for account, amount, day in (
+        (accounts[0], 10, utc(2024, 3, 2)),
+        (accounts[0], 20, utc(2024, 3, 20)),
+        (accounts[0], 40, utc(2024, 4, 5)),
+        (accounts[1], 5, utc(2024, 3, 9)),
+    ):
+        Transaction.objects.using(using).create(
+            account_id=account.pk,
+            category_id=category.pk,
+            amount=amount,
+            date=day,
+            description='Compra'
+        )
+
+    return user, accounts, budgets
+
+
+class AuditTest(TestCase):
+    """
+    Testes para a auditoria dos saldos e dos gastos dos orçamentos.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+        """
+
+        self.user, self.accounts, self.budgets = create_data()
+
+    def drift(self, report):
+        return {
+            (item['model'], item['pk']): item['expected']
+            for item in report['drift']
+        }
+
+    def test_budget_drift_and_fix(self):
+        """
+        Testa se a auditoria, em páginas pequenas, encontra e corrige os
+        gastos divergentes, sem contar as transações fora do período.
+        """
+
+        report = audit(chunk_size=2)
+
+        self.assertEqual(report['accounts'], 2)
+        self.assertEqual(report['budgets'], 2)
+        self.assertEqual(report['transactions'], 4)
+        self.assertEqual(report['checkpoints'], 2)
+        self.assertEqual(self.drift(report), {
+            ('budget', self.budgets[0].pk): 30,
+            ('budget', self.budgets[1].pk): 5,
+        })
+
+        audit(fix=True, chunk_size=2)
+
+        self.budgets[0].refresh_from_db()
+        self.assertEqual(self.budgets[0].spent, 30)
+        self.assertEqual(self.budgets[0].version, 2)
+        self.assertEqual(audit()['drift'], [])
+
+    def test_balance_drift(self):
+        """
+        Testa se a auditoria encontra os saldos que deixaram de corresponder
+        ao saldo de abertura menos as transações.
+        """
+
+        audit(fix=True)
+
+        self.assertEqual(
+            BalanceCheckpoint.objects.get(account=self.accounts[0]).
+            opening_balance,
+            1070
+        )
+
+        Transaction.objects.filter(account=self.accounts[0]).first().delete()
+
+        report = audit()
+
+        self.assertEqual(
+            self.drift(report)[('account', self.accounts[0].pk)],
+            1010
+        )
+        self.assertNotIn(('account', self.accounts[1].pk), self.drift(report))
+
+    def test_manual_balance_shifts_checkpoint(self):
+        """
+        Testa se um ajuste manual do saldo pela API não é apontado como
+        divergência.
+        """
+
+        audit(fix=True)
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.patch(
+            f'/api/account/{self.accounts[0].pk}/',
+            {'balance': '1500.00'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(audit()['drift'], [])
+
+    def assert_cold_months_audited(self, move):
+        """
+        Corrige as divergências, move março e abril para fora da tabela
+        principal com `move` e verifica se a auditoria e a correção pelo
+        comando mantêm os saldos e os gastos.
+        """
+
+        audit(fix=True)
+
+        for month in (3, 4):
+            move(date(2024, month, 1))
+        self.assertFalse(Transaction.objects.exists())
+
+        report = audit(chunk_size=1)
+
+        self.assertEqual(report['transactions'], 4)
+        self.assertEqual(report['drift'], [])
+
+        call_command('audit_finances', '--fix', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Budget.objects.values_list('spent', flat=True)),
+            [5, 30]
+        )
+        self.assertEqual(
+            sorted(Account.objects.values_list('balance', flat=True)),
+            [1000, 1000]
+        )
+
+    def test_detached_months(self):
+        """
+        Testa se as transações dos meses desanexados entram nos saldos e nos
+        gastos esperados.
+        """
+
+        self.assert_cold_months_audited(detach_partition)
+
+    def test_archived_months(self):
+        """
+        Testa se as transações dos meses arquivados entram nos saldos e nos
+        gastos esperados.
+        """
+
+        self.assert_cold_months_audited(archive_period)
+
+    def test_command(self):
+        """
+        Testa se o comando lista as divergências e o resumo.
+        """
+
+        out = StringIO()
+        call_command('audit_finances', stdout=out)
+
+        self.assertIn(
+            f'default budget {self.budgets[0].pk}: registrado 0.00, '
+            f'esperado 30.00',
+            out.getvalue()
+        )
+        self.assertIn('2 divergência(s).', out.getvalue())
+
+
+class ParallelAuditTest(TransactionTestCase):
+    """
+    Testes para a auditoria em paralelo, em um banco SQLite em arquivo
+    compartilhado pelos processos.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.settings['audit'] = {
+            **connections.settings['default'],
+            'NAME': os.path.join(self.directory, 'audit.sqlite3'),
+            'TEST': {'MIRROR': None},
+        }
+        call_command('migrate', database='audit', verbosity=0)
+
+        self.user, self.accounts, self.budgets = create_data('audit')
+
+    def tearDown(self):
+        connections['audit'].close()
+        del connections['audit']
+        del connections.settings['audit']
+
+        shutil.rmtree(self.directory)
+
+    def test_workers(self):
+        """
+        Testa se a auditoria com vários processos soma os resultados das
+        faixas de contas e corrige as divergências.
+        """
+
+        report = audit('audit', workers=2, fix=True)
+
+        self.assertEqual(report['accounts'], 2)
+        self.assertEqual(report['transactions'], 4)
+        self.assertEqual(len(report['drift']), 2)
+        self.assertEqual(
+            sorted(
+                Budget.objects.using('audit').values_list('spent', flat=True)
+            ),
+            [5, 30]
+        )
@@ -0,0 +1,219 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.tokens import AccessToken
+from finances.authentication import (
+    LRUCache,
+    StatelessJWTAuthentication,
+    get_cache
+)
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    """
+    Testes para a autenticação JWT com o cache de titulares.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular e
+        obtém um token de acesso por `/api/token/`.
+        """
+
+        get_cache('USER_CACHE').clear()
+        get_cache('TOKEN_CACHE').clear()
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.client = APIClient()
+        self.access = self.obtain_token('user1', 'password1')
+
+    def obtain_token(self, username, password):
+        response = self.client.post(
+            '/api/token/',
+            {'username': username, 'password': password}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['access']
+
+    def authenticate(self, token=None):
+        request = APIRequestFactory().get(
+            '/api/categories/',
+            HTTP_AUTHORIZATION=f'Bearer {token or self.access}'
+        )
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def get(self, token=None):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token or self.access}'
+        )
+        return self.client.get('/api/categories/')
+
+    def test_token_claims(self):
+        """
+        Testa se o token de acesso inclui as permissões e a versão das
+        credenciais do titular.
+        """
+
+        token = AccessToken(self.access)
+
+        self.assertEqual(token['user_id'], self.user.pk)
+        self.assertFalse(token['is_staff'])
+        self.assertTrue(token['is_active'])
+        self.assertIn('auth_version', token)
+
+    def test_cached_user_needs_no_query(self):
+        """
+        Testa se apenas a primeira autenticação do titular consulta o banco.
+        """
+
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate()
+
+        with self.assertNumQueries(0):
+            cached, _ = self.authenticate()
+
+        self.assertEqual(cached, self.user)
+        self.assertIsNot(cached, user)
+
+    def test_password_change_revokes_tokens(self):
+        """
+        Testa se a alteração da senha revoga os tokens emitidos antes dela.
+        """
+
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+
+        self.user.set_password('password2')
+        self.user.save()
+
+        self.assertEqual(self.get().status_code, status.HTTP_401_UNAUTHORIZED)
+
+        access = self.obtain_token('user1', 'password2')
+        self.assertEqual(self.get(access).status_code, status.HTTP_200_OK)
+
+    def test_permission_change_revokes_tokens(self):
+        """
+        Testa se a alteração das permissões revoga os tokens emitidos antes
+        dela.
+        """
+
+        self.authenticate()
+
+        self.user.is_staff = True
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+        user, _ = self.authenticate(self.obtain_token('user1', 'password1'))
+        self.assertTrue(user.is_staff)
+
+    def test_change_from_other_process(self):
+        """
+        Testa se a alteração feita em outro processo, sem remover o titular
+        deste cache, é vista quando a entrada expira.
+        """
+
+        self.authenticate()
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.authenticate()
+
+        with mock.patch('time.time', return_value=10 ** 10):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+    def test_token_without_version(self):
+        """
+        Testa se os tokens sem a versão das credenciais são autenticados pelo
+        banco.
+        """
+
+        token = str(AccessToken.for_user(self.user))
+
+        with self.assertNumQueries(1):
+            self.authenticate(token)
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(token)
+
+        self.assertEqual(user, self.user)
+
+    def test_validated_token_is_cached(self):
+        """
+        Testa se a assinatura de um token repetido é verificada apenas uma
+        vez até o seu `exp`.
+        """
+
+        validate = JWTAuthentication.get_validated_token
+
+        with mock.patch.object(
+            JWTAuthentication,
+            'get_validated_token',
+            autospec=True,
+            side_effect=validate
+        ) as get_validated_token:
+            self.authenticate()
+            self.authenticate()
+            self.assertEqual(get_validated_token.call_count, 1)
+
+            expires = AccessToken(self.access)['exp']
+            with mock.patch('time.time', return_value=expires):
+                self.authenticate()
+            self.assertEqual(get_validated_token.call_count, 2)
+
+    def test_invalid_token_is_not_cached(self):
+        """
+        Testa se um token inválido é recusado em todas as solicitações.
+        """
+
+        token = self.access[:-2] + ('A' if self.access[-2] != 'A' else 'B')
+        token += self.access[-1]
+
+        for _ in range(2):
+            with self.assertRaises(InvalidToken):
+                self.authenticate(token)
+
+
+class LRUCacheTest(SimpleTestCase):
+    """
+    Testes para o cache LRU da autenticação.
+    """
+
+    def test_least_recently_used_is_evicted(self):
+        """
+        Testa se a entrada usada há mais tempo é removida quando o cache
+        fica cheio.
+        """
+
+        cache = LRUCache(max_size=2)
+
+        cache.set(1, 'a', 10 ** 10)
+        cache.set(2, 'b', 10 ** 10)
+        cache.get(1)
+        cache.set(3, 'c', 10 ** 10)
+
+        self.assertEqual(cache.get(1), 'a')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 'c')
+
+    def test_expired_entry(self):
+        """
+        Testa se uma entrada deixa de ser lida após a sua expiração.
+        """
+
+        cache = LRUCache(max_size=2)
+        cache.set(1, 'a', 0)
+
+        self.assertIsNone(cache.get(1))
@@ -0,0 +1,236 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import Account, Budget, Category, Transaction
+
+
+class BatchSetupMixin:
+    """
+    Dados comuns aos testes do endpoint `/api/batch/`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria dois titulares,
+        cada um com uma conta, e uma categoria com um orçamento na conta do
+        primeiro titular.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.other_account = Account.objects.create(
+            owner=self.other,
+            name='Poupança',
+            balance=500
+        )
+        self.category = Category.objects.create(name='Mercado')
+        self.budget = Budget.objects.create(
+            account=self.account,
+            category=self.category,
+            amount=500,
+            start_date='2024-01-01',
+            end_date='2024-12-31'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def batch(self, requests, **options):
+        return self.client.post(
+            '/api/batch/',
+            {'requests': requests, **options},
+            format='json'
+        )
+
+    def create_transaction(self, amount=100):
+        return {
+            'id': 'transaction',
+            'method': 'POST',
+            'path': '/api/transactions/',
+            'body': {
+                'account': self.account.pk,
+                'category': self.category.pk,
+                'amount': amount,
+                'description': 'Compra'
+            },
+        }
+
+
+class BatchTest(BatchSetupMixin, TestCase):
+    """
+    Testes para o endpoint `/api/batch/`.
+    """
+
+    def test_operations_in_order(self):
+        """
+        Testa se as operações são executadas em ordem e se cada uma vê o
+        resultado das anteriores.
+        """
+
+        response = self.batch([
+            self.create_transaction(),
+            {
+                'method': 'PUT',
+                'path': f'/api/budget/{self.budget.pk}/',
+                'body': {
+                    'account': self.account.pk,
+                    'category': self.category.pk,
+                    'amount': 800,
+                    'start_date': '2024-01-01',
+                    'end_date': '2024-12-31'
+                },
+            },
+            {
+                'method': 'GET',
+                'path': f'/api/account/{self.account.pk}/balance/'
+            },
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['rolled_back'])
+
+        created, updated, account = response.data['responses']
+        self.assertEqual(created['id'], 'transaction')
+        self.assertEqual(created['status'], status.HTTP_201_CREATED)
+        self.assertEqual(updated['status'], status.HTTP_200_OK)
+        self.assertEqual(updated['body']['amount'], '800.00')
+        self.assertEqual(updated['body']['spent'], '100.00')
+        self.assertIn('ETag', updated['headers'])
+        self.assertEqual(account['id'], 2)
+        self.assertEqual(account['body']['balance'], '900.00')
+
+    def test_failure_rolls_back(self):
+        """
+        Testa se uma operação com falha interrompe o lote e desfaz as
+        escritas anteriores.
+        """
+
+        response = self.batch([
+            self.create_transaction(),
+            {
+                'method': 'GET',
+                'path': f'/api/account/{self.other_account.pk}/'
+            },
+            self.create_transaction(),
+        ])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(response.data['rolled_back'])
+        self.assertEqual(
+            [item['status'] for item in response.data['responses']],
+            [status.HTTP_201_CREATED, status.HTTP_403_FORBIDDEN]
+        )
+        self.assertFalse(Transaction.objects.exists())
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 1000)
+
+    def test_non_atomic_batch(self):
+        """
+        Testa se, com `atomic` falso, todas as operações são executadas
+        independentemente.
+        """
+
+        response = self.batch(
+            [
+                self.create_transaction(),
+                {'method': 'DELETE', 'path': '/api/transaction/999999/'},
+                self.create_transaction(50),
+            ],
+            atomic=False
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in response.data['responses']],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_404_NOT_FOUND,
+                status.HTTP_201_CREATED,
+            ]
+        )
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_invalid_batches(self):
+        """
+        Testa se lotes vazios, métodos desconhecidos e caminhos fora dos
+        endpoints síncronos da API são recusados.
+        """
+
+        for requests in (
+            [],
+            [{'method': 'TRACE', 'path': '/api/accounts/'}],
+            [{'method': 'GET', 'path': '/api/unknown/'}],
+            [{'method': 'GET', 'path': '/api/async/categories/'}],
+            [{'method': 'POST', 'path': '/api/batch/'}],
+            [{'method': 'POST', 'path': '/api/token/'}],
+        ):
+            response = self.batch(requests)
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_400_BAD_REQUEST,
+                requests
+            )
+
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_requires_authentication(self):
+        """
+        Testa se o lote exige autenticação.
+        """
+
+        self.client.force_authenticate(user=None)
+
+        response = self.batch([{'method': 'GET', 'path': '/api/categories/'}])
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ParallelBatchTest(BatchSetupMixin, TransactionTestCase):
+    """
+    Testes para as leituras simultâneas do endpoint `/api/batch/`.
+    """
+
+    def test_parallel_reads(self):
+        """
+        Testa se as leituras consecutivas executadas ao mesmo tempo retornam
+        os mesmos resultados, na ordem das operações.
+        """
+
+        reads = [
+            {
+                'method': 'GET',
+                'path': f'/api/account/{self.account.pk}/balance/'
+            },
+            {'method': 'GET', 'path': f'/api/budget/{self.budget.pk}/'},
+            {'method': 'GET', 'path': '/api/categories/'},
+        ]
+
+        response = self.batch(
+            reads + [self.create_transaction()] + reads[:1],
+            parallel=True
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['responses']
+        self.assertEqual(
+            [item['id'] for item in results],
+            [0, 1, 2, 'transaction', 4]
+        )
+        self.assertEqual(results[0]['body']['balance'], '1000.00')
+        self.assertEqual(results[1]['body']['amount'], '500.00')
+        self.assertEqual(results[2]['body'][0]['name'], 'Mercado')
+        self.assertEqual(results[4]['body']['balance'], '900.00')
@@ -0,0 +1,160 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import Account, Category, ChangeLog, Transaction
+
+
+@override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+class ChangeFeedTest(TestCase):
+    """
+    Testes para o registro de alterações e o endpoint `/api/changes/`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria dois titulares,
+        cada um com uma conta, uma categoria e uma transação do primeiro
+        titular.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.other_account = Account.objects.create(
+            owner=self.other,
+            name='Poupança',
+            balance=500
+        )
+        self.category = Category.objects.create(name='Mercado')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            '/api/transactions/',
+            {
+                'account': self.account.pk,
+                'category': self.category.pk,
+                'amount': 100,
+                'description': 'Compra'
+            },
+            format='json'
+        )
+        self.transaction = Transaction.objects.get(pk=response.data['id'])
+
+    def changes(self, **params):
+        response = self.client.get('/api/changes/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_initial_sync(self):
+        """
+        Testa se a primeira sincronização retorna os objetos do titular e as
+        categorias, uma vez cada, com os dados atuais.
+        """
+
+        data = self.changes()
+
+        self.assertEqual(
+            [(item['model'], item['id']) for item in data['changes']],
+            [
+                ('category', self.category.pk),
+                ('transaction', self.transaction.pk),
+                ('account', self.account.pk),
+            ]
+        )
+        self.assertEqual(data['changes'][2]['data']['balance'], '900.00')
+        self.assertFalse(data['has_more'])
+        self.assertEqual(data['next'], data['changes'][-1]['cursor'])
+
+        self.assertEqual(self.changes(since=data['next'])['changes'], [])
+
+    def test_updates_and_tombstones(self):
+        """
+        Testa se as alterações posteriores ao cursor substituem o registro
+        anterior do objeto e se as exclusões são retornadas como lápides.
+        """
+
+        cursor = self.changes()['next']
+
+        response = self.client.put(
+            f'/api/transaction/{self.transaction.pk}/',
+            {
+                'amount': 120,
+                'description': 'Compra de remédios',
+                'account': self.account.pk,
+                'category': self.category.pk
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        data = self.changes(since=cursor)
+        self.assertEqual(len(data['changes']), 1)
+        self.assertEqual(
+            data['changes'][0]['data']['description'],
+            'Compra de remédios'
+        )
+        self.assertEqual(
+            ChangeLog.objects.filter(
+                model='transaction',
+                object_id=self.transaction.pk
+            ).count(),
+            1
+        )
+
+        response = self.client.delete(
+            f'/api/transaction/{self.transaction.pk}/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        data = self.changes(since=data['next'])
+        self.assertEqual(data['changes'], [{
+            'cursor': data['next'],
+            'model': 'transaction',
+            'id': self.transaction.pk,
+            'deleted': True,
+            'data': None,
+        }])
+
+    def test_pagination(self):
+        """
+        Testa se `?limit=` pagina as alterações pelo cursor.
+        """
+
+        data = self.changes(limit=2)
+        self.assertEqual(len(data['changes']), 2)
+        self.assertTrue(data['has_more'])
+
+        data = self.changes(since=data['next'], limit=2)
+        self.assertEqual(len(data['changes']), 1)
+        self.assertFalse(data['has_more'])
+
+        response = self.client.get('/api/changes/', {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=60)
+    def test_recent_changes_wait(self):
+        """
+        Testa se as alterações mais recentes que
+        `CHANGE_FEED_SETTLE_SECONDS` ficam para a próxima sincronização.
+        """
+
+        data = self.changes()
+
+        self.assertEqual(data['changes'], [])
+        self.assertEqual(data['next'], 0)
+        self.assertFalse(data['has_more'])
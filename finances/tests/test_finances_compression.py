@@ -0,0 +1,158 @@
+import gzip
+import os
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.middleware import GZipThresholdMiddleware
+from finances.models import Account, Category, Transaction
+
+
+class GZipThresholdMiddlewareTest(TestCase):
+    """
+    Testes para o middleware GZipThresholdMiddleware.
+
+    Esta classe contém testes que verificam se apenas as views habilitadas
+    têm suas respostas comprimidas e se o tamanho mínimo é respeitado.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um administrador
+        e transações suficientes para gerar uma listagem grande.
+        """
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+
+        self.account = Account.objects.create(
+            owner=self.admin,
+            name='Conta Corrente',
+            balance=10000
+        )
+
+        self.category = Category.objects.create(name='Mercado')
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                account=self.account,
+                category=self.category,
+                amount=10,
+                description=f'Compra número {number} no mercado.'
+            )
+            for number in range(50)
+        ])
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_compress_large_list(self):
+        """
+        Testa se uma listagem grande é comprimida quando o cliente aceita
+        gzip.
+        """
+
+        response = self.client.get(
+            '/api/transactions/',
+            HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        content = gzip.decompress(response.content)
+        self.assertIn(b'Compra n', content)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+
+    def test_client_without_gzip(self):
+        """
+        Testa se a resposta não é comprimida quando o cliente não aceita gzip.
+        """
+
+        response = self.client.get('/api/transactions/')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @override_settings(GZIP_RESPONSE={'MIN_LENGTH': 100000})
+    def test_skip_small_body(self):
+        """
+        Testa se corpos menores que o tamanho mínimo não são comprimidos.
+        """
+
+        response = self.client.get(
+            '/api/transactions/',
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_view_without_gzip(self):
+        """
+        Testa se views que não habilitaram a compressão não são comprimidas.
+        """
+
+        response = self.client.get(
+            f'/api/category/{self.category.pk}/',
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_compress_streaming_response(self):
+        """
+        Testa se respostas de streaming são comprimidas à medida que são
+        enviadas, independentemente do tamanho mínimo.
+        """
+
+        chunks = [b'{"id": %d}\n' % number for number in range(100)]
+
+        def view(request):
+            return StreamingHttpResponse(iter(chunks))
+
+        view.gzip_response = True
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = GZipThresholdMiddleware(lambda request: view(request))
+        middleware.process_view(request, view, (), {})
+
+        response = middleware(request)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks)
+        )
+
+    def test_keep_uncompressible_body(self):
+        """
+        Testa se o corpo original é mantido quando a compressão não reduz o
+        tamanho.
+        """
+
+        body = os.urandom(4096)
+
+        def view(request):
+            return HttpResponse(body)
+
+        view.gzip_response = True
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = GZipThresholdMiddleware(lambda request: view(request))
+        middleware.process_view(request, view, (), {})
+
+        response = middleware(request)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -0,0 +1,236 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.exceptions import PreconditionFailed
+from finances.models import Account, Budget, Category, Transaction
+from finances.serializers import AccountSerializer
+
+
+class OptimisticConcurrencyTest(TestCase):
+    """
+    Testes para o controle de concorrência otimista com a coluna `version` e
+    o cabeçalho `If-Match`.
+
+    Esta classe verifica se edições feitas sobre uma versão desatualizada são
+    rejeitadas com o status HTTP 412 PRECONDITION FAILED em vez de sobrescrever
+    edições concorrentes.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        conta, categoria, transação e orçamento.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1',
+            first_name='Carlos',
+            last_name='Alberto',
+            email='carlos@email.com'
+        )
+
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Conta Corrente',
+            balance=1000
+        )
+
+        self.category = Category.objects.create(name='Academia')
+
+        self.transaction = Transaction.objects.create(
+            amount=100,
+            description='Mensalidade',
+            account=self.account,
+            category=self.category
+        )
+
+        self.budget = Budget.objects.create(
+            start_date='2023-08-01',
+            end_date='2023-08-31',
+            amount=150,
+            account=self.account,
+            category=self.category,
+            spent=100
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_get_returns_etag(self):
+        """
+        Testa se os detalhes retornam o ETag com a versão atual.
+        """
+
+        response = self.client.get(f'/api/account/{self.account.pk}/')
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self.client.get(f'/api/budget/{self.budget.pk}/')
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self.client.get(
+            f'/api/transaction/{self.transaction.pk}/?fields=amount'
+        )
+        self.assertEqual(response['ETag'], '"1"')
+
+    def test_patch_account_with_if_match(self):
+        """
+        Testa se a primeira edição com o ETag atual é aplicada e se a segunda
+        edição com o mesmo ETag é rejeitada.
+        """
+
+        url = f'/api/account/{self.account.pk}/'
+
+        response = self.client.patch(
+            url, {'balance': 500}, format='json', HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.patch(
+            url, {'balance': 700}, format='json', HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 500)
+        self.assertEqual(self.account.version, 2)
+
+    def test_concurrent_update_without_if_match(self):
+        """
+        Testa se uma edição concorrente aplicada entre a leitura e a escrita é
+        detectada mesmo sem o cabeçalho `If-Match`.
+        """
+
+        stale = Account.objects.get(pk=self.account.pk)
+
+        Account.objects.get(pk=self.account.pk).update_versioned(
+            1, name='Conta Poupança'
+        )
+
+        serializer = AccountSerializer(
+            instance=stale,
+            data={'name': 'Conta Salário', 'owner': self.user.pk},
+            partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+
+        with self.assertRaises(PreconditionFailed):
+            serializer.save()
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.name, 'Conta Poupança')
+
+    def test_put_transaction_conflict(self):
+        """
+        Testa se a edição de uma transação com ETag desatualizado é rejeitada
+        sem alterar o gasto do orçamento.
+        """
+
+        Transaction.objects.filter(pk=self.transaction.pk).update(version=2)
+
+        response = self.client.put(
+            f'/api/transaction/{self.transaction.pk}/',
+            {
+                'amount': 120,
+                'description': 'Mensalidade',
+                'account': self.account.pk,
+                'category': self.category.pk
+            },
+            format='json',
+            HTTP_IF_MATCH='"1"'
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, 100)
+
+    def test_put_budget(self):
+        """
+        Testa se a edição de um orçamento incrementa a versão e se a edição
+        com ETag desatualizado é rejeitada.
+        """
+
+        url = f'/api/budget/{self.budget.pk}/'
+        data = {
+            'account': self.account.pk,
+            'category': self.category.pk,
+            'amount': 200,
+            'start_date': '2023-08-01',
+            'end_date': '2023-08-31'
+        }
+
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.put(
+            url, {**data, 'amount': 300}, format='json', HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.amount, 200)
+
+    def test_invalid_if_match(self):
+        """
+        Testa se um cabeçalho `If-Match` inválido retorna o status HTTP 400
+        BAD REQUEST.
+        """
+
+        response = self.client.patch(
+            f'/api/account/{self.account.pk}/',
+            {'balance': 500},
+            format='json',
+            HTTP_IF_MATCH='abc'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_budget_spent_increments_are_not_lost(self):
+        """
+        Testa se somas ao gasto de um orçamento feitas a partir de cópias
+        desatualizadas são todas aplicadas, e se as transações da API
+        atualizam o gasto e a versão do orçamento.
+        """
+
+        first = Budget.objects.get(pk=self.budget.pk)
+        second = Budget.objects.get(pk=self.budget.pk)
+
+        self.assertEqual(first.increment('spent', 10), 100)
+        self.assertEqual(second.increment('spent', 5), 110)
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, 115)
+        self.assertEqual(self.budget.version, 3)
+        self.assertEqual(second.spent, 115)
+
+        response = self.client.post('/api/transactions/', {
+            'amount': '20.00',
+            'description': 'Suplemento',
+            'account': self.account.pk,
+            'category': self.category.pk,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, 135)
+        self.assertEqual(self.budget.version, 4)
+
+        response = self.client.delete(
+            f'/api/transaction/{response.data["id"]}/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.budget.refresh_from_db()
+        self.assertEqual(self.budget.spent, 115)
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import Account, Budget, Category, Transaction
+
+
+class DashboardSetupMixin:
+    """
+    Dados comuns aos testes do endpoint `/api/dashboard/`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        duas contas, duas categorias, um orçamento e transações em março de
+        2024, e uma conta de outro titular.
+        """
+
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.checking = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.savings = Account.objects.create(
+            owner=self.user,
+            name='Poupança',
+            balance=2500
+        )
+        other_account = Account.objects.create(
+            owner=other,
+            name='Outra',
+            balance=9000
+        )
+        self.market = Category.objects.create(name='Mercado')
+        self.transport = Category.objects.create(name='Transporte')
+        Budget.objects.create(
+            account=self.checking,
+            category=self.market,
+            amount=800,
+            start_date='2024-03-01',
+            end_date='2024-03-31'
+        )
+
+        for day, account, category, amount in (
+            (2, self.checking, self.market, 120),
+            (5, self.checking, self.transport, 40),
+            (9, self.savings, self.market, 80),
+            (12, other_account, self.market, 999),
+        ):
+            Transaction.objects.create(
+                account=account,
+                category=category,
+                amount=amount,
+                description='Compra',
+                date=datetime(2024, 3, day, tzinfo=timezone.utc)
+            )
+        Transaction.objects.create(
+            account=self.checking,
+            category=self.market,
+            amount=30,
+            description='Compra de fevereiro',
+            date=datetime(2024, 2, 20, tzinfo=timezone.utc)
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def dashboard(self, period='2024-03'):
+        response = self.client.get('/api/dashboard/', {'period': period})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assertDashboard(self, data):
+        self.assertEqual(data['owner']['username'], 'user1')
+        self.assertEqual(data['period'], '2024-03')
+        self.assertEqual(
+            [account['name'] for account in data['accounts']],
+            ['Corrente', 'Poupança']
+        )
+        self.assertEqual(data['net_worth'], '3500.00')
+        self.assertEqual(len(data['budgets']), 1)
+        self.assertEqual(
+            [item['description'] for item in data['recent_transactions']],
+            ['Compra', 'Compra', 'Compra', 'Compra de fevereiro']
+        )
+        self.assertEqual(
+            [
+                (item['name'], item['total'])
+                for item in data['category_totals']
+            ],
+            [('Mercado', '200.00'), ('Transporte', '40.00')]
+        )
+
+
+class DashboardTest(DashboardSetupMixin, TestCase):
+    """
+    Testes para o endpoint `/api/dashboard/`.
+    """
+
+    def test_dashboard(self):
+        """
+        Testa se o painel reúne apenas os dados do titular, com um número
+        fixo de consultas.
+        """
+
+        with self.assertNumQueries(6):
+            data = self.dashboard()
+
+        self.assertDashboard(data)
+
+    def test_cached_until_data_changes(self):
+        """
+        Testa se o painel é lido do cache até que os dados do titular mudem.
+        """
+
+        self.dashboard()
+
+        with self.assertNumQueries(0):
+            self.dashboard()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                account=self.savings,
+                category=self.transport,
+                amount=60,
+                description='Ônibus',
+                date=datetime(2024, 3, 20, tzinfo=timezone.utc)
+            )
+
+        data = self.dashboard()
+        self.assertEqual(
+            data['recent_transactions'][0]['description'],
+            'Ônibus'
+        )
+        self.assertEqual(data['category_totals'][1]['total'], '100.00')
+
+    def test_invalid_period(self):
+        """
+        Testa se um período inválido é recusado.
+        """
+
+        response = self.client.get('/api/dashboard/', {'period': '2024-13'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        """
+        Testa se o painel exige autenticação.
+        """
+
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get('/api/dashboard/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConcurrentDashboardTest(DashboardSetupMixin, TransactionTestCase):
+    """
+    Testes para as consultas simultâneas do endpoint `/api/dashboard/`.
+    """
+
+    def test_concurrent_queries(self):
+        """
+        Testa se o painel montado com consultas simultâneas é igual ao
+        montado em sequência.
+        """
+
+        self.assertDashboard(self.dashboard())
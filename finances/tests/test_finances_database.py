@@ -0,0 +1,254 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connection, connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings
+)
+from app.database import database_config
+from finances.database import configure_sqlite, retry_on_lock
+
+
+class DatabaseConfigTest(SimpleTestCase):
+    """
+    Testes para a configuração do banco de dados por variáveis de ambiente.
+    """
+
+    def test_sqlite_default(self):
+        """
+        Testa se o SQLite é usado quando nenhuma variável é definida, com
+        conexões persistentes e verificação de saúde.
+        """
+
+        config = database_config({}, '/srv/app')
+
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], '/srv/app/db.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+    def test_postgresql(self):
+        """
+        Testa se as variáveis de conexão do PostgreSQL são lidas.
+        """
+
+        config = database_config({
+            'DB_ENGINE': 'postgresql',
+            'DB_NAME': 'finances',
+            'DB_USER': 'app',
+            'DB_PASSWORD': 'secret',
+            'DB_HOST': 'db.internal',
+            'DB_CONN_MAX_AGE': '300',
+            'DB_CONN_HEALTH_CHECKS': 'false',
+        }, '/srv/app')
+
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['HOST'], 'db.internal')
+        self.assertEqual(config['PORT'], '5432')
+        self.assertEqual(config['USER'], 'app')
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_pool_with_external_pooler(self):
+        """
+        Testa se o modo com pool desativa os cursores do lado do servidor nas
+        versões do Django sem pool nativo.
+        """
+
+        with mock.patch('app.database.django.VERSION', (4, 2, 0)):
+            config = database_config(
+                {'DB_ENGINE': 'postgresql', 'DB_POOL': 'true'}, '/srv/app'
+            )
+
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_native_pool(self):
+        """
+        Testa se o pool nativo é configurado no Django 5.1 ou superior, com
+        as conexões persistentes desativadas.
+        """
+
+        with mock.patch('app.database.django.VERSION', (5, 1, 0)):
+            config = database_config({
+                'DB_ENGINE': 'postgresql',
+                'DB_POOL': '1',
+                'DB_POOL_MAX_SIZE': '20',
+            }, '/srv/app')
+
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {
+            'min_size': 2,
+            'max_size': 20,
+        })
+
+    def test_unsupported_engine(self):
+        """
+        Testa se um DB_ENGINE desconhecido gera um erro.
+        """
+
+        with self.assertRaises(ValueError):
+            database_config({'DB_ENGINE': 'oracle'}, '/srv/app')
+
+
+@override_settings(DB_LOCK_RETRY={'ATTEMPTS': 3, 'BACKOFF': 0})
+class SQLiteProfileTest(TransactionTestCase):
+    """
+    Testes para os pragmas do SQLite e para as novas tentativas em caso de
+    banco bloqueado.
+    """
+
+    def test_pragmas(self):
+        """
+        Testa se os pragmas são aplicados na conexão.
+        """
+
+        configure_sqlite(sender=None, connection=connection)
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -65536)
+
+    def test_retry_on_lock(self):
+        """
+        Testa se a função é repetida quando o banco está bloqueado.
+        """
+
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(write(), 'ok')
+        self.assertEqual(calls, [True, True, True])
+
+    def test_give_up_after_attempts(self):
+        """
+        Testa se o erro é propagado após esgotar as tentativas.
+        """
+
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            write()
+
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        """
+        Testa se erros que não são de bloqueio não são repetidos.
+        """
+
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            raise OperationalError('no such table: finances_transaction')
+
+        with self.assertRaises(OperationalError):
+            write()
+
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(DATABASE_SHARDS=['shard1'])
+class RetryOnShardTest(TransactionTestCase):
+    """
+    Testes para a repetição das escritas feitas em um shard.
+    """
+
+    def setUp(self):
+        """
+        Registra o alias `shard1`, apontando para um arquivo SQLite
+        temporário.
+        """
+
+        self.directory = tempfile.mkdtemp()
+        connections.settings['shard1'] = {
+            **connections.settings['default'],
+            'NAME': os.path.join(self.directory, 'shard1.sqlite3'),
+            'TEST': {'MIRROR': None},
+        }
+
+    def tearDown(self):
+        connections['shard1'].close()
+        del connections['shard1']
+        del connections.settings['shard1']
+        shutil.rmtree(self.directory)
+
+    def test_transaction_on_active_shard(self):
+        """
+        Testa se, por padrão, a transação repetida também é aberta no shard
+        ativo, e se uma escrita no shard de uma tentativa bloqueada é
+        desfeita.
+        """
+
+        shard = connections['shard1']
+        with shard.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (name TEXT)')
+
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(
+                (connection.in_atomic_block, shard.in_atomic_block)
+            )
+            with shard.cursor() as cursor:
+                cursor.execute("INSERT INTO item VALUES ('x')")
+            if len(calls) < 2:
+                raise OperationalError('database is locked')
+
+        with mock.patch(
+            'finances.database.current_shard',
+            return_value='shard1'
+        ):
+            write()
+
+        self.assertEqual(calls, [(True, True), (True, True)])
+        with shard.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_explicit_aliases(self):
+        """
+        Testa se a transação é aberta nos bancos informados em `using` e se
+        a função não é repetida dentro de uma transação já aberta em um
+        deles.
+        """
+
+        calls = []
+
+        @retry_on_lock(using=lambda: ['shard1'])
+        def write():
+            calls.append(connections['shard1'].in_atomic_block)
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertGreater(len(calls), 1)
+        self.assertTrue(all(calls))
+
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            with transaction.atomic(using='shard1'):
+                write()
+        self.assertEqual(calls, [True])
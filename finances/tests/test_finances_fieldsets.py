@@ -0,0 +1,160 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import Account, Budget, Category, Transaction
+from finances.serializers import CategorySerializer
+
+
+class SparseFieldsetTest(TestCase):
+    """
+    Testes para os parâmetros `?fields=` e `?expand=`.
+
+    Esta classe verifica se as respostas contêm apenas os campos solicitados,
+    se as relações são expandidas sob demanda e se o ORM seleciona apenas as
+    colunas necessárias.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um
+        administrador, um titular com conta, transação e orçamento.
+        """
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1',
+            first_name='Carlos',
+            last_name='Alberto',
+            email='carlos@email.com'
+        )
+
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Conta Corrente',
+            balance=1000
+        )
+
+        self.category = Category.objects.create(name='Academia')
+
+        self.transaction = Transaction.objects.create(
+            amount=100,
+            description='Mensalidade da academia',
+            account=self.account,
+            category=self.category
+        )
+
+        self.budget = Budget.objects.create(
+            start_date='2023-08-01',
+            end_date='2023-08-31',
+            amount=150,
+            account=self.account,
+            category=self.category
+        )
+
+        self.client_admin = APIClient()
+        self.client_admin.force_authenticate(user=self.admin)
+
+        self.client_user = APIClient()
+        self.client_user.force_authenticate(user=self.user)
+
+    def test_fields_restrict_response_and_columns(self):
+        """
+        Testa se `?fields=` restringe os campos da resposta e as colunas
+        selecionadas pelo ORM.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_admin.get(
+                '/api/transactions/?fields=id,amount'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [{'id': self.transaction.pk, 'amount': '100.00'}]
+        )
+
+        select = queries.captured_queries[-1]['sql']
+        self.assertNotIn('description', select)
+
+    def test_expand_relations(self):
+        """
+        Testa se `?expand=` inclui as relações aninhadas usando uma única
+        consulta.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_admin.get(
+                '/api/budgets/?fields=id,amount&expand=category'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data[0]['category'],
+            CategorySerializer(self.category).data
+        )
+        self.assertEqual(response.data[0]['category']['name'], 'Academia')
+        self.assertEqual(
+            set(response.data[0]), {'id', 'amount', 'category'}
+        )
+        self.assertIn('JOIN', queries.captured_queries[-1]['sql'])
+
+    def test_detail_fields(self):
+        """
+        Testa se os detalhes de uma transação respeitam `?fields=` e
+        `?expand=`.
+        """
+
+        response = self.client_user.get(
+            f'/api/transaction/{self.transaction.pk}/'
+            '?fields=description&expand=account'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['description'], 'Mensalidade da academia'
+        )
+        self.assertEqual(response.data['account']['name'], 'Conta Corrente')
+        self.assertNotIn('amount', response.data)
+
+    def test_unknown_field(self):
+        """
+        Testa se campos ou relações desconhecidos retornam o status HTTP 400
+        BAD REQUEST.
+        """
+
+        response = self.client_admin.get('/api/transactions/?fields=foo')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client_admin.get('/api/budgets/?expand=owner')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_account_detail_expand(self):
+        """
+        Testa se a conta inclui apenas as relações pedidas em `?expand=` e se
+        continua incluindo todas quando o parâmetro é omitido.
+        """
+
+        response = self.client_user.get(
+            f'/api/account/{self.account.pk}/?expand=budgets'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data), ['budgets'])
+
+        response = self.client_user.get(f'/api/account/{self.account.pk}/')
+
+        self.assertEqual(
+            set(response.data), {'owner', 'transactions', 'budgets'}
+        )
@@ -0,0 +1,184 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.idempotency import purge_expired_keys
+from finances.models import Account, Category, IdempotencyKey, Transaction
+
+
+class IdempotencyKeyTest(TestCase):
+    """
+    Testes para o cabeçalho `Idempotency-Key` na criação de transações e
+    orçamentos.
+
+    Esta classe verifica se as repetições de uma solicitação com a mesma chave
+    não criam registros duplicados nem debitam o saldo novamente.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular
+        autenticado, uma conta e uma categoria.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1',
+            first_name='Carlos',
+            last_name='Alberto',
+            email='carlos@email.com'
+        )
+
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Conta Corrente',
+            balance=1000
+        )
+
+        self.category = Category.objects.create(name='Mercado')
+
+        self.data = {
+            'amount': 50,
+            'description': 'Compra no mercado.',
+            'account': self.account.id,
+            'category': self.category.id,
+        }
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, data, key='abc-123', path='/api/transactions/'):
+        return self.client.post(
+            path,
+            data=data,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_response(self):
+        """
+        Testa se a repetição com a mesma chave retorna a resposta original sem
+        criar outra transação nem debitar o saldo novamente.
+        """
+
+        first = self.post(self.data)
+        second = self.post(self.data)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertFalse(first.has_header('Idempotent-Replayed'))
+
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, 950)
+
+    def test_different_keys(self):
+        """
+        Testa se chaves diferentes criam transações diferentes.
+        """
+
+        self.post(self.data, key='first')
+        self.post(self.data, key='second')
+
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_key_reused_with_other_body(self):
+        """
+        Testa se reutilizar a chave com outro conteúdo retorna o status HTTP
+        422 UNPROCESSABLE ENTITY.
+        """
+
+        self.post(self.data)
+        response = self.post({**self.data, 'amount': 70})
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_concurrent_insert_replays(self):
+        """
+        Testa se, quando outro worker registra a chave entre a consulta e a
+        inserção, a solicitação reproduz a resposta registrada em vez de
+        criar outra transação.
+        """
+
+        self.post(self.data)
+
+        with mock.patch.object(QuerySet, 'first', return_value=None):
+            response = self.post(self.data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_validation_error_is_not_stored(self):
+        """
+        Testa se respostas de erro lançadas pela validação não são
+        armazenadas, permitindo que o cliente corrija e repita a chave.
+        """
+
+        response = self.post({**self.data, 'amount': 5000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key(self):
+        """
+        Testa se uma chave expirada é descartada e a solicitação é executada
+        novamente.
+        """
+
+        self.post(self.data)
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        response = self.post(self.data)
+
+        self.assertFalse(response.has_header('Idempotent-Replayed'))
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_purge_expired_keys(self):
+        """
+        Testa se apenas as chaves expiradas são removidas.
+        """
+
+        self.post(self.data, key='old')
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        self.post(self.data, key='new')
+
+        self.assertEqual(purge_expired_keys(), 1)
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list('key', flat=True)),
+            ['new']
+        )
+
+    def test_budget_creation(self):
+        """
+        Testa se a criação de orçamentos também é idempotente.
+        """
+
+        data = {
+            'account': self.account.id,
+            'category': self.category.id,
+            'amount': 500,
+            'start_date': '2023-08-01',
+            'end_date': '2023-08-31',
+        }
+
+        first = self.post(data, path='/api/budgets/')
+        second = self.post(data, path='/api/budgets/')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
@@ -0,0 +1,298 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.ledger import balance_at, daily_balances
+from finances.models import (
+    Account, BalanceSnapshot, Category, LedgerDay, LedgerEntry
+)
+
+
+def utc(year, month, day):
+    return datetime(year, month, day, 12, tzinfo=timezone.utc)
+
+
+@override_settings(LEDGER_SNAPSHOT_INTERVAL=3)
+class LedgerTest(TestCase):
+    """
+    Testes para o livro-razão das contas e o saldo em uma data.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        uma conta e uma categoria sem orçamento.
+        """
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.other = User.objects.create_user(
+            username='user2',
+            password='password2'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.category = Category.objects.create(name='Mercado')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_transaction(self, amount):
+        return self.client.post(
+            '/api/transactions/',
+            {
+                'account': self.account.pk,
+                'category': self.category.pk,
+                'amount': amount,
+                'description': f'Compra de {amount}'
+            },
+            format='json'
+        )
+
+    def test_opening_entry(self):
+        """
+        Testa se a criação de uma conta abre o livro-razão com o saldo
+        inicial.
+        """
+
+        entry = LedgerEntry.objects.get(account=self.account)
+
+        self.assertEqual(entry.sequence, 1)
+        self.assertEqual(entry.kind, LedgerEntry.OPENING)
+        self.assertEqual(entry.delta, 1000)
+        self.assertEqual(balance_at(self.account), 1000)
+
+    def test_transactions_and_adjustments(self):
+        """
+        Testa se as transações e os ajustes manuais do saldo são gravados
+        no livro-razão, com um registro de saldo a cada
+        `LEDGER_SNAPSHOT_INTERVAL` lançamentos.
+        """
+
+        for amount in (100, 50, 25):
+            response = self.create_transaction(amount)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.patch(
+            f'/api/account/{self.account.pk}/',
+            {'balance': 900},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entries = list(
+            LedgerEntry.objects.filter(account=self.account).order_by(
+                'sequence'
+            ).values_list('sequence', 'kind', 'delta')
+        )
+        self.assertEqual(entries, [
+            (1, LedgerEntry.OPENING, 1000),
+            (2, LedgerEntry.TRANSACTION, -100),
+            (3, LedgerEntry.TRANSACTION, -50),
+            (4, LedgerEntry.TRANSACTION, -25),
+            (5, LedgerEntry.ADJUSTMENT, 75),
+        ])
+
+        snapshot = BalanceSnapshot.objects.get(account=self.account)
+        self.assertEqual(snapshot.sequence, 3)
+        self.assertEqual(snapshot.balance, 850)
+
+        self.account.refresh_from_db()
+        self.assertEqual(balance_at(self.account), self.account.balance)
+
+        ledger_day = LedgerDay.objects.get(account=self.account)
+        self.assertEqual(ledger_day.delta, self.account.balance)
+
+    def test_balance_at_date(self):
+        """
+        Testa se o saldo em uma data considera apenas os lançamentos até a
+        data.
+        """
+
+        for sequence, day, delta in (
+            (2, 5, -100),
+            (3, 10, -50),
+            (4, 20, -25),
+        ):
+            entry = LedgerEntry.objects.create(
+                account=self.account,
+                sequence=sequence,
+                kind=LedgerEntry.TRANSACTION,
+                delta=delta,
+                created_at=utc(2030, 1, day)
+            )
+        LedgerEntry.objects.filter(sequence=1).update(
+            created_at=utc(2030, 1, 1)
+        )
+        BalanceSnapshot.objects.create(
+            account=self.account,
+            sequence=3,
+            balance=850,
+            created_at=utc(2030, 1, 10)
+        )
+
+        self.assertIsNone(balance_at(self.account, utc(2029, 12, 31)))
+        self.assertEqual(balance_at(self.account, utc(2030, 1, 7)), 900)
+        self.assertEqual(balance_at(self.account, utc(2030, 1, 15)), 850)
+        self.assertEqual(balance_at(self.account, entry.created_at), 825)
+
+    def test_balance_endpoint(self):
+        """
+        Testa se o endpoint retorna o saldo na data informada e rejeita
+        datas inválidas e contas de outros titulares.
+        """
+
+        LedgerEntry.objects.filter(account=self.account).update(
+            created_at=utc(2030, 1, 1)
+        )
+        LedgerEntry.objects.create(
+            account=self.account,
+            sequence=2,
+            kind=LedgerEntry.TRANSACTION,
+            delta=Decimal('-10.50'),
+            created_at=utc(2030, 1, 2)
+        )
+        url = f'/api/account/{self.account.pk}/balance/'
+
+        response = self.client.get(url, {'at': '2030-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balance'], '1000.00')
+
+        response = self.client.get(url, {'at': '2030-01-02T13:00:00Z'})
+        self.assertEqual(response.data['balance'], '989.50')
+
+        response = self.client.get(url, {'at': '2029-12-31'})
+        self.assertIsNone(response.data['balance'])
+
+        response = self.client.get(url, {'at': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def create_history(self):
+        """
+        Cria lançamentos em 2030, com suas somas diárias e um registro de
+        saldo entre eles.
+        """
+
+        LedgerEntry.objects.filter(account=self.account).update(
+            created_at=utc(2030, 1, 2)
+        )
+        LedgerDay.objects.filter(account=self.account).update(
+            day=date(2030, 1, 2)
+        )
+        for day, delta in ((3, -150), (6, 20), (8, -5)):
+            LedgerDay.objects.create(
+                account=self.account,
+                day=date(2030, 1, day),
+                delta=delta
+            )
+        for sequence, day, delta in (
+            (2, 3, -100),
+            (3, 3, -50),
+            (4, 6, 20),
+            (5, 8, -5),
+        ):
+            LedgerEntry.objects.create(
+                account=self.account,
+                sequence=sequence,
+                kind=LedgerEntry.TRANSACTION,
+                delta=delta,
+                created_at=utc(2030, 1, day)
+            )
+        BalanceSnapshot.objects.create(
+            account=self.account,
+            sequence=3,
+            balance=850,
+            created_at=utc(2030, 1, 3)
+        )
+
+    def test_daily_balances(self):
+        """
+        Testa se a série diária repete o saldo nos dias sem lançamentos,
+        parte do saldo anterior ao intervalo e é reduzida a `points` pontos.
+        """
+
+        self.create_history()
+
+        self.assertEqual(
+            daily_balances(self.account, date(2030, 1, 1), date(2030, 1, 8)),
+            [
+                (date(2030, 1, 1), None),
+                (date(2030, 1, 2), 1000),
+                (date(2030, 1, 3), 850),
+                (date(2030, 1, 4), 850),
+                (date(2030, 1, 5), 850),
+                (date(2030, 1, 6), 870),
+                (date(2030, 1, 7), 870),
+                (date(2030, 1, 8), 865),
+            ]
+        )
+        self.assertEqual(
+            daily_balances(self.account, date(2030, 1, 5), date(2030, 1, 9)),
+            [
+                (date(2030, 1, 5), 850),
+                (date(2030, 1, 6), 870),
+                (date(2030, 1, 7), 870),
+                (date(2030, 1, 8), 865),
+                (date(2030, 1, 9), 865),
+            ]
+        )
+        self.assertEqual(
+            daily_balances(
+                self.account, date(2030, 1, 1), date(2030, 1, 8), points=3
+            ),
+            [
+                (date(2030, 1, 2), 1000),
+                (date(2030, 1, 5), 850),
+                (date(2030, 1, 8), 865),
+            ]
+        )
+
+    def test_balance_history_endpoint(self):
+        """
+        Testa se o endpoint retorna a série diária do intervalo e rejeita
+        parâmetros inválidos.
+        """
+
+        self.create_history()
+        url = f'/api/account/{self.account.pk}/balance/history/'
+
+        response = self.client.get(
+            url, {'start': '2030-01-06', 'end': '2030-01-08'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['balances'], [
+            {'date': '2030-01-06', 'balance': '870.00'},
+            {'date': '2030-01-07', 'balance': '870.00'},
+            {'date': '2030-01-08', 'balance': '865.00'},
+        ])
+
+        response = self.client.get(
+            url, {'start': '2025-01-01', 'end': '2030-01-08', 'points': 10}
+        )
+        self.assertEqual(len(response.data['balances']), 10)
+        self.assertEqual(response.data['balances'][-1]['balance'], '865.00')
+
+        for params in (
+            {'start': '2030-01-09', 'end': '2030-01-08'},
+            {'start': '2000-01-01', 'end': '2030-01-08'},
+            {'points': 0},
+            {'end': 'amanhã'},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
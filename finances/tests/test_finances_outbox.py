@@ -0,0 +1,286 @@
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import Account, Budget, Category, OutboxEvent
+from finances.outbox import claim_batch, dispatch, get_config
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """
+    Destinatário local dos webhooks, que guarda as notificações recebidas e
+    responde com o status definido no servidor.
+    """
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.server.received.append(json.loads(self.rfile.read(length)))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class OutboxTest(TestCase):
+    """
+    Testes para a caixa de saída e o comando `dispatch_outbox`.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele inicia o
+        destinatário local dos webhooks e cria um titular com uma conta, uma
+        categoria e um orçamento.
+        """
+
+        self.server = HTTPServer(('127.0.0.1', 0), WebhookHandler)
+        self.server.received = []
+        self.server.status = 200
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings = override_settings(OUTBOX={
+            'WEBHOOK_URLS': [
+                f'http://127.0.0.1:{self.server.server_port}/hook'
+            ],
+            'TIMEOUT': 2,
+            'CONCURRENCY': 4,
+            'MAX_ATTEMPTS': 3,
+            'BACKOFF_SECONDS': 2,
+            'MAX_BACKOFF_SECONDS': 600,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        self.category = Category.objects.create(name='Mercado')
+        self.budget = Budget.objects.create(
+            account=self.account,
+            category=self.category,
+            amount=500,
+            start_date='2024-01-01',
+            end_date='2024-12-31'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_transaction(self, amount=100):
+        response = self.client.post(
+            '/api/transactions/',
+            {
+                'account': self.account.pk,
+                'category': self.category.pk,
+                'amount': amount,
+                'description': 'Compra'
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_events_written_with_changes(self):
+        """
+        Testa se a criação, a alteração e a exclusão de uma transação gravam
+        os eventos da transação e do orçamento.
+        """
+
+        pk = self.create_transaction()
+        self.client.put(
+            f'/api/transaction/{pk}/',
+            {
+                'amount': 150,
+                'description': 'Compra',
+                'account': self.account.pk,
+                'category': self.category.pk
+            },
+            format='json'
+        )
+        self.client.delete(f'/api/transaction/{pk}/')
+
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by('id').values_list(
+                'event', flat=True
+            )),
+            [
+                'transaction.created', 'budget.updated',
+                'transaction.updated', 'budget.updated',
+                'budget.updated', 'transaction.deleted',
+            ]
+        )
+        self.assertEqual(
+            set(OutboxEvent.objects.values_list('account_id', flat=True)),
+            {self.account.pk}
+        )
+
+    def test_delivery_coalesces_events(self):
+        """
+        Testa se os eventos de uma conta são entregues em uma única
+        notificação, com um evento por objeto, e excluídos após a entrega.
+        """
+
+        first = self.create_transaction(100)
+        second = self.create_transaction(50)
+        self.client.delete(f'/api/transaction/{second}/')
+
+        report = dispatch('default', config=get_config())
+
+        self.assertEqual(report['events'], 6)
+        self.assertEqual(report['delivered'], 6)
+        self.assertEqual(report['requests'], 1)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        notification, = self.server.received
+        self.assertEqual(notification['account'], self.account.pk)
+        self.assertEqual(
+            [
+                (item['event'], item['object_id'])
+                for item in notification['events']
+            ],
+            [
+                ('transaction.created', first),
+                ('budget.updated', self.budget.pk),
+            ]
+        )
+        self.assertEqual(
+            notification['events'][1]['data']['spent'],
+            '100.00'
+        )
+
+    def test_failed_delivery_backs_off(self):
+        """
+        Testa se uma entrega com falha mantém os eventos, registra o erro e
+        adia a próxima tentativa.
+        """
+
+        self.create_transaction()
+        self.server.status = 500
+
+        report = dispatch('default', config=get_config())
+
+        self.assertEqual(report['failed'], 2)
+        for event in OutboxEvent.objects.all():
+            self.assertEqual(event.attempts, 1)
+            self.assertIn('HTTP 500', event.last_error)
+            self.assertGreater(event.next_attempt_at, timezone.now())
+
+        self.assertEqual(
+            dispatch('default', config=get_config())['events'],
+            0
+        )
+
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        self.server.status = 200
+        call_command('dispatch_outbox', stdout=StringIO())
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(len(self.server.received), 2)
+
+    def test_account_order_kept_after_failure(self):
+        """
+        Testa se os eventos posteriores de uma conta aguardam a nova
+        tentativa dos eventos com falha, sem atrasar as demais contas, e se
+        são entregues depois deles, em ordem.
+        """
+
+        first = self.create_transaction(100)
+        self.server.status = 500
+        self.assertEqual(dispatch('default', config=get_config())['failed'], 2)
+
+        self.server.status = 200
+        second = self.create_transaction(50)
+        other = Account.objects.create(
+            owner=self.user,
+            name='Poupança',
+            balance=1000
+        )
+        OutboxEvent.objects.create(
+            account_id=other.pk,
+            event='account.updated',
+            object_id=other.pk,
+            payload='{}'
+        )
+
+        report = dispatch('default', config=get_config())
+
+        self.assertEqual(report['delivered'], 1)
+        self.assertEqual(
+            [item['account'] for item in self.server.received[1:]],
+            [other.pk]
+        )
+        self.assertEqual(OutboxEvent.objects.count(), 4)
+
+        OutboxEvent.objects.update(next_attempt_at=timezone.now())
+        dispatch('default', config=get_config())
+
+        self.assertFalse(OutboxEvent.objects.exists())
+        notification = self.server.received[-1]
+        self.assertEqual(
+            [
+                item['object_id'] for item in notification['events']
+                if item['event'] == 'transaction.created'
+            ],
+            [first, second]
+        )
+
+    def test_lease_covers_batch(self):
+        """
+        Testa se a reserva dura o envio das notificações de todas as contas
+        do lote em grupos de `CONCURRENCY`, mais uma margem.
+        """
+
+        OutboxEvent.objects.bulk_create(
+            OutboxEvent(
+                account_id=account_id,
+                event='account.updated',
+                object_id=account_id,
+                payload='{}'
+            )
+            for account_id in range(1, 11)
+        )
+
+        before = timezone.now()
+        events = claim_batch('default', 100, get_config())
+
+        self.assertEqual(len(events), 10)
+        for event in OutboxEvent.objects.all():
+            self.assertGreaterEqual(
+                event.next_attempt_at - before,
+                timedelta(seconds=8)
+            )
+            self.assertLess(
+                event.next_attempt_at - before,
+                timedelta(seconds=9)
+            )
+
+    def test_nothing_written_without_urls(self):
+        """
+        Testa se nenhum evento é gravado sem URLs configuradas.
+        """
+
+        with override_settings(OUTBOX={'WEBHOOK_URLS': []}):
+            self.create_transaction()
+
+        self.assertFalse(OutboxEvent.objects.exists())
@@ -0,0 +1,245 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.models import (
+    Account, Category, Transaction, TransactionPartition
+)
+from finances.partitions import (
+    add_missing_columns,
+    detach_partition,
+    month_start,
+    period_bounds,
+    transactions_between
+)
+
+
+def utc(year, month, day):
+    return datetime(year, month, day, 12, tzinfo=timezone.utc)
+
+
+class TransactionPartitionTest(TestCase):
+    """
+    Testes para o particionamento mensal das transações.
+
+    No SQLite, desanexar um mês move as transações para uma tabela própria;
+    as consultas com intervalo de datas devem reunir a tabela principal e as
+    tabelas desanexadas do intervalo.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular, uma
+        conta e transações em janeiro, fevereiro e março de 2024.
+        """
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Conta',
+            balance=10000
+        )
+        self.category = Category.objects.create(name='Mercado')
+
+        self.transactions = [
+            Transaction.objects.create(
+                account=self.account,
+                category=self.category,
+                amount=10 * month,
+                date=utc(2024, month, 15),
+                description=f'Compra {month}'
+            )
+            for month in (1, 2, 3)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_detach_moves_rows(self):
+        """
+        Testa se desanexar um mês move suas transações para a tabela do
+        período e registra a partição.
+        """
+
+        partition = detach_partition(utc(2024, 1, 1).date())
+
+        self.assertEqual(partition.table_name, 'finances_transaction_p202401')
+        self.assertEqual(partition.rows, 1)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id, description FROM finances_transaction_p202401'
+            )
+            self.assertEqual(
+                cursor.fetchall(),
+                [(self.transactions[0].pk, 'Compra 1')]
+            )
+
+        with self.assertRaises(ValueError):
+            detach_partition(utc(2024, 1, 1).date())
+
+    def test_detach_keeps_all_columns(self):
+        """
+        Testa se a tabela desanexada guarda todas as colunas de transações,
+        inclusive `updated_at`, e se a leitura do período as devolve.
+        """
+
+        detach_partition(utc(2024, 1, 1).date())
+
+        transaction = transactions_between(
+            utc(2024, 1, 1), utc(2024, 2, 1)
+        )[0]
+        self.assertEqual(transaction.pk, self.transactions[0].pk)
+        self.assertEqual(
+            transaction.updated_at,
+            self.transactions[0].updated_at
+        )
+        self.assertEqual(
+            transaction.version,
+            self.transactions[0].version
+        )
+
+    def test_add_missing_columns(self):
+        """
+        Testa se uma partição desanexada antes da coluna `updated_at` recebe
+        a coluna, preenchida, e volta a ser lida.
+        """
+
+        detach_partition(utc(2024, 1, 1).date())
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ALTER TABLE finances_transaction_p202401 '
+                'DROP COLUMN updated_at'
+            )
+
+        self.assertEqual(
+            add_missing_columns(connection, 'finances_transaction_p202401'),
+            ['updated_at']
+        )
+        self.assertEqual(
+            add_missing_columns(connection, 'finances_transaction_p202401'),
+            []
+        )
+
+        transaction = transactions_between(
+            utc(2024, 1, 1), utc(2024, 2, 1)
+        )[0]
+        self.assertEqual(transaction.description, 'Compra 1')
+        self.assertIsNotNone(transaction.updated_at)
+
+    def test_open_month_cannot_be_detached(self):
+        """
+        Testa se o mês atual não pode ser desanexado.
+        """
+
+        with self.assertRaises(ValueError):
+            detach_partition(month_start(datetime.now(timezone.utc)))
+
+        self.assertFalse(TransactionPartition.objects.exists())
+
+    def test_range_reads_only_overlapping_partitions(self):
+        """
+        Testa se a consulta por intervalo reúne as transações da tabela
+        principal e das partições desanexadas, sem ler as partições fora do
+        intervalo.
+        """
+
+        detach_partition(utc(2024, 1, 1).date())
+        detach_partition(utc(2024, 2, 1).date())
+
+        start, _ = period_bounds(utc(2024, 2, 1).date())
+        _, end = period_bounds(utc(2024, 3, 1).date())
+
+        with self.assertNumQueries(4):
+            transactions = transactions_between(start, end)
+
+        self.assertEqual(
+            [transaction.pk for transaction in transactions],
+            [self.transactions[1].pk, self.transactions[2].pk]
+        )
+        self.assertEqual(transactions[0].amount, 20)
+        self.assertEqual(transactions[0].date, utc(2024, 2, 15))
+        self.assertEqual(transactions[0].category_id, self.category.pk)
+
+        transactions = transactions_between(end, None)
+        self.assertEqual(list(transactions), [])
+
+    def test_list_view_date_range(self):
+        """
+        Testa se a listagem com `?start=` e `?end=` inclui as transações
+        desanexadas e rejeita datas inválidas.
+        """
+
+        detach_partition(utc(2024, 1, 1).date())
+
+        response = self.client.get(
+            '/api/transactions/?start=2024-01-01&end=2024-02-15'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [transaction['description'] for transaction in response.data],
+            ['Compra 1', 'Compra 2']
+        )
+
+        response = self.client.get('/api/transactions/?start=2024-13-01')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_end_on_first_day_of_month(self):
+        """
+        Testa se um `?end=` no primeiro dia de um mês inclui as transações
+        desse dia guardadas na partição desanexada do mês.
+        """
+
+        Transaction.objects.create(
+            account=self.account,
+            category=self.category,
+            amount=5,
+            date=utc(2024, 3, 1),
+            description='Compra 1º de março'
+        )
+        detach_partition(utc(2024, 3, 1).date())
+
+        response = self.client.get(
+            '/api/transactions/?start=2024-02-01&end=2024-03-01'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [transaction['description'] for transaction in response.data],
+            ['Compra 2', 'Compra 1º de março']
+        )
+
+    def test_partition_command(self):
+        """
+        Testa se o comando desanexa e lista as partições.
+        """
+
+        out = StringIO()
+        call_command(
+            'partition_transactions',
+            '--detach', '2024-02',
+            '--list',
+            stdout=out
+        )
+
+        self.assertIn('2024-02 desanexado em', out.getvalue())
+        self.assertIn('2024-02 finances_transaction_p202402 1', out.getvalue())
@@ -0,0 +1,223 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from finances import passwords
+from finances.passwords import (
+    ConfigurablePBKDF2PasswordHasher,
+    acheck_password,
+    ahash_password,
+    hash_password
+)
+
+OWNER = {
+    'username': 'user1',
+    'first_name': 'Carlos',
+    'last_name': 'Alberto',
+    'email': 'carlos@email.com',
+    'password': 'password1',
+}
+
+
+@override_settings(PASSWORD_HASHING={'ITERATIONS': 1000})
+class PasswordsTest(TestCase):
+    """
+    Testes para o hash das senhas no cadastro e no login.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+        """
+
+        self.client = APIClient()
+
+    def login(self, username, password, path='/api/token/'):
+        return self.client.post(
+            path,
+            {'username': username, 'password': password},
+            format='json'
+        )
+
+    def test_registered_owner_can_login(self):
+        """
+        Testa se o titular cadastrado por `POST /api/owners/` consegue fazer
+        login com a senha informada, com um único cálculo de hash.
+        """
+
+        with mock.patch.object(
+            ConfigurablePBKDF2PasswordHasher,
+            'encode',
+            autospec=True,
+            side_effect=ConfigurablePBKDF2PasswordHasher.encode
+        ) as encode:
+            response = self.client.post('/api/owners/', OWNER, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(encode.call_count, 1)
+        self.assertNotIn('password', response.data)
+
+        owner = User.objects.get(username='user1')
+        self.assertTrue(owner.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(owner.check_password('password1'))
+
+        response = self.login('user1', 'password1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_password_update(self):
+        """
+        Testa se a senha alterada por `PATCH /api/owner/<pk>/` é gravada com
+        hash e aceita no login.
+        """
+
+        owner = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.client.force_authenticate(owner)
+
+        response = self.client.patch(
+            f'/api/owner/{owner.pk}/',
+            {'password': 'password2'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(
+            self.login('user1', 'password1').status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(
+            self.login('user1', 'password2').status_code,
+            status.HTTP_200_OK
+        )
+
+    def test_iterations_setting(self):
+        """
+        Testa se a quantidade de iterações configurada é usada e se um hash
+        com outra quantidade é refeito no login.
+        """
+
+        encoded = hash_password('password1')
+        self.assertTrue(encoded.startswith('pbkdf2_sha256$1000$'))
+
+        User.objects.create(username='user1', password=encoded)
+
+        with self.settings(PASSWORD_HASHING={'ITERATIONS': 2000}):
+            self.assertEqual(get_hasher().iterations, 2000)
+
+            response = self.login('user1', 'password1')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            owner = User.objects.get(username='user1')
+            self.assertTrue(owner.password.startswith('pbkdf2_sha256$2000$'))
+
+        self.assertEqual(get_hasher().iterations, 1000)
+
+    async def test_async_register_and_login(self):
+        """
+        Testa o cadastro e o login pelas views assíncronas.
+        """
+
+        response = await self.async_client.post(
+            '/api/async/owners/',
+            OWNER,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('password', response.json())
+
+        owner = await User.objects.aget(username='user1')
+        self.assertTrue(await acheck_password(owner, 'password1'))
+
+        response = await self.async_client.post(
+            '/api/async/token/',
+            {'username': 'user1', 'password': 'password1'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        access = AccessToken(response.json()['access'])
+        self.assertEqual(access['user_id'], owner.pk)
+        self.assertIn('auth_version', access)
+
+        response = await self.async_client.post(
+            '/api/async/owners/',
+            OWNER,
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('username', response.json())
+
+    async def test_async_login_failures(self):
+        """
+        Testa se o login assíncrono recusa senhas incorretas, titulares
+        inexistentes ou inativos e solicitações sem as credenciais.
+        """
+
+        await User.objects.acreate(
+            username='user1',
+            password=await ahash_password('password1')
+        )
+        await User.objects.acreate(
+            username='user2',
+            password=await ahash_password('password2'),
+            is_active=False
+        )
+
+        for username, password in (
+            ('user1', 'wrong'),
+            ('nobody', 'password1'),
+            ('user2', 'password2'),
+        ):
+            response = await self.async_client.post(
+                '/api/async/token/',
+                {'username': username, 'password': password},
+                content_type='application/json'
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_401_UNAUTHORIZED
+            )
+
+        response = await self.async_client.post(
+            '/api/async/token/',
+            {'username': 'user1'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json())
+
+        response = await self.async_client.post(
+            '/api/async/token/',
+            'not json',
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_process_executor(self):
+        """
+        Testa o cálculo do hash em um pool de processos.
+        """
+
+        with self.settings(
+            PASSWORD_HASHING={
+                'ITERATIONS': 1000,
+                'EXECUTOR': 'process',
+                'WORKERS': 1,
+            }
+        ):
+            executor = passwords.get_executor()
+            try:
+                encoded = await ahash_password('password1')
+                user = User(username='user1', password=encoded)
+                self.assertTrue(await acheck_password(user, 'password1'))
+                self.assertFalse(await acheck_password(user, 'wrong'))
+            finally:
+                passwords._executors.pop(('process', 1), None)
+                executor.shutdown()
@@ -0,0 +1,176 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from finances.models import RevokedToken
+from finances.revocation import BloomFilter, store
+
+
+class RevocationTest(TestCase):
+    """
+    Testes para a revogação dos tokens de atualização.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular e
+        obtém os seus tokens por `/api/token/`.
+        """
+
+        store.reset()
+
+        User.objects.create_user(username='user1', password='password1')
+        self.client = APIClient()
+
+        response = self.client.post(
+            '/api/token/',
+            {'username': 'user1', 'password': 'password1'}
+        )
+        self.refresh = response.data['refresh']
+
+    def post(self, path, data):
+        return self.client.post(path, data, format='json')
+
+    def test_rotation_revokes_used_token(self):
+        """
+        Testa se a troca de um token de atualização retorna um token novo e
+        revoga o usado.
+        """
+
+        response = self.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        self.assertTrue(RevokedToken.objects.filter(
+            jti=RefreshToken(self.refresh)['jti']
+        ).exists())
+
+        reused = self.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(reused.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        rotated = self.post(
+            '/api/token/refresh/',
+            {'refresh': response.data['refresh']}
+        )
+        self.assertEqual(rotated.status_code, status.HTTP_200_OK)
+
+    def test_verify_revoked_token(self):
+        """
+        Testa se `/api/token/verify/` recusa um token revogado.
+        """
+
+        response = self.post('/api/token/verify/', {'token': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.post('/api/token/refresh/', {'refresh': self.refresh})
+
+        response = self.post('/api/token/verify/', {'token': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_not_revoked_needs_no_query(self):
+        """
+        Testa se, após a criação do filtro, verificar um token não revogado
+        não consulta o banco.
+        """
+
+        self.post('/api/token/verify/', {'token': self.refresh})
+
+        with self.assertNumQueries(0):
+            response = self.post(
+                '/api/token/verify/',
+                {'token': self.refresh}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revocation_from_other_process(self):
+        """
+        Testa se as revogações gravadas por outro processo entram no filtro
+        após `SYNC_SECONDS`.
+        """
+
+        jti = RefreshToken(self.refresh)['jti']
+        self.assertFalse(store.is_revoked(jti))
+
+        RevokedToken.objects.create(
+            jti=jti,
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        self.assertFalse(store.is_revoked(jti))
+
+        with mock.patch('time.monotonic', return_value=10 ** 9):
+            self.assertTrue(store.is_revoked(jti))
+
+    def test_filter_grows(self):
+        """
+        Testa se o filtro é recriado com uma capacidade maior quando fica
+        cheio, sem perder os tokens revogados.
+        """
+
+        expires = timezone.now() + timedelta(days=1)
+
+        with self.settings(TOKEN_REVOCATION={'CAPACITY': 4}):
+            store.reset()
+            for number in range(6):
+                store.revoke(f'jti-{number}', expires.timestamp())
+
+            self.assertGreaterEqual(store.filter.capacity, 8)
+            self.assertTrue(all(
+                store.is_revoked(f'jti-{number}') for number in range(6)
+            ))
+            self.assertFalse(store.is_revoked('jti-other'))
+
+    def test_purge_expired_tokens(self):
+        """
+        Testa se o comando `purge_revoked_tokens` remove apenas os tokens
+        expirados.
+        """
+
+        RevokedToken.objects.create(
+            jti='expired',
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        RevokedToken.objects.create(
+            jti='valid',
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+
+        call_command('purge_revoked_tokens', stdout=mock.Mock())
+
+        self.assertEqual(
+            list(RevokedToken.objects.values_list('jti', flat=True)),
+            ['valid']
+        )
+
+
+class BloomFilterTest(SimpleTestCase):
+    """
+    Testes para o filtro de Bloom.
+    """
+
+    def test_membership(self):
+        """
+        Testa se os itens adicionados são encontrados e se a taxa de falsos
+        positivos fica próxima da configurada.
+        """
+
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for number in range(1000):
+            bloom.add(f'added-{number}')
+
+        self.assertTrue(all(
+            f'added-{number}' in bloom for number in range(1000)
+        ))
+
+        false_positives = sum(
+            f'other-{number}' in bloom for number in range(10000)
+        )
+        self.assertLess(false_positives, 300)
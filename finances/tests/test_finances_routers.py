@@ -0,0 +1,151 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from finances.models import Category
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=60)
+class ReplicaRouterTest(TransactionTestCase):
+    """
+    Testes para o roteamento de leituras para a réplica.
+
+    O banco de teste faz o papel do banco principal, e um segundo arquivo
+    SQLite, sem replicação, faz o papel da réplica. Assim, os dados lidos
+    mostram de qual banco a leitura veio.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele registra o alias
+        `replica` apontando para um arquivo SQLite temporário, aplica as
+        migrações nele e cria o mesmo usuário nos dois bancos, com uma
+        categoria de nome diferente em cada um.
+        """
+
+        directory = tempfile.mkdtemp()
+        self.replica_path = os.path.join(directory, 'replica.sqlite3')
+
+        connections.settings['replica'] = {
+            **connections.settings['default'],
+            'NAME': self.replica_path,
+            'TEST': {'MIRROR': None},
+        }
+        call_command('migrate', database='replica', verbosity=0)
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.user.save(using='replica')
+
+        Category.objects.create(pk=1, name='Principal')
+        Category.objects.using('replica').create(pk=1, name='Réplica')
+
+        cache.clear()
+
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def tearDown(self):
+        """
+        Remove o alias `replica` e o arquivo temporário.
+        """
+
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        os.remove(self.replica_path)
+        cache.clear()
+
+    def category_names(self):
+        response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [category['name'] for category in response.data]
+
+    def test_reads_go_to_replica(self):
+        """
+        Testa se as leituras das views vão para a réplica.
+        """
+
+        self.assertEqual(self.category_names(), ['Réplica'])
+
+    def test_reads_outside_requests_go_to_primary(self):
+        """
+        Testa se as leituras fora das solicitações usam o banco principal.
+        """
+
+        self.assertEqual(Category.objects.get(pk=1).name, 'Principal')
+
+    def test_writes_go_to_primary(self):
+        """
+        Testa se as escritas vão para o banco principal.
+        """
+
+        response = self.client.post('/api/categories/', {'name': 'Mercado'})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Category.objects.filter(name='Mercado').exists())
+        self.assertFalse(
+            Category.objects.using('replica').filter(name='Mercado').exists()
+        )
+
+    def test_read_your_writes(self):
+        """
+        Testa se, após uma escrita, as leituras do usuário vão para o banco
+        principal durante a janela configurada.
+        """
+
+        self.client.post('/api/categories/', {'name': 'Mercado'})
+
+        self.assertEqual(self.category_names(), ['Principal', 'Mercado'])
+
+        other = User.objects.create_user(username='user2', password='pw')
+        other.save(using='replica')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}'
+        )
+
+        self.assertEqual(self.category_names(), ['Réplica'])
+
+    def test_pin_expires(self):
+        """
+        Testa se as leituras voltam para a réplica quando a janela expira.
+        """
+
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            self.client.post('/api/categories/', {'name': 'Mercado'})
+
+        self.assertEqual(self.category_names(), ['Réplica'])
+
+    def test_session_cookie(self):
+        """
+        Testa se uma solicitação com o cookie de sessão é atendida: o usuário
+        da sessão é carregado sob demanda, e a sua leitura não pode depender
+        dele mesmo para escolher o banco.
+        """
+
+        admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword'
+        )
+        admin.save(using='replica')
+
+        client = APIClient()
+        client.force_login(admin)
+
+        response = client.get('/admin/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.context['user'], admin)
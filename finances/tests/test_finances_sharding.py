@@ -0,0 +1,297 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from finances.models import Account, Category, OwnerShard, Transaction
+from finances.routers import hash_shard, owner_shard, shard_for_owner
+from finances.sharding import SHARD_ID_SPAN
+
+SHARDS = ['shard1', 'shard2', 'shard3']
+
+
+@override_settings(DATABASE_SHARDS=SHARDS)
+class ShardRouterTest(TransactionTestCase):
+    """
+    Testes para o particionamento dos dados por titular.
+
+    Cada shard é um arquivo SQLite temporário. O banco de teste faz o papel
+    do banco principal, que guarda os usuários, as categorias e o diretório
+    de shards.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele registra os shards,
+        aplica as migrações em cada um e cria dois titulares em shards
+        diferentes, um administrador e uma categoria.
+        """
+
+        self.directory = tempfile.mkdtemp()
+
+        for alias in SHARDS:
+            connections.settings[alias] = {
+                **connections.settings['default'],
+                'NAME': os.path.join(self.directory, f'{alias}.sqlite3'),
+                'TEST': {'MIRROR': None},
+            }
+            call_command('migrate', database=alias, verbosity=0)
+
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            password='adminpassword',
+            email='admin@example.com'
+        )
+
+        self.users = []
+        number = 0
+        while len({shard_for_owner(user.pk) for user in self.users}) < 2:
+            number += 1
+            user = User.objects.create_user(
+                username=f'user{number}',
+                password='password'
+            )
+            if shard_for_owner(user.pk) not in {
+                shard_for_owner(other.pk) for other in self.users
+            }:
+                self.users.append(user)
+
+        self.category = Category.objects.create(name='Mercado')
+
+        self.accounts = [
+            Account.objects.create(owner=user, name='Conta', balance=1000)
+            for user in self.users
+        ]
+
+    def tearDown(self):
+        """
+        Remove os shards e os arquivos temporários.
+        """
+
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+        shutil.rmtree(self.directory)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return client
+
+    def test_stable_hash(self):
+        """
+        Testa se o shard escolhido por hash é estável e se todos os shards
+        recebem titulares.
+        """
+
+        chosen = [hash_shard(owner_id, SHARDS) for owner_id in range(300)]
+
+        self.assertEqual(
+            chosen, [hash_shard(owner_id, SHARDS) for owner_id in range(300)]
+        )
+        self.assertEqual(set(chosen), set(SHARDS))
+
+    def test_accounts_live_on_owner_shard(self):
+        """
+        Testa se cada conta é gravada apenas no shard do titular, com IDs na
+        faixa reservada para o shard.
+        """
+
+        for user, account in zip(self.users, self.accounts):
+            alias = shard_for_owner(user.pk)
+            self.assertEqual(account._state.db, alias)
+
+            position = SHARDS.index(alias) + 1
+            self.assertGreaterEqual(account.pk, position * SHARD_ID_SPAN)
+
+            for other in SHARDS + ['default']:
+                accounts = Account.objects.using(other).filter(pk=account.pk)
+                self.assertEqual(accounts.exists(), other == alias)
+
+    def test_reference_data_replicated(self):
+        """
+        Testa se usuários e categorias são copiados para todos os shards.
+        """
+
+        for alias in SHARDS:
+            self.assertTrue(
+                Category.objects.using(alias).filter(
+                    pk=self.category.pk, name='Mercado'
+                ).exists()
+            )
+            self.assertEqual(
+                User.objects.using(alias).count(), User.objects.count()
+            )
+
+    def test_views_resolve_shard_from_user(self):
+        """
+        Testa se as views usam o shard do usuário autenticado.
+        """
+
+        user, account = self.users[0], self.accounts[0]
+        client = self.client_for(user)
+
+        response = client.post('/api/transactions/', {
+            'amount': '100.00',
+            'description': 'Compra',
+            'account': account.pk,
+            'category': self.category.pk,
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        alias = shard_for_owner(user.pk)
+        transaction = Transaction.objects.using(alias).get()
+        self.assertEqual(transaction.pk, response.data['id'])
+        self.assertEqual(
+            Account.objects.using(alias).get(pk=account.pk).balance, 900
+        )
+
+        response = client.get(f'/api/account/{account.pk}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['transactions']), 1)
+
+        response = self.client_for(self.users[1]).get(
+            f'/api/account/{account.pk}/'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_parallel_batch_uses_owner_shard(self):
+        """
+        Testa se as leituras de um lote executadas ao mesmo tempo, nas
+        threads do lote, também usam o shard do usuário autenticado.
+        """
+
+        account = self.accounts[0]
+        reads = [
+            {'method': 'GET', 'path': f'/api/account/{account.pk}/'},
+            {'method': 'GET', 'path': f'/api/account/{account.pk}/balance/'},
+        ]
+
+        for parallel in (False, True):
+            response = self.client_for(self.users[0]).post(
+                '/api/batch/',
+                {'requests': reads, 'parallel': parallel},
+                format='json'
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                [item['status'] for item in response.data['responses']],
+                [status.HTTP_200_OK, status.HTTP_200_OK]
+            )
+            self.assertEqual(
+                response.data['responses'][1]['body']['balance'],
+                '1000.00'
+            )
+
+    def test_admin_list_spans_shards(self):
+        """
+        Testa se a listagem dos administradores reúne todos os shards.
+        """
+
+        response = self.client_for(self.admin).get('/api/accounts/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(account['id'] for account in response.data),
+            sorted(account.pk for account in self.accounts)
+        )
+
+    def test_rebalance_command(self):
+        """
+        Testa se o comando move os dados de um titular para outro shard,
+        mantendo os IDs, e se as views passam a usar o novo shard.
+        """
+
+        user, account = self.users[0], self.accounts[0]
+        source = shard_for_owner(user.pk)
+        target = next(alias for alias in SHARDS if alias != source)
+
+        with owner_shard(user.pk):
+            Transaction.objects.create(
+                account=account,
+                category=self.category,
+                amount=50,
+                description='Compra'
+            )
+
+        out = StringIO()
+        call_command(
+            'rebalance_shards',
+            '--owner', str(user.pk),
+            '--to', target,
+            stdout=out
+        )
+
+        self.assertIn(f'movido de {source} para {target}', out.getvalue())
+        self.assertEqual(OwnerShard.objects.get(owner=user).alias, target)
+        self.assertEqual(shard_for_owner(user.pk), target)
+        self.assertFalse(Account.objects.using(source).exists())
+        self.assertEqual(
+            Transaction.objects.using(target).get().account_id, account.pk
+        )
+
+        response = self.client_for(user).get(f'/api/account/{account.pk}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['transactions']), 1)
+
+    @override_settings(CHANGE_FEED_SETTLE_SECONDS=0)
+    def test_rebalance_keeps_change_feed(self):
+        """
+        Testa se mover um titular registra suas contas e transações como
+        alteradas, e não como excluídas, no registro de alterações.
+        """
+
+        user, account = self.users[0], self.accounts[0]
+        source = shard_for_owner(user.pk)
+        target = next(alias for alias in SHARDS if alias != source)
+
+        with owner_shard(user.pk):
+            transaction = Transaction.objects.create(
+                account=account,
+                category=self.category,
+                amount=50,
+                description='Compra'
+            )
+
+        client = self.client_for(user)
+        cursor = client.get('/api/changes/?since=0').data['next']
+
+        call_command(
+            'rebalance_shards',
+            '--owner', str(user.pk),
+            '--to', target,
+            stdout=StringIO()
+        )
+
+        response = client.get('/api/changes/?since=0')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changes = {
+            (change['model'], change['id']): change
+            for change in response.data['changes']
+        }
+        for key in (
+            ('account', account.pk),
+            ('transaction', transaction.pk),
+        ):
+            self.assertFalse(changes[key]['deleted'])
+            self.assertEqual(changes[key]['data']['id'], key[1])
+            self.assertGreater(changes[key]['cursor'], cursor)
@@ -0,0 +1,303 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from finances.aggregates import reset_stats, stats
+from finances.models import Account, Category, Transaction
+from finances.singleflight import LOCK_KEY, RESULT_KEY, single_flight
+from finances.views import AccountAPIDetail
+
+
+class SlowCompute:
+    """
+    Cálculo lento que conta as suas execuções.
+    """
+
+    def __init__(self, value='result', seconds=0.2):
+        self.value = value
+        self.seconds = seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.seconds)
+        return self.value
+
+
+def run_concurrently(func, count=8):
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(lambda _: func(), range(count)))
+
+
+class SingleFlightTest(SimpleTestCase):
+    """
+    Testes para o agrupamento de leituras simultâneas.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_calls_share_one_computation(self):
+        """
+        Testa se as chamadas simultâneas com a mesma chave executam o
+        cálculo uma única vez e recebem o mesmo resultado.
+        """
+
+        compute = SlowCompute()
+
+        results = run_concurrently(lambda: single_flight('key', compute))
+
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual({value for value, _ in results}, {'result'})
+        self.assertEqual(
+            sorted(shared for _, shared in results),
+            [False] + [True] * 7
+        )
+        self.assertIsNone(cache.get(LOCK_KEY.format(key='key')))
+
+    def test_later_calls_compute_again(self):
+        """
+        Testa se uma chamada posterior ao término do cálculo calcula um
+        resultado novo.
+        """
+
+        compute = SlowCompute(seconds=0)
+
+        single_flight('key', compute)
+        single_flight('key', compute)
+
+        self.assertEqual(compute.calls, 2)
+
+    def test_waits_for_other_process(self):
+        """
+        Testa se, com a trava do cache de outro processo, a chamada aguarda e
+        reutiliza o resultado publicado por ele.
+        """
+
+        compute = SlowCompute(seconds=0)
+        cache.add(LOCK_KEY.format(key='key'), 'other', 10)
+
+        def finish():
+            time.sleep(0.1)
+            cache.set(RESULT_KEY.format(key='key', token='other'), 'shared')
+            cache.delete(LOCK_KEY.format(key='key'))
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        result = single_flight('key', compute)
+        thread.join()
+
+        self.assertEqual(result, ('shared', True))
+        self.assertEqual(compute.calls, 0)
+
+    def test_released_without_result(self):
+        """
+        Testa se a chamada calcula o resultado quando a trava de outro
+        processo é liberada sem um resultado.
+        """
+
+        compute = SlowCompute(seconds=0)
+        cache.add(LOCK_KEY.format(key='key'), 'other', 10)
+
+        timer = threading.Timer(
+            0.1,
+            lambda: cache.delete(LOCK_KEY.format(key='key'))
+        )
+        timer.start()
+        result = single_flight('key', compute)
+        timer.join()
+
+        self.assertEqual(result, ('result', False))
+        self.assertEqual(compute.calls, 1)
+
+    def test_wait_limit(self):
+        """
+        Testa se a chamada calcula o resultado quando a espera passa de
+        `WAIT_SECONDS`.
+        """
+
+        compute = SlowCompute(seconds=0)
+        cache.add(LOCK_KEY.format(key='key'), 'other', 10)
+
+        with self.settings(SINGLE_FLIGHT={'WAIT_SECONDS': 0.1}):
+            result = single_flight('key', compute)
+
+        self.assertEqual(result, ('result', False))
+
+    def test_leader_failure(self):
+        """
+        Testa se a falha da líder libera a trava e se as demais chamadas
+        calculam o resultado por conta própria.
+        """
+
+        attempts = []
+
+        def compute():
+            attempts.append(1)
+            if len(attempts) == 1:
+                time.sleep(0.1)
+                raise RuntimeError
+            return 'result'
+
+        def call():
+            try:
+                return single_flight('key', compute)[0]
+            except RuntimeError:
+                return 'error'
+
+        results = run_concurrently(call, count=3)
+
+        self.assertEqual(sorted(results), ['error', 'result', 'result'])
+        self.assertIsNone(cache.get(LOCK_KEY.format(key='key')))
+
+
+class SingleFlightTransactionTest(TestCase):
+    """
+    Testes para o agrupamento dentro de uma transação aberta.
+    """
+
+    def test_not_shared_in_transaction(self):
+        """
+        Testa se, dentro de uma transação, o resultado é calculado sem
+        trava e sem ser publicado no cache.
+        """
+
+        compute = SlowCompute(seconds=0)
+
+        self.assertEqual(single_flight('key', compute), ('result', False))
+        self.assertIsNone(cache.get(LOCK_KEY.format(key='key')))
+        self.assertEqual(compute.calls, 1)
+
+
+class SingleFlightViewTest(TransactionTestCase):
+    """
+    Testes para o agrupamento das leituras simultâneas dos endpoints.
+    """
+
+    def setUp(self):
+        """
+        Configuração inicial para os testes.
+
+        Este método é executado antes de cada teste. Ele cria um titular com
+        uma conta e uma transação.
+        """
+
+        cache.clear()
+        reset_stats()
+
+        self.user = User.objects.create_user(
+            username='user1',
+            password='password1'
+        )
+        self.account = Account.objects.create(
+            owner=self.user,
+            name='Corrente',
+            balance=1000
+        )
+        Transaction.objects.create(
+            account=self.account,
+            category=Category.objects.create(name='Mercado'),
+            amount=100,
+            description='Compra'
+        )
+
+    def get(self, path):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            return client.get(path)
+        finally:
+            connections.close_all()
+
+    def test_account_detail(self):
+        """
+        Testa se as solicitações simultâneas do detalhe de uma conta
+        compartilham uma única consulta das relações.
+        """
+
+        get_detail = AccountAPIDetail.get_detail
+        calls = []
+
+        def slow_detail(view, account, expand):
+            calls.append(1)
+            time.sleep(0.2)
+            return get_detail(view, account, expand)
+
+        with mock.patch.object(AccountAPIDetail, 'get_detail', slow_detail):
+            responses = run_concurrently(
+                lambda: self.get(f'/api/account/{self.account.pk}/')
+            )
+
+        self.assertEqual(len(calls), 1)
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['transactions']), 1)
+            self.assertEqual(response.data['owner']['username'], 'user1')
+
+    def test_account_detail_after_write(self):
+        """
+        Testa se uma solicitação feita após uma alteração da conta não
+        reutiliza as relações lidas antes dela.
+        """
+
+        get_detail = AccountAPIDetail.get_detail
+        calls = []
+
+        def slow_detail(view, account, expand):
+            calls.append(account.version)
+            data = get_detail(view, account, expand)
+            time.sleep(0.3)
+            return data
+
+        with mock.patch.object(AccountAPIDetail, 'get_detail', slow_detail):
+            with ThreadPoolExecutor(1) as executor:
+                before = executor.submit(
+                    self.get, f'/api/account/{self.account.pk}/'
+                )
+                time.sleep(0.1)
+
+                client = APIClient()
+                client.force_authenticate(user=self.user)
+                response = client.post('/api/transactions/', {
+                    'amount': '50.00',
+                    'description': 'Outra compra',
+                    'account': self.account.pk,
+                    'category': Category.objects.get().pk,
+                })
+                self.assertEqual(
+                    response.status_code,
+                    status.HTTP_201_CREATED
+                )
+
+                after = self.get(f'/api/account/{self.account.pk}/')
+                before = before.result()
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(before.data['transactions']), 1)
+        self.assertEqual(len(after.data['transactions']), 2)
+        self.assertNotEqual(before['ETag'], after['ETag'])
+
+    def test_aggregate(self):
+        """
+        Testa se as solicitações simultâneas de uma agregação fora do cache
+        a calculam uma única vez.
+        """
+
+        responses = run_concurrently(
+            lambda: self.get('/api/aggregates/net-worth/')
+        )
+
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, {'net_worth': '1000.00'})
+        self.assertEqual(stats()['net-worth']['misses'], 1)
+        self.assertEqual(stats()['net-worth']['hits'], 7)
@@ -1,5 +1,5 @@
 from django.urls import path
-from finances import views
+from finances import async_views, views
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -22,6 +22,20 @@ urlpatterns = [
         name='account_detail'
     ),
 
+    # Endpoint para obter o saldo de uma conta em uma data ('?at=').
+    path(
+        'api/account/<int:pk>/balance/',
+        views.AccountBalanceAPIView.as_view(),
+        name='account_balance'
+    ),
+
+    # Endpoint para obter os saldos diários de uma conta em um intervalo.
+    path(
+        'api/account/<int:pk>/balance/history/',
+        views.AccountBalanceHistoryAPIView.as_view(),
+        name='account_balance_history'
+    ),
+
     # Endpoint para listar todos os titulares de contas financeiras.
     path(
         'api/owners/',
@@ -78,6 +92,99 @@ urlpatterns = [
         name='budget_detail'
     ),
 
+    # Endpoint para listar as alterações posteriores a um cursor ('?since=').
+    path(
+        'api/changes/',
+        views.ChangeAPIList.as_view(),
+        name='changes_list'
+    ),
+
+    # Endpoint do painel inicial do titular.
+    path(
+        'api/dashboard/',
+        views.DashboardAPIView.as_view(),
+        name='dashboard'
+    ),
+
+    # Endpoint para obter as estatísticas do cache de agregações.
+    path(
+        'api/aggregates/stats/',
+        views.AggregateStatsAPIView.as_view(),
+        name='aggregate_stats'
+    ),
+
+    # Endpoint para obter uma agregação do titular autenticado.
+    path(
+        'api/aggregates/<str:name>/',
+        views.AggregateAPIView.as_view(),
+        name='aggregate_detail'
+    ),
+
+    # Endpoint para executar várias operações em uma única solicitação.
+    path(
+        'api/batch/',
+        views.BatchAPIView.as_view(),
+        name='batch'
+    ),
+
+    # Versões assíncronas (ASGI) dos endpoints de leitura.
+    path(
+        'api/async/accounts/',
+        async_views.AccountAsyncList.as_view(),
+        name='async_accounts_list'
+    ),
+
+    path(
+        'api/async/account/<int:pk>/',
+        async_views.AccountAsyncDetail.as_view(),
+        name='async_account_detail'
+    ),
+
+    path(
+        'api/async/categories/',
+        async_views.CategoryAsyncList.as_view(),
+        name='async_categories_list'
+    ),
+
+    path(
+        'api/async/transactions/',
+        async_views.TransactionAsyncList.as_view(),
+        name='async_transactions_list'
+    ),
+
+    path(
+        'api/async/budgets/',
+        async_views.BudgetAsyncList.as_view(),
+        name='async_budgets_list'
+    ),
+
+    path(
+        'api/async/budget/<int:pk>/',
+        async_views.BudgetAsyncDetail.as_view(),
+        name='async_budget_detail'
+    ),
+
+    # Versões assíncronas do cadastro de titulares e do login, com o hash das
+    # senhas calculado em um pool.
+    path(
+        'api/async/owners/',
+        async_views.OwnerAsyncCreate.as_view(),
+        name='async_owners_create'
+    ),
+
+    path(
+        'api/async/token/',
+        async_views.TokenAsyncObtain.as_view(),
+        name='async_token_obtain_pair'
+    ),
+
+    # Fluxo Server-Sent Events dos alertas de orçamento do titular.
+    path(
+        'api/alerts/stream/',
+        async_views.BudgetAlertStream.as_view(),
+        name='budget_alerts_stream'
+    ),
+
     # Endpoint para obter o token de acesso (login).
     path(
         'api/token/',
@@ -9,11 +9,42 @@ from finances.serializers import (
 )
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.db.transaction import atomic
 from rest_framework.views import APIView
 from django.contrib.auth.models import User
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from . permissions import IsOwner
+from finances.idempotency import idempotent
+from finances.database import retry_on_lock
+from finances.sharding import across_shards
+from finances.routers import get_shards
+from finances.partitions import date_range_param, transactions_between
+from finances.archive import find_archived
+from finances.batch import parse_operations, run_batch
+from finances.changes import changes_since, cursor_params, record_change
+from finances.aggregates import (
+    AGGREGATES,
+    get_aggregate,
+    invalidate,
+    stats as aggregate_stats
+)
+from finances.outbox import enqueue
+from finances.singleflight import single_flight
+from finances.concurrency import etag_for
+from finances.dashboard import get_dashboard, period_param
+from finances.ledger import (
+    at_param,
+    balance_at,
+    daily_balances,
+    history_params
+)
+from finances.fieldsets import (
+    get_fieldset,
+    parse_list_param,
+    restrict_queryset
+)
 
 
 class AccountAPIList(APIView):
@@ -21,7 +52,7 @@ class AccountAPIList(APIView):
     Representação da API para gerenciar contas financeiras dos usuários.
 
     Atributos:
-        Nenhum atributo específico nesta classe.
+        gzip_response: Habilita a compressão gzip das listagens.
 
     Métodos:
         get_permissions: Retorna as permissões apropriadas com base no método
@@ -33,6 +64,8 @@ class AccountAPIList(APIView):
         /api/accounts/
     """
 
+    gzip_response = True
+
     permission_classes = [IsAdminUser, ]
 
     def get_permissions(self):
@@ -90,9 +123,9 @@ class AccountAPIList(APIView):
             JSON.
         """
 
-        accounts = Account.objects.all()
+        accounts = across_shards(Account.objects.all())
 
-        if not accounts.exists():
+        if not accounts:
             return Response({'message': 'There are no registered accounts.'})
 
         serializer = AccountSerializer(
@@ -148,13 +181,15 @@ class AccountAPIDetail(APIView):
     conta financeira específica do usuário.
 
     Atributos:
-        Nenhum atributo específico nesta classe.
+        expandable_fields: As relações que podem ser incluídas na resposta do
+        método GET através do parâmetro `?expand=`.
 
     Métodos:
         get_account: Obtém uma conta financeira específica com base no ID.
         get_permissions: Retorna as permissões apropriadas com base no método
         da solicitação.
         get: Retorna detalhes de uma conta financeira específica.
+        get_detail: Consulta as relações incluídas na resposta do método GET.
         patch_balance: Atualiza valor monetário de uma conta financeira
         específica.
         delete: Exclui uma conta financeira específica.
@@ -163,6 +198,8 @@ class AccountAPIDetail(APIView):
         /api/account/<pk>/
     """
 
+    expandable_fields = ('owner', 'transactions', 'budgets')
+
     def get_account(self, pk):
         """
         Método auxiliar para obter uma conta financeira com base no ID.
@@ -186,7 +223,8 @@ class AccountAPIDetail(APIView):
             pk=pk
         )
 
-        if account.owner != self.request.user:
+        if account.owner_id is None or \
+                account.owner_id != self.request.user.pk:
             raise PermissionDenied(
                 'Você não tem permissão para executar essa ação.'
             )
@@ -215,36 +253,93 @@ class AccountAPIDetail(APIView):
         """
         Método HTTP GET para obter detalhes de uma conta financeira específica.
 
+        Por padrão, o titular, as transações e os orçamentos da conta são
+        incluídos na resposta. O parâmetro `?expand=` restringe a resposta às
+        relações informadas, e apenas essas são consultadas no banco. As
+        solicitações simultâneas da mesma versão da conta compartilham as
+        consultas: uma solicitação feita após uma alteração da conta não
+        recebe as relações lidas antes dela junto com o ETag novo. As
+        alterações que não mudam a versão da conta, como as dos orçamentos,
+        ainda podem ser vistas com o atraso de uma consulta em andamento.
+
         Parâmetros:
             request: O objeto de solicitação HTTP.
             pk: O ID da conta a ser obtida.
 
+        Exemplo de Uso:
+            GET /api/account/1/?expand=owner,budgets
+
         Retorna:
             Response: Uma resposta HTTP contendo os detalhes da conta em
             formato JSON.
         """
 
+        expand = parse_list_param(request, 'expand')
+        if expand is None:
+            expand = self.expandable_fields
+
+        unknown = ', '.join(sorted(set(expand) - set(self.expandable_fields)))
+        if unknown:
+            raise ValidationError(
+                {'expand': [f'Unknown relation(s): {unknown}.']}
+            )
+
         account = self.get_account(pk)
 
-        owner_serializer = OwnerSerializer(account.owner)
+        data, _ = single_flight(
+            f'account:{account.pk}:{account.version}:'
+            f'{",".join(sorted(set(expand)))}',
+            lambda: self.get_detail(account, expand)
+        )
 
-        transactions = account.transaction_set.all()
-        transaction_serializer = TransactionSerializer(transactions, many=True)
+        return Response(data, headers={'ETag': etag_for(account)})
 
-        budgets = account.budget_set.all()
-        budget_serializer = BudgetSerializer(budgets, many=True)
+    def get_detail(self, account, expand):
+        """
+        Método auxiliar para consultar as relações de uma conta financeira
+        incluídas na resposta do método GET.
 
-        return Response({
-            'owner': owner_serializer.data,
-            'transactions': transaction_serializer.data,
-            'budgets': budget_serializer.data
-        })
+        As solicitações simultâneas da mesma versão da conta e das mesmas
+        relações compartilham uma única consulta (veja
+        `finances.singleflight`).
+
+        Parâmetros:
+            account: A conta financeira.
+            expand: As relações a serem incluídas.
+
+        Retorna:
+            dict: As relações da conta, serializadas.
+        """
+
+        data = {}
+
+        if 'owner' in expand:
+            data['owner'] = OwnerSerializer(account.owner).data
+
+        if 'transactions' in expand:
+            data['transactions'] = TransactionSerializer(
+                account.transaction_set.all(),
+                many=True
+            ).data
+
+        if 'budgets' in expand:
+            data['budgets'] = BudgetSerializer(
+                account.budget_set.all(),
+                many=True
+            ).data
+
+        return data
 
     def patch(self, request, pk):
         """
         Método HTTP PATCH para atualizar os dados de uma conta financeira
         específica.
 
+        A atualização é condicional à versão da conta. Se o cabeçalho
+        `If-Match` for enviado com o ETag obtido no GET, e a conta tiver sido
+        alterada desde então, a resposta terá o status 412 Precondition
+        Failed.
+
         Parâmetros:
             request: O objeto de solicitação contendo os dados a serem
             atualizados.
@@ -269,7 +364,7 @@ class AccountAPIDetail(APIView):
 
         serializer.save()
 
-        return Response(serializer.data)
+        return Response(serializer.data, headers={'ETag': etag_for(account)})
 
     def delete(self, request, pk):
         """
@@ -291,12 +386,121 @@ class AccountAPIDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class AccountBalanceAPIView(AccountAPIDetail):
+    """
+    Representação da API que retorna o saldo de uma conta financeira em uma
+    data, calculado pelo livro-razão da conta (veja `finances.ledger`).
+
+    Métodos:
+        get: Retorna o saldo da conta na data informada.
+
+    Endpoint Base:
+        /api/account/<pk>/balance/
+    """
+
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, pk):
+        """
+        Método HTTP GET para obter o saldo de uma conta financeira em uma
+        data.
+
+        O parâmetro `?at=` aceita uma data (AAAA-MM-DD), que corresponde ao
+        fim do dia, ou uma data e hora ISO 8601. Sem o parâmetro, retorna o
+        saldo atual. O saldo é o do último registro de saldo anterior à data
+        somado a, no máximo, `LEDGER_SNAPSHOT_INTERVAL` lançamentos.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+            pk: O ID da conta.
+
+        Exemplo de Uso:
+            GET /api/account/1/balance/?at=2024-03-31
+
+        Retorna:
+            Response: Uma resposta HTTP com o ID da conta, a data e o saldo
+            (null se a conta ainda não existia na data) em formato JSON.
+        """
+
+        at = at_param(request)
+        account = self.get_account(pk)
+        balance = balance_at(account, at)
+
+        return Response({
+            'account': account.pk,
+            'at': at.isoformat() if at else None,
+            'balance': f'{balance:.2f}' if balance is not None else None,
+        })
+
+
+class AccountBalanceHistoryAPIView(AccountAPIDetail):
+    """
+    Representação da API que retorna a série de saldos diários de uma conta
+    financeira em um intervalo, para gráficos de evolução do saldo.
+
+    Atributos:
+        gzip_response: Habilita a compressão gzip da série.
+
+    Métodos:
+        get: Retorna o saldo da conta no fim de cada dia do intervalo.
+
+    Endpoint Base:
+        /api/account/<pk>/balance/history/
+    """
+
+    gzip_response = True
+
+    http_method_names = ['get', 'head', 'options']
+
+    def get(self, request, pk):
+        """
+        Método HTTP GET para obter o saldo de uma conta no fim de cada dia de
+        um intervalo.
+
+        Os parâmetros `?start=` e `?end=` (AAAA-MM-DD, inclusivos) definem o
+        intervalo, por padrão os últimos 30 dias. O parâmetro `?points=`
+        reduz a série a essa quantidade de pontos, mantendo o último dia de
+        cada faixa de dias.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+            pk: O ID da conta.
+
+        Exemplo de Uso:
+            GET /api/account/1/balance/history/?start=2020-01-01&points=60
+
+        Retorna:
+            Response: Uma resposta HTTP com o ID da conta, o intervalo e a
+            lista de saldos (null nos dias anteriores à abertura da conta) em
+            formato JSON.
+        """
+
+        start, end, points = history_params(request)
+        account = self.get_account(pk)
+
+        return Response({
+            'account': account.pk,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'balances': [
+                {
+                    'date': day.isoformat(),
+                    'balance': f'{balance:.2f}'
+                    if balance is not None else None,
+                }
+                for day, balance in daily_balances(
+                    account, start, end, points
+                )
+            ],
+        })
+
+
 class OwnerAPIList(APIView):
     """
     Representação da API para gerar titulares das contas financeiras.
 
     Atributos:
-        Nenhum atributo específico nesta classe.
+        gzip_response: Habilita a compressão gzip das listagens.
 
     Métodos:
         get_permissions: Define as permissões necessárias para cada tipo de
@@ -308,6 +512,8 @@ class OwnerAPIList(APIView):
         /api/owners/
     """
 
+    gzip_response = True
+
     def get_permissions(self):
         """
         Método para definir as permissões necessárias para cada tipo de
@@ -408,7 +614,7 @@ class OwnerAPIList(APIView):
 
         if serializer.is_valid():
 
-            owner = User.objects.create_user(**serializer.validated_data)
+            owner = serializer.save()
 
             return Response(
                 OwnerSerializer(instance=owner).data,
@@ -576,7 +782,7 @@ class CategoryAPIList(APIView):
     Representação da API para gerenciar categorias de gastos.
 
     Atributos:
-        Nenhum atributo específico nesta classe.
+        gzip_response: Habilita a compressão gzip das listagens.
 
     Métodos:
         get: Retorna uma lista de todas as categorias registradas.
@@ -586,6 +792,8 @@ class CategoryAPIList(APIView):
         /api/categories/
     """
 
+    gzip_response = True
+
     permission_classes = [IsAuthenticated, ]
 
     def get(self, request):
@@ -783,10 +991,18 @@ class CategoryAPIDetail(APIView):
         budgets = Budget.objects.filter(category=category)
 
         for transaction in transactions:
-            transaction.delete()
+            with atomic(using=transaction._state.db):
+                enqueue(
+                    transaction._state.db, 'transaction.deleted', transaction
+                )
+                record_change(transaction, deleted=True)
+                invalidate(transaction)
+                transaction.delete()
 
         for budget in budgets:
-            budget.delete()
+            with atomic(using=budget._state.db):
+                enqueue(budget._state.db, 'budget.deleted', budget)
+                budget.delete()
 
         category.delete()
 
@@ -798,7 +1014,7 @@ class TransactionAPIList(APIView):
     Representação da API para gerenciar as transações realizadas pelo titular.
 
     Atributos:
-        Nenhum atributo específico nesta classe.
+        gzip_response: Habilita a compressão gzip das listagens.
 
     Métodos:
         get_permissions: Retorna as permissões apropriadas com base no método
@@ -810,6 +1026,8 @@ class TransactionAPIList(APIView):
         /api/transactions/
     """
 
+    gzip_response = True
+
     permission_classes = [IsAdminUser, ]
 
     def get_permissions(self):
@@ -862,14 +1080,41 @@ class TransactionAPIList(APIView):
                 }
             ]
 
+        Parâmetros de Consulta:
+            fields: Os campos a serem retornados, separados por vírgula.
+            expand: As relações a serem incluídas por completo (account,
+            category).
+            start: A data inicial das transações (AAAA-MM-DD).
+            end: A data final das transações, inclusiva (AAAA-MM-DD). Com
+            `start` ou `end`, a consulta lê apenas as partições mensais do
+            intervalo, inclusive as desanexadas.
+
         Retorna:
             Response: Uma resposta HTTP contendo uma lista de transações em
             formato JSON.
         """
 
-        transactions = Transaction.objects.all()
+        fields, expand = get_fieldset(request, TransactionSerializer)
+        start, end = date_range_param(request)
 
-        if not transactions.exists():
+        queryset = restrict_queryset(
+            Transaction.objects.all(),
+            fields,
+            expand
+        )
+
+        if start is None and end is None:
+            transactions = across_shards(queryset)
+        else:
+            transactions = [
+                instance
+                for alias in get_shards() or [queryset.db]
+                for instance in transactions_between(
+                    start, end, queryset.using(alias)
+                )
+            ]
+
+        if not transactions:
             return Response(
                 {'message': 'There are no registered transactions.'}
             )
@@ -877,16 +1122,22 @@ class TransactionAPIList(APIView):
         serializer = TransactionSerializer(
             instance=transactions,
             many=True,
-            context={'request': request}
+            context={'request': request},
+            fields=fields,
+            expand=expand
         )
 
         return Response(serializer.data)
 
+    @retry_on_lock
+    @idempotent
     def post(self, request):
         """
         Método HTTP POST para criar uma nova transação.
         Envia os dados da nova transação em formato JSON no corpo da
-        solicitação.
+        solicitação. Se o cabeçalho `Idempotency-Key` for enviado, as
+        repetições com a mesma chave recebem a resposta original sem criar uma
+        nova transação.
 
         Parâmetros:
             request: O objeto da solicitação.
@@ -944,13 +1195,15 @@ class TransactionAPIDetail(APIView):
 
     permission_classes = [IsAuthenticated, ]
 
-    def get_transaction(self, pk):
+    def get_transaction(self, pk, queryset=None):
         """
         Método auxilixar para obter uma transação específica com base no ID.
 
         Parâmetros:
             request: O objeto da solicitação HTTP.
             pk: O ID da categoria a ser obtida.
+            queryset: O queryset usado na busca. Por padrão, todas as
+            transações.
 
         Retorna:
             Response: Uma resposta HTTP contendo os detalhes da transação em
@@ -958,7 +1211,7 @@ class TransactionAPIDetail(APIView):
         """
 
         transactions = get_object_or_404(
-            Transaction.objects.all(),
+            queryset if queryset is not None else Transaction.objects.all(),
             pk=pk
         )
 
@@ -987,30 +1240,63 @@ class TransactionAPIDetail(APIView):
     def get(self, request, pk):
         """
         Método HTTP GET para obter detalhes de uma transação específica.
+        Transações arquivadas (`finances.archive`) também são retornadas,
+        apenas para leitura.
 
         Parâmetros:
             request: O objeto da solicitação HTTP.
             pk: O ID da transação a ser obtida.
 
+        Parâmetros de Consulta:
+            fields: Os campos a serem retornados, separados por vírgula.
+            expand: As relações a serem incluídas por completo (account,
+            category).
+
         Retorna:
             Response: Uma resposta HTTP contendo os detalhes da transação em
             formato JSON.
         """
 
-        transaction = self.get_transaction(pk)
+        fields, expand = get_fieldset(request, TransactionSerializer)
+
+        queryset = restrict_queryset(
+            Transaction.objects.all(),
+            fields,
+            expand,
+            required=('account', 'version')
+        )
+
+        try:
+            transaction = self.get_transaction(pk, queryset)
+        except Http404:
+            transaction = find_archived(pk, queryset.db)
+            if transaction is None:
+                raise
+            self.check_object_permissions(request, transaction)
 
         serializer = TransactionSerializer(
             instance=transaction,
             many=False,
-            context={'request': request}
+            context={'request': request},
+            fields=fields,
+            expand=expand
         )
 
-        return Response(serializer.data)
+        return Response(
+            serializer.data,
+            headers={'ETag': etag_for(transaction)}
+        )
 
+    @retry_on_lock
     def put(self, request, pk):
         """
         Método HTTP PATCH para atualizar os dados de uma transação específica.
 
+        A atualização é condicional à versão da transação. Se o cabeçalho
+        `If-Match` for enviado com o ETag obtido no GET, e a transação tiver
+        sido alterada desde então, a resposta terá o status 412 Precondition
+        Failed.
+
         Parâmetros:
             request: O objeto da soicitação HTTP.
             pk: O ID da trasação a ser atualizada.
@@ -1034,8 +1320,12 @@ class TransactionAPIDetail(APIView):
 
         serializer.save()
 
-        return Response(serializer.data)
+        return Response(
+            serializer.data,
+            headers={'ETag': etag_for(transaction)}
+        )
 
+    @retry_on_lock
     def delete(self, request, pk):
         """
         Método HTTP DELETE para excluir uma transação específica.
@@ -1055,15 +1345,199 @@ class TransactionAPIDetail(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         category = transaction.category
+        using = transaction._state.db
+
+        with atomic(using=using):
+            if category and category.budget_set.exists():
+                budget = category.budget_set.first()
+                budget.increment('spent', -transaction.amount)
+                enqueue(
+                    using,
+                    'budget.updated',
+                    budget,
+                    BudgetSerializer(budget).data,
+                    account_id=budget.account_id or transaction.account_id
+                )
+
+            enqueue(using, 'transaction.deleted', transaction)
+            record_change(transaction, deleted=True)
+            invalidate(transaction)
+            transaction.delete()
 
-        if category and category.budget_set.exists():
-            budget = category.budget_set.first()
-            budget.spent -= transaction.amount
-            budget.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        transaction.delete()
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+class ChangeAPIList(APIView):
+    """
+    Representação da API de sincronização incremental, que retorna as
+    contas, transações, orçamentos e categorias alterados ou excluídos após
+    um cursor (veja `finances.changes`).
+
+    Atributos:
+        gzip_response: Habilita a compressão gzip das alterações.
+
+    Métodos:
+        get: Retorna as alterações posteriores ao cursor.
+
+    Endpoint Base:
+        /api/changes/
+    """
+
+    gzip_response = True
+
+    permission_classes = [IsAuthenticated, ]
+
+    def get(self, request):
+        """
+        Método HTTP GET para listar as alterações posteriores a um cursor.
+
+        Na primeira sincronização, o cliente omite `?since=` e recebe todos
+        os seus objetos; nas seguintes, envia o valor de `next` recebido.
+        Enquanto `has_more` for verdadeiro, há mais alterações a buscar. O
+        parâmetro `?limit=` define a quantidade máxima de alterações.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+
+        Exemplo de Uso:
+            GET /api/changes/?since=1520&limit=200
+
+        Retorna:
+            Response: Uma resposta HTTP com as alterações, cada uma com o
+            cursor, o modelo, o ID, se o objeto foi excluído e seus dados
+            atuais, o próximo cursor e se há mais alterações, em formato
+            JSON.
+        """
+
+        since, limit = cursor_params(request)
+        changes, cursor, has_more = changes_since(request.user, since, limit)
+
+        return Response({
+            'changes': changes,
+            'next': cursor,
+            'has_more': has_more,
+        })
+
+
+class DashboardAPIView(APIView):
+    """
+    Representação da API do painel inicial do titular, com as contas, os
+    orçamentos, as transações recentes e os totais por categoria em uma
+    única resposta (veja `finances.dashboard`).
+
+    Atributos:
+        gzip_response: Habilita a compressão gzip do painel.
+
+    Métodos:
+        get: Retorna o painel do titular autenticado.
+
+    Endpoint Base:
+        /api/dashboard/
+    """
+
+    gzip_response = True
+
+    permission_classes = [IsAuthenticated, ]
+
+    def get(self, request):
+        """
+        Método HTTP GET para obter o painel do titular autenticado.
+
+        O parâmetro `?period=` (AAAA-MM) define o mês dos totais por
+        categoria; por padrão, o mês atual.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+
+        Exemplo de Uso:
+            GET /api/dashboard/?period=2024-03
+
+        Retorna:
+            Response: Uma resposta HTTP com o titular, as contas, o
+            patrimônio líquido, os orçamentos, as transações recentes e o
+            total gasto por categoria no mês, em formato JSON.
+        """
+
+        data, _ = get_dashboard(request.user, period_param(request))
+
+        return Response(data)
+
+
+class AggregateAPIView(APIView):
+    """
+    Representação da API das agregações do titular, como o total gasto por
+    categoria e o patrimônio líquido, lidas do cache de agregações (veja
+    `finances.aggregates`).
+
+    Métodos:
+        get: Retorna uma agregação do titular autenticado.
+
+    Endpoint Base:
+        /api/aggregates/<name>/
+    """
+
+    permission_classes = [IsAuthenticated, ]
+
+    def get(self, request, name):
+        """
+        Método HTTP GET para obter uma agregação do titular autenticado.
+
+        O parâmetro `?period=` (AAAA-MM) define o mês das agregações mensais;
+        por padrão, o mês atual.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+            name: O nome da agregação (`category-totals` ou `net-worth`).
+
+        Exemplo de Uso:
+            GET /api/aggregates/category-totals/?period=2024-03
+
+        Retorna:
+            Response: Uma resposta HTTP com a agregação em formato JSON.
+
+        Raises:
+            Http404: Se a agregação não existir.
+        """
+
+        if name not in AGGREGATES:
+            raise Http404
+
+        data, _ = get_aggregate(request.user, name, period_param(request))
+
+        return Response(data)
+
+
+class AggregateStatsAPIView(APIView):
+    """
+    Representação da API das estatísticas do cache de agregações.
+
+    Métodos:
+        get: Retorna as leituras do cache e os cálculos de cada agregação.
+
+    Endpoint Base:
+        /api/aggregates/stats/
+    """
+
+    permission_classes = [IsAdminUser, ]
+
+    def get(self, request):
+        """
+        Método HTTP GET para obter as estatísticas do cache de agregações
+        deste processo.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+
+        Exemplo de Uso:
+            GET /api/aggregates/stats/
+
+        Retorna:
+            Response: Uma resposta HTTP com, para cada agregação, as leituras
+            do cache (`hits`), os cálculos (`misses`) e a taxa de acerto
+            (`hit_rate`), em formato JSON.
+        """
+
+        return Response(aggregate_stats())
 
 
 class BudgetAPIList(APIView):
@@ -1071,7 +1545,7 @@ class BudgetAPIList(APIView):
     Representação da API para gerenciar os orçamentos realizados pelo titular.
 
     Atributos:
-        Nenhum atrbibuto específico nesta classe.
+        gzip_response: Habilita a compressão gzip das listagens.
 
     Métodos:
         get_permissions: Retorna as permissões apropriadas com base no método
@@ -1083,6 +1557,8 @@ class BudgetAPIList(APIView):
         /api/budgets/
     """
 
+    gzip_response = True
+
     permission_classes = [IsAdminUser, ]
 
     def get_permissions(self):
@@ -1129,29 +1605,43 @@ class BudgetAPIList(APIView):
                 }
             ]
 
+        Parâmetros de Consulta:
+            fields: Os campos a serem retornados, separados por vírgula.
+            expand: As relações a serem incluídas por completo (account,
+            category).
+
         Retorna:
             Response: Uma resposta HTTP contendo uma lista de orçamentos em
             formato JSON.
         """
 
-        budgets = Budget.objects.all()
+        fields, expand = get_fieldset(request, BudgetSerializer)
 
-        if not budgets.exists():
+        budgets = across_shards(
+            restrict_queryset(Budget.objects.all(), fields, expand)
+        )
+
+        if not budgets:
             return Response({'message': 'There are no registered budgets.'})
 
         serializer = BudgetSerializer(
             instance=budgets,
             many=True,
-            context={'request': request}
+            context={'request': request},
+            fields=fields,
+            expand=expand
         )
 
         return Response(serializer.data)
 
+    @idempotent
     def post(self, request):
         """
         Método HTTP POST para criar um novo orçamento.
         Envia os dados do novo orçamento em formato JSON no corpo da
-        solicitação.
+        solicitação. Se o cabeçalho `Idempotency-Key` for enviado, as
+        repetições com a mesma chave recebem a resposta original sem criar um
+        novo orçamento.
 
         Parâmetros:
             request: O objeto da solicitação.
@@ -1205,13 +1695,15 @@ class BudgetAPIDetail(APIView):
         delete: Exclui um orçamento específico.
     """
 
-    def get_budget(self, pk):
+    def get_budget(self, pk, queryset=None):
         """
         Método auxilixar para obter um orçamento específico com base no ID.
 
         Parâmetros:
             request: O objeto da solicitação HTTP.
             pk: O ID do orçamento a ser obtido.
+            queryset: O queryset usado na busca. Por padrão, todos os
+            orçamentos.
 
         Retorna:
             Response: Uma resposta HTTP contendo os detalhes do orçamento em
@@ -1219,7 +1711,7 @@ class BudgetAPIDetail(APIView):
         """
 
         budget = get_object_or_404(
-            Budget.objects.all(),
+            queryset if queryset is not None else Budget.objects.all(),
             pk=pk
         )
 
@@ -1253,25 +1745,47 @@ class BudgetAPIDetail(APIView):
             request: O objeto da solicitação HTTP.
             pk: O ID do orçamento a ser obtido.
 
+        Parâmetros de Consulta:
+            fields: Os campos a serem retornados, separados por vírgula.
+            expand: As relações a serem incluídas por completo (account,
+            category).
+
         Retorna:
             Response: Uma resposta HTTP contendo os detalhes do orçamento em
             formato JSON.
         """
 
-        budget = self.get_budget(pk)
+        fields, expand = get_fieldset(request, BudgetSerializer)
+
+        budget = self.get_budget(
+            pk,
+            restrict_queryset(
+                Budget.objects.all(),
+                fields,
+                expand,
+                required=('account', 'version')
+            )
+        )
 
         serializer = BudgetSerializer(
             instance=budget,
             many=False,
-            context={'request': request}
+            context={'request': request},
+            fields=fields,
+            expand=expand
         )
 
-        return Response(serializer.data)
+        return Response(serializer.data, headers={'ETag': etag_for(budget)})
 
     def put(self, request, pk):
         """
         Método HTTP PUT para atualizar os dados de um orçamento específico.
 
+        A atualização é condicional à versão do orçamento. Se o cabeçalho
+        `If-Match` for enviado com o ETag obtido no GET, e o orçamento tiver
+        sido alterado desde então, a resposta terá o status 412 Precondition
+        Failed.
+
         Parâmetros:
             request: O objeto da soicitação HTTP.
             pk: O ID do orçamento a ser obtido.
@@ -1297,7 +1811,11 @@ class BudgetAPIDetail(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            serializer.data,
+            status=status.HTTP_200_OK,
+            headers={'ETag': etag_for(budget)}
+        )
 
     def delete(self, request, pk):
         """
@@ -1314,6 +1832,74 @@ class BudgetAPIDetail(APIView):
 
         budget = self.get_budget(pk)
 
-        budget.delete()
+        with atomic(using=budget._state.db):
+            enqueue(budget._state.db, 'budget.deleted', budget)
+            budget.delete()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BatchAPIView(APIView):
+    """
+    Representação da API que executa várias operações em uma única
+    solicitação (veja `finances.batch`).
+
+    Atributos:
+        gzip_response: Habilita a compressão gzip das respostas.
+
+    Métodos:
+        post: Executa as operações do lote.
+
+    Endpoint Base:
+        /api/batch/
+    """
+
+    gzip_response = True
+
+    permission_classes = [IsAuthenticated, ]
+
+    @idempotent
+    def post(self, request):
+        """
+        Método HTTP POST para executar uma lista ordenada de operações.
+
+        Cada operação informa `method`, `path` (um endpoint da API, com a
+        query string, se necessário), `body` e `headers` opcionais e um `id`
+        opcional, repetido na resposta. Com `atomic` (verdadeiro por padrão),
+        as operações são executadas em uma transação e a primeira falha
+        interrompe o lote e desfaz as escritas anteriores. Com `parallel`, as
+        leituras consecutivas são executadas ao mesmo tempo.
+
+        Parâmetros:
+            request: O objeto de solicitação HTTP.
+
+        Exemplo de Uso:
+            POST /api/batch/
+            {
+                "requests": [
+                    {"method": "POST", "path": "/api/transactions/",
+                     "body": {"account": 1, "amount": 50, "category": 2,
+                              "description": "Mercado"}},
+                    {"method": "GET", "path": "/api/account/1/"}
+                ]
+            }
+
+        Retorna:
+            Response: Uma resposta HTTP com o status, os cabeçalhos e o corpo
+            da resposta de cada operação executada e se o lote foi desfeito.
+            Se o lote for desfeito, o status é o da operação que falhou.
+        """
+
+        operations = parse_operations(request.data)
+        responses, rolled_back = run_batch(
+            request,
+            operations,
+            atomic=request.data.get('atomic', True) is not False,
+            parallel=request.data.get('parallel', False) is True
+        )
+
+        return Response(
+            {'responses': responses, 'rolled_back': rolled_back},
+            status=responses[-1]['status'] if rolled_back
+            else status.HTTP_200_OK
+        )